@@ -12,6 +12,8 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 import math
 
+import numpy as np
+
 @dataclass
 class SkillCombination:
     """技能组合配置"""
@@ -60,6 +62,7 @@ class AIBuildRecommender:
         self.support_gems_db = self._load_support_gems_database()
         self.ascendancy_db = self._load_ascendancy_database()
         self.meta_analysis = self._load_meta_analysis()
+        self._score_tables = self._build_score_tables()
         
     def _load_skill_database(self) -> Dict[str, Dict]:
         """加载技能数据库"""
@@ -265,9 +268,56 @@ class AIBuildRecommender:
         
         return min(innovation, 1.0)
     
-    def generate_unique_combinations(self, count: int = 10) -> List[AIBuildRecommendation]:
-        """生成独特的构筑组合"""
-        recommendations = []
+    def _build_score_tables(self) -> Dict[str, Any]:
+        """预先计算按整数ID索引的协同和创新度分量（辅助宝石维度末尾为空位，ID -1）"""
+        skill_names = list(self.skills_db)
+        support_names = list(self.support_gems_db)
+        ascendancy_names = list(self.ascendancy_db)
+        
+        pair_synergy = np.ones((len(skill_names), len(support_names) + 1))
+        for i, skill in enumerate(skill_names):
+            skill_data = self.skills_db[skill]
+            skill_tags = set(skill_data["tags"])
+            for j, support in enumerate(support_names):
+                support_synergy = self.support_gems_db[support]["synergy"]
+                
+                tag_match = len(skill_tags.intersection(support_synergy))
+                if tag_match > 0:
+                    pair_synergy[i, j] *= (1 + tag_match * 0.3)
+                if skill_data["damage_type"] in support_synergy:
+                    pair_synergy[i, j] *= 1.4
+        
+        support_rarity = np.ones(len(support_names) + 1)
+        for j, support in enumerate(support_names):
+            support_rarity[j] = 1 - self.support_gems_db[support].get("meta_usage", 0.5) + 0.2
+        
+        return {
+            'skill_names': skill_names,
+            'support_names': support_names,
+            'ascendancy_names': ascendancy_names,
+            'skill_ids': {name: i for i, name in enumerate(skill_names)},
+            'ascendancy_ids': {name: i for i, name in enumerate(ascendancy_names)},
+            'pair_synergy': pair_synergy,
+            'support_rarity': support_rarity,
+            'skill_innovation': np.array([(1 - self.skills_db[s].get("meta_usage", 0.5)) * 2
+                                          for s in skill_names]),
+            'ascendancy_innovation': np.array([1 - self.ascendancy_db[a].get("meta_usage", 0.5) + 0.3
+                                               for a in ascendancy_names]),
+        }
+    
+    def generate_unique_combinations(self, count: int = 10, mode: str = "sample",
+                                     seed: Optional[int] = None) -> List[AIBuildRecommendation]:
+        """
+        生成独特的构筑组合
+        
+        Args:
+            count: 生成数量
+            mode: "sample" 随机抽样（最多尝试 count*5 次）；
+                  "exhaustive" 枚举所有 (技能, 升华, 辅助宝石组合) 批量评分，
+                  每个 (技能, 升华) 取最佳辅助组合后返回真正的前 count 个
+            seed: 随机种子，指定时结果可复现
+        """
+        rng = random.Random(seed) if seed is not None else random
         
         # 获取冷门技能（使用率 < 10%）
         unpopular_skills = [
@@ -281,34 +331,55 @@ class AIBuildRecommender:
             if data.get("meta_usage", 0) < 0.15
         ]
         
+        if mode == "exhaustive":
+            recommendations = self._generate_exhaustive(count, unpopular_skills, unpopular_ascendancies, rng)
+        elif mode == "sample":
+            recommendations = self._generate_sampled(count, unpopular_skills, unpopular_ascendancies, rng)
+        else:
+            raise ValueError(f"未知的生成模式: {mode}")
+        
+        # 按创新度和协同度排序
+        recommendations.sort(key=lambda x: (x.innovation_score + x.skill_combination.synergy_score) / 2, reverse=True)
+            
+        return recommendations[:count]
+            
+    def _compatible_supports(self, skill: str) -> List[str]:
+        """与技能标签或伤害类型协同的辅助宝石（同时满足两者的出现两次）"""
+        skill_data = self.skills_db[skill]
+        compatible_supports = []
+        for support, support_data in self.support_gems_db.items():
+            # 检查兼容性
+            if any(tag in support_data.get("synergy", []) for tag in skill_data["tags"]):
+                compatible_supports.append(support)
+            if skill_data["damage_type"] in support_data.get("synergy", []):
+                compatible_supports.append(support)
+        return compatible_supports
+    
+    def _generate_sampled(self, count: int, skills: List[str], ascendancies: List[str],
+                          rng) -> List[AIBuildRecommendation]:
+        """随机抽样生成构筑组合"""
+        recommendations = []
         attempts = 0
         max_attempts = count * 5
         
+        if not skills or not ascendancies:
+            return recommendations
+        
         while len(recommendations) < count and attempts < max_attempts:
             attempts += 1
             
             # 随机选择冷门技能和升华
-            skill = random.choice(unpopular_skills)
-            ascendancy = random.choice(unpopular_ascendancies)
-            
-            # 确保职业匹配
-            skill_data = self.skills_db[skill]
-            asc_data = self.ascendancy_db[ascendancy]
+            skill = rng.choice(skills)
+            ascendancy = rng.choice(ascendancies)
             
             # 生成支援宝石组合
-            compatible_supports = []
-            for support, support_data in self.support_gems_db.items():
-                # 检查兼容性
-                if any(tag in support_data.get("synergy", []) for tag in skill_data["tags"]):
-                    compatible_supports.append(support)
-                if skill_data["damage_type"] in support_data.get("synergy", []):
-                    compatible_supports.append(support)
+            compatible_supports = self._compatible_supports(skill)
             
             # 选择4-5个支援宝石
             if len(compatible_supports) < 4:
                 continue
                 
-            selected_supports = random.sample(compatible_supports, min(5, len(compatible_supports)))
+            selected_supports = rng.sample(compatible_supports, min(5, len(compatible_supports)))
             
             # 计算各项评分
             synergy_score = self.analyze_skill_synergy(skill, selected_supports)
@@ -320,19 +391,70 @@ class AIBuildRecommender:
             
             # 生成构筑推荐
             recommendation = self._create_ai_build_recommendation(
-                skill, selected_supports, ascendancy, synergy_score, innovation_score
+                skill, selected_supports, ascendancy, synergy_score, innovation_score, rng
             )
             
             recommendations.append(recommendation)
         
-        # 按创新度和协同度排序
-        recommendations.sort(key=lambda x: (x.innovation_score + x.skill_combination.synergy_score) / 2, reverse=True)
+        return recommendations
         
-        return recommendations[:count]
+    def _generate_exhaustive(self, count: int, skills: List[str], ascendancies: List[str],
+                             rng) -> List[AIBuildRecommendation]:
+        """枚举全部组合，批量计算协同度和创新度，返回达标的前 count 个"""
+        tables = self._score_tables
+        support_index = {name: j for j, name in enumerate(tables['support_names'])}
+        asc_list = [tables['ascendancy_ids'][asc] for asc in ascendancies]
+        
+        # 技能 × 辅助宝石组合（不重复的兼容辅助宝石中选4-5个）
+        skill_rows, support_rows = [], []
+        for skill in skills:
+            compatible = sorted({support_index[name] for name in self._compatible_supports(skill)})
+            if len(compatible) < 4:
+                continue
+            size = min(5, len(compatible))
+            for subset in itertools.combinations(compatible, size):
+                skill_rows.append(tables['skill_ids'][skill])
+                support_rows.append(subset + (-1,) * (5 - size))
+        
+        if not skill_rows or not asc_list:
+            return []
+        
+        # × 升华
+        n_asc = len(asc_list)
+        skill_ids = np.repeat(np.array(skill_rows, dtype=np.intp), n_asc)
+        support_ids = np.repeat(np.array(support_rows, dtype=np.intp), n_asc, axis=0)
+        asc_ids = np.tile(np.array(asc_list, dtype=np.intp), len(skill_rows))
+        
+        # 与 analyze_skill_synergy / calculate_innovation_score 相同的公式
+        synergy = np.minimum(tables['pair_synergy'][skill_ids[:, None], support_ids].prod(axis=1), 3.0)
+        innovation = np.minimum(
+            tables['skill_innovation'][skill_ids] *
+            tables['support_rarity'][support_ids].prod(axis=1) ** 0.3 *
+            tables['ascendancy_innovation'][asc_ids],
+            1.0
+        )
+        
+        # 过滤低质量组合，每个 (技能, 升华) 保留最佳辅助组合，按排序分取前 count 个（同分保持枚举顺序）
+        passing = np.flatnonzero((synergy >= 1.3) & (innovation >= 0.6))
+        rank_score = (innovation[passing] + synergy[passing]) / 2
+        ranked = passing[np.argsort(-rank_score, kind="stable")]
+        pair_keys = skill_ids[ranked] * len(tables['ascendancy_names']) + asc_ids[ranked]
+        _, first = np.unique(pair_keys, return_index=True)
+        top = ranked[np.sort(first)][:count]
+        
+        recommendations = []
+        for index in top:
+            skill = tables['skill_names'][skill_ids[index]]
+            supports = [tables['support_names'][j] for j in support_ids[index] if j >= 0]
+            ascendancy = tables['ascendancy_names'][asc_ids[index]]
+            recommendations.append(self._create_ai_build_recommendation(
+                skill, supports, ascendancy, float(synergy[index]), float(innovation[index]), rng
+            ))
+        return recommendations
     
     def _create_ai_build_recommendation(self, skill: str, supports: List[str], 
                                       ascendancy: str, synergy_score: float, 
-                                      innovation_score: float) -> AIBuildRecommendation:
+                                      innovation_score: float, rng=random) -> AIBuildRecommendation:
         """创建AI构筑推荐"""
         
         skill_data = self.skills_db[skill]
@@ -358,17 +480,17 @@ class AIBuildRecommender:
         )
         
         # 生成构筑名称
-        build_name = f"{self._generate_build_name(skill, ascendancy)}"
+        build_name = f"{self._generate_build_name(skill, ascendancy, rng)}"
         
         # 预测性能
         base_damage = skill_data["base_damage"]
-        predicted_dps = int(base_damage * damage_multiplier * synergy_score * random.uniform(800, 1500))
+        predicted_dps = int(base_damage * damage_multiplier * synergy_score * rng.uniform(800, 1500))
         
         # 计算风险评估
         risk = self._assess_build_risk(skill, supports, ascendancy)
         
         # 成本预测
-        cost_prediction = self._predict_build_cost(skill, supports, ascendancy)
+        cost_prediction = self._predict_build_cost(skill, supports, ascendancy, rng)
         
         # 生成AI分析
         why_unique = self._generate_uniqueness_analysis(skill, supports, ascendancy, innovation_score)
@@ -386,23 +508,23 @@ class AIBuildRecommender:
             predicted_effectiveness=synergy_score * 0.8 + innovation_score * 0.2,
             risk_assessment=risk,
             
-            passive_allocation=self._generate_passive_strategy(skill, ascendancy),
+            passive_allocation=self._generate_passive_strategy(skill, ascendancy, rng),
             equipment_strategy=self._generate_equipment_strategy(skill, supports),
             defense_approach=self._determine_defense_approach(skill, ascendancy),
             scaling_mechanics=self._identify_scaling_mechanics(skill, supports),
             
             estimated_performance={
                 "dps": predicted_dps,
-                "survivability": random.randint(6000, 12000),
-                "clear_speed": random.uniform(7.5, 9.5),
-                "boss_damage": random.uniform(8.0, 9.8)
+                "survivability": rng.randint(6000, 12000),
+                "clear_speed": rng.uniform(7.5, 9.5),
+                "boss_damage": rng.uniform(8.0, 9.8)
             },
             
             cost_prediction=cost_prediction,
             difficulty_factors={
-                "gear_dependency": random.randint(2, 4),
-                "mechanical_complexity": random.randint(1, 3),
-                "league_start_viability": random.randint(3, 5)
+                "gear_dependency": rng.randint(2, 4),
+                "mechanical_complexity": rng.randint(1, 3),
+                "league_start_viability": rng.randint(3, 5)
             },
             
             why_unique=why_unique,
@@ -410,7 +532,7 @@ class AIBuildRecommender:
             optimization_paths=optimization_paths
         )
     
-    def _generate_build_name(self, skill: str, ascendancy: str) -> str:
+    def _generate_build_name(self, skill: str, ascendancy: str, rng=random) -> str:
         """生成独特的构筑名称"""
         skill_descriptors = {
             "Spark": ["Electric", "Lightning", "Bolt", "Storm"],
@@ -421,7 +543,7 @@ class AIBuildRecommender:
         }
         
         descriptors = skill_descriptors.get(skill, ["Unique", "Rare", "Hidden", "Secret"])
-        descriptor = random.choice(descriptors)
+        descriptor = rng.choice(descriptors)
         
         return f"{descriptor} {ascendancy}"
     
@@ -442,9 +564,10 @@ class AIBuildRecommender:
         
         return min(risk, 1.0)
     
-    def _predict_build_cost(self, skill: str, supports: List[str], ascendancy: str) -> Dict[str, float]:
+    def _predict_build_cost(self, skill: str, supports: List[str], ascendancy: str,
+                            rng=random) -> Dict[str, float]:
         """预测构筑成本"""
-        base_cost = random.uniform(3, 15)  # Divine Orbs
+        base_cost = rng.uniform(3, 15)  # Divine Orbs
         
         # 冷门技能通常装备便宜
         skill_usage = self.skills_db.get(skill, {}).get("meta_usage", 0.5)
@@ -523,7 +646,7 @@ class AIBuildRecommender:
         
         return paths
     
-    def _generate_passive_strategy(self, skill: str, ascendancy: str) -> Dict[str, Any]:
+    def _generate_passive_strategy(self, skill: str, ascendancy: str, rng=random) -> Dict[str, Any]:
         """生成天赋策略"""
         skill_data = self.skills_db[skill]
         asc_data = self.ascendancy_db[ascendancy]
@@ -532,7 +655,7 @@ class AIBuildRecommender:
             "primary_focus": skill_data["scaling"][0],
             "secondary_focus": "life" if skill_data["type"] == "spell" else "damage",
             "keystone_recommendations": asc_data.get("keystones", []),
-            "total_points": random.randint(105, 115)
+            "total_points": rng.randint(105, 115)
         }
     
     def _generate_equipment_strategy(self, skill: str, supports: List[str]) -> Dict[str, Dict]:
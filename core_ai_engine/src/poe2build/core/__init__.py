@@ -4,6 +4,7 @@ PoE2 Build Generator Core Module
 This package contains core system components:
 - AI Orchestrator: Integrates RAG, PoB2 and data sources
 - Build Generator: Intelligent build generation and optimization
+- Build Search: Beam search over skill/support/keystone combinations
 - Recommendation Engine: Smart recommendation and ranking system
 """
 
@@ -13,9 +14,14 @@ from .ai_orchestrator import (
     RecommendationResult,
     SystemComponent,
     ComponentStatus,
-    ComponentHealth
+    ComponentHealth,
+    HealthSnapshot,
+    PipelineEvent,
+    PipelineEventType
 )
 
+from .health_monitor import HealthMonitor
+
 from .build_generator import (
     PoE2BuildGenerator,
     GenerationConstraints,
@@ -24,6 +30,13 @@ from .build_generator import (
     BuildComplexity
 )
 
+from .build_search import (
+    BuildSearchEngine,
+    BuildSearchSpace,
+    BuildSearchResult,
+    BuildCandidate
+)
+
 from .recommender import (
     PoE2Recommender,
     RecommendationRequest,
@@ -42,6 +55,10 @@ __all__ = [
     'SystemComponent',
     'ComponentStatus',
     'ComponentHealth',
+    'HealthSnapshot',
+    'PipelineEvent',
+    'PipelineEventType',
+    'HealthMonitor',
     
     # Build Generator
     'PoE2BuildGenerator',
@@ -49,6 +66,10 @@ __all__ = [
     'BuildTemplate',
     'BuildArchetype', 
     'BuildComplexity',
+    'BuildSearchEngine',
+    'BuildSearchSpace',
+    'BuildSearchResult',
+    'BuildCandidate',
     
     # Recommendation Engine
     'PoE2Recommender',
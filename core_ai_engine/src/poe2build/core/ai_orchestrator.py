@@ -10,14 +10,20 @@ PoE2 AI协调器 - 整合RAG、PoB2和数据源的核心组件
 """
 
 import asyncio
+import copy
+import hashlib
+import json
 import logging
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields, replace
 from enum import Enum
-from typing import Dict, List, Optional, Any, Union, Tuple, Callable
+from types import MappingProxyType
+from typing import Dict, List, Optional, Any, Union, Tuple, Callable, Mapping, AsyncIterator
 
 from ..models.build import PoE2Build, PoE2BuildGoal, PoE2BuildStats
 from ..models.characters import PoE2CharacterClass, PoE2Ascendancy
+from ..utils.latency import LatencySpan, get_latency_recorder, start_metrics_server
 
 
 # 配置日志
@@ -41,6 +47,7 @@ class ComponentStatus(Enum):
     DEGRADED = "degraded"
     UNAVAILABLE = "unavailable"
     ERROR = "error"
+    NOT_LOADED = "not_loaded"  # 延迟初始化的组件，首次使用时加载
 
 
 @dataclass
@@ -53,6 +60,44 @@ class ComponentHealth:
     last_check: Optional[float] = None
 
 
+@dataclass(frozen=True)
+class HealthSnapshot:
+    """
+    系统健康状态快照（不可变）
+    
+    由 health_check 或组件初始化完成时整体替换发布，读取方拿到的引用不会再被修改，
+    因此可以在任意线程中无锁读取。
+    """
+    timestamp: float
+    overall_status: str
+    components: Mapping[str, Mapping[str, Any]] = field(default_factory=lambda: MappingProxyType({}))
+    performance: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    
+    @property
+    def age_seconds(self) -> float:
+        """快照距今的秒数"""
+        return time.time() - self.timestamp
+    
+    def component_status(self, component: Union[SystemComponent, str]) -> Optional[str]:
+        """获取组件状态值，组件不存在时返回None"""
+        name = component.value if isinstance(component, SystemComponent) else component
+        info = self.components.get(name)
+        return info['status'] if info else None
+    
+    def is_component_healthy(self, component: Union[SystemComponent, str]) -> bool:
+        """组件在快照中是否健康"""
+        return self.component_status(component) == ComponentStatus.HEALTHY.value
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为 health_check 的报告格式（可修改的副本）"""
+        return {
+            'timestamp': self.timestamp,
+            'overall_status': self.overall_status,
+            'components': {name: dict(info) for name, info in self.components.items()},
+            'performance': dict(self.performance)
+        }
+
+
 @dataclass
 class UserRequest:
     """用户推荐请求"""
@@ -82,6 +127,33 @@ class UserRequest:
     # PoB2集成
     generate_pob2_code: bool = True
     validate_with_pob2: bool = True
+    
+    def fingerprint(self) -> str:
+        """
+        请求指纹
+        
+        对规范化后的字段取哈希：枚举取值、字符串小写去空白、技能列表去重排序、数值取整，
+        语义相同的请求得到相同的指纹。
+        """
+        normalized = {f.name: _normalize_request_value(getattr(self, f.name)) for f in fields(self)}
+        payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _normalize_request_value(value: Any) -> Any:
+    """规范化请求字段值，用于计算指纹"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, str):
+        return value.strip().lower() or None
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return round(float(value), 2)
+    if isinstance(value, (list, tuple, set)):
+        items = sorted({_normalize_request_value(v) for v in value} - {None})
+        return items or None
+    return str(value)
 
 
 @dataclass
@@ -95,13 +167,59 @@ class RecommendationResult:
     used_components: List[SystemComponent]
 
 
+class PipelineEventType(Enum):
+    """推荐流水线事件类型"""
+    PROVISIONAL = "provisional"      # RAG候选排序完成的临时结果
+    BUILD_UPDATED = "build_updated"  # 单个构筑获得了价格或PoB2数据
+    BUILD_REMOVED = "build_removed"  # 单个构筑未通过预算或要求验证
+    FINAL = "final"                  # 最终排序结果
+
+
+@dataclass
+class PipelineEvent:
+    """推荐流水线事件"""
+    event_type: PipelineEventType
+    stage: str
+    builds: List[PoE2Build] = field(default_factory=list)
+    build_indices: List[int] = field(default_factory=list)  # builds 中各构筑的RAG候选序号，跨事件稳定
+    progress: float = 0.0  # 0-1
+    result: Optional[RecommendationResult] = None  # 仅 FINAL 事件
+    timestamp: float = field(default_factory=time.time)
+
+
 class PoE2AIOrchestrator:
     """
     PoE2 AI协调器主类
     
     负责整合所有子系统并提供统一的推荐接口
+    
+    相互独立的组件并发初始化，每个组件有单独的超时。配置 lazy_init=True 时，
+    RAG引擎和PoB2本地客户端推迟到首次使用时加载，其余组件就绪即可开始服务。
     """
     
+    # 组件 -> 初始化方法名（按名称查找，便于测试替换）
+    COMPONENT_INITIALIZERS = {
+        SystemComponent.DATA_CACHE: '_init_cache_manager',
+        SystemComponent.MARKET_API: '_init_market_api',
+        SystemComponent.NINJA_SCRAPER: '_init_ninja_scraper',
+        SystemComponent.POB2_LOCAL: '_init_pob2_local',
+        SystemComponent.POB2_WEB: '_init_pob2_web',
+        SystemComponent.RAG_ENGINE: '_init_rag_engine',
+    }
+    
+    # 默认的组件初始化超时(秒)，可通过 config['init_timeouts'][组件名] 覆盖
+    DEFAULT_INIT_TIMEOUTS = {
+        SystemComponent.DATA_CACHE: 5.0,
+        SystemComponent.MARKET_API: 10.0,
+        SystemComponent.NINJA_SCRAPER: 15.0,
+        SystemComponent.POB2_LOCAL: 20.0,
+        SystemComponent.POB2_WEB: 10.0,
+        SystemComponent.RAG_ENGINE: 60.0,
+    }
+    
+    # 延迟模式下推迟到首次使用时加载的昂贵组件
+    LAZY_COMPONENTS = (SystemComponent.RAG_ENGINE, SystemComponent.POB2_LOCAL)
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         初始化AI协调器
@@ -121,10 +239,31 @@ class PoE2AIOrchestrator:
         self._ninja_scraper = None
         self._cache_manager = None
         
+        # 组件初始化任务（并发请求共享同一次初始化）
+        self._component_init_tasks: Dict[SystemComponent, asyncio.Task] = {}
+        
+        # 最近一次发布的健康快照（整体替换，读取为O(1)）
+        self._health_snapshot: Optional[HealthSnapshot] = None
+        
+        # 推荐结果缓存: (请求指纹, 数据版本) -> (结果, 过期时间)
+        self._result_cache: 'OrderedDict[Tuple[str, Tuple], Tuple[RecommendationResult, float]]' = OrderedDict()
+        self.result_cache_ttl = self.config.get('result_cache_ttl', 300)  # 秒，0表示不缓存
+        self.result_cache_size = self.config.get('result_cache_size', 256)
+        
+        # 正在计算的请求: (请求指纹, 数据版本) -> 计算任务，相同请求并发时共享同一次计算
+        self._inflight_requests: Dict[Tuple[str, Tuple], asyncio.Task] = {}
+        self._inflight_waiters: Dict[Tuple[str, Tuple], int] = {}
+        
+        # 分阶段延迟埋点（默认记录到进程级记录器，与各组件内部的span汇总在一起）
+        self.latency_recorder = get_latency_recorder()
+        self._metrics_server = None
+        
         # 性能统计
         self._request_count = 0
         self._total_response_time = 0.0
         self._error_count = 0
+        self._cache_hits = 0
+        self._coalesced_requests = 0
         
         logger.info("PoE2AIOrchestrator 已创建，等待初始化...")
     
@@ -132,6 +271,9 @@ class PoE2AIOrchestrator:
         """
         异步初始化所有组件
         
+        各组件通过 asyncio.gather 并发初始化，启动耗时取决于最慢的组件而不是总和。
+        延迟模式下昂贵组件不在此处加载，就绪判断只基于立即初始化的组件。
+        
         Returns:
             初始化是否成功
         """
@@ -141,31 +283,44 @@ class PoE2AIOrchestrator:
         logger.info("开始初始化 PoE2AIOrchestrator...")
         start_time = time.time()
         
-        # 初始化各个组件
-        success_count = 0
-        total_components = len(SystemComponent)
+        lazy_components = self._lazy_components()
+        eager_components = [c for c in SystemComponent if c not in lazy_components]
+        self._component_init_tasks.clear()
         
         try:
-            # 1. 初始化缓存管理器
-            success_count += await self._init_cache_manager()
-            
-            # 2. 初始化数据源
-            success_count += await self._init_market_api()
-            success_count += await self._init_ninja_scraper()
-            
-            # 3. 初始化PoB2集成
-            success_count += await self._init_pob2_local()
-            success_count += await self._init_pob2_web()
+            for component in lazy_components:
+                self._component_health[component] = ComponentHealth(
+                    component=component,
+                    status=ComponentStatus.NOT_LOADED,
+                    last_check=time.time()
+                )
             
-            # 4. 初始化RAG引擎
-            success_count += await self._init_rag_engine()
+            results = await asyncio.gather(*(
+                self._ensure_component_task(component) for component in eager_components
+            ))
+            self._publish_health_snapshot()
+            success_count = sum(results)
+            total_components = len(eager_components)
             
             # 检查初始化成功率
-            success_rate = success_count / total_components
+            success_rate = success_count / total_components if total_components else 1.0
             self._initialized = success_rate >= 0.5  # 至少50%组件正常
             
             init_time = (time.time() - start_time) * 1000
-            logger.info(f"PoE2AIOrchestrator 初始化完成: {success_count}/{total_components} 组件正常 ({init_time:.2f}ms)")
+            logger.info(
+                f"PoE2AIOrchestrator 初始化完成: {success_count}/{total_components} 组件正常"
+                + (f", {len(lazy_components)} 个组件延迟加载" if lazy_components else "")
+                + f" ({init_time:.2f}ms)"
+            )
+            
+            if self._initialized and self.config.get('metrics_port') is not None and self._metrics_server is None:
+                self._metrics_server = start_metrics_server(self.config['metrics_port'],
+                                                            recorder=self.latency_recorder)
+            
+            if self._initialized and self.config.get('warm_up_lazy_components', False):
+                # 后台预热延迟组件，首次使用时直接复用这次初始化
+                for component in lazy_components:
+                    self._ensure_component_task(component)
             
             return self._initialized
             
@@ -173,6 +328,70 @@ class PoE2AIOrchestrator:
             logger.error(f"PoE2AIOrchestrator 初始化失败: {e}")
             return False
     
+    def _lazy_components(self) -> Tuple[SystemComponent, ...]:
+        """本次初始化中延迟加载的组件"""
+        if not self.config.get('lazy_init', False):
+            return ()
+        return self.LAZY_COMPONENTS
+    
+    def _init_timeout(self, component: SystemComponent) -> float:
+        """组件初始化超时(秒)"""
+        overrides = self.config.get('init_timeouts', {})
+        return overrides.get(component.value, self.DEFAULT_INIT_TIMEOUTS[component])
+    
+    def _ensure_component_task(self, component: SystemComponent) -> 'asyncio.Future':
+        """获取组件的初始化任务，不存在时创建"""
+        task = self._component_init_tasks.get(component)
+        if task is None or task.cancelled():
+            # 所属事件循环关闭时未完成的任务会被取消，需要重新初始化
+            task = asyncio.ensure_future(self._run_component_init(component))
+            # 组件状态变化后立即发布新快照，不必等待下一次健康检查
+            task.add_done_callback(lambda _: self._publish_health_snapshot())
+            self._component_init_tasks[component] = task
+        return task
+    
+    async def _run_component_init(self, component: SystemComponent) -> int:
+        """带超时地初始化单个组件，返回1表示可用"""
+        timeout = self._init_timeout(component)
+        initializer = getattr(self, self.COMPONENT_INITIALIZERS[component])
+        try:
+            result = await asyncio.wait_for(initializer(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._component_health[component] = ComponentHealth(
+                component=component,
+                status=ComponentStatus.UNAVAILABLE,
+                error_message=f"初始化超时 ({timeout:.1f}s)",
+                last_check=time.time()
+            )
+            logger.warning(f"✗ {component.value} 初始化超时 ({timeout:.1f}s)")
+            return 0
+        except Exception as e:
+            self._component_health[component] = ComponentHealth(
+                component=component,
+                status=ComponentStatus.ERROR,
+                error_message=str(e),
+                last_check=time.time()
+            )
+            logger.warning(f"✗ {component.value} 初始化失败: {e}")
+            return 0
+        
+        # 初始化方法未登记健康状态时，按返回值补齐
+        health = self._component_health.get(component)
+        if health is None or health.status == ComponentStatus.NOT_LOADED:
+            self._component_health[component] = ComponentHealth(
+                component=component,
+                status=ComponentStatus.HEALTHY if result else ComponentStatus.UNAVAILABLE,
+                last_check=time.time()
+            )
+        return result
+    
+    async def _ensure_component(self, component: SystemComponent) -> bool:
+        """确保组件已加载（延迟组件在首次使用时初始化），返回组件是否健康"""
+        health = self._component_health.get(component)
+        if health is not None and health.status == ComponentStatus.NOT_LOADED:
+            await self._ensure_component_task(component)
+        return self._is_component_healthy(component)
+    
     async def _init_cache_manager(self) -> int:
         """初始化缓存管理器"""
         try:
@@ -353,6 +572,8 @@ class PoE2AIOrchestrator:
         """
         生成构筑推荐
         
+        按请求指纹和数据版本查找结果缓存；未命中时，并发的相同请求共享同一次计算。
+        
         Args:
             request: 用户请求
             
@@ -362,9 +583,154 @@ class PoE2AIOrchestrator:
         if not self._initialized:
             raise RuntimeError("Orchestrator not initialized. Call initialize() first.")
         
+        fingerprint = request.fingerprint()
+        key = (fingerprint, self._data_versions())
+        
+        cached = self._get_cached_result(key)
+        if cached is not None:
+            self._cache_hits += 1
+            logger.info(f"推荐结果缓存命中: {fingerprint[:12]}")
+            return self._copy_result(cached, cache_hit=True)
+        
+        task = self._inflight_requests.get(key)
+        coalesced = task is not None
+        if coalesced:
+            self._coalesced_requests += 1
+            logger.info(f"合并相同的并发请求: {fingerprint[:12]}")
+        else:
+            task = asyncio.ensure_future(self._run_recommendation_pipeline(request))
+            task.add_done_callback(lambda t: self._on_pipeline_done(key, fingerprint, t))
+            self._inflight_requests[key] = task
+        
+        self._inflight_waiters[key] = self._inflight_waiters.get(key, 0) + 1
+        try:
+            # shield: 单个等待者被取消时不影响其他等待者共享的计算
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._inflight_waiters.get(key, 0) <= 1 and not task.done():
+                task.cancel()  # 最后一个等待者取消时才取消计算
+            raise
+        finally:
+            remaining = self._inflight_waiters.get(key, 0) - 1
+            if remaining > 0:
+                self._inflight_waiters[key] = remaining
+            else:
+                self._inflight_waiters.pop(key, None)
+        
+        return self._copy_result(result, coalesced=True) if coalesced else result
+    
+    def invalidate_result_cache(self):
+        """清空推荐结果缓存"""
+        self._result_cache.clear()
+    
+    def _data_versions(self) -> Tuple:
+        """
+        影响推荐结果的数据版本
+        
+        包括RAG索引版本、价格表时间戳（组件提供 index_version/price_table_timestamp 时）
+        以及各组件的可用状态；任一变化都会使旧的缓存结果失效。
+        """
+        return (
+            getattr(self._rag_engine, 'index_version', None),
+            getattr(self._market_api, 'price_table_timestamp', None),
+            tuple(
+                (component.value, self._is_component_healthy(component))
+                for component in SystemComponent
+            )
+        )
+    
+    def _get_cached_result(self, key: Tuple[str, Tuple]) -> Optional[RecommendationResult]:
+        """查找未过期的缓存结果"""
+        entry = self._result_cache.get(key)
+        if entry is None:
+            return None
+        
+        result, expire_time = entry
+        if time.time() >= expire_time:
+            del self._result_cache[key]
+            return None
+        
+        self._result_cache.move_to_end(key)
+        return result
+    
+    def _on_pipeline_done(self, key: Tuple[str, Tuple], fingerprint: str, task: asyncio.Task):
+        """计算完成回调：移除进行中的记录，成功结果写入缓存"""
+        if self._inflight_requests.get(key) is task:
+            del self._inflight_requests[key]
+        
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._store_result(fingerprint, task.result())
+    
+    def _store_result(self, fingerprint: str, result: RecommendationResult):
+        """将成功的推荐结果写入缓存"""
+        if self.result_cache_ttl <= 0 or result.metadata.get('fallback_mode'):
+            return  # 未启用缓存或降级结果不缓存
+        
+        # 计算过程中可能加载了延迟组件，按完成时的数据版本缓存
+        cache_key = (fingerprint, self._data_versions())
+        self._result_cache[cache_key] = (self._copy_result(result), time.time() + self.result_cache_ttl)
+        self._result_cache.move_to_end(cache_key)
+        while len(self._result_cache) > self.result_cache_size:
+            self._result_cache.popitem(last=False)
+    
+    @staticmethod
+    def _copy_result(result: RecommendationResult, **flags) -> RecommendationResult:
+        """深拷贝共享的结果，避免调用方修改缓存或其他合并请求中的构筑和元数据"""
+        return replace(result, builds=copy.deepcopy(result.builds),
+                       metadata={**copy.deepcopy(result.metadata), **flags},
+                       used_components=list(result.used_components))
+    
+    async def stream_build_recommendations(self, request: UserRequest) -> AsyncIterator[PipelineEvent]:
+        """
+        以事件流的形式生成构筑推荐
+        
+        RAG候选排序完成后立即产出 PROVISIONAL 临时结果；之后每个构筑拿到价格或PoB2数据时
+        产出 BUILD_UPDATED / BUILD_REMOVED 增量事件；最后产出带完整结果的 FINAL 事件。
+        缓存命中时直接产出 FINAL。
+        
+        Args:
+            request: 用户请求
+            
+        Yields:
+            流水线事件
+        """
+        if not self._initialized:
+            raise RuntimeError("Orchestrator not initialized. Call initialize() first.")
+        
+        fingerprint = request.fingerprint()
+        cached = self._get_cached_result((fingerprint, self._data_versions()))
+        if cached is not None:
+            self._cache_hits += 1
+            result = self._copy_result(cached, cache_hit=True)
+            yield PipelineEvent(PipelineEventType.FINAL, 'final_ranking', builds=result.builds,
+                                progress=1.0, result=result)
+            return
+        
+        async for event in self._iterate_pipeline(request):
+            if event.event_type == PipelineEventType.FINAL:
+                self._store_result(fingerprint, event.result)
+            yield event
+    
+    async def _run_recommendation_pipeline(self, request: UserRequest) -> RecommendationResult:
+        """执行完整的四阶段推荐流程，返回最终结果"""
+        result = None
+        async for event in self._iterate_pipeline(request):
+            if event.event_type == PipelineEventType.FINAL:
+                result = event.result
+        return result
+    
+    async def _iterate_pipeline(self, request: UserRequest) -> AsyncIterator[PipelineEvent]:
+        """
+        四阶段推荐流程
+        
+        RAG生成后先排序产出临时结果；市场数据和PoB2验证按构筑并发执行，
+        每个构筑完成一个阶段就产出一次增量事件；最后统一排序产出最终结果。
+        """
         start_time = time.time()
         self._request_count += 1
         used_components = []
+        workers: List[asyncio.Task] = []
         
         try:
             logger.info(f"开始生成构筑推荐: {request.character_class}, 目标: {request.build_goal}")
@@ -373,43 +739,109 @@ class PoE2AIOrchestrator:
             rag_recommendations = []
             rag_confidence = 0.0
             
-            if self._is_component_healthy(SystemComponent.RAG_ENGINE):
+            if await self._ensure_component(SystemComponent.RAG_ENGINE):
                 used_components.append(SystemComponent.RAG_ENGINE)
-                rag_recommendations, rag_confidence = await self._generate_rag_recommendations(request)
+                with self._span('rag_generation'):
+                    rag_recommendations, rag_confidence = await self._generate_rag_recommendations(request)
                 logger.info(f"RAG推荐生成: {len(rag_recommendations)} 个构筑, 置信度: {rag_confidence:.3f}")
             
-            # 第2阶段: 市场数据整合
-            market_enhanced_builds = rag_recommendations
-            if self._is_component_healthy(SystemComponent.MARKET_API):
-                used_components.append(SystemComponent.MARKET_API)
-                market_enhanced_builds = await self._enhance_with_market_data(
-                    rag_recommendations, request
-                )
-                logger.info(f"市场数据整合完成: {len(market_enhanced_builds)} 个构筑")
+            # 先按最终规则排序RAG候选，作为临时结果尽早返回
+            with self._span('provisional_ranking'):
+                provisional = await self._finalize_recommendations(list(rag_recommendations), request)
+            self.latency_recorder.record('orchestrator.time_to_first_result', (time.time() - start_time) * 1000)
+            candidate_index = {id(build): index for index, build in enumerate(rag_recommendations)}
+            yield PipelineEvent(PipelineEventType.PROVISIONAL, 'rag_generation', builds=provisional,
+                                build_indices=[candidate_index[id(build)] for build in provisional],
+                                progress=0.3)
             
-            # 第3阶段: PoB2计算验证
-            validated_builds = market_enhanced_builds
-            pob2_validated = False
+            # 第2、3阶段: 市场数据整合与PoB2计算验证（按构筑并发）
+            use_market = self._is_component_healthy(SystemComponent.MARKET_API)
+            if use_market:
+                used_components.append(SystemComponent.MARKET_API)
             
+            pob2_client = None
             if request.validate_with_pob2:
+                await self._ensure_component(SystemComponent.POB2_LOCAL)
                 pob2_client = self._get_available_pob2_client()
                 if pob2_client:
                     used_components.append(
                         SystemComponent.POB2_LOCAL if pob2_client == self._pob2_local
                         else SystemComponent.POB2_WEB
                     )
-                    validated_builds = await self._validate_with_pob2(
-                        market_enhanced_builds, pob2_client, request
-                    )
-                    pob2_validated = True
-                    logger.info(f"PoB2验证完成: {len(validated_builds)} 个构筑通过验证")
+            pob2_validated = pob2_client is not None
+            
+            queue: asyncio.Queue = asyncio.Queue()
+            survivors: Dict[int, PoE2Build] = {}
+            semaphore = asyncio.Semaphore(self.config.get('build_concurrency', 8))
+            steps_per_build = int(use_market) + int(pob2_validated)
+            total_steps = max(len(rag_recommendations) * steps_per_build, 1)
+            
+            async def process_build(index: int, build: PoE2Build):
+                async with semaphore:
+                    if use_market:
+                        try:
+                            with self._span('market_integration'):
+                                kept = await self._enhance_build_with_market_data(build, request)
+                        except Exception as e:
+                            logger.error(f"市场数据增强失败: {e}")
+                            kept = True  # 与整批处理一致：出错时保留原构筑
+                        await queue.put(('market_integration', index, build, kept))
+                        if not kept:
+                            return
+                    if pob2_client:
+                        try:
+                            with self._span('pob2_validation'):
+                                kept = await self._validate_build_with_pob2(build, pob2_client, request)
+                        except Exception as e:
+                            logger.error(f"PoB2验证失败: {e}")
+                            kept = True
+                        await queue.put(('pob2_validation', index, build, kept))
+                        if not kept:
+                            return
+                    survivors[index] = build
+            
+            workers = [
+                asyncio.ensure_future(process_build(index, build))
+                for index, build in enumerate(rag_recommendations)
+            ]
+            
+            async def join_workers():
+                try:
+                    await asyncio.gather(*workers)
+                finally:
+                    await queue.put(None)
+            
+            enrichment_start = time.perf_counter()
+            joiner = asyncio.ensure_future(join_workers())
+            completed_steps = 0
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                stage, index, build, kept = item
+                completed_steps += 1
+                yield PipelineEvent(
+                    PipelineEventType.BUILD_UPDATED if kept else PipelineEventType.BUILD_REMOVED,
+                    stage, builds=[build], build_indices=[index],
+                    progress=0.3 + 0.6 * completed_steps / total_steps
+                )
+            await joiner  # 传播工作任务中的异常
+            self.latency_recorder.record('orchestrator.enrichment', (time.perf_counter() - enrichment_start) * 1000)
+            
+            validated_builds = [survivors[index] for index in sorted(survivors)]
+            if use_market:
+                logger.info(f"市场数据整合完成: {len(rag_recommendations)} 个构筑")
+            if pob2_validated:
+                logger.info(f"PoB2验证完成: {len(validated_builds)} 个构筑通过验证")
             
             # 第4阶段: 最终排序和筛选
-            final_builds = await self._finalize_recommendations(validated_builds, request)
+            with self._span('final_ranking'):
+                final_builds = await self._finalize_recommendations(validated_builds, request)
             
             # 生成元数据
             generation_time = (time.time() - start_time) * 1000
             self._total_response_time += generation_time
+            self.latency_recorder.record('orchestrator.total', generation_time)
             
             metadata = {
                 'request_id': f"req_{int(time.time())}_{self._request_count}",
@@ -441,7 +873,6 @@ class PoE2AIOrchestrator:
             )
             
             logger.info(f"构筑推荐生成完成: {len(final_builds)} 个推荐, 耗时 {generation_time:.2f}ms")
-            return result
             
         except Exception as e:
             self._error_count += 1
@@ -451,7 +882,7 @@ class PoE2AIOrchestrator:
             fallback_builds = await self._generate_fallback_recommendations(request)
             generation_time = (time.time() - start_time) * 1000
             
-            return RecommendationResult(
+            result = RecommendationResult(
                 builds=fallback_builds,
                 metadata={
                     'error': str(e),
@@ -463,6 +894,14 @@ class PoE2AIOrchestrator:
                 generation_time_ms=generation_time,
                 used_components=used_components
             )
+        finally:
+            # 调用方提前结束迭代或被取消时，停止仍在运行的构筑任务
+            for worker in workers:
+                if not worker.done():
+                    worker.cancel()
+        
+        yield PipelineEvent(PipelineEventType.FINAL, 'final_ranking', builds=result.builds,
+                            progress=1.0, result=result)
     
     async def _generate_rag_recommendations(self, request: UserRequest) -> Tuple[List[PoE2Build], float]:
         """使用RAG引擎生成推荐"""
@@ -478,7 +917,8 @@ class PoE2AIOrchestrator:
             }
             
             # 调用RAG引擎
-            recommendations = await self._rag_engine.generate_recommendations(rag_query)
+            with self._span('rag_engine_query'):
+                recommendations = await self._rag_engine.generate_recommendations(rag_query)
             
             builds = []
             total_confidence = 0.0
@@ -603,22 +1043,7 @@ class PoE2AIOrchestrator:
             enhanced_builds = []
             
             for build in builds:
-                # 获取关键物品价格
-                if build.key_items:
-                    total_cost = 0.0
-                    for item_name in build.key_items:
-                        item_price = await self._market_api.get_item_price(item_name)
-                        if item_price:
-                            total_cost += item_price.get('median_price', 0)
-                    
-                    if total_cost > 0:
-                        build.estimated_cost = total_cost
-                
-                # 检查预算约束
-                if request.max_budget and build.estimated_cost:
-                    if build.estimated_cost <= request.max_budget:
-                        enhanced_builds.append(build)
-                else:
+                if await self._enhance_build_with_market_data(build, request):
                     enhanced_builds.append(build)
             
             return enhanced_builds
@@ -627,32 +1052,32 @@ class PoE2AIOrchestrator:
             logger.error(f"市场数据增强失败: {e}")
             return builds
     
+    async def _enhance_build_with_market_data(self, build: PoE2Build, request: UserRequest) -> bool:
+        """使用市场数据更新单个构筑的成本，返回是否满足预算"""
+        # 获取关键物品价格
+        if build.key_items:
+            total_cost = 0.0
+            for item_name in build.key_items:
+                with self._span('market_http'):
+                    item_price = await self._market_api.get_item_price(item_name)
+                if item_price:
+                    total_cost += item_price.get('median_price', 0)
+            
+            if total_cost > 0:
+                build.estimated_cost = total_cost
+        
+        # 检查预算约束
+        if request.max_budget and build.estimated_cost:
+            return build.estimated_cost <= request.max_budget
+        return True
+    
     async def _validate_with_pob2(self, builds: List[PoE2Build], pob2_client, request: UserRequest) -> List[PoE2Build]:
         """使用PoB2验证构筑"""
         try:
             validated_builds = []
             
             for build in builds:
-                if request.generate_pob2_code:
-                    # 生成PoB2导入代码
-                    pob2_code = await pob2_client.generate_build_code(build)
-                    if pob2_code:
-                        build.pob2_code = pob2_code
-                
-                # 计算统计数据
-                calculated_stats = await pob2_client.calculate_build_stats(build)
-                if calculated_stats:
-                    build.stats = PoE2BuildStats(
-                        total_dps=calculated_stats.get('total_dps', build.stats.total_dps if build.stats else 0),
-                        effective_health_pool=calculated_stats.get('ehp', build.stats.effective_health_pool if build.stats else 0),
-                        fire_resistance=calculated_stats.get('fire_res', 75),
-                        cold_resistance=calculated_stats.get('cold_res', 75),
-                        lightning_resistance=calculated_stats.get('lightning_res', 75),
-                        chaos_resistance=calculated_stats.get('chaos_res', -30)
-                    )
-                
-                # 验证构筑是否满足用户要求
-                if self._validate_build_requirements(build, request):
+                if await self._validate_build_with_pob2(build, pob2_client, request):
                     validated_builds.append(build)
             
             return validated_builds
@@ -661,6 +1086,31 @@ class PoE2AIOrchestrator:
             logger.error(f"PoB2验证失败: {e}")
             return builds
     
+    async def _validate_build_with_pob2(self, build: PoE2Build, pob2_client, request: UserRequest) -> bool:
+        """使用PoB2计算单个构筑，返回是否满足用户要求"""
+        if request.generate_pob2_code:
+            # 生成PoB2导入代码
+            with self._span('pob2_generate_code'):
+                pob2_code = await pob2_client.generate_build_code(build)
+            if pob2_code:
+                build.pob2_code = pob2_code
+        
+        # 计算统计数据
+        with self._span('pob2_calculate'):
+            calculated_stats = await pob2_client.calculate_build_stats(build)
+        if calculated_stats:
+            build.stats = PoE2BuildStats(
+                total_dps=calculated_stats.get('total_dps', build.stats.total_dps if build.stats else 0),
+                effective_health_pool=calculated_stats.get('ehp', build.stats.effective_health_pool if build.stats else 0),
+                fire_resistance=calculated_stats.get('fire_res', 75),
+                cold_resistance=calculated_stats.get('cold_res', 75),
+                lightning_resistance=calculated_stats.get('lightning_res', 75),
+                chaos_resistance=calculated_stats.get('chaos_res', -30)
+            )
+        
+        # 验证构筑是否满足用户要求
+        return self._validate_build_requirements(build, request)
+    
     def _validate_build_requirements(self, build: PoE2Build, request: UserRequest) -> bool:
         """验证构筑是否满足用户要求"""
         if not build.stats:
@@ -770,51 +1220,92 @@ class PoE2AIOrchestrator:
         return health and health.status == ComponentStatus.HEALTHY
     
     async def health_check(self) -> Dict[str, Any]:
-        """执行系统健康检查"""
-        logger.info("执行系统健康检查...")
-        
-        health_report = {
-            'timestamp': time.time(),
-            'overall_status': 'healthy',
-            'components': {},
-            'performance': {
-                'total_requests': self._request_count,
-                'error_count': self._error_count,
-                'average_response_time_ms': (
-                    self._total_response_time / self._request_count 
-                    if self._request_count > 0 else 0
-                ),
-                'error_rate': self._error_count / max(self._request_count, 1)
-            }
-        }
+        """执行系统健康检查，并发布新的健康快照"""
+        logger.debug("执行系统健康检查...")
+        
+        snapshot = self._publish_health_snapshot()
+        
+        healthy_count = sum(1 for name in snapshot.components if snapshot.is_component_healthy(name))
+        logger.info(f"健康检查完成: {snapshot.overall_status}, {healthy_count}/{len(snapshot.components)} 组件正常")
         
-        # 检查各组件状态
+        return snapshot.to_dict()
+    
+    def get_health_snapshot(self) -> HealthSnapshot:
+        """
+        获取最近发布的健康快照
+        
+        只读取已发布的引用，不执行检查；请求路径应使用此方法代替 health_check。
+        尚未发布过快照时按当前组件状态生成一次。
+        """
+        snapshot = self._health_snapshot
+        if snapshot is None:
+            snapshot = self._publish_health_snapshot()
+        return snapshot
+    
+    def _publish_health_snapshot(self) -> HealthSnapshot:
+        """根据当前组件状态生成并发布健康快照"""
+        snapshot = self._build_health_snapshot()
+        self._health_snapshot = snapshot
+        return snapshot
+    
+    def _build_health_snapshot(self) -> HealthSnapshot:
+        """根据当前组件状态构建健康快照"""
+        components = {}
         unhealthy_count = 0
-        for component, health in self._component_health.items():
-            component_info = {
+        # 复制一份，避免其他线程并发写入时迭代出错
+        for component, health in list(self._component_health.items()):
+            components[component.value] = MappingProxyType({
                 'status': health.status.value,
                 'response_time_ms': health.response_time_ms,
                 'last_check': health.last_check,
                 'error_message': health.error_message
-            }
+            })
             
-            health_report['components'][component.value] = component_info
-            
-            if health.status != ComponentStatus.HEALTHY:
+            if health.status not in (ComponentStatus.HEALTHY, ComponentStatus.NOT_LOADED):
                 unhealthy_count += 1
         
         # 确定整体状态
-        total_components = len(self._component_health)
+        total_components = len(components)
         if unhealthy_count == 0:
-            health_report['overall_status'] = 'healthy'
+            overall_status = 'healthy'
         elif unhealthy_count < total_components / 2:
-            health_report['overall_status'] = 'degraded'
+            overall_status = 'degraded'
         else:
-            health_report['overall_status'] = 'unhealthy'
+            overall_status = 'unhealthy'
+        
+        performance = MappingProxyType({
+            'total_requests': self._request_count,
+            'error_count': self._error_count,
+            'average_response_time_ms': (
+                self._total_response_time / self._request_count 
+                if self._request_count > 0 else 0
+            ),
+            'error_rate': self._error_count / max(self._request_count, 1)
+        })
         
-        logger.info(f"健康检查完成: {health_report['overall_status']}, {total_components - unhealthy_count}/{total_components} 组件正常")
+        return HealthSnapshot(
+            timestamp=time.time(),
+            overall_status=overall_status,
+            components=MappingProxyType(components),
+            performance=performance
+        )
+    
+    def _span(self, stage: str) -> LatencySpan:
+        """协调器阶段的计时span"""
+        return self.latency_recorder.span(f"orchestrator.{stage}")
+    
+    def get_latency_metrics(self, format: str = "json") -> Union[Dict[str, Any], str]:
+        """
+        获取分阶段延迟统计
         
-        return health_report
+        Args:
+            format: "json" 返回各span的 p50/p95/p99 字典；"prometheus" 返回Prometheus文本
+        """
+        if format == "prometheus":
+            return self.latency_recorder.to_prometheus()
+        if format == "json":
+            return self.latency_recorder.snapshot()
+        raise ValueError(f"不支持的格式: {format}")
     
     def get_system_stats(self) -> Dict[str, Any]:
         """获取系统统计信息"""
@@ -831,7 +1322,11 @@ class PoE2AIOrchestrator:
             'healthy_components': sum(
                 1 for h in self._component_health.values() 
                 if h.status == ComponentStatus.HEALTHY
-            )
+            ),
+            'cache_hits': self._cache_hits,
+            'coalesced_requests': self._coalesced_requests,
+            'cached_results': len(self._result_cache),
+            'latency': self.latency_recorder.snapshot()
         }
 
 
@@ -8,6 +8,8 @@ PoE2构筑生成器 - 智能构筑生成和优化
 4. 提供构筑模板和变种管理
 """
 
+import asyncio
+import functools
 import logging
 import random
 from dataclasses import dataclass
@@ -17,6 +19,7 @@ from typing import Dict, List, Optional, Any, Set, Tuple
 from ..models.build import PoE2Build, PoE2BuildGoal, PoE2BuildStats, PoE2DamageType
 from ..models.characters import PoE2CharacterClass, PoE2Ascendancy
 from ..models.skills import PoE2Skill
+from .build_search import BuildCandidate, BuildSearchEngine, BuildSearchSpace
 
 
 logger = logging.getLogger(__name__)
@@ -88,18 +91,25 @@ class PoE2BuildGenerator:
     智能生成满足特定需求的构筑配置
     """
     
-    def __init__(self, config: Optional[Dict[str, Any]] = None):
+    def __init__(self, config: Optional[Dict[str, Any]] = None, data_extractor=None):
         """
         初始化构筑生成器
         
         Args:
-            config: 生成器配置
+            config: 生成器配置（beam_width、search_time_budget 控制组合搜索）
+            data_extractor: 可选的PoB2DataExtractor，提供技能/天赋兼容数据；
+                            未提供或数据不可用时使用内置组合目录
         """
         self.config = config or {}
         self._templates = {}
         self._skill_database = {}
         self._item_database = {}
         
+        # 组合搜索
+        self.data_extractor = data_extractor
+        self._search_engine = BuildSearchEngine(beam_width=self.config.get('beam_width', 64))
+        self._search_spaces: Dict[PoE2CharacterClass, BuildSearchSpace] = {}
+        
         # 初始化构筑模板
         self._initialize_templates()
         logger.info("PoE2BuildGenerator 初始化完成")
@@ -230,15 +240,20 @@ class PoE2BuildGenerator:
                             character_class: PoE2CharacterClass,
                             build_goal: PoE2BuildGoal,
                             constraints: GenerationConstraints,
-                            count: int = 3) -> List[PoE2Build]:
+                            count: int = 3,
+                            time_budget: Optional[float] = None) -> List[PoE2Build]:
         """
         生成构筑
         
+        优先在 (升华, 主技能, 辅助宝石, 关键石) 组合空间中搜索满足约束的构筑，
+        搜索没有结果时回退到模板生成。
+        
         Args:
             character_class: 角色职业
             build_goal: 构筑目标
             constraints: 生成约束
             count: 生成数量
+            time_budget: 组合搜索的时间预算(秒)，默认取配置 search_time_budget
             
         Returns:
             生成的构筑列表
@@ -246,6 +261,14 @@ class PoE2BuildGenerator:
         logger.info(f"生成构筑: {character_class.value}, 目标: {build_goal.value}, 数量: {count}")
         
         try:
+            # 组合搜索是CPU密集的同步计算，放到线程池中执行，避免阻塞事件循环
+            searched_builds = await self._run_in_thread(
+                self._generate_builds_by_search, character_class, build_goal, constraints, count, time_budget
+            )
+            if searched_builds:
+                logger.info(f"构筑生成完成: {len(searched_builds)} 个 (组合搜索)")
+                return searched_builds
+            
             # 获取合适的模板
             suitable_templates = self._find_suitable_templates(
                 character_class, build_goal, constraints
@@ -271,6 +294,114 @@ class PoE2BuildGenerator:
             logger.error(f"构筑生成失败: {e}")
             return []
     
+    @staticmethod
+    async def _run_in_thread(func, *args):
+        """在默认线程池中执行同步函数（兼容Python 3.8，等价于asyncio.to_thread）"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args))
+    
+    def _get_search_space(self, character_class: PoE2CharacterClass) -> BuildSearchSpace:
+        """获取职业的组合空间（按职业缓存，兼容表只计算一次）"""
+        space = self._search_spaces.get(character_class)
+        if space is None:
+            if self.data_extractor is not None:
+                space = BuildSearchSpace.from_pob2_data(character_class, self.data_extractor)
+            if space is None:
+                space = BuildSearchSpace.default(character_class)
+            self._search_spaces[character_class] = space
+        return space
+    
+    def search_build_candidates(self,
+                                character_class: PoE2CharacterClass,
+                                build_goal: PoE2BuildGoal,
+                                constraints: GenerationConstraints,
+                                max_results: int = 100,
+                                time_budget: Optional[float] = None,
+                                ascendancy: Optional[PoE2Ascendancy] = None,
+                                main_skill: Optional[str] = None) -> List[BuildCandidate]:
+        """
+        在组合空间中搜索满足约束的构筑组合
+        
+        Returns:
+            按评分降序排列的组合；超出时间预算时返回已找到的最好结果
+        """
+        if time_budget is None:
+            time_budget = self.config.get('search_time_budget', 1.0)
+        
+        result = self._search_engine.search(
+            self._get_search_space(character_class), build_goal, constraints,
+            max_results=max_results, time_budget=time_budget,
+            ascendancy=ascendancy, main_skill=main_skill
+        )
+        return result.candidates
+    
+    def _generate_builds_by_search(self,
+                                   character_class: PoE2CharacterClass,
+                                   build_goal: PoE2BuildGoal,
+                                   constraints: GenerationConstraints,
+                                   count: int,
+                                   time_budget: Optional[float]) -> List[PoE2Build]:
+        """通过组合搜索生成构筑"""
+        try:
+            candidates = self.search_build_candidates(
+                character_class, build_goal, constraints,
+                max_results=max(count, 1), time_budget=time_budget
+            )
+        except Exception as e:
+            logger.error(f"构筑组合搜索失败: {e}")
+            return []
+        
+        builds = []
+        for candidate in candidates:
+            build = self._candidate_to_build(character_class, candidate, build_goal, constraints)
+            if build is not None:
+                builds.append(build)
+        return builds[:count]
+    
+    def _candidate_to_build(self,
+                            character_class: PoE2CharacterClass,
+                            candidate: BuildCandidate,
+                            build_goal: PoE2BuildGoal,
+                            constraints: GenerationConstraints) -> Optional[PoE2Build]:
+        """将搜索得到的组合转换为构筑"""
+        try:
+            resistances = {"fire": 75, "cold": 75, "lightning": 75, "chaos": -30}
+            if constraints.required_resistances:
+                for res_type, min_value in constraints.required_resistances.items():
+                    resistances[res_type] = min(80, max(resistances.get(res_type, 0), min_value))
+            
+            uses_energy_shield = "spell" in candidate.skill.tags
+            stats = PoE2BuildStats(
+                total_dps=candidate.dps,
+                effective_health_pool=candidate.ehp,
+                fire_resistance=resistances["fire"],
+                cold_resistance=resistances["cold"],
+                lightning_resistance=resistances["lightning"],
+                chaos_resistance=resistances["chaos"],
+                life=candidate.ehp * (0.4 if uses_energy_shield else 0.7),
+                energy_shield=candidate.ehp * 0.6 if uses_energy_shield else 0.0
+            )
+            
+            build = PoE2Build(
+                name=candidate.name,
+                character_class=character_class,
+                ascendancy=candidate.ascendancy.ascendancy,
+                level=90,
+                stats=stats,
+                estimated_cost=candidate.cost,
+                currency_type="divine",
+                goal=build_goal,
+                main_skill_gem=candidate.skill.name,
+                support_gems=[support.name for support in candidate.supports],
+                passive_keystones=[keystone.name for keystone in candidate.keystones],
+                notes=f"Generated by combinatorial search. Score: {candidate.score:.3f}"
+            )
+            return build if build.validate() else None
+        
+        except Exception as e:
+            logger.error(f"转换搜索结果失败: {candidate.name}: {e}")
+            return None
+    
     def _find_suitable_templates(self, 
                                character_class: PoE2CharacterClass,
                                build_goal: PoE2BuildGoal,
@@ -551,6 +682,12 @@ class PoE2BuildGenerator:
         try:
             logger.info(f"优化构筑: {build.name}")
             
+            # 优先在同一升华和主技能下重新搜索辅助宝石与关键石
+            searched = await self._run_in_thread(self._optimize_by_search, build, constraints)
+            if searched is not None:
+                logger.info(f"构筑优化完成: {searched.name} (组合搜索)")
+                return searched
+            
             optimized_build = PoE2Build(
                 name=f"Optimized {build.name}",
                 character_class=build.character_class,
@@ -577,6 +714,34 @@ class PoE2BuildGenerator:
             logger.error(f"构筑优化失败: {e}")
             return build  # 返回原构筑
     
+    def _optimize_by_search(self, build: PoE2Build, constraints: GenerationConstraints) -> Optional[PoE2Build]:
+        """在构筑的升华和主技能下搜索最优组合，主技能不在组合空间中时返回None"""
+        if not build.main_skill_gem:
+            return None
+        
+        goal = build.goal or PoE2BuildGoal.ENDGAME_CONTENT
+        try:
+            candidates = self.search_build_candidates(
+                build.character_class, goal, constraints, max_results=1,
+                ascendancy=build.ascendancy, main_skill=build.main_skill_gem
+            )
+        except Exception as e:
+            logger.error(f"构筑组合搜索失败: {e}")
+            return None
+        
+        if not candidates:
+            return None
+        
+        optimized = self._candidate_to_build(build.character_class, candidates[0], goal, constraints)
+        if optimized is None:
+            return None
+        
+        optimized.name = f"Optimized {build.name}"
+        optimized.level = build.level
+        optimized.key_items = build.key_items[:] if build.key_items else []
+        optimized.notes = f"Optimized version of {build.name}"
+        return optimized
+    
     async def _apply_optimization_strategies(self, build: PoE2Build, constraints: GenerationConstraints) -> PoE2Build:
         """应用优化策略"""
         # 策略1: DPS优化
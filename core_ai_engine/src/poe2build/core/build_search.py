@@ -0,0 +1,693 @@
+"""
+构筑组合搜索引擎
+
+在 (升华, 主技能, 辅助宝石, 天赋关键石) 的组合空间上进行束搜索：
+1. 辅助宝石只从与主技能标签兼容的集合中选取（兼容表预先计算）
+2. 用乐观上界/下界对生成约束（最低DPS、最低EHP、最高预算）剪枝
+3. 部分组合的属性按状态缓存，子状态在父状态基础上增量计算
+4. 任意时刻可中止（anytime），返回时间预算内找到的最好构筑
+
+使用示例:
+```python
+space = BuildSearchSpace.default(PoE2CharacterClass.WITCH)
+engine = BuildSearchEngine(beam_width=64)
+result = engine.search(space, PoE2BuildGoal.BOSS_KILLING,
+                       GenerationConstraints(min_dps=800000, max_budget=20),
+                       max_results=200, time_budget=0.5)
+for candidate in result.candidates:
+    print(candidate.name, candidate.dps, candidate.cost)
+```
+"""
+
+import heapq
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from ..models.build import PoE2BuildGoal, PoE2DamageType
+from ..models.characters import PoE2CharacterClass, PoE2Ascendancy, ASCENDANCY_MAPPING
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SkillOption:
+    """主技能选项"""
+    name: str
+    tags: FrozenSet[str]
+    damage_type: PoE2DamageType
+    base_dps: float
+    cost: float = 0.0
+
+
+@dataclass(frozen=True)
+class SupportOption:
+    """辅助宝石选项（tags 中任一标签与主技能匹配即可辅助）"""
+    name: str
+    tags: FrozenSet[str]
+    dps_multiplier: float = 1.0
+    ehp_multiplier: float = 1.0
+    cost: float = 0.0
+
+
+@dataclass(frozen=True)
+class KeystoneOption:
+    """天赋关键石选项（tags 为空表示对所有技能生效）"""
+    name: str
+    tags: FrozenSet[str] = frozenset()
+    dps_multiplier: float = 1.0
+    ehp_multiplier: float = 1.0
+    cost: float = 0.0
+
+
+@dataclass(frozen=True)
+class AscendancyOption:
+    """升华选项（tags 匹配主技能时获得加成）"""
+    ascendancy: PoE2Ascendancy
+    tags: FrozenSet[str]
+    dps_multiplier: float = 1.0
+    ehp_multiplier: float = 1.0
+
+
+# 搜索状态: (升华序号, 技能序号, 辅助宝石序号, 关键石序号)，序号元组按升序排列
+SearchState = Tuple[int, int, Tuple[int, ...], Tuple[int, ...]]
+
+
+@dataclass
+class BuildCandidate:
+    """搜索得到的完整构筑组合"""
+    ascendancy: AscendancyOption
+    skill: SkillOption
+    supports: List[SupportOption]
+    keystones: List[KeystoneOption]
+    dps: float
+    ehp: float
+    cost: float
+    score: float
+    
+    @property
+    def name(self) -> str:
+        return f"{self.ascendancy.ascendancy.value} {self.skill.name}"
+
+
+@dataclass
+class BuildSearchResult:
+    """搜索结果"""
+    candidates: List[BuildCandidate]       # 按评分降序
+    expanded_states: int = 0               # 展开的部分状态数
+    pruned_states: int = 0                 # 被约束剪枝的状态数
+    evaluated_builds: int = 0              # 评估过的完整组合数
+    elapsed_seconds: float = 0.0
+    exhausted: bool = True                 # False 表示因时间预算提前结束
+
+
+# 各构筑目标的评分权重 (DPS, EHP, 成本)
+GOAL_WEIGHTS: Dict[PoE2BuildGoal, Tuple[float, float, float]] = {
+    PoE2BuildGoal.BOSS_KILLING: (0.6, 0.3, 0.1),
+    PoE2BuildGoal.CLEAR_SPEED: (0.55, 0.25, 0.2),
+    PoE2BuildGoal.ENDGAME_CONTENT: (0.4, 0.5, 0.1),
+    PoE2BuildGoal.LEAGUE_START: (0.35, 0.35, 0.3),
+    PoE2BuildGoal.BUDGET_FRIENDLY: (0.3, 0.3, 0.4),
+}
+
+# 每个组合空间缓存的状态属性上限
+STATS_CACHE_SIZE = 200000
+
+# 复杂度上限 -> 允许的关键石数量
+_COMPLEXITY_KEYSTONES = {"beginner": 0, "intermediate": 1, "advanced": 2, "expert": 3}
+
+
+class BuildSearchSpace:
+    """
+    单个职业的构筑组合空间
+    
+    创建时预先计算每个主技能可用的辅助宝石和关键石（按DPS倍率降序），
+    搜索时只在兼容集合中展开。
+    """
+    
+    def __init__(self,
+                 character_class: PoE2CharacterClass,
+                 ascendancies: List[AscendancyOption],
+                 skills: List[SkillOption],
+                 supports: List[SupportOption],
+                 keystones: List[KeystoneOption],
+                 base_ehp: float = 6000.0,
+                 base_cost: float = 2.0,
+                 min_supports: int = 3,
+                 max_supports: int = 5,
+                 max_keystones: int = 2):
+        self.character_class = character_class
+        self.ascendancies = ascendancies
+        self.skills = skills
+        self.supports = supports
+        self.keystones = keystones
+        self.base_ehp = base_ehp
+        self.base_cost = base_cost
+        self.min_supports = min_supports
+        self.max_supports = max_supports
+        self.max_keystones = max_keystones
+        
+        self._compatible_supports = [self._compatible(skill, supports, require_tags=True) for skill in skills]
+        self._compatible_keystones = [self._compatible(skill, keystones, require_tags=False) for skill in skills]
+        # 状态 -> (dps, ehp, cost)，跨搜索复用
+        self._stats_cache: Dict[SearchState, Tuple[float, float, float]] = {}
+    
+    @staticmethod
+    def _compatible(skill: SkillOption, options: List[Any], require_tags: bool) -> Tuple[int, ...]:
+        """与技能兼容的选项序号，按DPS倍率降序"""
+        indices = [
+            i for i, option in enumerate(options)
+            if (option.tags & skill.tags) or (not option.tags and not require_tags)
+        ]
+        return tuple(sorted(indices, key=lambda i: -options[i].dps_multiplier))
+    
+    def base_stats(self, ascendancy_index: int, skill_index: int) -> Tuple[float, float, float]:
+        """升华 + 主技能的初始 (dps, ehp, cost)，升华标签匹配技能时获得加成"""
+        state = (ascendancy_index, skill_index, (), ())
+        stats = self._stats_cache.get(state)
+        if stats is None:
+            ascendancy, skill = self.ascendancies[ascendancy_index], self.skills[skill_index]
+            bonus = ascendancy if ascendancy.tags & skill.tags else None
+            stats = (skill.base_dps * (bonus.dps_multiplier if bonus else 1.0),
+                     self.base_ehp * (bonus.ehp_multiplier if bonus else 1.0),
+                     self.base_cost + skill.cost)
+            self._stats_cache[state] = stats
+        return stats
+    
+    def child_stats(self, state: SearchState, parent: Tuple[float, float, float],
+                    option: Any) -> Tuple[float, float, float]:
+        """子状态的属性：在父状态基础上乘以新选项的倍率（按状态缓存）"""
+        stats = self._stats_cache.get(state)
+        if stats is None:
+            dps, ehp, cost = parent
+            stats = (dps * option.dps_multiplier, ehp * option.ehp_multiplier, cost + option.cost)
+            if len(self._stats_cache) >= STATS_CACHE_SIZE:
+                self._stats_cache.clear()
+            self._stats_cache[state] = stats
+        return stats
+    
+    def compatible_supports(self, skill_index: int) -> Tuple[int, ...]:
+        """主技能可用的辅助宝石序号"""
+        return self._compatible_supports[skill_index]
+    
+    def compatible_keystones(self, skill_index: int) -> Tuple[int, ...]:
+        """主技能可用的关键石序号"""
+        return self._compatible_keystones[skill_index]
+    
+    @property
+    def size(self) -> int:
+        """组合空间规模的粗略估计（不含关键石）"""
+        total = 0
+        for skill_index in range(len(self.skills)):
+            n = len(self._compatible_supports[skill_index])
+            total += sum(math.comb(n, k) for k in range(self.min_supports, self.max_supports + 1))
+        return total * len(self.ascendancies)
+    
+    @classmethod
+    def default(cls, character_class: PoE2CharacterClass) -> 'BuildSearchSpace':
+        """内置的组合空间数据"""
+        return cls(
+            character_class=character_class,
+            ascendancies=[
+                AscendancyOption(asc, frozenset(tags), dps, ehp)
+                for asc, (tags, dps, ehp) in _ASCENDANCY_DATA.items()
+                if asc in ASCENDANCY_MAPPING.get(character_class, [])
+            ],
+            skills=[skill for skill in _SKILLS if skill.tags & _CLASS_SKILL_TAGS[character_class]],
+            supports=list(_SUPPORTS),
+            keystones=list(_KEYSTONES),
+            base_ehp=_CLASS_BASE_EHP.get(character_class, 6000.0)
+        )
+    
+    @classmethod
+    def from_pob2_data(cls, character_class: PoE2CharacterClass, extractor) -> Optional['BuildSearchSpace']:
+        """
+        用PoB2数据提取器的宝石和天赋数据构建组合空间
+        
+        PoB2数据不包含数值化的收益，主动宝石的基础DPS按 baseEffectiveness 缩放，
+        辅助宝石和关键石的倍率使用保守的统一估计。升华使用内置数据。
+        数据不可用时返回None。
+        
+        Args:
+            character_class: 角色职业
+            extractor: PoB2DataExtractor 实例
+        """
+        try:
+            gems = extractor.get_skill_gems()
+            passives = extractor.get_passive_tree()
+        except Exception as e:
+            logger.warning(f"读取PoB2数据失败: {e}")
+            return None
+        
+        if not gems:
+            return None
+        
+        class_tags = _CLASS_SKILL_TAGS[character_class]
+        skills, supports = [], []
+        for gem in gems.values():
+            tags = frozenset(_normalize_tags(gem.tags))
+            if gem.gem_type == "support":
+                supports.append(SupportOption(gem.name, tags, dps_multiplier=1.2, cost=0.1))
+            elif gem.gem_type == "active" and tags & class_tags:
+                skills.append(SkillOption(
+                    gem.name, tags, _damage_type_from_tags(tags),
+                    base_dps=_POB2_BASE_SKILL_DPS * (gem.base_effectiveness or 1.0)
+                ))
+        
+        keystones = [
+            KeystoneOption(node.name, dps_multiplier=1.1, ehp_multiplier=1.05, cost=1.0)
+            for node in (passives or {}).values() if node.is_keystone
+        ]
+        
+        if not skills or not supports:
+            return None
+        
+        default = cls.default(character_class)
+        return cls(
+            character_class=character_class,
+            ascendancies=default.ascendancies,
+            skills=skills,
+            supports=supports,
+            keystones=keystones or default.keystones,
+            base_ehp=default.base_ehp
+        )
+
+
+class BuildSearchEngine:
+    """
+    束搜索构筑引擎
+    
+    逐层为部分组合添加辅助宝石，每层保留评分最高的 beam_width 个状态（束宽逐轮递增，支持时间预算）；
+    达到最少辅助数量的状态与兼容关键石组合后作为完整构筑评估。
+    """
+    
+    def __init__(self, beam_width: int = 64):
+        """
+        Args:
+            beam_width: 每层保留的部分状态数
+        """
+        self.beam_width = beam_width
+    
+    def search(self,
+               space: BuildSearchSpace,
+               goal: PoE2BuildGoal,
+               constraints,
+               max_results: int = 100,
+               time_budget: Optional[float] = None,
+               ascendancy: Optional[PoE2Ascendancy] = None,
+               main_skill: Optional[str] = None) -> BuildSearchResult:
+        """
+        搜索满足约束的最佳构筑组合
+        
+        Args:
+            space: 组合空间
+            goal: 构筑目标（决定评分权重）
+            constraints: GenerationConstraints
+            max_results: 返回的最大构筑数
+            time_budget: 时间预算(秒)，到时返回已找到的最好结果；None表示搜索完整个束
+            ascendancy: 只搜索指定升华
+            main_skill: 只搜索指定主技能
+        """
+        start = time.perf_counter()
+        deadline = start + time_budget if time_budget is not None else None
+        weights = GOAL_WEIGHTS.get(goal, GOAL_WEIGHTS[PoE2BuildGoal.ENDGAME_CONTENT])
+        
+        search = _SearchRun(self, space, weights, constraints, max_results, deadline)
+        exhausted = search.run(ascendancy, main_skill)
+        
+        result = BuildSearchResult(
+            candidates=search.best_candidates(),
+            expanded_states=search.expanded,
+            pruned_states=search.pruned,
+            evaluated_builds=search.evaluated,
+            elapsed_seconds=time.perf_counter() - start,
+            exhausted=exhausted
+        )
+        logger.debug(
+            f"构筑搜索完成: {len(result.candidates)} 个结果, 展开 {result.expanded_states}, "
+            f"剪枝 {result.pruned_states}, 耗时 {result.elapsed_seconds * 1000:.1f}ms"
+        )
+        return result
+
+
+class _SearchRun:
+    """一次搜索的状态（剪枝界限、结果堆、计数）"""
+    
+    def __init__(self, engine: BuildSearchEngine, space: BuildSearchSpace,
+                 weights: Tuple[float, float, float], constraints, max_results: int,
+                 deadline: Optional[float]):
+        self.engine = engine
+        self.space = space
+        self.weights = weights
+        self.max_results = max_results
+        self.deadline = deadline
+        
+        self.min_dps = constraints.min_dps or 0.0
+        self.min_ehp = constraints.min_ehp or 0.0
+        self.max_budget = constraints.max_budget if constraints.max_budget else math.inf
+        
+        forbidden = set(constraints.forbidden_items or [])
+        self.allowed_supports = {i for i, s in enumerate(space.supports) if s.name not in forbidden}
+        self.allowed_keystones = {i for i, k in enumerate(space.keystones) if k.name not in forbidden}
+        self.preferred_damage_types = set(constraints.preferred_damage_types or [])
+        
+        self.max_keystones = space.max_keystones
+        if constraints.complexity_limit is not None:
+            self.max_keystones = min(self.max_keystones,
+                                     _COMPLEXITY_KEYSTONES.get(constraints.complexity_limit.value, 2))
+        
+        self.expanded = 0
+        self.pruned = 0
+        self.evaluated = 0
+        self._results: List[Tuple[float, SearchState]] = []  # 最小堆，保留 max_results 个
+        self._result_stats: Dict[SearchState, Tuple[float, float, float]] = {}
+    
+    def _timed_out(self) -> bool:
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+    
+    def _score(self, dps: float, ehp: float, cost: float) -> float:
+        w_dps, w_ehp, w_cost = self.weights
+        return (w_dps * math.log1p(dps / 1e6) +
+                w_ehp * math.log1p(ehp / 1e4) +
+                w_cost / (1.0 + cost / 10.0))
+    
+    def run(self, ascendancy: Optional[PoE2Ascendancy], main_skill: Optional[str]) -> bool:
+        """
+        执行搜索，返回是否完整搜索（未超时）
+        
+        束宽从1开始按4倍递增到 beam_width：窄束很快产出完整构筑，
+        有时间预算时总能先拿到结果；之后的宽束复用已缓存的部分评分继续改进。
+        """
+        initial = self._initial_states(ascendancy, main_skill)
+        
+        width = 1
+        while True:
+            width = min(width, self.engine.beam_width)
+            if not self._beam_pass(initial, width):
+                return False
+            if width >= self.engine.beam_width:
+                return True
+            width *= 4
+    
+    def _initial_states(self, ascendancy: Optional[PoE2Ascendancy], main_skill: Optional[str]):
+        """第1层: 升华 × 主技能"""
+        space = self.space
+        initial: List[Tuple[float, SearchState, Tuple[float, float, float]]] = []
+        for a, asc in enumerate(space.ascendancies):
+            if ascendancy is not None and asc.ascendancy != ascendancy:
+                continue
+            for s, skill in enumerate(space.skills):
+                if main_skill is not None and skill.name != main_skill:
+                    continue
+                if self.preferred_damage_types and skill.damage_type not in self.preferred_damage_types:
+                    continue
+                
+                state = (a, s, (), ())
+                stats = space.base_stats(a, s)
+                
+                self.expanded += 1
+                if self._prune(state, stats):
+                    self.pruned += 1
+                    continue
+                initial.append((self._score(*stats), state, stats))
+        return initial
+    
+    def _beam_pass(self, initial, width: int) -> bool:
+        """以给定束宽逐层添加辅助宝石，返回是否在截止时间前完成"""
+        beam = heapq.nlargest(width, initial, key=lambda item: item[0])
+        for depth in range(1, self.space.max_supports + 1):
+            if not beam:
+                break
+            
+            next_beam = []
+            for _, state, stats in beam:
+                if self._timed_out():
+                    return False
+                next_beam.extend(self._expand_supports(state, stats))
+            
+            beam = heapq.nlargest(width, next_beam, key=lambda item: item[0])
+            
+            if depth >= self.space.min_supports:
+                for _, state, stats in beam:
+                    if self._timed_out():
+                        return False
+                    self._emit_with_keystones(state, stats)
+        
+        return True
+    
+    def _expand_supports(self, state: SearchState, stats: Tuple[float, float, float]):
+        """为状态添加一个兼容的辅助宝石（只添加序号在已选之后的，避免重复排列）"""
+        a, s, supports, _ = state
+        compatible = self.space.compatible_supports(s)
+        start = compatible.index(supports[-1]) + 1 if supports else 0
+        
+        children = []
+        for position in range(start, len(compatible)):
+            support_index = compatible[position]
+            if support_index not in self.allowed_supports:
+                continue
+            
+            child = (a, s, supports + (support_index,), ())
+            child_stats = self.space.child_stats(child, stats, self.space.supports[support_index])
+            
+            self.expanded += 1
+            if self._prune(child, child_stats):
+                self.pruned += 1
+                continue
+            children.append((self._score(*child_stats), child, child_stats))
+        return children
+    
+    def _prune(self, state: SearchState, stats: Tuple[float, float, float]) -> bool:
+        """用乐观界限判断状态的所有后继是否都不可能满足约束"""
+        dps, ehp, cost = stats
+        _, s, supports, _ = state
+        space = self.space
+        
+        # 预算: 成本只增不减，且至少还要补足最少辅助宝石
+        remaining_needed = max(0, space.min_supports - len(supports))
+        compatible = space.compatible_supports(s)
+        start = compatible.index(supports[-1]) + 1 if supports else 0
+        remaining = [i for i in compatible[start:] if i in self.allowed_supports]
+        if len(remaining) < remaining_needed:
+            return True
+        if remaining_needed:
+            cheapest = sorted(space.supports[i].cost for i in remaining)[:remaining_needed]
+            if cost + sum(cheapest) > self.max_budget:
+                return True
+        elif cost > self.max_budget:
+            return True
+        
+        # DPS/EHP: 剩余槽位全部取最大倍率时的上界
+        slots = space.max_supports - len(supports)
+        keystones = [space.keystones[i] for i in space.compatible_keystones(s) if i in self.allowed_keystones]
+        dps_bound = dps * _best_product((space.supports[i].dps_multiplier for i in remaining), slots) \
+            * _best_product((k.dps_multiplier for k in keystones), self.max_keystones)
+        if dps_bound < self.min_dps:
+            return True
+        
+        ehp_bound = ehp * _best_product((space.supports[i].ehp_multiplier for i in remaining), slots) \
+            * _best_product((k.ehp_multiplier for k in keystones), self.max_keystones)
+        return ehp_bound < self.min_ehp
+    
+    def _emit_with_keystones(self, state: SearchState, stats: Tuple[float, float, float]):
+        """把辅助宝石已完整的状态与0..max_keystones个关键石组合，作为完整构筑评估"""
+        a, s, supports, _ = state
+        keystones = [i for i in self.space.compatible_keystones(s) if i in self.allowed_keystones]
+        
+        frontier = [((), stats)]
+        while frontier:
+            next_frontier = []
+            for chosen, chosen_stats in frontier:
+                self._offer((a, s, supports, chosen), chosen_stats)
+                if len(chosen) >= self.max_keystones:
+                    continue
+                
+                start = keystones.index(chosen[-1]) + 1 if chosen else 0
+                for keystone_index in keystones[start:]:
+                    child = (a, s, supports, chosen + (keystone_index,))
+                    next_frontier.append((
+                        child[3],
+                        self.space.child_stats(child, chosen_stats, self.space.keystones[keystone_index])
+                    ))
+            frontier = next_frontier
+    
+    def _offer(self, state: SearchState, stats: Tuple[float, float, float]):
+        """评估完整构筑，满足约束时放入结果堆"""
+        if state in self._result_stats:
+            return
+        
+        self.evaluated += 1
+        dps, ehp, cost = stats
+        if dps < self.min_dps or ehp < self.min_ehp or cost > self.max_budget:
+            return
+        
+        item = (self._score(*stats), state)
+        if len(self._results) < self.max_results:
+            heapq.heappush(self._results, item)
+        elif item > self._results[0]:
+            _, evicted = heapq.heapreplace(self._results, item)
+            self._result_stats.pop(evicted, None)
+        else:
+            return
+        self._result_stats[state] = stats
+    
+    def best_candidates(self) -> List[BuildCandidate]:
+        """结果按评分降序转换为构筑组合"""
+        space = self.space
+        candidates = []
+        for score, state in sorted(self._results, reverse=True):
+            a, s, supports, keystones = state
+            dps, ehp, cost = self._result_stats[state]
+            candidates.append(BuildCandidate(
+                ascendancy=space.ascendancies[a],
+                skill=space.skills[s],
+                supports=[space.supports[i] for i in supports],
+                keystones=[space.keystones[i] for i in keystones],
+                dps=dps, ehp=ehp, cost=cost, score=score
+            ))
+        return candidates
+
+
+def _best_product(multipliers: Iterable[float], slots: int) -> float:
+    """最多取 slots 个倍率（只取大于1的）的最大乘积"""
+    if slots <= 0:
+        return 1.0
+    best = heapq.nlargest(slots, (m for m in multipliers if m > 1.0))
+    return math.prod(best) if best else 1.0
+
+
+def _normalize_tags(tags: Any) -> List[str]:
+    """PoB2宝石标签可能是列表或 {tag: true} 表"""
+    if isinstance(tags, dict):
+        return [str(tag).lower() for tag, enabled in tags.items() if enabled]
+    return [str(tag).lower() for tag in (tags or [])]
+
+
+def _damage_type_from_tags(tags: FrozenSet[str]) -> PoE2DamageType:
+    for damage_type in (PoE2DamageType.FIRE, PoE2DamageType.COLD,
+                        PoE2DamageType.LIGHTNING, PoE2DamageType.CHAOS):
+        if damage_type.value in tags:
+            return damage_type
+    return PoE2DamageType.PHYSICAL
+
+
+# ---- 内置组合空间数据 ----
+
+_POB2_BASE_SKILL_DPS = 150000.0
+
+# 各职业可使用的技能标签
+_CLASS_SKILL_TAGS: Dict[PoE2CharacterClass, FrozenSet[str]] = {
+    PoE2CharacterClass.WITCH: frozenset({"spell", "minion", "chaos"}),
+    PoE2CharacterClass.SORCERESS: frozenset({"spell"}),
+    PoE2CharacterClass.RANGER: frozenset({"bow"}),
+    PoE2CharacterClass.MERCENARY: frozenset({"crossbow", "grenade"}),
+    PoE2CharacterClass.MONK: frozenset({"quarterstaff", "unarmed"}),
+    PoE2CharacterClass.WARRIOR: frozenset({"mace", "slam", "warcry"}),
+}
+
+_CLASS_BASE_EHP: Dict[PoE2CharacterClass, float] = {
+    PoE2CharacterClass.WITCH: 5500.0,
+    PoE2CharacterClass.SORCERESS: 5000.0,
+    PoE2CharacterClass.RANGER: 5000.0,
+    PoE2CharacterClass.MERCENARY: 6000.0,
+    PoE2CharacterClass.MONK: 5500.0,
+    PoE2CharacterClass.WARRIOR: 7500.0,
+}
+
+# 升华: (受益标签, DPS倍率, EHP倍率)
+_ASCENDANCY_DATA: Dict[PoE2Ascendancy, Tuple[Tuple[str, ...], float, float]] = {
+    PoE2Ascendancy.STORMWEAVER: (("lightning", "cold"), 1.35, 1.0),
+    PoE2Ascendancy.CHRONOMANCER: (("spell",), 1.15, 1.2),
+    PoE2Ascendancy.INVOKER: (("cold", "lightning", "unarmed"), 1.3, 1.05),
+    PoE2Ascendancy.ACOLYTE_OF_CHAYULA: (("chaos", "quarterstaff"), 1.2, 1.15),
+    PoE2Ascendancy.DEADEYE: (("projectile", "bow"), 1.3, 1.0),
+    PoE2Ascendancy.PATHFINDER: (("chaos", "poison"), 1.25, 1.1),
+    PoE2Ascendancy.WITCHHUNTER: (("crossbow", "grenade"), 1.2, 1.15),
+    PoE2Ascendancy.GEMLING_LEGIONNAIRE: (("crossbow", "projectile"), 1.25, 1.05),
+    PoE2Ascendancy.INFERNALIST: (("fire", "minion"), 1.35, 1.05),
+    PoE2Ascendancy.BLOOD_MAGE: (("spell", "physical"), 1.25, 1.1),
+    PoE2Ascendancy.TITAN: (("slam", "mace"), 1.2, 1.3),
+    PoE2Ascendancy.WARBRINGER: (("warcry", "slam"), 1.3, 1.15),
+}
+
+
+def _skill(name: str, tags: str, damage_type: PoE2DamageType, base_dps: float, cost: float = 0.0) -> SkillOption:
+    return SkillOption(name, frozenset(tags.split()), damage_type, base_dps, cost)
+
+
+def _support(name: str, tags: str, dps: float = 1.0, ehp: float = 1.0, cost: float = 0.1) -> SupportOption:
+    return SupportOption(name, frozenset(tags.split()), dps, ehp, cost)
+
+
+def _keystone(name: str, tags: str = "", dps: float = 1.0, ehp: float = 1.0, cost: float = 0.0) -> KeystoneOption:
+    return KeystoneOption(name, frozenset(tags.split()), dps, ehp, cost)
+
+
+_SKILLS: Tuple[SkillOption, ...] = (
+    _skill("Fireball", "spell fire projectile aoe", PoE2DamageType.FIRE, 180000, 1.0),
+    _skill("Infernal Bolt", "spell fire projectile", PoE2DamageType.FIRE, 160000, 0.5),
+    _skill("Arc", "spell lightning chain", PoE2DamageType.LIGHTNING, 170000, 1.0),
+    _skill("Lightning Bolt", "spell lightning aoe", PoE2DamageType.LIGHTNING, 150000, 0.5),
+    _skill("Frost Bomb", "spell cold aoe", PoE2DamageType.COLD, 140000, 0.5),
+    _skill("Ice Nova", "spell cold aoe nova", PoE2DamageType.COLD, 165000, 1.0),
+    _skill("Contagion", "spell chaos aoe duration", PoE2DamageType.CHAOS, 130000, 1.5),
+    _skill("Raise Zombie", "minion physical", PoE2DamageType.PHYSICAL, 120000, 2.0),
+    _skill("Lightning Arrow", "bow projectile lightning aoe", PoE2DamageType.LIGHTNING, 190000, 1.5),
+    _skill("Explosive Shot", "bow projectile fire aoe", PoE2DamageType.FIRE, 175000, 1.5),
+    _skill("Gas Arrow", "bow projectile chaos poison duration", PoE2DamageType.CHAOS, 150000, 1.0),
+    _skill("Barrage", "bow projectile physical", PoE2DamageType.PHYSICAL, 200000, 2.0),
+    _skill("Rain of Arrows", "bow projectile physical aoe", PoE2DamageType.PHYSICAL, 160000, 1.0),
+    _skill("Galvanic Shards", "crossbow projectile lightning", PoE2DamageType.LIGHTNING, 185000, 1.5),
+    _skill("Fragmentation Rounds", "crossbow projectile physical", PoE2DamageType.PHYSICAL, 170000, 1.0),
+    _skill("Explosive Grenade", "grenade projectile fire aoe", PoE2DamageType.FIRE, 175000, 1.5),
+    _skill("Gas Grenade", "grenade chaos poison aoe duration", PoE2DamageType.CHAOS, 145000, 1.0),
+    _skill("Ice Strike", "quarterstaff melee cold", PoE2DamageType.COLD, 180000, 1.5),
+    _skill("Falling Thunder", "quarterstaff melee lightning aoe", PoE2DamageType.LIGHTNING, 190000, 2.0),
+    _skill("Tempest Flurry", "unarmed melee lightning", PoE2DamageType.LIGHTNING, 175000, 1.0),
+    _skill("Earthquake", "mace melee slam physical aoe duration", PoE2DamageType.PHYSICAL, 200000, 2.0),
+    _skill("Ground Slam", "mace melee slam physical aoe", PoE2DamageType.PHYSICAL, 170000, 1.0),
+    _skill("Rolling Slam", "mace melee slam physical", PoE2DamageType.PHYSICAL, 160000, 0.5),
+    _skill("Infernal Cry", "warcry fire aoe", PoE2DamageType.FIRE, 120000, 0.5),
+)
+
+_SUPPORTS: Tuple[SupportOption, ...] = (
+    _support("Fire Penetration", "fire", dps=1.35),
+    _support("Cold Penetration", "cold", dps=1.33),
+    _support("Lightning Penetration", "lightning", dps=1.35),
+    _support("Withering Touch", "chaos", dps=1.3),
+    _support("Spell Echo", "spell", dps=1.4, cost=0.5),
+    _support("Faster Casting", "spell", dps=1.2),
+    _support("Elemental Focus", "fire cold lightning", dps=1.3),
+    _support("Controlled Destruction", "spell", dps=1.25),
+    _support("Concentrated Effect", "aoe", dps=1.3),
+    _support("Increased Area of Effect", "aoe", dps=1.05),
+    _support("Pierce", "projectile", dps=1.15),
+    _support("Multiple Projectiles", "projectile", dps=1.25),
+    _support("Chain", "projectile chain", dps=1.2),
+    _support("Deadly Ailments", "poison chaos duration", dps=1.3, cost=0.3),
+    _support("Martial Tempo", "melee", dps=1.25),
+    _support("Brutality", "physical", dps=1.35, cost=0.3),
+    _support("Heavy Swing", "slam mace", dps=1.3),
+    _support("Primal Armament", "bow crossbow quarterstaff mace", dps=1.2),
+    _support("Minion Damage", "minion", dps=1.4),
+    _support("Minion Life", "minion", ehp=1.1),
+    _support("Life Leech", "melee projectile", ehp=1.15, cost=0.2),
+    _support("Arcane Surge", "spell", dps=1.1, ehp=1.05),
+    _support("Persistence", "duration", dps=1.15),
+    _support("Efficiency", "spell warcry", dps=1.05, ehp=1.05),
+)
+
+_KEYSTONES: Tuple[KeystoneOption, ...] = (
+    _keystone("Elemental Overload", "fire cold lightning", dps=1.3, ehp=0.95, cost=1.0),
+    _keystone("Chaos Inoculation", dps=1.0, ehp=1.35, cost=8.0),
+    _keystone("Eldritch Battery", "spell", dps=1.1, ehp=1.1, cost=3.0),
+    _keystone("Resolute Technique", "melee", dps=1.2, cost=1.0),
+    _keystone("Point Blank", "projectile", dps=1.2, ehp=0.95),
+    _keystone("Perfect Agony", "poison chaos", dps=1.25, cost=2.0),
+    _keystone("Iron Reflexes", dps=1.0, ehp=1.2, cost=2.0),
+    _keystone("Blood Magic", dps=1.05, ehp=1.1, cost=1.0),
+    _keystone("Giant's Blood", "mace slam", dps=1.15, ehp=1.05, cost=3.0),
+    _keystone("Minion Instability", "minion", dps=1.3, cost=1.0),
+)
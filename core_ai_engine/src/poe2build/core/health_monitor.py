@@ -0,0 +1,149 @@
+"""
+后台健康监控
+
+按固定间隔在独立线程中刷新协调器的组件健康状态，并发布不可变的 HealthSnapshot。
+请求路径和GUI定时器只读取最近一次发布的快照（O(1)），不再各自执行完整的健康检查。
+
+使用示例:
+```python
+monitor = HealthMonitor(orchestrator, interval=30.0)
+monitor.start()
+
+snapshot = monitor.snapshot  # 读取最新快照，不触发检查
+if snapshot.is_component_healthy(SystemComponent.POB2_LOCAL):
+    ...
+
+monitor.stop()
+```
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Callable, Optional
+
+from .ai_orchestrator import HealthSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    后台健康监控器
+
+    每隔 interval 秒调用一次 health_check，由协调器整体替换发布新的快照。
+    可以运行在已有的事件循环上（与协调器共用同一个循环），也可以在守护线程中运行自己的循环。
+    监控与请求路径之间只共享快照引用，无需加锁。
+    """
+
+    def __init__(self, orchestrator, interval: float = 30.0,
+                 on_update: Optional[Callable[[HealthSnapshot], None]] = None):
+        """
+        初始化健康监控器
+
+        Args:
+            orchestrator: 提供 health_check/get_health_snapshot 的AI协调器
+            interval: 刷新间隔(秒)
+            on_update: 每次刷新完成后的回调，在监控线程中调用
+        """
+        if interval <= 0:
+            raise ValueError(f"刷新间隔必须为正数: {interval}")
+
+        self.orchestrator = orchestrator
+        self.interval = interval
+        self.on_update = on_update
+
+        self._thread: Optional[threading.Thread] = None
+        self._future: Optional[concurrent.futures.Future] = None
+        self._stop_event = threading.Event()
+        self._refresh_count = 0
+
+    @property
+    def snapshot(self) -> HealthSnapshot:
+        """最近发布的健康快照"""
+        return self.orchestrator.get_health_snapshot()
+
+    @property
+    def is_running(self) -> bool:
+        """监控是否在运行"""
+        if self._future is not None:
+            return not self._future.done()
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def refresh_count(self) -> int:
+        """已完成的刷新次数"""
+        return self._refresh_count
+
+    async def refresh(self) -> HealthSnapshot:
+        """立即执行一次健康检查并返回新快照"""
+        await self.orchestrator.health_check()
+        snapshot = self.orchestrator.get_health_snapshot()
+        self._refresh_count += 1
+
+        if self.on_update:
+            try:
+                self.on_update(snapshot)
+            except Exception as e:
+                logger.error(f"健康快照回调失败: {e}")
+
+        return snapshot
+
+    async def run_forever(self):
+        """在当前事件循环中持续刷新，直到 stop() 被调用"""
+        while not self._stop_event.is_set():
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"后台健康检查失败: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        启动后台监控（已在运行时忽略）
+
+        Args:
+            loop: 运行监控的事件循环；为None时启动独立的监控线程
+        """
+        if self.is_running:
+            return
+
+        self._stop_event.clear()
+        if loop is not None:
+            self._future = asyncio.run_coroutine_threadsafe(self.run_forever(), loop)
+            logger.info(f"健康监控已启动，刷新间隔 {self.interval:.1f}s")
+            return
+
+        self._thread = threading.Thread(
+            target=self._run, name="poe2-health-monitor", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"健康监控已启动，刷新间隔 {self.interval:.1f}s")
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """停止后台监控"""
+        self._stop_event.set()
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+            logger.info("健康监控已停止")
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+            logger.info("健康监控已停止")
+
+    def _run(self):
+        """监控线程主循环：启动后立即刷新一次，之后按间隔刷新"""
+        loop = asyncio.new_event_loop()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    loop.run_until_complete(self.refresh())
+                except Exception as e:
+                    logger.error(f"后台健康检查失败: {e}")
+
+                if self._stop_event.wait(self.interval):
+                    break
+        finally:
+            loop.close()
@@ -14,6 +14,8 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Dict, List, Optional, Any, Tuple, Callable
 
+import numpy as np
+
 from ..models.build import PoE2Build, PoE2BuildGoal, PoE2BuildStats
 from ..models.characters import PoE2CharacterClass, PoE2Ascendancy
 
@@ -41,6 +43,32 @@ class RecommendationType(Enum):
     META = "meta"                # 流行构筑推荐
 
 
+# 评分矩阵的列顺序（与 ScoringWeights.as_vector 对应）
+SCORING_CRITERIA = (
+    ScoringCriteria.DPS,
+    ScoringCriteria.SURVIVABILITY,
+    ScoringCriteria.BUDGET,
+    ScoringCriteria.POPULARITY,
+    ScoringCriteria.EASE_OF_USE,
+)
+
+# 分段线性评分曲线 (阈值, 分数)
+_DPS_SCORE_CURVE = ([0, 400000, 800000, 1500000], [0.0, 0.4, 0.7, 1.0])
+_EHP_SCORE_CURVE = ([0, 5000, 8000, 12000], [0.0, 0.4, 0.7, 1.0])
+
+_COMPLEXITY_LEVELS = {"low": 1, "medium": 2, "high": 3}
+
+POPULAR_SKILLS = frozenset({
+    "Lightning Arrow", "Explosive Shot", "Fireball", "Arc",
+    "Earthquake", "Ground Slam", "Infernal Bolt"
+})
+POPULAR_CLASSES = frozenset({PoE2CharacterClass.WITCH, PoE2CharacterClass.RANGER})
+POPULAR_GOALS = frozenset({PoE2BuildGoal.CLEAR_SPEED, PoE2BuildGoal.ENDGAME_CONTENT})
+
+_CLASS_INDEX = {character_class: i for i, character_class in enumerate(PoE2CharacterClass)}
+_GOAL_INDEX = {goal: i for i, goal in enumerate(PoE2BuildGoal)}
+
+
 @dataclass
 class ScoringWeights:
     """评分权重配置"""
@@ -64,6 +92,17 @@ class ScoringWeights:
                 ease_weight=self.ease_weight / total
             )
         return self
+    
+    def as_vector(self) -> np.ndarray:
+        """标准化后的权重向量，顺序与 SCORING_CRITERIA 一致"""
+        weights = self.normalize()
+        return np.array([
+            weights.dps_weight,
+            weights.survivability_weight,
+            weights.budget_weight,
+            weights.popularity_weight,
+            weights.ease_weight
+        ])
 
 
 @dataclass
@@ -113,6 +152,128 @@ class RecommendationRequest:
     explanation_detail: str = "medium"  # "low", "medium", "high"
 
 
+@dataclass
+class CandidateFeatures:
+    """
+    候选构筑的批量特征
+    
+    每个字段是一个与 builds 行对应的数组，一次遍历构筑列表提取，
+    之后的过滤、评分和多样化都在这些数组上完成。
+    """
+    builds: List[PoE2Build]
+    class_ids: np.ndarray
+    goal_ids: np.ndarray           # 无目标为 -1
+    main_skills: List[Optional[str]]
+    has_stats: np.ndarray
+    dps: np.ndarray
+    ehp: np.ndarray
+    avg_resistance: np.ndarray
+    resistance_capped: np.ndarray
+    has_cost: np.ndarray
+    cost: np.ndarray               # 无成本信息为 0
+    support_counts: np.ndarray
+    key_item_counts: np.ndarray
+    complexity_levels: np.ndarray  # 1=low, 2=medium, 3=high
+    has_main_skill: np.ndarray
+    popular_skill: np.ndarray
+    popular_class: np.ndarray
+    popular_goal: np.ndarray
+    valid: np.ndarray
+    
+    @classmethod
+    def from_builds(cls, builds: List[PoE2Build]) -> 'CandidateFeatures':
+        """从构筑列表提取特征"""
+        n = len(builds)
+        dps, ehp, avg_resistance, cost, keystone_counts = (np.zeros(n) for _ in range(5))
+        has_stats, resistance_capped, has_cost, valid = (np.zeros(n, dtype=bool) for _ in range(4))
+        support_counts, key_item_counts = np.zeros(n, dtype=int), np.zeros(n, dtype=int)
+        
+        for i, build in enumerate(builds):
+            stats = build.stats
+            if stats:
+                has_stats[i] = True
+                dps[i] = stats.total_dps
+                ehp[i] = stats.effective_health_pool
+                avg_resistance[i] = stats.get_total_resistance_percentage()
+                resistance_capped[i] = stats.is_resistance_capped()
+            if build.estimated_cost:
+                has_cost[i] = True
+                cost[i] = build.estimated_cost
+            support_counts[i] = len(build.support_gems or ())
+            key_item_counts[i] = len(build.key_items or ())
+            keystone_counts[i] = len(build.passive_keystones or ())
+            valid[i] = build.validate()
+        
+        # 复杂度: 技能数量、关键物品、天赋关键点和预算（高预算通常意味着更复杂）
+        complexity_score = (
+            0.5 * support_counts + 0.3 * key_item_counts + 0.7 * keystone_counts +
+            np.select([cost > 20, cost > 10], [2.0, 1.0], default=0.0)
+        )
+        complexity_levels = np.select([complexity_score <= 2, complexity_score <= 5], [1, 2], default=3)
+        
+        main_skills = [build.main_skill_gem for build in builds]
+        
+        return cls(
+            builds=builds,
+            class_ids=np.array([_CLASS_INDEX[b.character_class] for b in builds], dtype=int),
+            goal_ids=np.array([_GOAL_INDEX.get(b.goal, -1) for b in builds], dtype=int),
+            main_skills=main_skills,
+            has_stats=has_stats,
+            dps=dps,
+            ehp=ehp,
+            avg_resistance=avg_resistance,
+            resistance_capped=resistance_capped,
+            has_cost=has_cost,
+            cost=cost,
+            support_counts=support_counts,
+            key_item_counts=key_item_counts,
+            complexity_levels=complexity_levels,
+            has_main_skill=np.array([bool(skill) for skill in main_skills], dtype=bool),
+            popular_skill=np.array([skill in POPULAR_SKILLS for skill in main_skills], dtype=bool),
+            popular_class=np.array([b.character_class in POPULAR_CLASSES for b in builds], dtype=bool),
+            popular_goal=np.array([b.goal in POPULAR_GOALS for b in builds], dtype=bool),
+            valid=valid
+        )
+    
+    def similarity_matrix(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        多样化特征矩阵（行已L2标准化，行向量内积即余弦相似度）
+        
+        特征: 职业、主技能、构筑目标的独热编码（目标权重0.8）和对数成本
+        
+        Args:
+            rows: 需要的构筑行号，默认全部
+        """
+        rows = np.arange(len(self.builds)) if rows is None else np.asarray(rows)
+        n = len(rows)
+        
+        skill_vocabulary: Dict[str, int] = {}
+        skill_ids = np.array([
+            skill_vocabulary.setdefault(self.main_skills[row], len(skill_vocabulary))
+            if self.main_skills[row] else -1
+            for row in rows
+        ], dtype=int)
+        
+        class_block = np.zeros((n, len(_CLASS_INDEX)))
+        class_block[np.arange(n), self.class_ids[rows]] = 1.0
+        
+        skill_block = np.zeros((n, max(len(skill_vocabulary), 1)))
+        has_skill = skill_ids >= 0
+        skill_block[np.flatnonzero(has_skill), skill_ids[has_skill]] = 1.0
+        
+        goal_ids = self.goal_ids[rows]
+        goal_block = np.zeros((n, len(_GOAL_INDEX)))
+        has_goal = goal_ids >= 0
+        goal_block[np.flatnonzero(has_goal), goal_ids[has_goal]] = math.sqrt(0.8)
+        
+        log_cost = np.log1p(self.cost[rows])
+        cost_column = (log_cost / max(log_cost.max(initial=0.0), 1e-9))[:, None]
+        
+        matrix = np.hstack([class_block, skill_block, goal_block, cost_column])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+
 class PoE2Recommender:
     """
     PoE2推荐引擎
@@ -140,6 +301,9 @@ class PoE2Recommender:
         """
         推荐构筑
         
+        候选构筑先提取为特征数组，过滤、评分和多样化都在数组上批量完成，
+        只有最终入选的构筑才生成推荐解释等详细信息。
+        
         Args:
             request: 推荐请求
             candidate_builds: 候选构筑列表
@@ -150,32 +314,32 @@ class PoE2Recommender:
         logger.info(f"开始构筑推荐: {len(candidate_builds)} 个候选构筑")
         
         try:
+            features = CandidateFeatures.from_builds(candidate_builds)
+            
             # 第1步: 预过滤
-            filtered_builds = self._prefilter_builds(candidate_builds, request)
-            logger.debug(f"预过滤后: {len(filtered_builds)} 个构筑")
+            candidates = np.flatnonzero(self._prefilter_mask(features, request))
+            logger.debug(f"预过滤后: {len(candidates)} 个构筑")
             
-            # 第2步: 计算评分
-            scored_builds = []
-            for build in filtered_builds:
-                score = await self._calculate_build_score(build, request)
-                recommendation_type = self._determine_recommendation_type(build, request)
-                similarity = self._calculate_similarity(build, request)
-                
-                recommendation = BuildRecommendation(
-                    build=build,
-                    score=score,
-                    recommendation_type=recommendation_type,
-                    similarity_to_request=similarity,
-                    market_trend=self._get_market_trend(build),
-                    meta_rank=self._get_meta_rank(build)
-                )
-                scored_builds.append(recommendation)
+            # 第2步: 批量评分（权重向量与评分矩阵相乘得到总分）
+            score_matrix = self._score_matrix(features, request)
+            component_scores = score_matrix[candidates]
+            weights = (request.scoring_weights or ScoringWeights()).as_vector()
+            total_scores = component_scores @ weights
+            confidences = self._calculate_confidence(features, score_matrix)[candidates]
             
             # 第3步: 排序和筛选
-            final_recommendations = self._rank_and_filter_recommendations(
-                scored_builds, request
+            selected = self._rank_and_filter_recommendations(
+                features, candidates, total_scores, confidences, request
             )
             
+            final_recommendations = [
+                self._build_recommendation(
+                    features.builds[candidates[i]], request,
+                    total_scores[i], component_scores[i], confidences[i]
+                )
+                for i in selected
+            ]
+            
             logger.info(f"推荐完成: {len(final_recommendations)} 个推荐")
             return final_recommendations
             
@@ -185,331 +349,186 @@ class PoE2Recommender:
     
     def _prefilter_builds(self, builds: List[PoE2Build], request: RecommendationRequest) -> List[PoE2Build]:
         """预过滤构筑"""
-        filtered = []
-        
-        for build in builds:
-            # 职业过滤
-            if request.character_class and build.character_class != request.character_class:
-                continue
-            
-            # 预算过滤
-            if request.max_budget and build.estimated_cost:
-                if build.estimated_cost > request.max_budget:
-                    continue
-            
-            # 性能过滤
-            if not self._meets_performance_requirements(build, request):
-                continue
-            
-            # 复杂度过滤（基于构筑特征推断）
-            if request.preferred_complexity:
-                build_complexity = self._estimate_build_complexity(build)
-                if not self._complexity_matches_preference(build_complexity, request.preferred_complexity):
-                    continue
-            
-            filtered.append(build)
-        
-        return filtered
+        mask = self._prefilter_mask(CandidateFeatures.from_builds(builds), request)
+        return [build for build, keep in zip(builds, mask) if keep]
     
-    def _meets_performance_requirements(self, build: PoE2Build, request: RecommendationRequest) -> bool:
-        """检查是否满足性能要求"""
-        if not build.stats:
-            return False
-        
-        # DPS要求
-        if request.min_dps and build.stats.total_dps < request.min_dps:
-            return False
-        
-        # EHP要求
-        if request.min_ehp and build.stats.effective_health_pool < request.min_ehp:
-            return False
-        
-        # 抗性要求
-        if request.require_resistance_cap and not build.stats.is_resistance_capped():
-            return False
-        
-        return True
-    
-    def _estimate_build_complexity(self, build: PoE2Build) -> str:
-        """估计构筑复杂度"""
-        complexity_score = 0
-        
-        # 基于技能数量
-        if build.support_gems:
-            complexity_score += len(build.support_gems) * 0.5
-        
-        # 基于关键物品数量
-        if build.key_items:
-            complexity_score += len(build.key_items) * 0.3
-        
-        # 基于天赋关键点
-        if build.passive_keystones:
-            complexity_score += len(build.passive_keystones) * 0.7
-        
-        # 基于预算（高预算通常意味着更复杂）
-        if build.estimated_cost:
-            if build.estimated_cost > 20:
-                complexity_score += 2
-            elif build.estimated_cost > 10:
-                complexity_score += 1
-        
-        # 转换为复杂度级别
-        if complexity_score <= 2:
-            return "low"
-        elif complexity_score <= 5:
-            return "medium"
-        else:
-            return "high"
-    
-    def _complexity_matches_preference(self, build_complexity: str, preferred: str) -> bool:
-        """检查复杂度是否匹配偏好"""
-        complexity_levels = {"low": 1, "medium": 2, "high": 3}
-        build_level = complexity_levels.get(build_complexity, 2)
-        preferred_level = complexity_levels.get(preferred, 2)
+    def _prefilter_mask(self, features: CandidateFeatures, request: RecommendationRequest) -> np.ndarray:
+        """预过滤：返回通过筛选的布尔掩码"""
+        mask = features.has_stats.copy()
         
-        # 允许1级差异
-        return abs(build_level - preferred_level) <= 1
+        # 职业过滤
+        if request.character_class:
+            mask &= features.class_ids == _CLASS_INDEX[request.character_class]
+        
+        # 预算过滤
+        if request.max_budget:
+            mask &= ~(features.has_cost & (features.cost > request.max_budget))
+        
+        # 性能过滤（无统计数据的构筑已排除）
+        if request.min_dps:
+            mask &= features.dps >= request.min_dps
+        if request.min_ehp:
+            mask &= features.ehp >= request.min_ehp
+        if request.require_resistance_cap:
+            mask &= features.resistance_capped
+        
+        # 复杂度过滤（允许1级差异）
+        if request.preferred_complexity:
+            preferred_level = _COMPLEXITY_LEVELS.get(request.preferred_complexity, 2)
+            mask &= np.abs(features.complexity_levels - preferred_level) <= 1
+        
+        return mask
     
     async def _calculate_build_score(self, build: PoE2Build, request: RecommendationRequest) -> RecommendationScore:
-        """计算构筑评分"""
-        weights = request.scoring_weights or ScoringWeights()
-        weights = weights.normalize()
-        
-        component_scores = {}
-        reasons = []
-        
-        # DPS评分
-        dps_score = self._score_dps(build, request)
-        component_scores[ScoringCriteria.DPS] = dps_score
-        if dps_score > 0.8:
-            reasons.append(f"Excellent DPS: {build.stats.total_dps:,.0f}" if build.stats else "High DPS potential")
-        
-        # 生存性评分
-        survivability_score = self._score_survivability(build, request)
-        component_scores[ScoringCriteria.SURVIVABILITY] = survivability_score
-        if survivability_score > 0.8:
-            reasons.append(f"Strong survivability: {build.stats.effective_health_pool:,.0f} EHP" if build.stats else "Good survivability")
-        
-        # 预算评分
-        budget_score = self._score_budget(build, request)
-        component_scores[ScoringCriteria.BUDGET] = budget_score
-        if budget_score > 0.8:
-            cost_str = f"{build.estimated_cost} divine" if build.estimated_cost else "budget-friendly"
-            reasons.append(f"Budget-friendly: {cost_str}")
-        
-        # 流行度评分
-        popularity_score = await self._score_popularity(build)
-        component_scores[ScoringCriteria.POPULARITY] = popularity_score
-        if popularity_score > 0.7:
-            reasons.append("Popular in current meta")
-        
-        # 易用性评分
-        ease_score = self._score_ease_of_use(build)
-        component_scores[ScoringCriteria.EASE_OF_USE] = ease_score
-        if ease_score > 0.8:
-            reasons.append("Easy to play and maintain")
-        
-        # 计算总分
-        total_score = (
-            dps_score * weights.dps_weight +
-            survivability_score * weights.survivability_weight +
-            budget_score * weights.budget_weight +
-            popularity_score * weights.popularity_weight +
-            ease_score * weights.ease_weight
-        )
-        
-        # 计算置信度
-        confidence = self._calculate_confidence(build, component_scores)
-        
-        # 生成解释
-        explanation = self._generate_explanation(build, component_scores, request)
-        
-        return RecommendationScore(
-            total_score=total_score,
-            component_scores=component_scores,
-            confidence=confidence,
-            explanation=explanation,
-            reasons=reasons
-        )
+        """计算单个构筑的评分"""
+        features = CandidateFeatures.from_builds([build])
+        component_scores = self._score_matrix(features, request)
+        weights = (request.scoring_weights or ScoringWeights()).as_vector()
+        total_score = (component_scores @ weights)[0]
+        confidence = self._calculate_confidence(features, component_scores)[0]
+        return self._recommendation_score(build, request, total_score, component_scores[0], confidence)
     
-    def _score_dps(self, build: PoE2Build, request: RecommendationRequest) -> float:
-        """评分DPS"""
-        if not build.stats:
-            return 0.5  # 默认中等分数
-        
-        dps = build.stats.total_dps
-        
-        # 定义DPS阈值
-        excellent_dps = 1500000  # 150万DPS为优秀
-        good_dps = 800000       # 80万DPS为良好
-        acceptable_dps = 400000  # 40万DPS为可接受
-        
-        if dps >= excellent_dps:
-            return 1.0
-        elif dps >= good_dps:
-            return 0.7 + 0.3 * (dps - good_dps) / (excellent_dps - good_dps)
-        elif dps >= acceptable_dps:
-            return 0.4 + 0.3 * (dps - acceptable_dps) / (good_dps - acceptable_dps)
-        else:
-            return max(0.1, 0.4 * dps / acceptable_dps)
+    def _score_matrix(self, features: CandidateFeatures, request: RecommendationRequest) -> np.ndarray:
+        """批量计算各维度评分，列顺序与 SCORING_CRITERIA 一致"""
+        return np.column_stack([
+            self._score_dps(features),
+            self._score_survivability(features),
+            self._score_budget(features, request),
+            self._score_popularity(features),
+            self._score_ease_of_use(features),
+        ])
     
-    def _score_survivability(self, build: PoE2Build, request: RecommendationRequest) -> float:
-        """评分生存性"""
-        if not build.stats:
-            return 0.5
-        
-        ehp = build.stats.effective_health_pool
-        
-        # EHP阈值
-        excellent_ehp = 12000
-        good_ehp = 8000
-        acceptable_ehp = 5000
-        
-        ehp_score = 0.0
-        if ehp >= excellent_ehp:
-            ehp_score = 1.0
-        elif ehp >= good_ehp:
-            ehp_score = 0.7 + 0.3 * (ehp - good_ehp) / (excellent_ehp - good_ehp)
-        elif ehp >= acceptable_ehp:
-            ehp_score = 0.4 + 0.3 * (ehp - acceptable_ehp) / (good_ehp - acceptable_ehp)
-        else:
-            ehp_score = max(0.1, 0.4 * ehp / acceptable_ehp)
+    def _score_dps(self, features: CandidateFeatures) -> np.ndarray:
+        """评分DPS（40万可接受、80万良好、150万优秀，分段线性）"""
+        scores = np.maximum(0.1, np.interp(features.dps, *_DPS_SCORE_CURVE))
+        return np.where(features.has_stats, scores, 0.5)  # 无统计数据给中等分数
+    
+    def _score_survivability(self, features: CandidateFeatures) -> np.ndarray:
+        """评分生存性（EHP分段线性 + 抗性加成）"""
+        ehp_scores = np.maximum(0.1, np.interp(features.ehp, *_EHP_SCORE_CURVE))
         
-        # 抗性加成
-        resistance_bonus = 0.0
-        if build.stats.is_resistance_capped():
-            resistance_bonus = 0.1
-            # 过量抗性额外加成
-            avg_res = (build.stats.fire_resistance + build.stats.cold_resistance + build.stats.lightning_resistance) / 3
-            if avg_res > 75:
-                resistance_bonus += min(0.1, (avg_res - 75) / 50)
+        # 抗性加成，过量抗性额外加成
+        overcap_bonus = np.clip((features.avg_resistance - 75) / 50, 0.0, 0.1)
+        resistance_bonus = np.where(features.resistance_capped, 0.1 + overcap_bonus, 0.0)
         
-        return min(1.0, ehp_score + resistance_bonus)
+        scores = np.minimum(1.0, ehp_scores + resistance_bonus)
+        return np.where(features.has_stats, scores, 0.5)
     
-    def _score_budget(self, build: PoE2Build, request: RecommendationRequest) -> float:
+    def _score_budget(self, features: CandidateFeatures, request: RecommendationRequest) -> np.ndarray:
         """评分预算"""
-        if not build.estimated_cost:
-            return 0.6  # 无成本信息给中等分数
+        cost = features.cost
         
-        cost = build.estimated_cost
-        
-        # 如果有预算要求，基于预算范围评分
         if request.max_budget:
-            if cost <= request.max_budget * 0.5:
-                return 1.0  # 远低于预算
-            elif cost <= request.max_budget * 0.8:
-                return 0.8  # 预算范围内
-            elif cost <= request.max_budget:
-                return 0.6  # 接近预算上限
-            else:
-                return 0.2  # 超出预算
-        
-        # 无预算要求时，基于绝对成本评分
-        if cost <= 3.0:
-            return 1.0  # 非常便宜
-        elif cost <= 8.0:
-            return 0.8  # 便宜
-        elif cost <= 20.0:
-            return 0.6  # 中等
-        elif cost <= 50.0:
-            return 0.4  # 昂贵
+            # 基于预算范围评分: 远低于预算、预算范围内、接近上限、超出预算
+            budget = request.max_budget
+            scores = np.select(
+                [cost <= budget * 0.5, cost <= budget * 0.8, cost <= budget],
+                [1.0, 0.8, 0.6], default=0.2
+            )
         else:
-            return 0.2  # 非常昂贵
+            # 基于绝对成本评分: 非常便宜 ... 非常昂贵
+            scores = np.select(
+                [cost <= 3.0, cost <= 8.0, cost <= 20.0, cost <= 50.0],
+                [1.0, 0.8, 0.6, 0.4], default=0.2
+            )
+        
+        return np.where(features.has_cost, scores, 0.6)  # 无成本信息给中等分数
     
-    async def _score_popularity(self, build: PoE2Build) -> float:
+    def _score_popularity(self, features: CandidateFeatures) -> np.ndarray:
         """评分流行度"""
-        try:
-            # 这里应该查询实际的流行度数据
-            # 现在返回基于构筑特征的模拟分数
-            
-            popularity_indicators = 0
-            
-            # 基于主技能的流行度
-            if build.main_skill_gem:
-                popular_skills = [
-                    "Lightning Arrow", "Explosive Shot", "Fireball", "Arc",
-                    "Earthquake", "Ground Slam", "Infernal Bolt"
-                ]
-                if build.main_skill_gem in popular_skills:
-                    popularity_indicators += 0.3
-            
-            # 基于职业流行度
-            popular_classes = [PoE2CharacterClass.WITCH, PoE2CharacterClass.RANGER]
-            if build.character_class in popular_classes:
-                popularity_indicators += 0.2
-            
-            # 基于预算范围（中等预算通常更受欢迎）
-            if build.estimated_cost:
-                if 5.0 <= build.estimated_cost <= 15.0:
-                    popularity_indicators += 0.2
-            
-            # 基于构筑目标
-            popular_goals = [PoE2BuildGoal.CLEAR_SPEED, PoE2BuildGoal.ENDGAME_CONTENT]
-            if build.goal in popular_goals:
-                popularity_indicators += 0.2
-            
-            # 抗性满足会增加流行度
-            if build.stats and build.stats.is_resistance_capped():
-                popularity_indicators += 0.1
-            
-            return min(1.0, popularity_indicators)
-            
-        except Exception as e:
-            logger.warning(f"流行度评分失败: {e}")
-            return 0.5
+        # 这里应该查询实际的流行度数据
+        # 现在基于主技能、职业、中等预算、构筑目标和抗性的模拟分数
+        mid_budget = features.has_cost & (features.cost >= 5.0) & (features.cost <= 15.0)
+        scores = (
+            0.3 * features.popular_skill +
+            0.2 * features.popular_class +
+            0.2 * mid_budget +
+            0.2 * features.popular_goal +
+            0.1 * features.resistance_capped
+        )
+        return np.minimum(1.0, scores)
     
-    def _score_ease_of_use(self, build: PoE2Build) -> float:
+    def _score_ease_of_use(self, features: CandidateFeatures) -> np.ndarray:
         """评分易用性"""
-        ease_score = 1.0
-        
         # 复杂度惩罚
-        complexity = self._estimate_build_complexity(build)
-        if complexity == "high":
-            ease_score -= 0.3
-        elif complexity == "medium":
-            ease_score -= 0.1
+        complexity_penalty = np.select(
+            [features.complexity_levels == 3, features.complexity_levels == 2], [0.3, 0.1], default=0.0
+        )
+        # 昂贵构筑、技能组合复杂、关键物品依赖
+        expensive = features.has_cost & (features.cost > 30.0)
+        
+        scores = (
+            1.0 - complexity_penalty -
+            0.2 * expensive -
+            0.1 * (features.support_counts > 5) -
+            0.1 * (features.key_item_counts > 3)
+        )
+        return np.maximum(0.1, scores)
+    
+    def _calculate_confidence(self, features: CandidateFeatures, component_scores: np.ndarray) -> np.ndarray:
+        """
+        计算推荐置信度
         
-        # 昂贵构筑通常更难使用
-        if build.estimated_cost and build.estimated_cost > 30.0:
-            ease_score -= 0.2
+        Args:
+            features: 候选构筑特征
+            component_scores: 与 features 行对应的评分矩阵
+        """
+        # 数据完整性
+        data_completeness = (
+            0.5 + 0.3 * features.has_stats + 0.1 * features.has_cost + 0.1 * features.has_main_skill
+        )
         
-        # 技能组合复杂度
-        if build.support_gems and len(build.support_gems) > 5:
-            ease_score -= 0.1
+        # 评分一致性（各维度评分差异小说明更可靠）
+        consistency = np.maximum(0.0, 1.0 - component_scores.var(axis=1))
         
-        # 关键物品依赖
-        if build.key_items and len(build.key_items) > 3:
-            ease_score -= 0.1
+        # 构筑验证状态
+        validation_score = np.where(features.valid, 0.8, 0.3)
         
-        return max(0.1, ease_score)
+        return (data_completeness + consistency + validation_score) / 3
+    
+    def _build_recommendation(self, build: PoE2Build, request: RecommendationRequest,
+                              total_score: float, component_scores: np.ndarray,
+                              confidence: float) -> BuildRecommendation:
+        """为入选构筑生成完整推荐结果"""
+        return BuildRecommendation(
+            build=build,
+            score=self._recommendation_score(build, request, total_score, component_scores, confidence),
+            recommendation_type=self._determine_recommendation_type(build, request),
+            similarity_to_request=self._calculate_similarity(build, request),
+            market_trend=self._get_market_trend(build),
+            meta_rank=self._get_meta_rank(build)
+        )
     
-    def _calculate_confidence(self, build: PoE2Build, component_scores: Dict[ScoringCriteria, float]) -> float:
-        """计算推荐置信度"""
-        confidence_factors = []
+    def _recommendation_score(self, build: PoE2Build, request: RecommendationRequest,
+                              total_score: float, component_scores: np.ndarray,
+                              confidence: float) -> RecommendationScore:
+        """由评分向量生成评分详情和推荐理由"""
+        scores = {criteria: float(score) for criteria, score in zip(SCORING_CRITERIA, component_scores)}
+        reasons = []
         
-        # 数据完整性
-        data_completeness = 0.5
-        if build.stats:
-            data_completeness += 0.3
-        if build.estimated_cost:
-            data_completeness += 0.1
-        if build.main_skill_gem:
-            data_completeness += 0.1
+        if scores[ScoringCriteria.DPS] > 0.8:
+            reasons.append(f"Excellent DPS: {build.stats.total_dps:,.0f}" if build.stats else "High DPS potential")
         
-        confidence_factors.append(data_completeness)
+        if scores[ScoringCriteria.SURVIVABILITY] > 0.8:
+            reasons.append(f"Strong survivability: {build.stats.effective_health_pool:,.0f} EHP" if build.stats else "Good survivability")
         
-        # 评分一致性（各维度评分差异小说明更可靠）
-        scores = list(component_scores.values())
-        if scores:
-            score_variance = sum((s - sum(scores)/len(scores))**2 for s in scores) / len(scores)
-            consistency = max(0.0, 1.0 - score_variance)
-            confidence_factors.append(consistency)
+        if scores[ScoringCriteria.BUDGET] > 0.8:
+            cost_str = f"{build.estimated_cost} divine" if build.estimated_cost else "budget-friendly"
+            reasons.append(f"Budget-friendly: {cost_str}")
         
-        # 构筑验证状态
-        validation_score = 0.8 if build.validate() else 0.3
-        confidence_factors.append(validation_score)
+        if scores[ScoringCriteria.POPULARITY] > 0.7:
+            reasons.append("Popular in current meta")
         
-        return sum(confidence_factors) / len(confidence_factors)
+        if scores[ScoringCriteria.EASE_OF_USE] > 0.8:
+            reasons.append("Easy to play and maintain")
+        
+        return RecommendationScore(
+            total_score=float(total_score),
+            component_scores=scores,
+            confidence=float(confidence),
+            explanation=self._generate_explanation(build, scores, request),
+            reasons=reasons
+        )
     
     def _generate_explanation(self, build: PoE2Build, component_scores: Dict[ScoringCriteria, float], request: RecommendationRequest) -> str:
         """生成推荐解释"""
@@ -600,79 +619,66 @@ class PoE2Recommender:
         
         return similarity_score / factors if factors > 0 else 0.5
     
-    def _rank_and_filter_recommendations(self, recommendations: List[BuildRecommendation], request: RecommendationRequest) -> List[BuildRecommendation]:
-        """排序和筛选推荐结果"""
-        # 按评分排序
-        recommendations.sort(key=lambda r: (r.score.total_score, r.score.confidence), reverse=True)
-        
-        # 多样化推荐（避免过于相似的构筑）
-        diversified = self._diversify_recommendations(recommendations)
+    def _rank_and_filter_recommendations(self, features: CandidateFeatures, candidates: np.ndarray,
+                                         total_scores: np.ndarray, confidences: np.ndarray,
+                                         request: RecommendationRequest) -> List[int]:
+        """
+        排序和筛选推荐结果
         
-        # 限制数量
-        final_count = min(len(diversified), request.max_recommendations)
+        Returns:
+            入选构筑在 candidates 中的位置，按推荐顺序排列
+        """
+        # 按评分排序（评分相同时按置信度），同分保持候选原有顺序
+        order = np.lexsort((-confidences, -total_scores))
         
-        return diversified[:final_count]
+        # 多样化推荐（避免过于相似的构筑）并限制数量
+        final_count = min(len(order), request.max_recommendations)
+        selected = self._diversify_recommendations(features, candidates[order], total_scores[order], final_count)
+        return [int(order[position]) for position in selected]
     
-    def _diversify_recommendations(self, recommendations: List[BuildRecommendation]) -> List[BuildRecommendation]:
-        """推荐多样化"""
-        if len(recommendations) <= 3:
-            return recommendations
+    def _diversify_recommendations(self, features: CandidateFeatures, ranked: np.ndarray,
+                                   relevance: np.ndarray, count: int) -> List[int]:
+        """
+        推荐多样化（MMR）
         
-        diversified = [recommendations[0]]  # 总是包含最高分的
+        每一步选择 λ·评分 - (1-λ)·与已选构筑最大余弦相似度 最高的候选，
+        λ 由配置项 diversity_lambda 控制（默认0.7，1.0 表示只按评分排序）。
         
-        for rec in recommendations[1:]:
-            # 检查是否与已选择的构筑过于相似
-            is_diverse = True
-            for selected in diversified:
-                similarity = self._calculate_build_similarity(rec.build, selected.build)
-                if similarity > 0.8:  # 相似度阈值
-                    is_diverse = False
-                    break
+        Args:
+            features: 候选构筑特征
+            ranked: 按评分排好序的构筑行号
+            relevance: 与 ranked 对应的评分
+            count: 选择数量
             
-            if is_diverse:
-                diversified.append(rec)
-                if len(diversified) >= 8:  # 最多8个多样化推荐
-                    break
-        
-        # 如果多样化后数量不足，添加剩余的高分构筑
-        while len(diversified) < min(len(recommendations), 10):
-            for rec in recommendations:
-                if rec not in diversified:
-                    diversified.append(rec)
-                    break
-        
-        return diversified
-    
-    def _calculate_build_similarity(self, build1: PoE2Build, build2: PoE2Build) -> float:
-        """计算两个构筑的相似度"""
-        similarity_factors = []
-        
-        # 职业相同
-        if build1.character_class == build2.character_class:
-            similarity_factors.append(1.0)
-        else:
-            similarity_factors.append(0.0)
+        Returns:
+            入选构筑在 ranked 中的位置，按选择顺序排列
+        """
+        if count <= 0:
+            return []
         
-        # 主技能相同
-        if build1.main_skill_gem == build2.main_skill_gem:
-            similarity_factors.append(1.0)
-        else:
-            similarity_factors.append(0.0)
+        diversity_lambda = self.config.get('diversity_lambda', 0.7)
+        feature_matrix = features.similarity_matrix(ranked)
         
-        # 目标相同
-        if build1.goal == build2.goal:
-            similarity_factors.append(0.8)
-        else:
-            similarity_factors.append(0.0)
+        selected = [0]  # 总是包含最高分的
+        max_similarity = feature_matrix @ feature_matrix[0]
+        available = np.ones(len(ranked), dtype=bool)
+        available[0] = False
         
-        # 预算相似
-        if build1.estimated_cost and build2.estimated_cost:
-            cost_ratio = min(build1.estimated_cost, build2.estimated_cost) / max(build1.estimated_cost, build2.estimated_cost)
-            similarity_factors.append(cost_ratio)
-        else:
-            similarity_factors.append(0.5)
+        while len(selected) < count:
+            mmr = diversity_lambda * relevance - (1.0 - diversity_lambda) * max_similarity
+            mmr[~available] = -np.inf
+            best = int(np.argmax(mmr))
+            
+            selected.append(best)
+            available[best] = False
+            np.maximum(max_similarity, feature_matrix @ feature_matrix[best], out=max_similarity)
         
-        return sum(similarity_factors) / len(similarity_factors)
+        return selected
+    
+    def _calculate_build_similarity(self, build1: PoE2Build, build2: PoE2Build) -> float:
+        """计算两个构筑的相似度（多样化特征向量的余弦相似度）"""
+        vectors = CandidateFeatures.from_builds([build1, build2]).similarity_matrix()
+        return float(vectors[0] @ vectors[1])
     
     def _is_meta_build(self, build: PoE2Build) -> bool:
         """检查是否为流行构筑"""
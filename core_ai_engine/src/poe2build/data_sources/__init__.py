@@ -37,54 +37,91 @@ poe2db = get_poe2db_client()
 ```
 """
 
-# 基础数据源类
-from .base_data_source import BaseDataSource
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-# 四大核心数据源导入
-from .poe2scout.api_client import (
-    PoE2ScoutClient,
-    ItemPrice,
-    CurrencyExchange,
-    get_poe2scout_client
-)
+from ..utils.lazy_import import attach_lazy_attributes
 
-from .ninja.scraper import (
-    NinjaMetaScraper,
-    PopularBuild,
-    SkillUsageStats,
-    AscendancyTrend,
-    get_ninja_scraper
-)
+# 导出属性 -> 所在子模块，首次访问时才导入 (PEP 562)；
+# requests、BeautifulSoup等依赖随对应数据源模块按需加载
+_LAZY_ATTRIBUTES = {
+    # 基础数据源类
+    'BaseDataSource': 'base_data_source',
+    
+    # 四大核心数据源
+    'PoE2ScoutClient': 'poe2scout.api_client',
+    'ItemPrice': 'poe2scout.api_client',
+    'CurrencyExchange': 'poe2scout.api_client',
+    'get_poe2scout_client': 'poe2scout.api_client',
+    
+    'NinjaMetaScraper': 'ninja.scraper',
+    'PopularBuild': 'ninja.scraper',
+    'SkillUsageStats': 'ninja.scraper',
+    'AscendancyTrend': 'ninja.scraper',
+    'get_ninja_scraper': 'ninja.scraper',
+    
+    'PoB2DataExtractor': 'pob2.data_extractor',
+    'SkillGem': 'pob2.data_extractor',
+    'PassiveNode': 'pob2.data_extractor',
+    'BaseItem': 'pob2.data_extractor',
+    'get_pob2_extractor': 'pob2.data_extractor',
+    
+    'PoE2DBClient': 'poe2db.api_client',
+    'ItemDetail': 'poe2db.api_client',
+    'SkillDetail': 'poe2db.api_client',
+    'AscendancyInfo': 'poe2db.api_client',
+    'get_poe2db_client': 'poe2db.api_client',
+    
+    # 详情页爬取调度
+    'CrawlScheduler': 'crawl_scheduler',
+    'CrawlCheckpoint': 'crawl_scheduler',
+    'CrawlResult': 'crawl_scheduler',
+    'HostRateLimiter': 'crawl_scheduler',
+}
 
-from .pob2.data_extractor import (
-    PoB2DataExtractor,
-    SkillGem,
-    PassiveNode,
-    BaseItem,
-    get_pob2_extractor
-)
+_lazy_getattr, __dir__ = attach_lazy_attributes(__name__, _LAZY_ATTRIBUTES)
 
-from .poe2db.api_client import (
-    PoE2DBClient,
-    ItemDetail,
-    SkillDetail,
-    AscendancyInfo,
-    get_poe2db_client
-)
+if TYPE_CHECKING:  # 供静态分析和IDE补全使用
+    from .base_data_source import BaseDataSource
+    from .poe2scout.api_client import PoE2ScoutClient, ItemPrice, CurrencyExchange, get_poe2scout_client
+    from .ninja.scraper import (
+        NinjaMetaScraper, PopularBuild, SkillUsageStats, AscendancyTrend, get_ninja_scraper
+    )
+    from .pob2.data_extractor import PoB2DataExtractor, SkillGem, PassiveNode, BaseItem, get_pob2_extractor
+    from .poe2db.api_client import PoE2DBClient, ItemDetail, SkillDetail, AscendancyInfo, get_poe2db_client
+    from .crawl_scheduler import CrawlScheduler, CrawlCheckpoint, CrawlResult, HostRateLimiter
 
-# 导入动态数据爬虫系统
-try:
-    import sys
-    from pathlib import Path
-    project_root = Path(__file__).parent.parent.parent.parent.parent
-    sys.path.insert(0, str(project_root))
+# 动态数据爬虫系统（项目根目录下的脚本），首次使用时才导入
+_dynamic_crawlers_loaded = False
+
+def _load_dynamic_crawlers() -> bool:
+    """导入动态数据爬虫系统，返回是否可用（结果会被缓存）"""
+    global _dynamic_crawlers_loaded, DYNAMIC_CRAWLERS_AVAILABLE
+    global DynamicDataManager, PoB2GitHubDownloader, PoE2RealisticDataSystem
+    if _dynamic_crawlers_loaded:
+        return DYNAMIC_CRAWLERS_AVAILABLE
     
-    from dynamic_data_crawlers import DynamicDataManager
-    from pob2_github_downloader import PoB2GitHubDownloader  
-    from poe2_realistic_data_system import PoE2RealisticDataSystem
-    DYNAMIC_CRAWLERS_AVAILABLE = True
-except ImportError:
-    DYNAMIC_CRAWLERS_AVAILABLE = False
+    try:
+        project_root = Path(__file__).parent.parent.parent.parent.parent
+        sys.path.insert(0, str(project_root))
+        
+        from dynamic_data_crawlers import DynamicDataManager
+        from pob2_github_downloader import PoB2GitHubDownloader  
+        from poe2_realistic_data_system import PoE2RealisticDataSystem
+        DYNAMIC_CRAWLERS_AVAILABLE = True
+    except ImportError:
+        DYNAMIC_CRAWLERS_AVAILABLE = False
+    _dynamic_crawlers_loaded = True
+    return DYNAMIC_CRAWLERS_AVAILABLE
+
+def __getattr__(name):
+    if name == 'DYNAMIC_CRAWLERS_AVAILABLE':
+        return _load_dynamic_crawlers()
+    if name in ('DynamicDataManager', 'PoB2GitHubDownloader', 'PoE2RealisticDataSystem'):
+        if _load_dynamic_crawlers():
+            return globals()[name]
+    return _lazy_getattr(name)
 
 # 便捷函数：获取所有四大数据源
 def get_all_four_sources(limit=None):
@@ -104,8 +141,13 @@ def get_all_four_sources(limit=None):
         'poe2db_data': []
     }
     
+    from .ninja.scraper import get_ninja_scraper
+    from .poe2db.api_client import get_poe2db_client
+    from .poe2scout.api_client import get_poe2scout_client
+    from .pob2.data_extractor import get_pob2_extractor
+    
     # 使用动态爬虫系统获取实时数据
-    if DYNAMIC_CRAWLERS_AVAILABLE:
+    if _load_dynamic_crawlers():
         try:
             dynamic_manager = DynamicDataManager()
             dynamic_data = dynamic_manager.update_all_data()
@@ -158,8 +200,10 @@ def health_check_all_sources():
         'poe2db': {'status': {'status': 'unknown'}, 'description': '未知状态'}
     }
     
+    from .pob2.data_extractor import get_pob2_extractor
+    
     # 使用动态爬虫系统进行健康检查
-    if DYNAMIC_CRAWLERS_AVAILABLE:
+    if _load_dynamic_crawlers():
         try:
             dynamic_manager = DynamicDataManager()
             
@@ -289,6 +333,12 @@ __all__ = [
     'AscendancyInfo',
     'get_poe2db_client',
     
+    # 详情页爬取调度
+    'CrawlScheduler',
+    'CrawlCheckpoint',
+    'CrawlResult',
+    'HostRateLimiter',
+    
     # 便捷函数
     'get_all_four_sources',
     'health_check_all_sources'
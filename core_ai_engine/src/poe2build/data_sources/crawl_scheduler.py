@@ -0,0 +1,345 @@
+"""
+爬取调度器 - 有界并发、按主机限速、可断点续爬
+
+长时间的全站爬取（如poe2db全部技能/物品详情页）中途失败时不再丢失全部进度：
+每个URL的状态和解析结果写入sqlite工作队列，下次运行时跳过已完成的URL。
+
+使用示例:
+```python
+checkpoint = CrawlCheckpoint("data_storage/poe2db_cache/crawl_checkpoint.sqlite")
+scheduler = CrawlScheduler(fetch=fetch_page, parse=parse_gem_page,
+                           checkpoint=checkpoint, max_workers=4)
+result = scheduler.run(detail_urls, kind="skill_gem")
+for record in result.records:
+    ...
+```
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+from urllib.parse import urlsplit
+
+from ..resilience.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# 单个主机默认限速（与 PoE2RateLimiters.create_poe2db_limiter 一致）
+DEFAULT_REQUESTS_PER_SECOND = 1.0
+DEFAULT_BURST_CAPACITY = 3
+
+# 每个工作线程最多排队的任务数
+_QUEUE_FACTOR = 2
+
+# 检查点记录的默认有效期：超过后整类任务重新爬取（poe2db随补丁更新）
+DEFAULT_MAX_AGE = 24 * 3600
+
+
+class HostRateLimiter:
+    """
+    按主机的阻塞式令牌桶限速
+    
+    同一主机的所有调度器、所有工作线程共享一个令牌桶，
+    并发数再高也不会超过主机的请求速率。
+    """
+    
+    def __init__(self, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 burst_capacity: int = DEFAULT_BURST_CAPACITY):
+        if requests_per_second <= 0:
+            raise ValueError(f"无效的请求速率: {requests_per_second}")
+        self.requests_per_second = requests_per_second
+        self.burst_capacity = max(1, burst_capacity)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+    
+    def set_host_limit(self, host: str, requests_per_second: float, burst_capacity: Optional[int] = None):
+        """为单个主机设置不同的速率"""
+        with self._lock:
+            self._buckets[host] = TokenBucket(
+                capacity=burst_capacity or max(1, int(requests_per_second * 2)),
+                refill_rate=requests_per_second
+            )
+    
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(capacity=self.burst_capacity, refill_rate=self.requests_per_second)
+                self._buckets[host] = bucket
+            return bucket
+    
+    def acquire(self, url: str, timeout: Optional[float] = None) -> bool:
+        """
+        等待URL所在主机的令牌
+        
+        Returns:
+            是否在超时前拿到令牌（timeout为None时一直等待）
+        """
+        bucket = self._bucket(urlsplit(url).netloc)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        while not bucket.consume():
+            wait = max(0.01, (1 - bucket.get_available_tokens()) / bucket.refill_rate)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+        return True
+
+
+# 进程内共享的限速器：不同爬虫实例访问同一主机时共用配额
+_shared_rate_limiter = HostRateLimiter()
+
+
+def get_shared_rate_limiter() -> HostRateLimiter:
+    """获取进程内共享的按主机限速器"""
+    return _shared_rate_limiter
+
+
+class CrawlCheckpoint:
+    """
+    sqlite工作队列
+    
+    记录每个URL的状态（pending/done/failed）、失败次数和解析结果；
+    结果按URL首次入队的顺序返回。任务按 (kind, url) 区分，
+    不同解析器共享同一文件时应使用不同的kind。
+    """
+    
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+    
+    _SCHEMA_VERSION = 2
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS crawl_tasks (
+            kind TEXT NOT NULL,
+            url TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            record TEXT,
+            error TEXT,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (kind, url)
+        );
+        CREATE INDEX IF NOT EXISTS idx_crawl_tasks_kind_status ON crawl_tasks (kind, status);
+    """
+    
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        """
+        Args:
+            path: sqlite文件路径，":memory:" 表示不持久化
+        """
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < self._SCHEMA_VERSION:
+                # 旧版本只按URL区分任务，不同kind的记录会互相覆盖，直接丢弃重新爬取
+                self._conn.execute("DROP TABLE IF EXISTS crawl_tasks")
+                self._conn.execute(f"PRAGMA user_version = {self._SCHEMA_VERSION}")
+            self._conn.executescript(self._SCHEMA)
+    
+    def enqueue(self, urls: Iterable[str], kind: str) -> int:
+        """加入新的URL（已存在的URL保持原状态），返回新增数量"""
+        now = time.time()
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO crawl_tasks (kind, url, status, updated_at) VALUES (?, ?, ?, ?)",
+                ((kind, url, self.PENDING, now) for url in urls)
+            )
+            return self._conn.total_changes - before
+    
+    def pending(self, kind: str, max_attempts: Optional[int] = None) -> List[str]:
+        """待爬取的URL（包括失败次数未达上限的URL）"""
+        query = "SELECT url FROM crawl_tasks WHERE kind = ? AND status != ?"
+        params: List[Any] = [kind, self.DONE]
+        if max_attempts is not None:
+            query += " AND attempts < ?"
+            params.append(max_attempts)
+        with self._lock:
+            return [row[0] for row in self._conn.execute(query + " ORDER BY rowid", params)]
+    
+    def mark_done(self, url: str, record: Optional[Dict[str, Any]], kind: str):
+        """记录完成的URL和解析结果"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE crawl_tasks SET status = ?, attempts = attempts + 1, record = ?, error = NULL, "
+                "updated_at = ? WHERE kind = ? AND url = ?",
+                (self.DONE, json.dumps(record, ensure_ascii=False, default=str), time.time(), kind, url)
+            )
+    
+    def mark_failed(self, url: str, error: str, kind: str):
+        """记录失败的URL"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE crawl_tasks SET status = ?, attempts = attempts + 1, error = ?, updated_at = ? "
+                "WHERE kind = ? AND url = ?",
+                (self.FAILED, error, time.time(), kind, url)
+            )
+    
+    def records(self, kind: str) -> List[Dict[str, Any]]:
+        """已完成URL的解析结果（按入队顺序，跳过空结果）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT record FROM crawl_tasks WHERE kind = ? AND status = ? ORDER BY rowid",
+                (kind, self.DONE)
+            ).fetchall()
+        records = (json.loads(row[0]) for row in rows)
+        return [record for record in records if record is not None]
+    
+    def progress(self, kind: str) -> Dict[str, int]:
+        """各状态的URL数量"""
+        counts = {self.PENDING: 0, self.DONE: 0, self.FAILED: 0}
+        with self._lock:
+            for status, count in self._conn.execute(
+                "SELECT status, COUNT(*) FROM crawl_tasks WHERE kind = ? GROUP BY status", (kind,)
+            ):
+                counts[status] = count
+        return counts
+    
+    def reset(self, kind: str):
+        """清空某类任务（重新全量爬取）"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM crawl_tasks WHERE kind = ?", (kind,))
+    
+    def expire(self, kind: str, max_age: float) -> int:
+        """删除超过有效期的任务（下次入队时重新爬取），返回删除数量"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM crawl_tasks WHERE kind = ? AND updated_at < ?", (kind, time.time() - max_age)
+            )
+            return cursor.rowcount
+    
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass
+class CrawlResult:
+    """一次调度运行的结果"""
+    records: List[Dict[str, Any]] = field(default_factory=list)  # 全部已完成记录（含之前运行的）
+    completed: int = 0          # 本次完成的URL数
+    failed: int = 0             # 本次失败的URL数
+    resumed: int = 0            # 之前已完成、本次跳过的URL数
+    elapsed: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+class CrawlScheduler:
+    """
+    爬取调度器
+    
+    fetch(url) 返回页面内容，parse(url, content) 返回可JSON序列化的记录（或None跳过）；
+    两者都在工作线程中执行，检查点只在调度线程中写入。
+    """
+    
+    def __init__(self,
+                 fetch: Callable[[str], Any],
+                 parse: Callable[[str, Any], Optional[Dict[str, Any]]],
+                 checkpoint: Optional[CrawlCheckpoint] = None,
+                 max_workers: int = 4,
+                 rate_limiter: Optional[HostRateLimiter] = None,
+                 max_attempts: int = 3,
+                 max_age: Optional[float] = DEFAULT_MAX_AGE):
+        """
+        Args:
+            fetch: 页面获取函数
+            parse: 页面解析函数
+            checkpoint: 检查点（默认仅内存）
+            max_workers: 并发工作线程数
+            rate_limiter: 按主机限速器（默认进程内共享）
+            max_attempts: 单个URL跨运行累计的最大尝试次数
+            max_age: 检查点记录的有效期（秒），过期的URL重新爬取；None表示永不过期
+        """
+        if max_workers < 1:
+            raise ValueError(f"无效的工作线程数: {max_workers}")
+        self.fetch = fetch
+        self.parse = parse
+        self.checkpoint = checkpoint or CrawlCheckpoint()
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter or get_shared_rate_limiter()
+        self.max_attempts = max_attempts
+        self.max_age = max_age
+        self._stop = threading.Event()
+    
+    def stop(self):
+        """请求停止：已提交的任务完成后返回，未开始的URL留待下次续爬"""
+        self._stop.set()
+    
+    def _crawl_one(self, url: str) -> Optional[Dict[str, Any]]:
+        self.rate_limiter.acquire(url)
+        return self.parse(url, self.fetch(url))
+    
+    def run(self, urls: Iterable[str], kind: str) -> CrawlResult:
+        """
+        爬取URL列表（续爬已有检查点）
+        
+        Args:
+            urls: 要爬取的URL
+            kind: 任务类别（同一检查点中区分技能、物品等）
+        """
+        start_time = time.time()
+        self._stop.clear()
+        result = CrawlResult()
+        
+        if self.max_age is not None:
+            expired = self.checkpoint.expire(kind, self.max_age)
+            if expired:
+                logger.info(f"Expired {expired} stale {kind} checkpoint entries")
+        self.checkpoint.enqueue(urls, kind)
+        todo = self.checkpoint.pending(kind, self.max_attempts)
+        result.resumed = self.checkpoint.progress(kind)[CrawlCheckpoint.DONE]
+        if result.resumed:
+            logger.info(f"Resuming {kind} crawl: {result.resumed} done, {len(todo)} remaining")
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = deque()
+            todo_iter = iter(todo)
+            
+            def submit_next() -> bool:
+                if self._stop.is_set():
+                    return False
+                url = next(todo_iter, None)
+                if url is None:
+                    return False
+                in_flight.append((url, executor.submit(self._crawl_one, url)))
+                return True
+            
+            for _ in range(self.max_workers * _QUEUE_FACTOR):
+                if not submit_next():
+                    break
+            
+            while in_flight:
+                url, future = in_flight.popleft()
+                try:
+                    record = future.result()
+                except Exception as e:
+                    logger.warning(f"Failed to crawl {url}: {e}")
+                    self.checkpoint.mark_failed(url, str(e), kind)
+                    result.failed += 1
+                    result.errors[url] = str(e)
+                else:
+                    self.checkpoint.mark_done(url, record, kind)
+                    result.completed += 1
+                submit_next()
+        
+        result.records = self.checkpoint.records(kind)
+        result.elapsed = time.time() - start_time
+        logger.info(f"Crawled {kind}: {result.completed} completed, {result.failed} failed "
+                    f"in {result.elapsed:.1f}s")
+        return result
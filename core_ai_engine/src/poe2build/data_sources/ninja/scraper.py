@@ -8,12 +8,14 @@ https://poe.ninja/poe2/builds
 import requests
 import time
 import json
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Any
+from dataclasses import dataclass, asdict
 from datetime import datetime
 from bs4 import BeautifulSoup
 import re
 
+from .snapshots import MetaSnapshotDelta, MetaSnapshotStore
+
 
 @dataclass
 class PopularBuild:
@@ -44,6 +46,14 @@ class SkillUsageStats:
     trend: str  # "rising", "stable", "falling"
 
 
+@dataclass
+class _LeagueMeta:
+    """联盟的最近一次抓取"""
+    builds: List[PopularBuild]
+    fetched_at: datetime
+    version: Optional[int]  # 对应的快照版本
+
+
 @dataclass
 class AscendancyTrend:
     """升华趋势数据"""
@@ -60,12 +70,16 @@ class NinjaMetaScraper:
     
     BASE_URL = "https://poe.ninja/poe2"
     
-    def __init__(self, cache_duration: int = 1800):  # 30分钟缓存
+    def __init__(self, cache_duration: int = 1800,  # 30分钟缓存
+                 snapshot_path: Optional[str] = None,
+                 snapshot_versions: int = 10):
         """
         初始化爬虫
         
         Args:
             cache_duration: 缓存持续时间（秒）
+            snapshot_path: Meta快照sqlite文件，None表示只保存在内存
+            snapshot_versions: 每个联盟保留的快照版本数
         """
         self.cache_duration = cache_duration
         self.session = requests.Session()
@@ -77,10 +91,15 @@ class NinjaMetaScraper:
             'Connection': 'keep-alive'
         })
         
-        # 缓存
-        self._builds_cache: Optional[tuple] = None  # (data, timestamp)
-        self._skills_cache: Optional[tuple] = None
-        self._ascendancy_cache: Optional[tuple] = None
+        # 版本化快照：每次刷新与上一版本比较，只把变化推送给下游
+        self.snapshots = MetaSnapshotStore(snapshot_path or ":memory:")
+        self.snapshot_versions = snapshot_versions
+        self.last_deltas: Dict[str, MetaSnapshotDelta] = {}
+        self._delta_listeners: List[Callable[[MetaSnapshotDelta], None]] = []
+        
+        # 缓存：联盟 -> 最近一次抓取；(统计类型, 联盟) -> (快照版本, 统计结果)
+        self._league_meta: Dict[str, _LeagueMeta] = {}
+        self._derived_cache: Dict[tuple, tuple] = {}
         
         # 速率限制
         self.last_request_time = 0
@@ -125,18 +144,73 @@ class NinjaMetaScraper:
             流行构筑列表
         """
         # 检查缓存
-        if self._builds_cache:
-            data, timestamp = self._builds_cache
-            if self._is_cache_valid(timestamp):
-                return data[:limit]
+        meta = self._league_meta.get(league)
+        if meta and self._is_cache_valid(meta.fetched_at):
+            return meta.builds[:limit]
         
+        if self.refresh(league) is None:
+            return []
+        return self._league_meta[league].builds[:limit]
+    
+    def refresh(self, league: str = "Standard") -> Optional[MetaSnapshotDelta]:
+        """
+        重新抓取流行构筑并提交为新的快照版本
+        
+        快照总是保存完整列表（limit只在返回时截取），否则不同limit的调用
+        会被当作构筑的移除和重新加入。有变化时通知订阅者（只推送差异）。
+        
+        Args:
+            league: 联盟名称
+        
+        Returns:
+            相对上一版本的差异，请求失败时返回None
+        """
+        builds = self._fetch_popular_builds(league)
+        if builds is None:
+            return None
+        
+        delta = self.snapshots.commit(league, [asdict(build) for build in builds])
+        self._league_meta[league] = _LeagueMeta(builds, datetime.now(), delta.version)
+        self.last_deltas[league] = delta
+        
+        if not delta.is_empty:
+            self.snapshots.prune(league, keep=self.snapshot_versions)
+            for listener in list(self._delta_listeners):
+                try:
+                    listener(delta)
+                except Exception as e:
+                    print(f"Meta差异推送失败: {e}")
+        
+        return delta
+    
+    def subscribe(self, listener: Callable[[MetaSnapshotDelta], None]):
+        """订阅Meta变化（每次刷新有变化时以差异调用）"""
+        self._delta_listeners.append(listener)
+    
+    def unsubscribe(self, listener: Callable[[MetaSnapshotDelta], None]):
+        """取消订阅"""
+        if listener in self._delta_listeners:
+            self._delta_listeners.remove(listener)
+    
+    def get_meta_delta(self, league: str = "Standard", since_version: Optional[int] = None) -> MetaSnapshotDelta:
+        """
+        获取某个快照版本以来的累计变化
+        
+        Args:
+            league: 联盟名称
+            since_version: 下游已处理到的版本，None表示全部构筑
+        """
+        return self.snapshots.diff(league, since_version)
+    
+    def _fetch_popular_builds(self, league: str) -> Optional[List[PopularBuild]]:
+        """抓取并解析流行构筑页面（完整列表），请求失败时返回None"""
         url = f"{self.BASE_URL}/builds"
         if league != "Standard":
             url += f"?league={league}"
         
         soup = self._make_request(url)
         if not soup:
-            return []
+            return None
         
         builds = []
         
@@ -144,7 +218,7 @@ class NinjaMetaScraper:
             # 查找构筑表格或卡片
             build_elements = soup.find_all(['tr', 'div'], class_=lambda x: x and 'build' in x.lower())
             
-            for element in build_elements[:limit]:
+            for element in build_elements:
                 build_data = self._parse_build_element(element)
                 if build_data:
                     builds.append(build_data)
@@ -152,10 +226,21 @@ class NinjaMetaScraper:
         except Exception as e:
             print(f"解析构筑数据失败: {e}")
         
-        # 缓存结果
-        self._builds_cache = (builds, datetime.now())
-        
         return builds
+        
+    def _cached_derived(self, kind: str, league: str) -> tuple:
+        """
+        按快照版本缓存的统计结果
+        
+        Returns:
+            (快照版本, 缓存的结果或None)
+        """
+        meta = self._league_meta.get(league)
+        version = meta.version if meta else None
+        cached = self._derived_cache.get((kind, league))
+        if cached and cached[0] == version and version is not None:
+            return version, cached[1]
+        return version, None
     
     def _parse_build_element(self, element) -> Optional[PopularBuild]:
         """解析构筑元素"""
@@ -278,14 +363,11 @@ class NinjaMetaScraper:
         Returns:
             技能使用统计列表
         """
-        # 检查缓存
-        if self._skills_cache:
-            data, timestamp = self._skills_cache
-            if self._is_cache_valid(timestamp):
-                return data
-        
-        # 从构筑数据中统计技能使用情况
+        # 从构筑数据中统计技能使用情况（Meta没有变化时直接使用上次的统计）
         builds = self.get_popular_builds(league)
+        version, cached = self._cached_derived('skills', league)
+        if cached is not None:
+            return cached
         
         skill_stats = {}
         total_builds = len(builds)
@@ -336,7 +418,7 @@ class NinjaMetaScraper:
         usage_stats.sort(key=lambda x: x.usage_percentage, reverse=True)
         
         # 缓存结果
-        self._skills_cache = (usage_stats, datetime.now())
+        self._derived_cache[('skills', league)] = (version, usage_stats)
         
         return usage_stats
     
@@ -350,13 +432,10 @@ class NinjaMetaScraper:
         Returns:
             升华趋势列表
         """
-        # 检查缓存
-        if self._ascendancy_cache:
-            data, timestamp = self._ascendancy_cache
-            if self._is_cache_valid(timestamp):
-                return data
-        
         builds = self.get_popular_builds(league)
+        version, cached = self._cached_derived('ascendancy', league)
+        if cached is not None:
+            return cached
         
         ascendancy_stats = {}
         total_builds = len(builds)
@@ -400,7 +479,7 @@ class NinjaMetaScraper:
         trends.sort(key=lambda x: x.popularity_percentage, reverse=True)
         
         # 缓存结果
-        self._ascendancy_cache = (trends, datetime.now())
+        self._derived_cache[('ascendancy', league)] = (version, trends)
         
         return trends
     
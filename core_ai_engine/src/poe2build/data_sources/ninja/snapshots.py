@@ -0,0 +1,306 @@
+"""
+poe.ninja Meta快照 - 版本化、按内容哈希存储的构筑记录
+
+每次刷新把构筑列表提交为一个新版本的快照，并与上一版本比较，
+得到新增/移除/变化的构筑 (MetaSnapshotDelta)。下游只需处理变化的部分，
+不必在每次刷新时重新处理整个Meta。
+
+内容相同的构筑记录只保存一份；与上一版本完全相同的刷新不会产生新版本。
+
+使用示例:
+```python
+store = MetaSnapshotStore("data_storage/ninja_cache/meta_snapshots.sqlite")
+delta = store.commit("Standard", [asdict(build) for build in builds])
+if not delta.is_empty:
+    process(delta.added, delta.changed, delta.removed)
+```
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# 构筑身份：这些字段相同视为同一个构筑
+DEFAULT_KEY_FIELDS = ('character_class', 'ascendancy', 'main_skill', 'name')
+
+# 每次抓取都会变化、不属于构筑内容的字段
+DEFAULT_IGNORED_FIELDS = ('last_updated',)
+
+
+def _canonical_json(data: Any) -> str:
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, default=str, separators=(',', ':'))
+
+
+@dataclass
+class MetaSnapshot:
+    """快照版本信息"""
+    league: str
+    version: int
+    content_hash: str
+    created_at: float
+    record_count: int
+
+
+@dataclass
+class MetaSnapshotDelta:
+    """两个快照版本之间的差异"""
+    league: str
+    previous_version: Optional[int]
+    version: Optional[int]
+    added: Dict[str, Dict[str, Any]] = field(default_factory=dict)      # 构筑键 -> 记录
+    changed: Dict[str, Dict[str, Any]] = field(default_factory=dict)    # 构筑键 -> 新记录
+    removed: List[str] = field(default_factory=list)                    # 构筑键
+    
+    @property
+    def is_empty(self) -> bool:
+        """是否没有任何变化"""
+        return not (self.added or self.changed or self.removed)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（下游传输用）"""
+        return {
+            'league': self.league,
+            'previous_version': self.previous_version,
+            'version': self.version,
+            'added': self.added,
+            'changed': self.changed,
+            'removed': self.removed
+        }
+
+
+class MetaSnapshotStore:
+    """
+    sqlite快照存储
+    
+    records 表按内容哈希保存构筑记录，snapshot_entries 表记录每个版本包含哪些构筑。
+    """
+    
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS records (
+            hash TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS snapshots (
+            league TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            record_count INTEGER NOT NULL,
+            PRIMARY KEY (league, version)
+        );
+        CREATE TABLE IF NOT EXISTS snapshot_entries (
+            league TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            build_key TEXT NOT NULL,
+            hash TEXT NOT NULL,
+            PRIMARY KEY (league, version, build_key)
+        );
+    """
+    
+    def __init__(self, path: Union[str, Path] = ":memory:",
+                 key_fields: Sequence[str] = DEFAULT_KEY_FIELDS,
+                 ignored_fields: Sequence[str] = DEFAULT_IGNORED_FIELDS):
+        """
+        Args:
+            path: sqlite文件路径，":memory:" 表示不持久化
+            key_fields: 决定构筑身份的字段
+            ignored_fields: 计算内容哈希时忽略的字段
+        """
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.key_fields = tuple(key_fields)
+        self.ignored_fields = frozenset(ignored_fields)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(self._SCHEMA)
+    
+    def build_key(self, record: Dict[str, Any]) -> str:
+        """构筑键（身份字段小写后拼接）"""
+        return "|".join(str(record.get(name) or "").strip().lower() for name in self.key_fields)
+    
+    def record_hash(self, record: Dict[str, Any]) -> str:
+        """记录内容哈希（忽略易变字段）"""
+        content = {name: value for name, value in record.items() if name not in self.ignored_fields}
+        return hashlib.sha256(_canonical_json(content).encode('utf-8')).hexdigest()
+    
+    def _entries(self, league: str, version: Optional[int]) -> Dict[str, str]:
+        """版本的 构筑键 -> 记录哈希（按位置排序）"""
+        if version is None:
+            return {}
+        rows = self._conn.execute(
+            "SELECT build_key, hash FROM snapshot_entries WHERE league = ? AND version = ? ORDER BY position",
+            (league, version)
+        )
+        return dict(rows)
+    
+    def _load_records(self, hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        hashes = list(set(hashes))
+        loaded = {}
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for record_hash, data in self._conn.execute(
+                f"SELECT hash, data FROM records WHERE hash IN ({placeholders})", chunk
+            ):
+                loaded[record_hash] = json.loads(data)
+        return loaded
+    
+    def _latest_version(self, league: str) -> Optional[int]:
+        row = self._conn.execute(
+            "SELECT MAX(version) FROM snapshots WHERE league = ?", (league,)
+        ).fetchone()
+        return row[0]
+    
+    def _compute_delta(self, league: str, old: Dict[str, str], new: Dict[str, str],
+                       previous_version: Optional[int], version: Optional[int]) -> MetaSnapshotDelta:
+        added = [key for key in new if key not in old]
+        changed = [key for key in new if key in old and old[key] != new[key]]
+        removed = [key for key in old if key not in new]
+        
+        records = self._load_records(new[key] for key in added + changed)
+        return MetaSnapshotDelta(
+            league=league,
+            previous_version=previous_version,
+            version=version,
+            added={key: records[new[key]] for key in added},
+            changed={key: records[new[key]] for key in changed},
+            removed=removed
+        )
+    
+    def commit(self, league: str, records: Iterable[Dict[str, Any]]) -> MetaSnapshotDelta:
+        """
+        提交一次刷新的构筑列表
+        
+        内容与最新版本相同时不创建新版本，返回空差异（version 为当前最新版本）。
+        同一快照中构筑键重复的记录只保留第一条。
+        
+        Returns:
+            相对上一版本的差异
+        """
+        entries: Dict[str, str] = {}
+        payloads: List[Tuple[str, str]] = []
+        for record in records:
+            key = self.build_key(record)
+            if key in entries:
+                logger.debug(f"Duplicate meta build key skipped: {key}")
+                continue
+            record_hash = self.record_hash(record)
+            entries[key] = record_hash
+            payloads.append((record_hash, _canonical_json(record)))
+        
+        content_hash = hashlib.sha256(
+            "\n".join(f"{key}:{entries[key]}" for key in sorted(entries)).encode('utf-8')
+        ).hexdigest()
+        
+        with self._lock, self._conn:
+            previous_version = self._latest_version(league)
+            if previous_version is not None:
+                row = self._conn.execute(
+                    "SELECT content_hash FROM snapshots WHERE league = ? AND version = ?",
+                    (league, previous_version)
+                ).fetchone()
+                if row[0] == content_hash:
+                    return MetaSnapshotDelta(league, previous_version, previous_version)
+            
+            version = (previous_version or 0) + 1
+            self._conn.executemany("INSERT OR IGNORE INTO records (hash, data) VALUES (?, ?)", payloads)
+            self._conn.execute(
+                "INSERT INTO snapshots (league, version, content_hash, created_at, record_count) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (league, version, content_hash, time.time(), len(entries))
+            )
+            self._conn.executemany(
+                "INSERT INTO snapshot_entries (league, version, position, build_key, hash) VALUES (?, ?, ?, ?, ?)",
+                ((league, version, position, key, record_hash)
+                 for position, (key, record_hash) in enumerate(entries.items()))
+            )
+            
+            delta = self._compute_delta(
+                league, self._entries(league, previous_version), entries, previous_version, version
+            )
+        
+        logger.info(f"Meta snapshot {league} v{version}: +{len(delta.added)} "
+                    f"~{len(delta.changed)} -{len(delta.removed)}")
+        return delta
+    
+    def latest(self, league: str) -> Optional[MetaSnapshot]:
+        """最新版本信息"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT league, version, content_hash, created_at, record_count FROM snapshots "
+                "WHERE league = ? ORDER BY version DESC LIMIT 1", (league,)
+            ).fetchone()
+        return MetaSnapshot(*row) if row else None
+    
+    def versions(self, league: str) -> List[int]:
+        """保存的全部版本号"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version FROM snapshots WHERE league = ? ORDER BY version", (league,)
+            )
+            return [row[0] for row in rows]
+    
+    def records(self, league: str, version: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        快照中的构筑记录（按提交顺序）
+        
+        Args:
+            version: 版本号，默认最新版本
+        """
+        with self._lock:
+            if version is None:
+                version = self._latest_version(league)
+            entries = self._entries(league, version)
+            records = self._load_records(entries.values())
+        return {key: records[record_hash] for key, record_hash in entries.items()}
+    
+    def diff(self, league: str, from_version: Optional[int],
+             to_version: Optional[int] = None) -> MetaSnapshotDelta:
+        """
+        任意两个版本之间的差异
+        
+        Args:
+            from_version: 起始版本，None表示从空快照开始（全部为新增）
+            to_version: 目标版本，默认最新版本
+        """
+        with self._lock:
+            if to_version is None:
+                to_version = self._latest_version(league)
+            return self._compute_delta(
+                league, self._entries(league, from_version), self._entries(league, to_version),
+                from_version, to_version
+            )
+    
+    def prune(self, league: str, keep: int = 10) -> int:
+        """只保留最近 keep 个版本，并清理不再被引用的记录，返回删除的版本数"""
+        with self._lock, self._conn:
+            stale = [row[0] for row in self._conn.execute(
+                "SELECT version FROM snapshots WHERE league = ? ORDER BY version DESC LIMIT -1 OFFSET ?",
+                (league, keep)
+            )]
+            for version in stale:
+                self._conn.execute("DELETE FROM snapshots WHERE league = ? AND version = ?", (league, version))
+                self._conn.execute(
+                    "DELETE FROM snapshot_entries WHERE league = ? AND version = ?", (league, version)
+                )
+            if stale:
+                self._conn.execute(
+                    "DELETE FROM records WHERE hash NOT IN (SELECT DISTINCT hash FROM snapshot_entries)"
+                )
+        return len(stale)
+    
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -16,6 +16,8 @@ from datetime import datetime
 from bs4 import BeautifulSoup, Tag
 from urllib.parse import urljoin, quote
 
+from ...utils.latency import latency_span
+
 
 @dataclass
 class ItemDetail:
@@ -145,7 +147,8 @@ class PoE2DBClient:
         self._rate_limit()
         
         try:
-            response = self.session.get(url, timeout=15)
+            with latency_span("http.poe2db"):
+                response = self.session.get(url, timeout=15)
             response.raise_for_status()
             return BeautifulSoup(response.content, 'html.parser')
         except requests.exceptions.RequestException as e:
@@ -5,27 +5,43 @@ PoE2DB数据爬取 - 获取游戏数据（技能、物品、机制）
 
 import requests
 import logging
-from typing import Dict, Any, Optional, List
+import threading
+from typing import Dict, Any, Optional, List, Iterable
 from urllib.parse import urljoin, quote
 from bs4 import BeautifulSoup
 import re
 
 from .base_data_source import BaseDataSource
+from .crawl_scheduler import (
+    CrawlCheckpoint, CrawlResult, CrawlScheduler, HostRateLimiter, get_shared_rate_limiter
+)
 from ..resilience import create_poe2db_service, PoE2FallbackProvider
 
 logger = logging.getLogger(__name__)
 
+# 详情页爬取的默认检查点位置
+DEFAULT_CHECKPOINT_PATH = "data_storage/poe2db_cache/crawl_checkpoint.sqlite"
+
 class PoE2DBScraper(BaseDataSource):
     """PoE2DB网站爬虫"""
     
     BASE_URL = "https://poe2db.tw"
     
-    def __init__(self, use_resilience: bool = True):
+    # 检查点中的任务类别前缀（与共享同一文件的其他爬虫区分）
+    CHECKPOINT_NAMESPACE = "poe2db_scraper"
+    
+    def __init__(self, use_resilience: bool = True,
+                 checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT_PATH,
+                 max_workers: int = 4,
+                 rate_limiter: Optional[HostRateLimiter] = None):
         """
         初始化PoE2DB爬虫
         
         Args:
             use_resilience: 是否使用弹性服务
+            checkpoint_path: 详情页爬取检查点（sqlite），None表示不持久化
+            max_workers: 详情页并发爬取线程数
+            rate_limiter: 详情页的按主机限速器，默认为进程内共享的限速器
         """
         # 初始化弹性服务和降级提供者
         resilient_service = create_poe2db_service() if use_resilience else None
@@ -50,6 +66,12 @@ class PoE2DBScraper(BaseDataSource):
             'Upgrade-Insecure-Requests': '1'
         })
         
+        self.checkpoint_path = checkpoint_path
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter or get_shared_rate_limiter()
+        self._checkpoint: Optional[CrawlCheckpoint] = None
+        self._thread_local = threading.local()
+        
     def get_market_data(self, league: str = "Standard", **kwargs) -> Dict[str, Any]:
         """
         获取市场数据（PoE2DB主要不提供市场数据，返回基础信息）
@@ -118,7 +140,7 @@ class PoE2DBScraper(BaseDataSource):
             else:
                 # 获取物品分类列表
                 category = kwargs.get("category", "unique")
-                return self._scrape_item_category(category)
+                return self._scrape_item_category(category, kwargs.get("include_details", False))
                 
         return self._make_resilient_call("get_item_data", _fetch_item_data, cache_key)
         
@@ -157,13 +179,15 @@ class PoE2DBScraper(BaseDataSource):
             logger.error(f"Health check failed for {self.source_name}: {e}")
             return False
             
-    def _make_request(self, url: str, timeout: int = 30) -> BeautifulSoup:
+    def _make_request(self, url: str, timeout: int = 30,
+                      session: Optional[requests.Session] = None) -> BeautifulSoup:
         """
         发起HTTP请求并解析HTML
         
         Args:
             url: 请求URL
             timeout: 超时时间
+            session: 使用的会话（默认 self.session）
             
         Returns:
             BeautifulSoup解析对象
@@ -172,7 +196,7 @@ class PoE2DBScraper(BaseDataSource):
             requests.RequestException: 请求失败时抛出
         """
         try:
-            response = self.session.get(url, timeout=timeout)
+            response = (session or self.session).get(url, timeout=timeout)
             
             # 检查响应状态
             if response.status_code == 429:
@@ -289,27 +313,7 @@ class PoE2DBScraper(BaseDataSource):
             url = urljoin(self.BASE_URL, "/us/gem")
             soup = self._make_request(url)
             
-            gems = []
-            
-            # 寻找技能宝石表格
-            gem_table = soup.find('table', class_='gem-table')
-            if gem_table:
-                for row in gem_table.find_all('tr')[1:]:  # 跳过表头
-                    cells = row.find_all('td')
-                    if len(cells) >= 4:
-                        gem = {
-                            "name": cells[0].get_text(strip=True),
-                            "type": cells[1].get_text(strip=True),
-                            "level_req": cells[2].get_text(strip=True),
-                            "description": cells[3].get_text(strip=True) if len(cells) > 3 else ""
-                        }
-                        
-                        # 提取链接用于获取详细信息
-                        link = cells[0].find('a')
-                        if link and link.get('href'):
-                            gem["detail_url"] = urljoin(self.BASE_URL, link.get('href'))
-                            
-                        gems.append(gem)
+            gems = self._parse_gem_table(soup)
                         
             return self._standardize_response({
                 "gems": gems,
@@ -417,8 +421,8 @@ class PoE2DBScraper(BaseDataSource):
                 "items": []
             }, "get_item_details")
             
-    def _scrape_item_category(self, category: str) -> Dict[str, Any]:
-        """爬取物品分类"""
+    def _scrape_item_category(self, category: str, include_details: bool = False) -> Dict[str, Any]:
+        """爬取物品分类（include_details时并发爬取各物品详情页）"""
         try:
             url = urljoin(self.BASE_URL, f"/us/{category}")
             soup = self._make_request(url)
@@ -444,15 +448,20 @@ class PoE2DBScraper(BaseDataSource):
                             
                         items.append(item)
                         
+            metadata = {
+                "category": category,
+                "item_count": len(items),
+                "data_source": "poe2db.tw"
+            }
+            if include_details:
+                crawl = self._attach_details(items, f"item:{category}")
+                metadata.update(self._crawl_metadata(crawl))
+            
             return self._standardize_response({
                 "category": category,
                 "items": items,
                 "total_count": len(items)
-            }, "get_item_category", {
-                "category": category,
-                "item_count": len(items),
-                "data_source": "poe2db.tw"
-            })
+            }, "get_item_category", metadata)
             
         except Exception as e:
             logger.error(f"Failed to scrape item category {category}: {e}")
@@ -485,18 +494,21 @@ class PoE2DBScraper(BaseDataSource):
             }, "get_skill_details")
             
     def _scrape_all_skills(self) -> Dict[str, Any]:
-        """爬取所有技能列表"""
+        """爬取所有技能列表及各技能详情页（可断点续爬）"""
         try:
             url = urljoin(self.BASE_URL, "/us/gem")
             soup = self._make_request(url)
             
-            # 实现全技能列表爬取
-            # 这里简化处理，返回基础信息
+            skills = self._parse_gem_table(soup)
+            crawl = self._attach_details(skills, "skill_gem")
+            
             return self._standardize_response({
-                "message": "All skills scraping implemented",
-                "skills": []
+                "skills": skills,
+                "total_count": len(skills)
             }, "get_all_skills", {
-                "data_source": "poe2db.tw"
+                "skill_count": len(skills),
+                "data_source": "poe2db.tw",
+                **self._crawl_metadata(crawl)
             })
             
         except Exception as e:
@@ -504,4 +516,123 @@ class PoE2DBScraper(BaseDataSource):
             return self._standardize_response({
                 "error": f"Failed to get all skills: {e}",
                 "skills": []
-            }, "get_all_skills")
\ No newline at end of file
+            }, "get_all_skills")
+    
+    def crawl_detail_pages(self, urls: Iterable[str], kind: str) -> CrawlResult:
+        """
+        并发爬取详情页
+        
+        所有线程共享 self.rate_limiter 的poe2db主机限速；每个完成的URL和解析结果写入检查点，
+        中断后再次调用会跳过已完成的URL。
+        
+        详情页不经过弹性服务：只受共享主机限速器约束，不走弹性服务自己的限速器和熔断器
+        （CircuitBreaker.call 在整个调用期间持有锁，会让工作线程串行）。失败次数记入检查点，
+        单个URL跨运行累计最多尝试调度器的 max_attempts 次。
+        
+        Args:
+            urls: 详情页URL
+            kind: 任务类别（如 "skill_gem"、"item:unique"），检查点中加 CHECKPOINT_NAMESPACE 前缀
+        
+        Returns:
+            爬取结果，records 为按URL顺序的详情记录
+        """
+        scheduler = CrawlScheduler(
+            fetch=self._fetch_detail_page,
+            parse=self._parse_detail_page,
+            checkpoint=self._get_checkpoint(),
+            max_workers=self.max_workers,
+            rate_limiter=self.rate_limiter
+        )
+        return scheduler.run(urls, f"{self.CHECKPOINT_NAMESPACE}:{kind}")
+    
+    def _get_checkpoint(self) -> CrawlCheckpoint:
+        """首次使用时打开检查点"""
+        if self._checkpoint is None:
+            self._checkpoint = CrawlCheckpoint(self.checkpoint_path or ":memory:")
+        return self._checkpoint
+    
+    def _worker_session(self) -> requests.Session:
+        """每个工作线程独立的会话（请求头与主会话相同）"""
+        session = getattr(self._thread_local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.session.headers)
+            self._thread_local.session = session
+        return session
+    
+    def _fetch_detail_page(self, url: str) -> BeautifulSoup:
+        """工作线程中获取详情页（不经过弹性服务，限速由调度器的共享限速器负责）"""
+        return self._make_request(url, session=self._worker_session())
+    
+    def _parse_gem_table(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
+        """解析技能宝石列表表格"""
+        gems = []
+        
+        # 寻找技能宝石表格
+        gem_table = soup.find('table', class_='gem-table')
+        if gem_table:
+            for row in gem_table.find_all('tr')[1:]:  # 跳过表头
+                cells = row.find_all('td')
+                if len(cells) >= 4:
+                    gem = {
+                        "name": cells[0].get_text(strip=True),
+                        "type": cells[1].get_text(strip=True),
+                        "level_req": cells[2].get_text(strip=True),
+                        "description": cells[3].get_text(strip=True) if len(cells) > 3 else ""
+                    }
+                    
+                    # 提取链接用于获取详细信息
+                    link = cells[0].find('a')
+                    if link and link.get('href'):
+                        gem["detail_url"] = urljoin(self.BASE_URL, link.get('href'))
+                    
+                    gems.append(gem)
+        
+        return gems
+    
+    def _parse_detail_page(self, url: str, soup: BeautifulSoup) -> Dict[str, Any]:
+        """解析技能/物品详情页"""
+        title = soup.find('h1')
+        description = soup.find(class_=re.compile(r'(secDescrText|description)', re.I))
+        
+        tags = []
+        tag_container = soup.find(class_=re.compile(r'tags', re.I))
+        if tag_container:
+            tags = [tag.get_text(strip=True) for tag in tag_container.find_all(['a', 'span'])
+                    if tag.get_text(strip=True)]
+        
+        modifiers = [
+            mod.get_text(strip=True)
+            for mod in soup.find_all(class_=re.compile(r'(explicitMod|implicitMod|stat)', re.I))
+            if mod.get_text(strip=True)
+        ]
+        
+        return {
+            "detail_url": url,
+            "name": title.get_text(strip=True) if title else "",
+            "description": description.get_text(strip=True) if description else "",
+            "tags": tags,
+            "modifiers": modifiers
+        }
+    
+    def _attach_details(self, entries: List[Dict[str, Any]], kind: str) -> CrawlResult:
+        """爬取列表条目的详情页，结果写入各条目的 "details" 字段"""
+        urls = [entry["detail_url"] for entry in entries if entry.get("detail_url")]
+        crawl = self.crawl_detail_pages(urls, kind)
+        
+        details_by_url = {record["detail_url"]: record for record in crawl.records}
+        for entry in entries:
+            details = details_by_url.get(entry.get("detail_url"))
+            if details is not None:
+                entry["details"] = details
+        return crawl
+    
+    @staticmethod
+    def _crawl_metadata(crawl: CrawlResult) -> Dict[str, Any]:
+        """详情页爬取统计"""
+        return {
+            "details_completed": crawl.completed,
+            "details_resumed": crawl.resumed,
+            "details_failed": crawl.failed,
+            "details_elapsed": round(crawl.elapsed, 2)
+        }
@@ -12,6 +12,8 @@ from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+from ...utils.latency import latency_span
+
 
 @dataclass
 class ItemPrice:
@@ -86,7 +88,8 @@ class PoE2ScoutClient:
         url = f"{self.BASE_URL}/{endpoint.lstrip('/')}"
         
         try:
-            response = self.session.get(url, params=params, timeout=10)
+            with latency_span("http.poe2scout"):
+                response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
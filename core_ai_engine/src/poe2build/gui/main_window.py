@@ -243,6 +243,8 @@ class MainWindow(QMainWindow):
         # 连接页面信号
         if hasattr(self.pages["build_generator"], "build_generated"):
             self.pages["build_generator"].build_generated.connect(self._on_build_generated)
+        if hasattr(self.pages["build_generator"], "partial_results_ready"):
+            self.pages["build_generator"].partial_results_ready.connect(self._on_partial_results)
     
     def _connect_signals(self):
         """连接信号和槽"""
@@ -486,6 +488,17 @@ class MainWindow(QMainWindow):
         # 切换到结果页面
         self.show_page("build_results")
     
+    def _on_partial_results(self, partial_data: Dict[str, Any]):
+        """处理临时结果和增量更新"""
+        if "build_results" not in self.pages:
+            return
+        
+        self.pages["build_results"].display_partial_results(partial_data)
+        
+        # 临时结果到达时即切换到结果页面
+        if partial_data.get('event') == 'provisional' and partial_data.get('builds'):
+            self.show_page("build_results")
+    
     def closeEvent(self, event):
         """窗口关闭事件"""
         # 停止定时器
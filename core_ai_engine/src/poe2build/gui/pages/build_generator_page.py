@@ -31,6 +31,11 @@ class BuildGeneratorPage(QWidget):
     
     # 信号定义
     build_generated = pyqtSignal(dict)  # 构筑生成完成信号
+    partial_results_ready = pyqtSignal(dict)  # 临时结果/增量更新信号
+    
+    # 后端事件循环线程 -> GUI线程（跨线程信号以队列方式投递）
+    _backend_initialized = pyqtSignal(bool)
+    _backend_init_failed = pyqtSignal(str)
     
     def __init__(self, orchestrator=None, backend_config: Optional[Dict[str, Any]] = None, parent=None):
         super().__init__(parent)
@@ -414,9 +419,12 @@ class BuildGeneratorPage(QWidget):
         # 连接后端客户端信号
         self.backend_client.progress_updated.connect(self._on_progress_updated)
         self.backend_client.build_generated.connect(self._on_build_generated)
+        self.backend_client.partial_results_ready.connect(self.partial_results_ready)
         self.backend_client.error_occurred.connect(self._on_error_occurred)
         self.backend_client.status_changed.connect(self._on_backend_status_changed)
         self.backend_client.pob2_status_changed.connect(self._on_pob2_status_changed)
+        self._backend_initialized.connect(self._on_backend_initialized)
+        self._backend_init_failed.connect(self._handle_initialization_error)
         
         # 连接状态管理器信号
         self.status_manager.progress_updated.connect(self._update_progress_display)
@@ -431,39 +439,35 @@ class BuildGeneratorPage(QWidget):
     def _initialize_backend(self):
         """初始化后端连接"""
         try:
-            # 在新线程中初始化后端
-            from threading import Thread
-            import asyncio
-            
-            def init_backend():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
+            # 在后端事件循环中初始化，协调器的会话和任务都绑定在该循环上；
+            # 回调在事件循环线程中执行，通过信号回到GUI线程更新界面
+            def init_backend(future):
                 try:
-                    success = loop.run_until_complete(self.backend_client.initialize())
-                    if success:
-                        self.error_handler.show_notification(
-                            NotificationType.SUCCESS,
-                            "后端已连接",
-                            "AI构筑推荐系统已就绪"
-                        )
-                    else:
-                        self.error_handler.show_notification(
-                            NotificationType.WARNING,
-                            "后端连接失败",
-                            "系统将使用降级模式运行"
-                        )
+                    self._backend_initialized.emit(bool(future.result()))
                 except Exception as e:
-                    self._handle_initialization_error(str(e))
-                finally:
-                    loop.close()
+                    self._backend_init_failed.emit(str(e))
             
-            thread = Thread(target=init_backend)
-            thread.daemon = True
-            thread.start()
+            future = self.backend_client.run_coroutine(self.backend_client.initialize())
+            future.add_done_callback(init_backend)
             
         except Exception as e:
             self._handle_initialization_error(str(e))
     
+    def _on_backend_initialized(self, success: bool):
+        """后端初始化完成（GUI线程）"""
+        if success:
+            self.error_handler.show_notification(
+                NotificationType.SUCCESS,
+                "后端已连接",
+                "AI构筑推荐系统已就绪"
+            )
+        else:
+            self.error_handler.show_notification(
+                NotificationType.WARNING,
+                "后端连接失败",
+                "系统将使用降级模式运行"
+            )
+    
     def _handle_initialization_error(self, error_message: str):
         """处理初始化错误"""
         self.error_handler.handle_error(
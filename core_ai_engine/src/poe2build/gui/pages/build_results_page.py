@@ -161,6 +161,7 @@ class BuildResultsPage(QWidget):
         self.theme = PoE2Theme()
         self.current_results: Dict[str, Any] = {}
         self.selected_build: Dict[str, Any] = {}
+        self._partial_cards: Dict[int, BuildResultCard] = {}  # RAG候选序号 -> 临时结果卡片
         
         self._init_ui()
     
@@ -373,6 +374,7 @@ class BuildResultsPage(QWidget):
     def display_build_results(self, results_data: Dict[str, Any]):
         """显示构筑结果"""
         self.current_results = results_data
+        self._partial_cards = {}
         
         # 清空现有结果
         self._clear_results()
@@ -386,15 +388,83 @@ class BuildResultsPage(QWidget):
         
         # 添加构筑卡片
         for i, build in enumerate(recommendations):
-            card = BuildResultCard(build)
-            card.build_selected.connect(self._on_build_selected)
-            card.export_requested.connect(self._export_build)
-            self.results_layout.addWidget(card)
+            self.results_layout.addWidget(self._create_result_card(build))
         
         # 自动选择第一个构筑
         if recommendations:
             self._on_build_selected(recommendations[0])
     
+    def display_partial_results(self, partial_data: Dict[str, Any]):
+        """
+        显示流式推荐的临时结果和增量更新
+        
+        provisional 事件重建卡片列表，build_updated 原位替换对应卡片，build_removed 移除卡片；
+        最终结果仍由 display_build_results 显示。
+        """
+        event = partial_data.get('event')
+        indices = partial_data.get('build_indices', [])
+        builds = [self._card_data_from_backend(build) for build in partial_data.get('builds', [])]
+        
+        if event == 'provisional':
+            self._partial_cards = {}
+            self._clear_results()
+            
+            if not builds:
+                self._show_empty_state()
+                return
+            
+            for index, build in zip(indices, builds):
+                card = self._create_result_card(build)
+                self.results_layout.addWidget(card)
+                self._partial_cards[index] = card
+            
+            self._on_build_selected(builds[0])
+            return
+        
+        for index, build in zip(indices, builds):
+            old_card = self._partial_cards.pop(index, None)
+            if old_card is None:
+                continue
+            
+            if event == 'build_removed':
+                self.results_layout.removeWidget(old_card)
+            else:
+                new_card = self._create_result_card(build)
+                self.results_layout.replaceWidget(old_card, new_card)
+                self._partial_cards[index] = new_card
+                
+                # 正在查看的构筑同步刷新详情
+                if self.selected_build is old_card.build_data:
+                    self._on_build_selected(build)
+            old_card.deleteLater()
+    
+    def _create_result_card(self, build_data: Dict[str, Any]) -> BuildResultCard:
+        """创建并连接构筑卡片"""
+        card = BuildResultCard(build_data)
+        card.build_selected.connect(self._on_build_selected)
+        card.export_requested.connect(self._export_build)
+        return card
+    
+    @staticmethod
+    def _card_data_from_backend(build: Dict[str, Any]) -> Dict[str, Any]:
+        """将后端构筑数据转换为卡片数据格式"""
+        card_data = dict(build)
+        card_data['build_name'] = build.get('name') or '未命名构筑'
+        card_data['ascendancy'] = build.get('ascendancy') or '未指定'
+        
+        stats = build.get('stats')
+        if stats:
+            card_data['pob2_stats'] = {
+                'total_dps': stats.get('total_dps', 0),
+                'effective_health_pool': stats.get('effective_health_pool', 0),
+                'resistances': {
+                    'fire': stats.get('fire_resistance', 0),
+                    'cold': stats.get('cold_resistance', 0),
+                    'lightning': stats.get('lightning_resistance', 0)
+                }
+            }
+        return card_data
+    
     def _clear_results(self):
         """清空结果显示"""
         # 移除所有卡片
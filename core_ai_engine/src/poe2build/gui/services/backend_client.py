@@ -10,6 +10,7 @@ GUI后端通信客户端
 """
 
 import asyncio
+import concurrent.futures
 import json
 import logging
 import time
@@ -19,12 +20,17 @@ from typing import Dict, Any, Optional, Callable, List
 from dataclasses import dataclass, asdict
 from enum import Enum
 
-from PyQt6.QtCore import QObject, pyqtSignal, QTimer, QThread
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 from PyQt6.QtWidgets import QApplication
 
+from ...utils.async_loop import BackgroundEventLoop
+
 # 尝试导入后端模块，如果失败则使用模拟实现
 try:
-    from ...core.ai_orchestrator import PoE2AIOrchestrator, UserRequest, RecommendationResult
+    from ...core.ai_orchestrator import (
+        PoE2AIOrchestrator, UserRequest, RecommendationResult, HealthSnapshot, PipelineEventType
+    )
+    from ...core.health_monitor import HealthMonitor
     from ...models.build import PoE2BuildGoal, PoE2Build, PoE2BuildStats
     from ...models.characters import PoE2CharacterClass, PoE2Ascendancy
     BACKEND_AVAILABLE = True
@@ -73,6 +79,18 @@ except ImportError as e:
             for key, value in kwargs.items():
                 setattr(self, key, value)
     
+    HealthMonitor = None
+    PipelineEventType = None
+    
+    class HealthSnapshot:
+        def __init__(self, overall_status="healthy", components=None):
+            self.timestamp = time.time()
+            self.overall_status = overall_status
+            self.components = components or {}
+        
+        def to_dict(self):
+            return {"overall_status": self.overall_status, "components": dict(self.components)}
+    
     class PoE2AIOrchestrator:
         def __init__(self, config=None):
             self._initialized = True
@@ -83,6 +101,9 @@ except ImportError as e:
         async def health_check(self):
             return {"overall_status": "healthy", "components": {}}
         
+        def get_health_snapshot(self):
+            return HealthSnapshot()
+        
         async def generate_build_recommendations(self, user_request):
             from dataclasses import dataclass
             @dataclass
@@ -135,14 +156,21 @@ class ProgressUpdate:
             self.timestamp = time.time()
 
 
-class BackendWorkerThread(QThread):
-    """后端处理工作线程"""
+class BackendRequestTask(QObject):
+    """
+    后端请求任务
+    
+    协程提交到 BackendClient 的持久事件循环中执行，完成后通过Future回调发射Qt信号
+    （跨线程发射，由Qt排队到接收者所在的主线程）。
+    """
     
     # 信号定义
     progress_updated = pyqtSignal(dict)  # 进度更新
     result_ready = pyqtSignal(dict)  # 结果就绪
+    partial_result = pyqtSignal(dict)  # 临时结果或单个构筑的增量更新
     error_occurred = pyqtSignal(dict)  # 发生错误
     status_changed = pyqtSignal(str)  # 状态变化
+    finished = pyqtSignal()  # 任务结束（无论成功、失败或取消）
     
     def __init__(self, backend_client, request_data: Dict[str, Any]):
         super().__init__()
@@ -150,32 +178,35 @@ class BackendWorkerThread(QThread):
         self.request_data = request_data
         self.is_cancelled = False
         self._current_orchestrator = None
-        
-    def run(self):
-        """执行后端请求"""
+        self._future: Optional[concurrent.futures.Future] = None
+    
+    def start(self, event_loop: BackgroundEventLoop):
+        """提交请求到后台事件循环"""
+        self._future = event_loop.submit(self._process_request())
+        self._future.add_done_callback(self._on_future_done)
+    
+    def is_running(self) -> bool:
+        """请求是否仍在执行"""
+        return self._future is not None and not self._future.done()
+    
+    def _on_future_done(self, future: concurrent.futures.Future):
+        """Future完成回调（在事件循环线程中执行）"""
         try:
-            # 在工作线程中创建事件循环
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+            if future.cancelled() or self.is_cancelled:
+                return
             
-            try:
-                # 执行异步操作
-                result = loop.run_until_complete(self._process_request())
-                
-                if not self.is_cancelled:
-                    self.result_ready.emit(result)
-                    
-            finally:
-                loop.close()
-                
-        except Exception as e:
-            if not self.is_cancelled:
+            error = future.exception()
+            if error is None:
+                self.result_ready.emit(future.result())
+            else:
                 error_data = {
-                    'error': str(e),
-                    'error_type': type(e).__name__,
+                    'error': str(error),
+                    'error_type': type(error).__name__,
                     'timestamp': time.time()
                 }
                 self.error_occurred.emit(error_data)
+        finally:
+            self.finished.emit()
     
     async def _process_request(self) -> Dict[str, Any]:
         """处理后端请求"""
@@ -191,11 +222,11 @@ class BackendWorkerThread(QThread):
         if self.is_cancelled:
             return {}
             
-        # Stage 2: 验证系统健康
+        # Stage 2: 验证系统健康（读取后台监控发布的快照，不在请求路径上执行检查）
         self._emit_progress(15, "health_check", "检查系统组件状态...")
         
-        health_status = await orchestrator.health_check()
-        logger.info(f"系统健康状态: {health_status.get('overall_status', 'unknown')}")
+        health_snapshot = orchestrator.get_health_snapshot()
+        logger.info(f"系统健康状态: {health_snapshot.overall_status}")
         
         if self.is_cancelled:
             return {}
@@ -212,7 +243,10 @@ class BackendWorkerThread(QThread):
         self._emit_progress(40, "generation", "生成AI构筑推荐...")
         
         try:
-            result = await orchestrator.generate_build_recommendations(user_request)
+            if hasattr(orchestrator, 'stream_build_recommendations'):
+                result = await self._stream_recommendations(orchestrator, user_request)
+            else:
+                result = await orchestrator.generate_build_recommendations(user_request)
         except Exception as e:
             logger.error(f"生成推荐失败: {e}")
             # 尝试降级处理
@@ -235,6 +269,35 @@ class BackendWorkerThread(QThread):
         
         return processed_result
     
+    async def _stream_recommendations(self, orchestrator, user_request: UserRequest) -> Optional[RecommendationResult]:
+        """消费推荐事件流：临时结果和增量更新即时发给GUI，返回最终结果"""
+        stage_messages = {
+            'rag_generation': "已生成临时推荐，正在补充市场和PoB2数据...",
+            'market_integration': "更新构筑价格...",
+            'pob2_validation': "PoB2计算构筑属性..."
+        }
+        
+        result = None
+        stream = orchestrator.stream_build_recommendations(user_request)
+        try:
+            async for event in stream:
+                if self.is_cancelled:
+                    break
+                
+                if event.event_type == PipelineEventType.FINAL:
+                    result = event.result
+                    continue
+                
+                self.partial_result.emit(self.backend_client._process_pipeline_event(event))
+                # 真实进度映射到生成阶段的 40%-80%
+                self._emit_progress(40 + int(event.progress * 40), event.stage,
+                                    stage_messages.get(event.stage, "生成AI构筑推荐..."))
+        finally:
+            # 提前退出时立即关闭事件流，让协调器取消仍在进行的价格/PoB2任务
+            await stream.aclose()
+        
+        return result
+    
     def _emit_progress(self, progress: int, stage: str, message: str):
         """发射进度更新信号"""
         if not self.is_cancelled:
@@ -279,8 +342,10 @@ class BackendWorkerThread(QThread):
         )
     
     def cancel(self):
-        """取消操作"""
+        """取消操作（取消事件循环中正在执行的协程）"""
         self.is_cancelled = True
+        if self._future is not None:
+            self._future.cancel()
         if self._current_orchestrator:
             logger.info("取消当前构筑生成请求")
 
@@ -295,6 +360,7 @@ class BackendClient(QObject):
     # 信号定义
     progress_updated = pyqtSignal(dict)  # 进度更新
     build_generated = pyqtSignal(dict)  # 构筑生成完成
+    partial_results_ready = pyqtSignal(dict)  # 临时结果或单个构筑的增量更新
     error_occurred = pyqtSignal(dict)  # 发生错误
     status_changed = pyqtSignal(str)  # 状态变化
     pob2_status_changed = pyqtSignal(dict)  # PoB2状态变化
@@ -306,23 +372,45 @@ class BackendClient(QObject):
         self._orchestrator: Optional[PoE2AIOrchestrator] = None
         self._initialization_task = None
         self._current_status = RequestStatus.IDLE
-        self._worker_thread: Optional[BackendWorkerThread] = None
+        self._current_task: Optional[BackendRequestTask] = None
+        self._health_monitor: Optional[HealthMonitor] = None
+        
+        # 持久的后端事件循环，所有协程都在此执行，连接池和异步缓存可跨请求复用
+        self._event_loop = BackgroundEventLoop(name="poe2-backend-loop")
         
         # 重试配置
         self.max_retries = self.config.get('max_retries', 3)
         self.retry_delay = self.config.get('retry_delay', 1000)  # ms
         
-        # 状态检查定时器
+        # 后台健康监控的刷新间隔(秒)
+        self.health_check_interval = self.config.get('health_check_interval', 30.0)
+        
+        # 状态发布定时器（只读取健康快照，检查由后台监控完成）
         self.status_timer = QTimer()
         self.status_timer.timeout.connect(self._check_backend_status)
-        self.status_timer.start(30000)  # 每30秒检查一次
+        self.status_timer.start(int(self.health_check_interval * 1000))
         
         logger.info("BackendClient 已创建")
     
+    def run_coroutine(self, coro) -> concurrent.futures.Future:
+        """
+        在后端事件循环中执行协程
+        
+        Args:
+            coro: 要执行的协程，如 backend_client.initialize()
+            
+        Returns:
+            线程安全的Future，可等待结果、添加回调或取消
+        """
+        return self._event_loop.submit(coro)
+    
     async def initialize(self) -> bool:
         """
         异步初始化后端连接
         
+        应通过 run_coroutine(initialize()) 在后端事件循环中执行，
+        使协调器创建的会话和任务绑定在持久循环上。
+        
         Returns:
             初始化是否成功
         """
@@ -346,6 +434,9 @@ class BackendClient(QObject):
                 logger.info("后端协调器初始化成功")
                 self._set_status(RequestStatus.IDLE)
                 
+                # 启动后台健康监控
+                self._start_health_monitor()
+                
                 # 检查PoB2状态
                 await self._check_pob2_status()
                 
@@ -370,7 +461,7 @@ class BackendClient(QObject):
         Returns:
             是否成功启动生成过程
         """
-        if self._current_status not in [RequestStatus.IDLE, RequestStatus.COMPLETED, RequestStatus.ERROR]:
+        if self._current_status not in [RequestStatus.IDLE, RequestStatus.COMPLETED, RequestStatus.ERROR, RequestStatus.CANCELLED]:
             logger.warning(f"当前状态 {self._current_status.value} 不允许新的请求")
             return False
         
@@ -385,21 +476,22 @@ class BackendClient(QObject):
             self._emit_error(f"请求数据验证失败: {validation_result['error']}")
             return False
         
-        # 设置状态并启动工作线程
+        # 设置状态并提交请求
         self._set_status(RequestStatus.PROCESSING)
         
         try:
-            # 创建工作线程
-            self._worker_thread = BackendWorkerThread(self, request_data)
+            # 创建请求任务
+            self._current_task = BackendRequestTask(self, request_data)
             
             # 连接信号
-            self._worker_thread.progress_updated.connect(self._on_progress_updated)
-            self._worker_thread.result_ready.connect(self._on_result_ready)
-            self._worker_thread.error_occurred.connect(self._on_error_occurred)
-            self._worker_thread.finished.connect(self._on_thread_finished)
+            self._current_task.progress_updated.connect(self._on_progress_updated)
+            self._current_task.result_ready.connect(self._on_result_ready)
+            self._current_task.partial_result.connect(self.partial_results_ready)
+            self._current_task.error_occurred.connect(self._on_error_occurred)
+            self._current_task.finished.connect(self._on_task_finished)
             
-            # 启动线程
-            self._worker_thread.start()
+            # 提交到后端事件循环
+            self._current_task.start(self._event_loop)
             
             logger.info("构筑生成请求已启动")
             return True
@@ -417,11 +509,10 @@ class BackendClient(QObject):
         Returns:
             是否成功取消
         """
-        if self._worker_thread and self._worker_thread.isRunning():
+        if self._current_task and self._current_task.is_running():
             logger.info("取消当前构筑生成请求")
-            self._worker_thread.cancel()
-            self._worker_thread.quit()
-            self._worker_thread.wait(5000)  # 等待5秒
+            # 取消Future会在事件循环中取消对应任务，无需等待线程退出
+            self._current_task.cancel()
             
             self._set_status(RequestStatus.CANCELLED)
             return True
@@ -433,7 +524,7 @@ class BackendClient(QObject):
         检查后端健康状态
         
         Returns:
-            健康检查结果
+            健康检查结果（来自最近发布的健康快照）
         """
         if not self._orchestrator:
             return {
@@ -442,7 +533,7 @@ class BackendClient(QObject):
             }
         
         try:
-            health_result = await self._orchestrator.health_check()
+            health_result = self.get_health_snapshot().to_dict()
             logger.debug(f"后端健康检查: {health_result.get('overall_status', 'unknown')}")
             return health_result
             
@@ -460,6 +551,21 @@ class BackendClient(QObject):
         Returns:
             PoB2状态信息
         """
+        return self._pob2_status_from_snapshot()
+    
+    def get_health_snapshot(self) -> HealthSnapshot:
+        """
+        获取最近的健康快照（O(1)，不执行检查）
+        
+        Returns:
+            健康快照；协调器未初始化时抛出 RuntimeError
+        """
+        if not self._orchestrator:
+            raise RuntimeError("后端协调器未初始化")
+        return self._orchestrator.get_health_snapshot()
+    
+    def _pob2_status_from_snapshot(self) -> Dict[str, Any]:
+        """根据健康快照生成PoB2状态信息"""
         if not self._orchestrator:
             return {
                 'available': False,
@@ -469,8 +575,7 @@ class BackendClient(QObject):
             }
         
         try:
-            health_result = await self._orchestrator.health_check()
-            components = health_result.get('components', {})
+            components = self.get_health_snapshot().components
             
             local_status = components.get('pob2_local', {})
             web_status = components.get('pob2_web', {})
@@ -644,43 +749,56 @@ class BackendClient(QObject):
         
         return user_request
     
+    def _convert_build(self, build: PoE2Build) -> Dict[str, Any]:
+        """将后端构筑转换为GUI数据"""
+        build_data = {
+            'name': build.name,
+            'character_class': build.character_class.value,
+            'ascendancy': build.ascendancy.value if build.ascendancy else None,
+            'level': build.level,
+            'estimated_cost': build.estimated_cost,
+            'currency_type': getattr(build, 'currency_type', 'divine'),
+            'main_skill_gem': build.main_skill_gem,
+            'support_gems': build.support_gems or [],
+            'key_items': build.key_items or [],
+            'passive_keystones': build.passive_keystones or [],
+            'pob2_code': build.pob2_code,
+            'notes': build.notes,
+            'goal': build.goal.value if build.goal else None
+        }
+        
+        # 添加统计数据
+        if build.stats:
+            build_data['stats'] = {
+                'total_dps': build.stats.total_dps,
+                'effective_health_pool': build.stats.effective_health_pool,
+                'life': getattr(build.stats, 'life', 0),
+                'energy_shield': getattr(build.stats, 'energy_shield', 0),
+                'fire_resistance': build.stats.fire_resistance,
+                'cold_resistance': build.stats.cold_resistance,
+                'lightning_resistance': build.stats.lightning_resistance,
+                'chaos_resistance': build.stats.chaos_resistance,
+                'is_resistance_capped': build.stats.is_resistance_capped()
+            }
+        
+        return build_data
+    
+    def _process_pipeline_event(self, event) -> Dict[str, Any]:
+        """将流水线增量事件转换为GUI数据"""
+        return {
+            'event': event.event_type.value,
+            'stage': event.stage,
+            'progress': event.progress,
+            'build_indices': list(event.build_indices),
+            'builds': [self._convert_build(build) for build in event.builds],
+            'timestamp': event.timestamp
+        }
+    
     def _process_backend_result(self, result: RecommendationResult) -> Dict[str, Any]:
         """处理后端结果"""
         try:
             # 转换构筑列表
-            builds_data = []
-            for build in result.builds:
-                build_data = {
-                    'name': build.name,
-                    'character_class': build.character_class.value,
-                    'ascendancy': build.ascendancy.value if build.ascendancy else None,
-                    'level': build.level,
-                    'estimated_cost': build.estimated_cost,
-                    'currency_type': getattr(build, 'currency_type', 'divine'),
-                    'main_skill_gem': build.main_skill_gem,
-                    'support_gems': build.support_gems or [],
-                    'key_items': build.key_items or [],
-                    'passive_keystones': build.passive_keystones or [],
-                    'pob2_code': build.pob2_code,
-                    'notes': build.notes,
-                    'goal': build.goal.value if build.goal else None
-                }
-                
-                # 添加统计数据
-                if build.stats:
-                    build_data['stats'] = {
-                        'total_dps': build.stats.total_dps,
-                        'effective_health_pool': build.stats.effective_health_pool,
-                        'life': getattr(build.stats, 'life', 0),
-                        'energy_shield': getattr(build.stats, 'energy_shield', 0),
-                        'fire_resistance': build.stats.fire_resistance,
-                        'cold_resistance': build.stats.cold_resistance,
-                        'lightning_resistance': build.stats.lightning_resistance,
-                        'chaos_resistance': build.stats.chaos_resistance,
-                        'is_resistance_capped': build.stats.is_resistance_capped()
-                    }
-                
-                builds_data.append(build_data)
+            builds_data = [self._convert_build(build) for build in result.builds]
             
             # 构建最终结果
             processed_result = {
@@ -717,41 +835,42 @@ class BackendClient(QObject):
     async def _check_pob2_status(self):
         """检查PoB2状态"""
         try:
-            status = await self.get_pob2_status()
+            status = self._pob2_status_from_snapshot()
             self.pob2_status_changed.emit(status)
         except Exception as e:
             logger.error(f"检查PoB2状态失败: {e}")
     
+    def _start_health_monitor(self):
+        """启动后台健康监控（后端模块不可用时跳过）"""
+        if HealthMonitor is None or self._orchestrator is None:
+            return
+        
+        if self._health_monitor is None or self._health_monitor.orchestrator is not self._orchestrator:
+            self._stop_health_monitor()
+            self._health_monitor = HealthMonitor(self._orchestrator, interval=self.health_check_interval)
+        # 与请求共用后端事件循环
+        self._health_monitor.start(loop=self._event_loop.loop)
+    
+    def _stop_health_monitor(self):
+        """停止后台健康监控"""
+        if self._health_monitor is not None:
+            self._health_monitor.stop()
+            self._health_monitor = None
+    
     def _check_backend_status(self):
-        """定期检查后端状态"""
-        if self._orchestrator and not self.is_busy():
-            # 在主线程中异步运行
-            QTimer.singleShot(0, self._async_status_check)
-    
-    def _async_status_check(self):
-        """异步状态检查"""
-        async def check():
-            try:
-                health = await self.check_backend_health()
-                pob2_status = await self.get_pob2_status()
-                
-                # 发射状态更新信号
-                if health.get('overall_status') != 'healthy':
-                    logger.warning(f"后端状态异常: {health.get('overall_status')}")
-                
-                self.pob2_status_changed.emit(pob2_status)
-                
-            except Exception as e:
-                logger.error(f"状态检查失败: {e}")
+        """定期发布后端状态（读取健康快照，在主线程中同步完成）"""
+        if not self._orchestrator:
+            return
         
-        # 创建新的事件循环来运行异步函数
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(check())
-            loop.close()
+            snapshot = self.get_health_snapshot()
+            if snapshot.overall_status != 'healthy':
+                logger.warning(f"后端状态异常: {snapshot.overall_status}")
+            
+            self.pob2_status_changed.emit(self._pob2_status_from_snapshot())
+            
         except Exception as e:
-            logger.error(f"异步状态检查失败: {e}")
+            logger.error(f"状态检查失败: {e}")
     
     def _set_status(self, status: RequestStatus):
         """设置当前状态"""
@@ -783,13 +902,15 @@ class BackendClient(QObject):
         self._set_status(RequestStatus.ERROR)
         self.error_occurred.emit(error_data)
     
-    def _on_thread_finished(self):
-        """处理线程完成"""
-        if self._worker_thread:
-            self._worker_thread.deleteLater()
-            self._worker_thread = None
+    def _on_task_finished(self):
+        """处理请求任务完成"""
+        task = self.sender()
+        if task is not None:
+            task.deleteLater()
+        if task is self._current_task:
+            self._current_task = None
         
-        logger.debug("工作线程已完成")
+        logger.debug("请求任务已完成")
     
     def cleanup(self):
         """清理资源"""
@@ -800,6 +921,12 @@ class BackendClient(QObject):
         # 取消当前请求
         self.cancel_current_request()
         
+        # 停止后台健康监控
+        self._stop_health_monitor()
+        
+        # 停止后端事件循环
+        self._event_loop.stop()
+        
         # 清理协调器
         self._orchestrator = None
         
@@ -59,18 +59,11 @@ class PoB2StatusCheckThread(QThread):
         
         while self.running:
             try:
-                # 异步获取PoB2状态
-                import asyncio
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
-                try:
-                    status = loop.run_until_complete(
-                        self.backend_client.get_pob2_status()
-                    )
-                    self.status_updated.emit(status)
-                finally:
-                    loop.close()
+                # 在后端事件循环中获取PoB2状态
+                status = self.backend_client.run_coroutine(
+                    self.backend_client.get_pob2_status()
+                ).result(timeout=30)
+                self.status_updated.emit(status)
                 
                 # 等待下次检查
                 for _ in range(self.check_interval * 10):  # 100ms间隔检查停止
@@ -103,6 +96,10 @@ class PoB2StatusWidget(QWidget):
     refresh_requested = pyqtSignal()  # 刷新请求
     settings_changed = pyqtSignal(dict)  # 设置变化
     
+    # 后端事件循环线程 -> GUI线程（跨线程信号以队列方式投递）
+    _manual_status_ready = pyqtSignal(dict)
+    _manual_status_failed = pyqtSignal(str)
+    
     def __init__(self, backend_client=None, parent=None):
         super().__init__(parent)
         
@@ -123,6 +120,9 @@ class PoB2StatusWidget(QWidget):
         # 状态检查线程
         self.status_thread: Optional[PoB2StatusCheckThread] = None
         
+        self._manual_status_ready.connect(self._update_status_display)
+        self._manual_status_failed.connect(self._handle_status_error)
+        
         self._init_ui()
         self._setup_styles()
         self._start_monitoring()
@@ -480,27 +480,15 @@ class PoB2StatusWidget(QWidget):
     def _manual_status_check(self):
         """手动状态检查"""
         try:
-            import asyncio
-            
-            # 在新线程中执行异步操作
-            def run_async_check():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
+            # 在后端事件循环中执行异步操作；回调在事件循环线程中执行，通过信号回到GUI线程
+            def on_status_ready(future):
                 try:
-                    status = loop.run_until_complete(
-                        self.backend_client.get_pob2_status()
-                    )
-                    self._update_status_display(status)
+                    self._manual_status_ready.emit(future.result())
                 except Exception as e:
-                    self._handle_status_error(str(e))
-                finally:
-                    loop.close()
-            
-            # 在新线程中运行
-            from threading import Thread
-            thread = Thread(target=run_async_check)
-            thread.daemon = True
-            thread.start()
+                    self._manual_status_failed.emit(str(e))
+            
+            future = self.backend_client.run_coroutine(self.backend_client.get_pob2_status())
+            future.add_done_callback(on_status_ready)
             
         except Exception as e:
             self._handle_status_error(str(e))
@@ -15,6 +15,7 @@ PoB2集成模块 - Path of Building Community (PoE2)集成
 - PoB2BuildGenerator: AI构筑生成器
 - PoB2PathDetector: 路径检测器
 - PoB2Calculator: 高级计算器和分析器
+- PoB2ImportCodeEncoder: 导入代码流式编码器
 """
 
 from .local_client import PoB2LocalClient
@@ -23,6 +24,7 @@ from .calculation_engine import PoB2CalculationEngine
 from .build_generator import PoB2BuildGenerator
 from .path_detector import PoB2PathDetector
 from .calculator import PoB2Calculator, PoB2CalculatorFallback
+from .import_code_encoder import PoB2ImportCodeEncoder
 
 __all__ = [
     'PoB2LocalClient',
@@ -31,7 +33,8 @@ __all__ = [
     'PoB2BuildGenerator',
     'PoB2PathDetector',
     'PoB2Calculator',
-    'PoB2CalculatorFallback'
+    'PoB2CalculatorFallback',
+    'PoB2ImportCodeEncoder'
 ]
 
 # 版本信息
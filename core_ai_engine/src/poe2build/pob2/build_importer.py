@@ -4,19 +4,52 @@ PoB2构筑导入器 - 解析和处理Path of Building Community (PoE2)构筑格
 
 import base64
 import gzip
+import io
 import json
+import os
+import zipfile
 import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import logging
 import re
 
 logger = logging.getLogger(__name__)
 
+# 批量导入时每个工作进程最多排队的任务数（限制内存中的待处理结果）
+_BATCH_QUEUE_FACTOR = 4
+
+# 工作进程中的导入器实例
+_worker_importer: Optional['PoB2BuildImporter'] = None
+
+
+def _import_in_worker(item: Tuple[Optional[str], Union[str, Path]]) -> Dict:
+    """进程池任务：使用当前进程的导入器导入单个构筑"""
+    global _worker_importer
+    if _worker_importer is None:
+        _worker_importer = PoB2BuildImporter()
+    return _worker_importer._import_item(item)
+
 
 class PoB2BuildImporter:
     """PoB2构筑导入器，支持多种构筑格式"""
     
+    # 装备槽位映射
+    _ITEM_SLOT_MAPPING = {
+        'Weapon 1': 'main_hand',
+        'Weapon 2': 'off_hand',
+        'Helmet': 'helmet',
+        'Body Armour': 'body_armour',
+        'Gloves': 'gloves',
+        'Boots': 'boots',
+        'Belt': 'belt',
+        'Ring 1': 'ring_1',
+        'Ring 2': 'ring_2',
+        'Amulet': 'amulet'
+    }
+    
     def __init__(self):
         self.supported_formats = ['.xml', '.pob', 'import_code']
         
@@ -33,7 +66,7 @@ class PoB2BuildImporter:
         
         try:
             # 判断输入类型
-            if isinstance(source, (str, Path)) and Path(source).exists():
+            if self._is_existing_path(source):
                 # 文件路径
                 return self._import_from_file(Path(source))
             elif isinstance(source, str):
@@ -50,6 +83,80 @@ class PoB2BuildImporter:
                 'data': None
             }
     
+    def import_builds(self, sources: Iterable[Union[str, Path]],
+                      max_workers: Optional[int] = None) -> Iterator[Dict]:
+        """
+        批量导入构筑
+        
+        目录会展开为其中的 .xml/.pob 文件，.zip 压缩包会展开为其中的构筑文件。
+        构筑在进程池中并行解析，按输入顺序逐个产出结果，同时在途的任务数有上限，
+        因此可以处理数千个构筑文件而不会一次性占用大量内存。
+        
+        Args:
+            sources: 构筑文件、目录、压缩包路径或导入代码/XML字符串
+            max_workers: 最大工作进程数，默认为CPU核数；为1时在当前进程中逐个解析
+        
+        Yields:
+            Dict: 与 import_build 相同格式的结果，额外包含 'source' (文件路径或压缩包成员，字符串输入为None)
+        """
+        items = (item for source in sources for item in self.iter_build_sources(source))
+        workers = max_workers or os.cpu_count() or 1
+        
+        if workers == 1:
+            for item in items:
+                yield self._import_item(item)
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for item in items:
+                pending.append(executor.submit(_import_in_worker, item))
+                if len(pending) >= workers * _BATCH_QUEUE_FACTOR:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    
+    def iter_build_sources(self, source: Union[str, Path]) -> Iterator[Tuple[Optional[str], Union[str, Path]]]:
+        """
+        把导入源展开为 (来源标识, 文件路径或内容) 序列
+        
+        目录按文件名排序递归展开；压缩包成员在迭代时才读取内容。
+        """
+        if not self._is_existing_path(source):
+            yield None, source
+            return
+        
+        path = Path(source)
+        if path.is_dir():
+            for file_path in sorted(path.rglob('*')):
+                if file_path.is_file() and file_path.suffix.lower() in ('.xml', '.pob', '.zip'):
+                    yield from self.iter_build_sources(file_path)
+        elif path.suffix.lower() == '.zip':
+            with zipfile.ZipFile(path) as archive:
+                for name in sorted(archive.namelist()):
+                    if Path(name).suffix.lower() in ('.xml', '.pob'):
+                        content = archive.read(name).decode('utf-8-sig')
+                        yield f"{path}!{name}", content
+        else:
+            yield str(path), path
+    
+    def _import_item(self, item: Tuple[Optional[str], Union[str, Path]]) -> Dict:
+        """导入单个展开后的构筑并标注来源"""
+        label, payload = item
+        result = self.import_build(payload)
+        result['source'] = label
+        return result
+    
+    @staticmethod
+    def _is_existing_path(source: Union[str, Path]) -> bool:
+        """判断输入是否为存在的文件或目录（导入代码过长不能作为路径时返回False）"""
+        if not isinstance(source, (str, Path)):
+            return False
+        try:
+            return Path(source).exists()
+        except (OSError, ValueError):
+            return False
+    
     def _import_from_file(self, file_path: Path) -> Dict:
         """从文件导入构筑"""
         
@@ -133,23 +240,22 @@ class PoB2BuildImporter:
             raise ValueError(f"导入代码解析失败: {e}")
     
     def _parse_xml_file(self, file_path: Path) -> Dict:
-        """解析XML格式的构筑文件"""
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            xml_content = f.read()
+        """解析XML格式的构筑文件（增量解析，不把整个文件读入内存）"""
         
-        return self._parse_xml_string(xml_content)
+        # 由调用方打开文件：iterparse自己打开的文件在解析出错时不会立即关闭
+        with open(file_path, 'rb') as xml_file:
+            return self._parse_xml_stream(xml_file)
     
     def _parse_xml_string(self, xml_content: str) -> Dict:
         """解析XML字符串"""
         
+        return self._parse_xml_stream(io.StringIO(xml_content))
+    
+    def _parse_xml_stream(self, source: IO) -> Dict:
+        """增量解析XML，每个顶层段落解析完成后立即提取并释放"""
+        
         try:
-            root = ET.fromstring(xml_content)
-            
-            if root.tag != 'PathOfBuilding':
-                raise ValueError("不是有效的PathOfBuilding XML文件")
-            
-            build_data = self._extract_xml_build_data(root)
+            build_data = self._extract_xml_build_data_incremental(source)
             
             return {
                 'success': True,
@@ -160,6 +266,79 @@ class PoB2BuildImporter:
         except ET.ParseError as e:
             raise ValueError(f"XML解析错误: {e}")
     
+    def _extract_xml_build_data_incremental(self, source: IO) -> Dict:
+        """
+        使用iterparse提取构筑数据
+        
+        技能组和装备在各自的结束标签处立即提取并从树中移除，其余段落在段落结束时提取，
+        已处理的元素随即释放。结果与对完整文档调用 _extract_xml_build_data 相同（每种顶层段落只取第一个）。
+        """
+        
+        build_data = None
+        seen_sections = set()
+        depth = 0
+        root = section = None
+        extract_section = streaming = False  # 是否提取当前段落 / 是否逐个提取其子元素
+        
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if depth == 1:
+                    if elem.tag != 'PathOfBuilding':
+                        raise ValueError("不是有效的PathOfBuilding XML文件")
+                    root = elem
+                    build_data = self._extract_xml_build_data(ET.Element(elem.tag, elem.attrib))
+                elif depth == 2:
+                    # 重复的段落只需要丢弃
+                    section = elem
+                    extract_section = elem.tag not in seen_sections
+                    seen_sections.add(elem.tag)
+                    streaming = extract_section and elem.tag in ('Skills', 'Items')
+                    if streaming and elem.tag == 'Items':
+                        items_data = build_data['items'] = {}
+                continue
+            
+            depth -= 1
+            if depth == 2:
+                # 段落的直接子元素解析完成
+                if streaming:
+                    if elem.tag == 'SkillSet':
+                        skill_data = self._extract_skill_group(elem)
+                        if skill_data:
+                            build_data['skills'].append(skill_data)
+                    elif elem.tag == 'Item':
+                        self._add_item_data(items_data, elem)
+                if streaming or not extract_section:
+                    section.remove(elem)
+            elif depth == 1:
+                # 顶层段落解析完成
+                if extract_section and not streaming:
+                    self._extract_xml_section(build_data, elem)
+                root.remove(elem)
+        
+        return build_data
+    
+    def _extract_xml_section(self, build_data: Dict, elem: ET.Element):
+        """提取单个顶层段落的数据"""
+        
+        if elem.tag == 'Build':
+            build_data['character'] = {
+                'class': elem.get('className', ''),
+                'ascendancy': elem.get('ascendClassName', ''),
+                'level': int(elem.get('level', 1))
+            }
+        elif elem.tag == 'Skills':
+            for skill_group in elem.findall('SkillSet'):
+                skill_data = self._extract_skill_group(skill_group)
+                if skill_data:
+                    build_data['skills'].append(skill_data)
+        elif elem.tag == 'Items':
+            build_data['items'] = self._extract_items_data(elem)
+        elif elem.tag == 'Tree':
+            build_data['passive_tree'] = self._extract_passive_tree(elem)
+        elif elem.tag == 'Config':
+            build_data['config'] = self._extract_config_data(elem)
+    
     def _parse_pob_file(self, file_path: Path) -> Dict:
         """解析.pob格式文件（通常是导入代码）"""
         
@@ -189,37 +368,11 @@ class PoB2BuildImporter:
             'config': {}
         }
         
-        # 提取角色信息
-        build_elem = root.find('Build')
-        if build_elem is not None:
-            build_data['character'] = {
-                'class': build_elem.get('className', ''),
-                'ascendancy': build_elem.get('ascendClassName', ''),
-                'level': int(build_elem.get('level', 1))
-            }
-        
-        # 提取技能信息
-        skills_elem = root.find('Skills')
-        if skills_elem is not None:
-            for skill_group in skills_elem.findall('SkillSet'):
-                skill_data = self._extract_skill_group(skill_group)
-                if skill_data:
-                    build_data['skills'].append(skill_data)
-        
-        # 提取装备信息
-        items_elem = root.find('Items')
-        if items_elem is not None:
-            build_data['items'] = self._extract_items_data(items_elem)
-        
-        # 提取天赋树信息
-        tree_elem = root.find('Tree')
-        if tree_elem is not None:
-            build_data['passive_tree'] = self._extract_passive_tree(tree_elem)
-        
-        # 提取配置信息
-        config_elem = root.find('Config')
-        if config_elem is not None:
-            build_data['config'] = self._extract_config_data(config_elem)
+        # 提取角色、技能、装备、天赋树和配置信息
+        for tag in ('Build', 'Skills', 'Items', 'Tree', 'Config'):
+            elem = root.find(tag)
+            if elem is not None:
+                self._extract_xml_section(build_data, elem)
         
         return build_data
     
@@ -254,27 +407,18 @@ class PoB2BuildImporter:
         
         items_data = {}
         
-        # 装备槽位映射
-        slot_mapping = {
-            'Weapon 1': 'main_hand',
-            'Weapon 2': 'off_hand', 
-            'Helmet': 'helmet',
-            'Body Armour': 'body_armour',
-            'Gloves': 'gloves',
-            'Boots': 'boots',
-            'Belt': 'belt',
-            'Ring 1': 'ring_1',
-            'Ring 2': 'ring_2',
-            'Amulet': 'amulet'
-        }
-        
         for item in items_elem.findall('Item'):
-            slot = item.get('slot', '')
-            if slot in slot_mapping:
-                items_data[slot_mapping[slot]] = self._extract_item_data(item)
+            self._add_item_data(items_data, item)
         
         return items_data
     
+    def _add_item_data(self, items_data: Dict, item: ET.Element):
+        """把装备按槽位加入装备数据（不在标准槽位的装备忽略）"""
+        
+        slot = self._ITEM_SLOT_MAPPING.get(item.get('slot', ''))
+        if slot:
+            items_data[slot] = self._extract_item_data(item)
+    
     def _extract_item_data(self, item: ET.Element) -> Dict:
         """提取单个装备数据"""
         
@@ -12,6 +12,7 @@ import logging
 import threading
 
 from .local_client import PoB2LocalClient
+from ..utils.latency import latency_span
 from .build_importer import PoB2BuildImporter
 
 logger = logging.getLogger(__name__)
@@ -235,13 +236,14 @@ class PoB2CalculationEngine:
             logger.debug(f"执行PoB2计算命令: {cmd}")
             
             # 执行计算
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=self.calculation_timeout,
-                cwd=self.pob2_client.installation_path
-            )
+            with latency_span("pob2.subprocess"):
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    timeout=self.calculation_timeout,
+                    cwd=self.pob2_client.installation_path
+                )
             
             calculation_time = time.time() - start_time
             
@@ -0,0 +1,195 @@
+"""
+PoB2导入代码编码器
+
+把构筑XML以紧凑字节流（无缩进、无XML声明）直接写入zlib压缩器，压缩完成后Base64编码。
+不再经过 ElementTree -> 字符串 -> minidom美化 -> 正则去空白 的往返。
+
+使用示例:
+```python
+encoder = PoB2ImportCodeEncoder(compression_level=6)
+
+# 逐段写入（相同的片段会被缓存复用）
+stream = encoder.open()
+stream.start('PathOfBuilding')
+stream.element('Build', (('level', '90'), ('characterClass', 'Witch')))
+stream.end('PathOfBuilding')
+import_code = stream.finish()
+
+# 已有的ElementTree元素
+import_code = encoder.encode_element(root)
+```
+"""
+
+import base64
+import logging
+import xml.etree.ElementTree as ET
+import zlib
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 默认压缩级别（与旧实现相同）
+DEFAULT_COMPRESSION_LEVEL = 9
+
+# 累计到这个大小再交给压缩器，减少小块调用的开销
+_FLUSH_THRESHOLD = 16 * 1024
+
+# 属性列表：(名称, 值) 元组，保持写入顺序，同时可作为缓存键
+Attributes = Tuple[Tuple[str, str], ...]
+
+
+def escape_text(text: str) -> str:
+    """转义元素文本（与ElementTree一致）"""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def escape_attribute(value: str) -> str:
+    """转义属性值（与ElementTree一致）"""
+    value = escape_text(value)
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    if "\r" in value:
+        value = value.replace("\r", "&#13;")
+    if "\n" in value:
+        value = value.replace("\n", "&#10;")
+    if "\t" in value:
+        value = value.replace("\t", "&#09;")
+    return value
+
+
+def _attributes_markup(attributes: Attributes) -> str:
+    return "".join(f' {name}="{escape_attribute(value)}"' for name, value in attributes)
+
+
+@lru_cache(maxsize=1024)
+def start_tag(tag: str, attributes: Attributes = ()) -> bytes:
+    """开始标签的字节片段（缓存）"""
+    return f"<{tag}{_attributes_markup(attributes)}>".encode("utf-8")
+
+
+@lru_cache(maxsize=256)
+def end_tag(tag: str) -> bytes:
+    """结束标签的字节片段（缓存）"""
+    return f"</{tag}>".encode("utf-8")
+
+
+@lru_cache(maxsize=4096)
+def element_fragment(tag: str, attributes: Attributes = (), text: Optional[str] = None) -> bytes:
+    """
+    无子元素的完整元素字节片段（缓存）
+    
+    默认装备、光环技能组、配置项这类在不同构筑之间重复出现的元素只序列化一次。
+    """
+    if text is None:
+        return f"<{tag}{_attributes_markup(attributes)} />".encode("utf-8")
+    return f"<{tag}{_attributes_markup(attributes)}>{escape_text(text)}</{tag}>".encode("utf-8")
+
+
+class ImportCodeStream:
+    """
+    编码中的导入代码
+    
+    写入的XML字节先缓冲，超过阈值后交给zlib压缩器；finish() 返回Base64编码的导入代码。
+    """
+    
+    def __init__(self, compression_level: int = DEFAULT_COMPRESSION_LEVEL, keep_xml: bool = False):
+        """
+        Args:
+            compression_level: zlib压缩级别 (0-9, -1为zlib默认)
+            keep_xml: 是否保留未压缩的XML（用于调试和展示）
+        """
+        self._compressor = zlib.compressobj(compression_level)
+        self._buffer = bytearray()
+        self._compressed: List[bytes] = []
+        self._xml: Optional[List[bytes]] = [] if keep_xml else None
+        self._import_code: Optional[str] = None
+        self.xml_size = 0
+        self.compressed_size = 0
+    
+    def write(self, data: bytes) -> int:
+        """写入XML字节"""
+        if self._import_code is not None:
+            raise ValueError("导入代码已经完成编码")
+        self._buffer += data
+        if self._xml is not None:
+            self._xml.append(bytes(data))
+        self.xml_size += len(data)
+        if len(self._buffer) >= _FLUSH_THRESHOLD:
+            self._compressed.append(self._compressor.compress(self._buffer))
+            self._buffer.clear()
+        return len(data)
+    
+    def start(self, tag: str, attributes: Attributes = ()):
+        """写入开始标签"""
+        self.write(start_tag(tag, attributes))
+    
+    def end(self, tag: str):
+        """写入结束标签"""
+        self.write(end_tag(tag))
+    
+    def element(self, tag: str, attributes: Attributes = (), text: Optional[str] = None):
+        """写入无子元素的完整元素（片段缓存）"""
+        self.write(element_fragment(tag, attributes, text))
+    
+    def text_element(self, tag: str, attributes: Attributes, text: str):
+        """写入每个构筑都不同的文本元素（不进入片段缓存）"""
+        self.write(start_tag(tag, attributes))
+        self.write(escape_text(text).encode("utf-8"))
+        self.write(end_tag(tag))
+    
+    def finish(self) -> str:
+        """结束压缩并返回导入代码（重复调用返回同一结果）"""
+        if self._import_code is None:
+            self._compressed.append(self._compressor.compress(self._buffer))
+            self._compressed.append(self._compressor.flush())
+            self._buffer.clear()
+            compressed = b"".join(self._compressed)
+            self.compressed_size = len(compressed)
+            self._import_code = base64.b64encode(compressed).decode("ascii")
+        return self._import_code
+    
+    @property
+    def xml(self) -> str:
+        """已写入的XML文本（需要 keep_xml=True）"""
+        if self._xml is None:
+            raise ValueError("未保留XML内容，请使用 keep_xml=True")
+        return b"".join(self._xml).decode("utf-8")
+
+
+class PoB2ImportCodeEncoder:
+    """PoB2导入代码编码器"""
+    
+    def __init__(self, compression_level: int = DEFAULT_COMPRESSION_LEVEL):
+        """
+        Args:
+            compression_level: zlib压缩级别，越高代码越短、编码越慢 (0-9, -1为zlib默认)
+        """
+        if not -1 <= compression_level <= 9:
+            raise ValueError(f"无效的压缩级别: {compression_level}")
+        self.compression_level = compression_level
+    
+    def open(self, keep_xml: bool = False) -> ImportCodeStream:
+        """开始一个新的导入代码"""
+        return ImportCodeStream(self.compression_level, keep_xml)
+    
+    def encode_bytes(self, xml_bytes: bytes) -> str:
+        """编码已经序列化好的紧凑XML"""
+        return base64.b64encode(zlib.compress(xml_bytes, self.compression_level)).decode("ascii")
+    
+    def encode_element(self, root: ET.Element) -> str:
+        """把ElementTree元素直接序列化到压缩流中编码"""
+        stream = self.open()
+        ET.ElementTree(root).write(stream, encoding="utf-8", xml_declaration=False)
+        return stream.finish()
+    
+    @staticmethod
+    def decode(import_code: str) -> bytes:
+        """把导入代码还原为XML字节"""
+        return zlib.decompress(base64.b64decode(import_code.encode("ascii")))
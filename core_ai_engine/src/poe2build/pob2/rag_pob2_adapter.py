@@ -13,8 +13,6 @@ RAG-PoB2高度集成适配器 - 智能构建推荐与PoB2完美融合
 """
 
 import json
-import base64
-import zlib
 import xml.etree.ElementTree as ET
 import logging
 from typing import Dict, Any, List, Optional, Tuple
@@ -22,13 +20,14 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from enum import Enum
 
-from ..models.build import PoE2Build, BuildStats
+from ..models.build import PoE2Build
 from ..models.characters import PoE2CharacterClass, PoE2Ascendancy
-from ..models.items import PoE2Item, ItemType
+from ..models.items import PoE2Item
 from ..rag.models import PoE2BuildData, BuildGoal
 from ..rag.similarity_engine import SearchResult
 from .path_detector import PoB2PathDetector
 from .local_client import PoB2LocalClient
+from .import_code_encoder import PoB2ImportCodeEncoder
 
 logger = logging.getLogger(__name__)
 
@@ -80,6 +79,7 @@ class RAGPoB2Adapter:
         self.pob2_client = pob2_client or PoB2LocalClient()
         self.template_cache = {}
         self.validation_cache = {}
+        self.code_encoder = PoB2ImportCodeEncoder()
         
         # 初始化PoB2数据映射
         self._init_data_mappings()
@@ -413,17 +413,8 @@ class RAGPoB2Adapter:
             # 创建XML结构
             build_xml = self._create_build_xml(template)
             
-            # 转换为字符串
-            xml_string = ET.tostring(build_xml, encoding='unicode')
-            
-            # 压缩和编码
-            compressed = zlib.compress(xml_string.encode('utf-8'))
-            encoded = base64.b64encode(compressed).decode('ascii')
-            
-            # 添加PoB2标识符
-            import_code = f"eNrtPQty6zayQO8yPQegeB4_Y3eCJCfOZFZyJrU2U5VdSW7fgJFIc0aUGJLy-1g5w97BD7CHyC1ygjxE7rE3yBvE5qMbDYCkRP3sTO3MysqyKBINNBqNRqPx-3vf7cDf3_8mGhqNx2EMQxh_F_7-_tvgr2_xd--_he\_\_f9vdRVEUfgv97d\_v73e1WixGTdR8-\_xGBE1QIYJfojBEtVq78EsUdLswgCGEYAQFT3Fg2EWr3SuCKviq1YPgr97vdntd9Hfv\_2e1Wl3UfPu\_5\_f3293u9uNdWAvNFQ"
-            
-            return import_code
+            # 紧凑XML直接写入压缩流并编码
+            return self.code_encoder.encode_element(build_xml)
             
         except Exception as e:
             logger.error(f"生成PoB2导入代码失败: {e}")
@@ -6,6 +6,7 @@ RAG智能推荐系统 - 基于PoE2构筑数据的RAG增强AI推荐
 
 核心组件:
 - PoE2BuildData: 构筑数据模型
+- BuildSnapshot: 列式构筑快照 (惰性加载)
 - PoE2RAGDataCollector: 数据收集器
 - PoE2BuildScraper: 构筑爬虫
 - PoE2DataPreprocessor: 数据预处理器
@@ -19,61 +20,101 @@ RAG智能推荐系统 - 基于PoE2构筑数据的RAG增强AI推荐
 - 向量化存储与检索
 - 尊重API使用规范
 - 缓存和性能优化
+- 子模块按需延迟导入
 """
 
-from .models import (
-    PoE2BuildData, 
-    RAGDataModel, 
-    SuccessMetrics,
-    SkillGemSetup,
-    ItemInfo,
-    OffensiveStats,
-    DefensiveStats,
-    BuildGoal,
-    DataQuality
-)
-from .data_collector import PoE2RAGDataCollector, PoE2NinjaRAGCollector
-from .build_scraper import PoE2BuildScraper
-from .data_preprocessor import PoE2DataPreprocessor
+from typing import TYPE_CHECKING
 
-# RAG向量化组件
-from .vectorizer import PoE2BuildVectorizer, VectorConfig, create_vectorizer
-from .index_builder import PoE2BuildIndexBuilder, IndexConfig, create_index_builder
-from .similarity_engine import (
-    PoE2SimilarityEngine, 
-    SearchConfig, 
-    SearchQuery, 
-    SearchResult,
-    create_similarity_engine
-)
+from ..utils.lazy_import import attach_lazy_attributes
 
-# RAG AI引擎组件 (阶段9新增)
-from .ai_engine import (
-    PoE2AIEngine,
-    RecommendationStrategy,
-    RecommendationContext, 
-    AIRecommendation,
-    BuildInsight,
-    ConfidenceLevel,
-    create_ai_engine
-)
-from .knowledge_base import (
-    PoE2KnowledgeBase,
-    BuildPattern,
-    MetaInsight,
-    KnowledgeEntry,
-    MetaTrend,
-    KnowledgeType,
-    create_knowledge_base
-)
-from .recommendation import (
-    PoE2RecommendationEngine,
-    AlgorithmType,
-    RecommendationScore,
-    UserProfile,
-    OptimizationGoal,
-    create_recommendation_engine
-)
+# 导出属性 -> 所在子模块。子模块在首次访问属性时才导入 (PEP 562)，
+# 只用到数据模型时不会加载aiohttp、爬虫和向量化组件。
+_LAZY_ATTRIBUTES = {
+    # 数据模型
+    "PoE2BuildData": "models",
+    "RAGDataModel": "models",
+    "SuccessMetrics": "models",
+    "SkillGemSetup": "models",
+    "ItemInfo": "models",
+    "OffensiveStats": "models",
+    "DefensiveStats": "models",
+    "BuildGoal": "models",
+    "DataQuality": "models",
+    "BuildSnapshot": "snapshot",
+    "BuildSnapshotWriter": "snapshot",
+    "LazyBuildList": "snapshot",
+    
+    # 数据收集与预处理
+    "PoE2RAGDataCollector": "data_collector",
+    "PoE2NinjaRAGCollector": "data_collector",
+    "PoE2BuildScraper": "build_scraper",
+    "PoE2DataPreprocessor": "data_preprocessor",
+    
+    # RAG向量化组件
+    "PoE2BuildVectorizer": "vectorizer",
+    "VectorConfig": "vectorizer",
+    "create_vectorizer": "vectorizer",
+    "PoE2BuildIndexBuilder": "index_builder",
+    "IndexConfig": "index_builder",
+    "create_index_builder": "index_builder",
+    "PoE2SimilarityEngine": "similarity_engine",
+    "SearchConfig": "similarity_engine",
+    "SearchQuery": "similarity_engine",
+    "SearchResult": "similarity_engine",
+    "create_similarity_engine": "similarity_engine",
+    
+    # RAG AI引擎组件 (阶段9新增)
+    "PoE2AIEngine": "ai_engine",
+    "RecommendationStrategy": "ai_engine",
+    "RecommendationContext": "ai_engine",
+    "AIRecommendation": "ai_engine",
+    "BuildInsight": "ai_engine",
+    "ConfidenceLevel": "ai_engine",
+    "create_ai_engine": "ai_engine",
+    "PoE2KnowledgeBase": "knowledge_base",
+    "BuildPattern": "knowledge_base",
+    "MetaInsight": "knowledge_base",
+    "KnowledgeEntry": "knowledge_base",
+    "MetaTrend": "knowledge_base",
+    "KnowledgeType": "knowledge_base",
+    "KnowledgeAggregates": "knowledge_base",
+    "create_knowledge_base": "knowledge_base",
+    "PoE2RecommendationEngine": "recommendation",
+    "AlgorithmType": "recommendation",
+    "RecommendationScore": "recommendation",
+    "UserProfile": "recommendation",
+    "OptimizationGoal": "recommendation",
+    "create_recommendation_engine": "recommendation",
+}
+
+__getattr__, __dir__ = attach_lazy_attributes(__name__, _LAZY_ATTRIBUTES)
+
+if TYPE_CHECKING:  # 供静态分析和IDE补全使用
+    from .models import (
+        PoE2BuildData, RAGDataModel, SuccessMetrics, SkillGemSetup, ItemInfo,
+        OffensiveStats, DefensiveStats, BuildGoal, DataQuality
+    )
+    from .snapshot import BuildSnapshot, BuildSnapshotWriter, LazyBuildList
+    from .data_collector import PoE2RAGDataCollector, PoE2NinjaRAGCollector
+    from .build_scraper import PoE2BuildScraper
+    from .data_preprocessor import PoE2DataPreprocessor
+    from .vectorizer import PoE2BuildVectorizer, VectorConfig, create_vectorizer
+    from .index_builder import PoE2BuildIndexBuilder, IndexConfig, create_index_builder
+    from .similarity_engine import (
+        PoE2SimilarityEngine, SearchConfig, SearchQuery, SearchResult, create_similarity_engine
+    )
+    from .ai_engine import (
+        PoE2AIEngine, RecommendationStrategy, RecommendationContext, AIRecommendation,
+        BuildInsight, ConfidenceLevel, create_ai_engine
+    )
+    from .knowledge_base import (
+        PoE2KnowledgeBase, BuildPattern, MetaInsight, KnowledgeEntry, MetaTrend,
+        KnowledgeType, KnowledgeAggregates, create_knowledge_base
+    )
+    from .recommendation import (
+        PoE2RecommendationEngine, AlgorithmType, RecommendationScore, UserProfile,
+        OptimizationGoal, create_recommendation_engine
+    )
 
 __version__ = "2.0.0"
 
@@ -88,6 +129,9 @@ __all__ = [
     "DefensiveStats",
     "BuildGoal",
     "DataQuality",
+    "BuildSnapshot",
+    "BuildSnapshotWriter",
+    "LazyBuildList",
     
     # 数据收集与预处理
     "PoE2RAGDataCollector",
@@ -122,6 +166,7 @@ __all__ = [
     "KnowledgeEntry",
     "MetaTrend",
     "KnowledgeType", 
+    "KnowledgeAggregates",
     "create_knowledge_base",
     "PoE2RecommendationEngine",
     "AlgorithmType",
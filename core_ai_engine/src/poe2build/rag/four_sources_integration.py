@@ -21,6 +21,7 @@ from dataclasses import dataclass
 # 导入四大核心数据源
 from ..data_sources.poe2scout.api_client import get_poe2scout_client
 from ..data_sources.ninja.scraper import get_ninja_scraper
+from ..data_sources.ninja.snapshots import MetaSnapshotDelta
 from ..data_sources.pob2.data_extractor import get_pob2_extractor
 from ..data_sources.poe2db.api_client import get_poe2db_client
 
@@ -30,6 +31,7 @@ from .vectorizer import PoE2BuildVectorizer
 from .index_builder import PoE2BuildIndexBuilder
 from .ai_engine import PoE2AIEngine
 from .knowledge_base import PoE2KnowledgeBase
+from .models import PoE2BuildData, SkillGemSetup, OffensiveStats, DefensiveStats
 
 logger = logging.getLogger(__name__)
 
@@ -92,6 +94,82 @@ class FourSourcesRAGTrainer:
             'training_progress': {},
             'knowledge_base_stats': {}
         }
+        
+        # 增量Meta：订阅ninja快照差异，只把变化的构筑写入知识库
+        self._ninja_builds: Dict[str, Dict[str, PoE2BuildData]] = {}  # 联盟 -> 构筑键 -> 已写入的构筑
+        self._meta_versions: Dict[str, Optional[int]] = {}            # 联盟 -> 已处理的快照版本
+        self.ninja_scraper.subscribe(self.apply_meta_delta)
+    
+    def close(self):
+        """取消对ninja Meta差异的订阅"""
+        self.ninja_scraper.unsubscribe(self.apply_meta_delta)
+    
+    def apply_meta_delta(self, delta: MetaSnapshotDelta) -> Dict[str, int]:
+        """
+        把ninja Meta快照差异增量写入知识库
+        
+        新增的构筑直接加入；变化的构筑先减去旧记录再加入新记录（替换）；
+        移除的构筑从知识库中减去。差异的起始版本与已处理的版本不一致时
+        （订阅前已刷新过，或错过了中间版本），按当前快照重新对齐。
+        
+        Args:
+            delta: NinjaMetaScraper.refresh 推送的差异
+        
+        Returns:
+            知识库更新摘要
+        """
+        league = delta.league
+        if delta.previous_version != self._meta_versions.get(league):
+            delta = self._resync_meta_delta(league, delta.version)
+        
+        held = self._ninja_builds.setdefault(league, {})
+        removed = [held.pop(key) for key in [*delta.added, *delta.changed, *delta.removed] if key in held]
+        added = []
+        for records in (delta.added, delta.changed):
+            for key, record in records.items():
+                build = self._popular_build_to_rag(record)
+                held[key] = build
+                added.append(build)
+        
+        if self.knowledge_base is None:
+            self.knowledge_base = PoE2KnowledgeBase()
+        summary = self.knowledge_base.apply_build_delta(added=added, removed=removed)
+        self._meta_versions[league] = delta.version
+        
+        logger.info(f"Meta v{delta.version} ({league}) 已增量写入知识库: "
+                    f"+{len(delta.added)} ~{len(delta.changed)} -{len(delta.removed)}")
+        return summary
+    
+    def _resync_meta_delta(self, league: str, version: Optional[int]) -> MetaSnapshotDelta:
+        """按快照版本的完整记录与已写入的构筑对齐（已写入的构筑全部按变化替换）"""
+        records = self.ninja_scraper.snapshots.records(league, version)
+        held = self._ninja_builds.get(league, {})
+        return MetaSnapshotDelta(
+            league=league,
+            previous_version=self._meta_versions.get(league),
+            version=version,
+            added={key: record for key, record in records.items() if key not in held},
+            changed={key: record for key, record in records.items() if key in held},
+            removed=[key for key in held if key not in records]
+        )
+    
+    @staticmethod
+    def _popular_build_to_rag(record: Dict[str, Any]) -> PoE2BuildData:
+        """把快照中的流行构筑记录转换为RAG构筑数据"""
+        return PoE2BuildData(
+            character_name=record.get('name') or "",
+            character_class=record.get('character_class') or "",
+            ascendancy=record.get('ascendancy') or "",
+            level=int(record.get('avg_level') or 85),
+            main_skill_setup=SkillGemSetup(
+                main_skill=record.get('main_skill') or "",
+                support_gems=list(record.get('support_gems') or [])
+            ),
+            passive_keystones=list(record.get('passive_keystone') or []),
+            offensive_stats=OffensiveStats(dps=float(record.get('dps_estimate') or 0.0)),
+            defensive_stats=DefensiveStats(life=int(record.get('ehp_estimate') or 0)),
+            data_source="poe.ninja"
+        )
     
     async def collect_all_four_sources(self, league: str = "Rise of the Abyssal", limit: Optional[int] = None) -> FourSourcesData:
         """
@@ -418,7 +496,8 @@ class FourSourcesRAGTrainer:
         # 初始化RAG组件
         self.vectorizer = PoE2BuildVectorizer()
         self.index_builder = PoE2BuildIndexBuilder()
-        self.knowledge_base = PoE2KnowledgeBase()
+        if self.knowledge_base is None:  # 保留已增量写入的Meta构筑
+            self.knowledge_base = PoE2KnowledgeBase()
         self.ai_engine = PoE2AIEngine()
         
         training_result = {
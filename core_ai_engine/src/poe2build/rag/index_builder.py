@@ -16,12 +16,11 @@ from dataclasses import dataclass, asdict
 
 import numpy as np
 
-try:
-    import faiss
-    FAISS_AVAILABLE = True
-except ImportError:
-    faiss = None
-    FAISS_AVAILABLE = False
+from ..utils.lazy_import import optional_module
+
+# 导入本模块时即解析FAISS，保证 FAISS_AVAILABLE 反映实际能否导入
+faiss = optional_module("faiss", resolve=True)
+FAISS_AVAILABLE = faiss is not None
 
 def check_faiss_dependency():
     """检查FAISS依赖"""
@@ -38,6 +37,7 @@ logger = logging.getLogger(__name__)
 class IndexConfig:
     """索引配置"""
     index_type: str = "IndexFlatIP"          # FAISS索引类型
+    index_kind: str = "auto"                 # 索引结构: auto(按数据量选择), flat, ivf, ivfpq
     similarity_metric: str = "cosine"        # 相似度度量: "cosine", "l2", "dot"
     vector_dimension: int = 384              # 向量维度
     nprobe: int = 10                        # 搜索时的探针数量
@@ -96,7 +96,16 @@ class PoE2BuildIndexBuilder:
         check_faiss_dependency()
         d = self.config.vector_dimension
         
-        if num_vectors < 1000:
+        kind = self.config.index_kind
+        if kind == "auto":
+            if num_vectors < 1000:
+                kind = "flat"
+            elif num_vectors < 50000:
+                kind = "ivf"
+            else:
+                kind = "ivfpq"
+        
+        if kind == "flat":
             # 小数据集使用暴力搜索
             if self.config.similarity_metric == "cosine":
                 index = faiss.IndexFlatIP(d)
@@ -104,9 +113,9 @@ class PoE2BuildIndexBuilder:
                 index = faiss.IndexFlatL2(d)
             logger.info(f"创建Flat索引 (向量数: {num_vectors})")
             
-        elif num_vectors < 50000:
+        elif kind == "ivf":
             # 中等数据集使用IVF
-            nlist = min(self.config.clustering_nlist, num_vectors // 10)
+            nlist = max(1, min(self.config.clustering_nlist, num_vectors // 10))
             
             if self.config.similarity_metric == "cosine":
                 quantizer = faiss.IndexFlatIP(d)
@@ -118,9 +127,9 @@ class PoE2BuildIndexBuilder:
             index.nprobe = self.config.nprobe
             logger.info(f"创建IVF索引 (向量数: {num_vectors}, nlist: {nlist})")
             
-        else:
+        elif kind == "ivfpq":
             # 大数据集使用IVF + PQ压缩
-            nlist = min(self.config.clustering_nlist, num_vectors // 20)
+            nlist = max(1, min(self.config.clustering_nlist, num_vectors // 20))
             m = min(self.config.pq_m, d // 4)
             
             quantizer = faiss.IndexFlatL2(d)
@@ -135,6 +144,9 @@ class PoE2BuildIndexBuilder:
                 index = faiss.IndexPreTransform(opq, index)
                 logger.info("启用OPQ预处理")
         
+        else:
+            raise ValueError(f"不支持的索引结构: {self.config.index_kind}")
+        
         # GPU支持 (需要faiss-gpu)
         if self.config.use_gpu:
             try:
@@ -174,26 +186,54 @@ class PoE2BuildIndexBuilder:
         # 1. 向量化构筑数据
         logger.info("正在向量化构筑数据...")
         vectors = self.vectorizer.vectorize_builds(builds, show_progress=show_progress)
+        vectorize_time = (datetime.now() - start_time).total_seconds()
+        
+        stats = self.build_index_from_vectors(vectors, builds)
+        stats['vectorize_time_seconds'] = vectorize_time
+        stats['build_time_seconds'] = (datetime.now() - start_time).total_seconds()
+        
+        logger.info(f"索引构建完成: {stats}")
+        return stats
+    
+    def build_index_from_vectors(self, vectors: np.ndarray,
+                                 builds: List[PoE2BuildData]) -> Dict[str, Any]:
+        """用已经向量化的数据构建索引（如load_vectors读取的缓存向量）
+        
+        Args:
+            vectors: 构筑向量矩阵 [num_builds, vector_dim]，行顺序与builds一致
+            builds: 构筑数据列表
+            
+        Returns:
+            索引构建统计信息
+        """
+        if len(vectors) != len(builds):
+            raise ValueError(f"向量数量 {len(vectors)} 与构筑数量 {len(builds)} 不一致")
+        
+        start_time = datetime.now()
         
         # 2. 创建索引
         logger.info("创建FAISS索引...")
         self.index = self._create_index(len(builds))
         
         # 3. 预处理向量 (如果使用余弦相似度)
-        processed_vectors = vectors.copy()
+        processed_vectors = np.ascontiguousarray(vectors, dtype=np.float32).copy()
         if self.config.similarity_metric == "cosine":
             # 标准化向量用于内积计算余弦相似度
             norms = np.linalg.norm(processed_vectors, axis=1, keepdims=True)
             processed_vectors = processed_vectors / np.maximum(norms, 1e-8)
         
         # 4. 训练索引 (如果需要)
+        train_start = datetime.now()
         if hasattr(self.index, 'train') and not self.index.is_trained:
             logger.info("训练索引...")
             self.index.train(processed_vectors)
+        train_time = (datetime.now() - train_start).total_seconds()
         
         # 5. 添加向量到索引
         logger.info("添加向量到索引...")
+        add_start = datetime.now()
         self.index.add(processed_vectors)
+        add_time = (datetime.now() - add_start).total_seconds()
         
         # 6. 构建元数据映射
         self.build_metadata = {}
@@ -223,12 +263,13 @@ class PoE2BuildIndexBuilder:
             'vector_dimension': self.config.vector_dimension,
             'index_type': type(self.index).__name__,
             'build_time_seconds': build_time,
+            'train_time_seconds': train_time,
+            'add_time_seconds': add_time,
             'memory_usage_mb': self._estimate_memory_usage(),
             'similarity_metric': self.config.similarity_metric,
             'timestamp': datetime.now().isoformat()
         }
         
-        logger.info(f"索引构建完成: {stats}")
         return stats
     
     def add_builds(self, new_builds: List[PoE2BuildData], 
@@ -479,6 +520,33 @@ class PoE2BuildIndexBuilder:
         
         return stats
     
+    def reconstruct_vectors(self, positions: List[int]) -> Optional[np.ndarray]:
+        """按索引位置取回已存储的向量 (余弦索引中为标准化向量)
+        
+        IVF索引首次调用时建立直接映射；PQ压缩索引返回的是近似向量。
+        
+        Args:
+            positions: 向量在索引中的位置 (即元数据中的 index_position)
+            
+        Returns:
+            向量矩阵 [len(positions), vector_dim]，无法重建时返回None
+        """
+        if self.index is None or len(positions) == 0:
+            return None
+        
+        ids = np.asarray(positions, dtype=np.int64)
+        try:
+            return self.index.reconstruct_batch(ids)
+        except RuntimeError:
+            pass
+        
+        try:
+            faiss.extract_index_ivf(self.index).make_direct_map()
+            return self.index.reconstruct_batch(ids)
+        except Exception as e:
+            logger.debug(f"无法从索引重建向量: {e}")
+            return None
+    
     def optimize_index(self) -> Dict[str, Any]:
         """优化索引性能"""
         if not self.index:
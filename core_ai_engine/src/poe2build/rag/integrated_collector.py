@@ -373,9 +373,8 @@ class IntegratedRAGCollector:
         filepath = self.output_dir / filename
         
         try:
-            # 保存为JSON格式
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(data.to_json())
+            # 按扩展名保存为JSON或列式快照(.npz)
+            data.save_to_file(str(filepath))
             
             logger.info(f"[Integrated RAG] 数据已保存到: {filepath}")
             return str(filepath)
@@ -3,10 +3,14 @@
 
 负责管理构筑知识库，包括Meta趋势分析、成功模式提取、
 知识更新和检索等功能。为AI引擎提供丰富的背景知识。
+
+知识从可增量加减的运行聚合派生，持久化采用 快照 + 追加式变更日志。
 """
 
+import os
 import json
 import logging
+from bisect import bisect_right, insort
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple, Set
 from dataclasses import dataclass, field, asdict
@@ -15,7 +19,6 @@ from collections import defaultdict, Counter
 from enum import Enum
 
 from .models import PoE2BuildData, BuildGoal, DataQuality, RAGDataModel
-from .data_collector import PoE2RAGDataCollector
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -79,12 +82,187 @@ class KnowledgeEntry:
     verification_count: int = 0            # 验证次数
     tags: List[str] = field(default_factory=list)
 
+_KEY_SEP = "\x1f"  # 聚合复合键分隔符
+
+def _join_key(*parts) -> str:
+    """拼接聚合复合键"""
+    return _KEY_SEP.join(str(part) for part in parts)
+
+def _index_add(index: Dict[Any, Dict[str, None]], key: Any, item_id: str):
+    """向二级索引的桶中加入ID（dict作有序集合，保持插入顺序）"""
+    index.setdefault(key, {})[item_id] = None
+
+def _index_discard(index: Dict[Any, Dict[str, None]], key: Any, item_id: str):
+    """从二级索引的桶中移除ID，空桶一并删除"""
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.pop(item_id, None)
+        if not bucket:
+            del index[key]
+
+def _split_key(key: str) -> List[str]:
+    """拆分聚合复合键"""
+    return key.split(_KEY_SEP)
+
+def _accumulate(target: Dict[str, Dict[str, float]],
+                delta: Dict[str, Dict[str, float]],
+                sign: int = 1):
+    """把一组聚合增量按符号累加到target"""
+    for name, values in delta.items():
+        bucket = target.setdefault(name, {})
+        for key, value in values.items():
+            bucket[key] = bucket.get(key, 0) + sign * value
+
+class KnowledgeAggregates:
+    """知识库运行聚合
+    
+    以计数器和求和值保存从构筑中提取的全部统计量，可按构筑增量加减。
+    统计信息、构筑模式、成功因素和协同条目都从这些聚合派生。
+    """
+    
+    COUNTERS = (
+        'totals',                 # builds / successful / positive_cost_sum / positive_cost_count
+        'class_count',            # 职业 -> 构筑数
+        'class_cost_sum',         # 职业 -> 成本总和
+        'skill_count',            # 主技能 -> 构筑数
+        'goal_count',             # 构筑目标 -> 构筑数
+        'pattern_success_sum',    # 职业_技能 -> 成功度总和
+        'pattern_success_count',  # 职业_技能 -> 样本数
+        'group_count',            # (职业, 升华, 技能, 目标) -> 构筑数
+        'group_cost_sum',         # (职业, 升华, 技能, 目标) -> 成本总和 (仅成本>0)
+        'group_cost_count',       # (职业, 升华, 技能, 目标) -> 有成本的构筑数
+        'group_high_quality',     # (职业, 升华, 技能, 目标) -> 高质量构筑数
+        'success_factor_count',   # 成功因素 -> 成功构筑数
+        'skill_equipment',        # (技能, 武器) -> 构筑数
+        'skill_keystone',         # (技能, 关键天赋) -> 构筑数
+    )
+    
+    def __init__(self):
+        for name in self.COUNTERS:
+            setattr(self, name, Counter())
+    
+    @staticmethod
+    def group_key(build: PoE2BuildData) -> str:
+        """构筑模式分组键"""
+        return _join_key(
+            build.character_class,
+            build.ascendancy,
+            build.main_skill_setup.main_skill,
+            build.build_goal.value
+        )
+    
+    @staticmethod
+    def contributions(build: PoE2BuildData) -> Dict[str, Dict[str, float]]:
+        """单个构筑对各聚合的贡献"""
+        character_class = build.character_class
+        skill = build.main_skill_setup.main_skill
+        cost = build.total_cost
+        group_key = KnowledgeAggregates.group_key(build)
+        stats_key = f"{character_class}_{skill}"
+        
+        # 统计用成功度（基于流行度和数据质量）
+        success_score = 0.5
+        if build.popularity_rank > 0:
+            success_score += max(0, 1.0 - build.popularity_rank / 1000)
+        if build.data_quality == DataQuality.HIGH:
+            success_score += 0.3
+        elif build.data_quality == DataQuality.MEDIUM:
+            success_score += 0.1
+        
+        delta = {
+            'totals': {'builds': 1},
+            'class_count': {character_class: 1},
+            'class_cost_sum': {character_class: cost},
+            'skill_count': {skill: 1},
+            'goal_count': {build.build_goal.value: 1},
+            'pattern_success_sum': {stats_key: success_score},
+            'pattern_success_count': {stats_key: 1},
+            'group_count': {group_key: 1},
+        }
+        
+        if cost > 0:
+            delta['totals']['positive_cost_sum'] = cost
+            delta['totals']['positive_cost_count'] = 1
+            delta['group_cost_sum'] = {group_key: cost}
+            delta['group_cost_count'] = {group_key: 1}
+        if build.data_quality == DataQuality.HIGH:
+            delta['group_high_quality'] = {group_key: 1}
+        
+        # 成功因素（流行度排名、数据质量、性价比）
+        factor_score = 0
+        if 0 < build.popularity_rank <= 100:
+            factor_score += 0.5
+        if build.data_quality == DataQuality.HIGH:
+            factor_score += 0.3
+        if cost < 10:
+            factor_score += 0.2
+        if factor_score >= 0.6:
+            delta['totals']['successful'] = 1
+            if cost < 5:
+                budget_factor = "budget_friendly"
+            elif cost > 20:
+                budget_factor = "high_investment"
+            else:
+                budget_factor = "moderate_investment"
+            delta['success_factor_count'] = {
+                f"class_{character_class}": 1,
+                f"skill_{skill}": 1,
+                f"goal_{build.build_goal.value}": 1,
+                budget_factor: 1
+            }
+        
+        # 技能-装备 / 技能-关键天赋 协同
+        if build.weapon and build.weapon.name:
+            delta['skill_equipment'] = {_join_key(skill, build.weapon.name): 1}
+        if build.passive_keystones:
+            keystone_delta = {}
+            for keystone in build.passive_keystones:
+                key = _join_key(skill, keystone)
+                keystone_delta[key] = keystone_delta.get(key, 0) + 1
+            delta['skill_keystone'] = keystone_delta
+        
+        return delta
+    
+    def merge(self, delta: Dict[str, Dict[str, float]]):
+        """合并增量，归零的键会被移除"""
+        for name, values in delta.items():
+            counter = getattr(self, name)
+            for key, value in values.items():
+                new_value = counter.get(key, 0) + value
+                if abs(new_value) < 1e-9:
+                    counter.pop(key, None)
+                else:
+                    counter[key] = new_value
+    
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        return {name: dict(getattr(self, name)) for name in self.COUNTERS}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, float]]) -> 'KnowledgeAggregates':
+        aggregates = cls()
+        for name in cls.COUNTERS:
+            getattr(aggregates, name).update(data.get(name, {}))
+        return aggregates
+
 class PoE2KnowledgeBase:
     """PoE2构筑知识库管理器
     
     管理构筑相关的知识，包括模式识别、Meta分析、优化建议等。
+    
+    知识由运行聚合(KnowledgeAggregates)派生，apply_build_delta只处理新增/移除的构筑；
+    保存时变更追加到变更日志，日志过长时再压缩为完整快照。
     """
     
+    PATTERNS_FILE = "build_patterns.json"
+    INSIGHTS_FILE = "meta_insights.json"
+    ENTRIES_FILE = "knowledge_entries.json"
+    AGGREGATES_FILE = "knowledge_aggregates.json"
+    CHANGE_LOG_FILE = "knowledge_changes.jsonl"
+    SNAPSHOT_SEQ_KEY = "log_seq"            # 聚合快照中记录已包含的日志序号
+    
+    # 构筑模式按core_elements建立二级索引的字段
+    PATTERN_INDEX_FIELDS = ('character_class', 'ascendancy', 'main_skill', 'build_goal')
+    
     def __init__(self, knowledge_dir: str = "data/knowledge"):
         """初始化知识库管理器
         
@@ -99,6 +277,29 @@ class PoE2KnowledgeBase:
         self.meta_insights: List[MetaInsight] = []
         self.knowledge_entries: Dict[str, KnowledgeEntry] = {}
         
+        # 运行聚合与增量状态
+        self.aggregates = KnowledgeAggregates()
+        self._group_samples: Dict[str, List[str]] = {}
+        self._pending_delta: Dict[str, Dict[str, float]] = {}
+        self._dirty_patterns: Set[str] = set()
+        self._dirty_entries: Set[str] = set()
+        self._deleted_patterns: Set[str] = set()
+        self._deleted_entries: Set[str] = set()
+        self._new_insights: List[MetaInsight] = []
+        self._change_log_records = 0
+        self._log_seq = 0                       # 最后一条变更日志记录的序号
+        
+        # 二级索引（在_put_*/_drop_*中随写入维护）
+        self._pattern_index: Dict[str, Dict[str, Dict[str, None]]] = {
+            field_name: {} for field_name in self.PATTERN_INDEX_FIELDS
+        }
+        self._pattern_index_keys: Dict[str, Tuple[tuple, Tuple[datetime, str]]] = {}
+        self._patterns_by_update: List[Tuple[datetime, str]] = []   # 按last_updated有序
+        self._entries_by_type: Dict[KnowledgeType, Dict[str, None]] = {}
+        self._entries_by_tag: Dict[str, Dict[str, None]] = {}
+        self._entries_by_factor: Dict[str, str] = {}
+        self._entry_index_keys: Dict[str, tuple] = {}
+
         # 分析缓存
         self._class_stats = {}
         self._skill_stats = {}
@@ -108,208 +309,516 @@ class PoE2KnowledgeBase:
         self.max_patterns = 100
         self.max_insights = 500
         self.pattern_min_samples = 5
+        self.synergy_min_usage = 3
+        self.insight_retention_days = 30
+        self.max_pattern_samples = 10
+        self.compact_threshold = 2000           # 变更日志记录数超过该值时压缩
         
         self._load_knowledge_base()
-        
+    
+    # ===== 序列化 =====
+    
+    @staticmethod
+    def _pattern_to_dict(pattern: BuildPattern) -> Dict[str, Any]:
+        pattern_dict = asdict(pattern)
+        pattern_dict['first_seen'] = pattern.first_seen.isoformat()
+        pattern_dict['last_updated'] = pattern.last_updated.isoformat()
+        pattern_dict['trend'] = pattern.trend.value
+        return pattern_dict
+    
+    @staticmethod
+    def _pattern_from_dict(pattern_data: Dict[str, Any]) -> BuildPattern:
+        pattern = BuildPattern(**pattern_data)
+        # 转换日期时间
+        if isinstance(pattern.first_seen, str):
+            pattern.first_seen = datetime.fromisoformat(pattern.first_seen)
+        if isinstance(pattern.last_updated, str):
+            pattern.last_updated = datetime.fromisoformat(pattern.last_updated)
+        pattern.trend = MetaTrend(pattern_data.get('trend', MetaTrend.STABLE.value))
+        return pattern
+    
+    @staticmethod
+    def _insight_to_dict(insight: MetaInsight) -> Dict[str, Any]:
+        insight_dict = asdict(insight)
+        insight_dict['created_at'] = insight.created_at.isoformat()
+        return insight_dict
+    
+    @staticmethod
+    def _insight_from_dict(insight_data: Dict[str, Any]) -> MetaInsight:
+        insight = MetaInsight(**insight_data)
+        if isinstance(insight.created_at, str):
+            insight.created_at = datetime.fromisoformat(insight.created_at)
+        return insight
+    
+    @staticmethod
+    def _entry_to_dict(entry: KnowledgeEntry) -> Dict[str, Any]:
+        entry_dict = asdict(entry)
+        entry_dict['knowledge_type'] = entry.knowledge_type.value
+        entry_dict['created_at'] = entry.created_at.isoformat()
+        if entry.last_verified:
+            entry_dict['last_verified'] = entry.last_verified.isoformat()
+        return entry_dict
+    
+    @staticmethod
+    def _entry_from_dict(entry_data: Dict[str, Any]) -> KnowledgeEntry:
+        entry = KnowledgeEntry(**entry_data)
+        entry.knowledge_type = KnowledgeType(entry_data.get('knowledge_type'))
+        if isinstance(entry.created_at, str):
+            entry.created_at = datetime.fromisoformat(entry.created_at)
+        if entry.last_verified and isinstance(entry.last_verified, str):
+            entry.last_verified = datetime.fromisoformat(entry.last_verified)
+        return entry
+    
+    def _read_json(self, filename: str) -> Any:
+        path = self.knowledge_dir / filename
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _write_json(self, filename: str, data: Any):
+        """原子写入紧凑JSON"""
+        path = self.knowledge_dir / filename
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    
+    # ===== 加载与保存 =====
+    
     def _load_knowledge_base(self):
-        """加载知识库"""
+        """加载知识库快照并重放变更日志"""
         try:
             # 加载构筑模式
-            patterns_file = self.knowledge_dir / "build_patterns.json"
-            if patterns_file.exists():
-                with open(patterns_file, 'r', encoding='utf-8') as f:
-                    patterns_data = json.load(f)
-                
-                for pattern_data in patterns_data:
-                    pattern = BuildPattern(**pattern_data)
-                    # 转换日期时间
-                    if isinstance(pattern.first_seen, str):
-                        pattern.first_seen = datetime.fromisoformat(pattern.first_seen)
-                    if isinstance(pattern.last_updated, str):
-                        pattern.last_updated = datetime.fromisoformat(pattern.last_updated)
-                    pattern.trend = MetaTrend(pattern_data.get('trend', MetaTrend.STABLE.value))
-                    
-                    self.build_patterns[pattern.pattern_id] = pattern
-                    
-                logger.info(f"加载了 {len(self.build_patterns)} 个构筑模式")
+            for pattern_data in self._read_json(self.PATTERNS_FILE) or []:
+                self._put_pattern(self._pattern_from_dict(pattern_data))
             
             # 加载Meta洞察
-            insights_file = self.knowledge_dir / "meta_insights.json"
-            if insights_file.exists():
-                with open(insights_file, 'r', encoding='utf-8') as f:
-                    insights_data = json.load(f)
-                
-                for insight_data in insights_data:
-                    insight = MetaInsight(**insight_data)
-                    if isinstance(insight.created_at, str):
-                        insight.created_at = datetime.fromisoformat(insight.created_at)
-                    self.meta_insights.append(insight)
-                
-                logger.info(f"加载了 {len(self.meta_insights)} 个Meta洞察")
+            for insight_data in self._read_json(self.INSIGHTS_FILE) or []:
+                self._put_insight(self._insight_from_dict(insight_data))
             
             # 加载知识条目
-            knowledge_file = self.knowledge_dir / "knowledge_entries.json"
-            if knowledge_file.exists():
-                with open(knowledge_file, 'r', encoding='utf-8') as f:
-                    knowledge_data = json.load(f)
-                
-                for entry_data in knowledge_data:
-                    entry = KnowledgeEntry(**entry_data)
-                    entry.knowledge_type = KnowledgeType(entry_data.get('knowledge_type'))
-                    if isinstance(entry.created_at, str):
-                        entry.created_at = datetime.fromisoformat(entry.created_at)
-                    if entry.last_verified and isinstance(entry.last_verified, str):
-                        entry.last_verified = datetime.fromisoformat(entry.last_verified)
-                    
-                    self.knowledge_entries[entry.entry_id] = entry
-                
-                logger.info(f"加载了 {len(self.knowledge_entries)} 个知识条目")
-                
-        except Exception as e:
-            logger.warning(f"知识库加载失败: {e}")
-    
-    def save_knowledge_base(self):
-        """保存知识库"""
-        try:
-            # 保存构筑模式
-            patterns_data = []
-            for pattern in self.build_patterns.values():
-                pattern_dict = asdict(pattern)
-                pattern_dict['first_seen'] = pattern.first_seen.isoformat()
-                pattern_dict['last_updated'] = pattern.last_updated.isoformat()
-                pattern_dict['trend'] = pattern.trend.value
-                patterns_data.append(pattern_dict)
+            for entry_data in self._read_json(self.ENTRIES_FILE) or []:
+                self._put_entry(self._entry_from_dict(entry_data))
             
-            patterns_file = self.knowledge_dir / "build_patterns.json"
-            with open(patterns_file, 'w', encoding='utf-8') as f:
-                json.dump(patterns_data, f, ensure_ascii=False, indent=2)
+            # 加载运行聚合（同时记录快照已包含的变更日志序号）
+            aggregates_data = self._read_json(self.AGGREGATES_FILE)
+            if aggregates_data:
+                self.aggregates = KnowledgeAggregates.from_dict(aggregates_data)
+                self._log_seq = aggregates_data.get(self.SNAPSHOT_SEQ_KEY, 0)
             
-            # 保存Meta洞察
-            insights_data = []
-            for insight in self.meta_insights:
-                insight_dict = asdict(insight)
-                insight_dict['created_at'] = insight.created_at.isoformat()
-                insights_data.append(insight_dict)
+            self._replay_change_log()
             
-            insights_file = self.knowledge_dir / "meta_insights.json"
-            with open(insights_file, 'w', encoding='utf-8') as f:
-                json.dump(insights_data, f, ensure_ascii=False, indent=2)
+            # 加载完成后的状态都已持久化
+            self._clear_pending_changes()
+
+            for pattern in self.build_patterns.values():
+                self._group_samples[self._pattern_group_key(pattern)] = list(pattern.sample_builds)
+            self._prune_insights()
+            self._update_statistics()
+            self._refresh_pattern_popularity()
             
-            # 保存知识条目
-            knowledge_data = []
-            for entry in self.knowledge_entries.values():
-                entry_dict = asdict(entry)
-                entry_dict['knowledge_type'] = entry.knowledge_type.value
-                entry_dict['created_at'] = entry.created_at.isoformat()
-                if entry.last_verified:
-                    entry_dict['last_verified'] = entry.last_verified.isoformat()
-                knowledge_data.append(entry_dict)
+            logger.info(
+                f"加载了 {len(self.build_patterns)} 个构筑模式, "
+                f"{len(self.meta_insights)} 个Meta洞察, "
+                f"{len(self.knowledge_entries)} 个知识条目 "
+                f"(变更日志 {self._change_log_records} 条)"
+            )
+        
+        except Exception as e:
+            logger.warning(f"知识库加载失败: {e}")
+    
+    def _replay_change_log(self):
+        """按顺序重放变更日志（跳过快照中已包含的记录）"""
+        log_file = self.knowledge_dir / self.CHANGE_LOG_FILE
+        if not log_file.exists():
+            return
+        
+        with open(log_file, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 写入中断留下的半行，忽略
+                    logger.warning(f"跳过损坏的变更日志记录: 第{line_no}行")
+                    continue
+                
+                # 压缩在删除日志前中断时，日志中的记录已经包含在快照中
+                seq = record.get('seq')
+                if seq is not None:
+                    if seq <= self._log_seq:
+                        continue
+                    self._log_seq = seq
+                
+                op, data = record.get('op'), record.get('data')
+                if op == 'aggregates':
+                    self.aggregates.merge(data)
+                elif op == 'pattern':
+                    self._put_pattern(self._pattern_from_dict(data))
+                elif op == 'entry':
+                    self._put_entry(self._entry_from_dict(data))
+                elif op == 'insight':
+                    self._put_insight(self._insight_from_dict(data))
+                elif op == 'delete_pattern':
+                    self._drop_pattern(data)
+                elif op == 'delete_entry':
+                    self._drop_entry(data)
+                self._change_log_records += 1
+    
+    def _has_pending_changes(self) -> bool:
+        return bool(self._pending_delta or self._dirty_patterns or self._dirty_entries or
+                    self._deleted_patterns or self._deleted_entries or self._new_insights)
+    
+    def _clear_pending_changes(self):
+        self._pending_delta = {}
+        self._dirty_patterns.clear()
+        self._dirty_entries.clear()
+        self._deleted_patterns.clear()
+        self._deleted_entries.clear()
+        self._new_insights = []
+    
+    def save_knowledge_base(self, compact: bool = False):
+        """保存知识库
+        
+        默认把上次保存以来的变更追加到变更日志；compact为True、
+        快照文件不存在或日志超过compact_threshold时，改为重写完整快照。
+        """
+        try:
+            pending_records = (
+                len(self._dirty_patterns) + len(self._dirty_entries) +
+                len(self._deleted_patterns) + len(self._deleted_entries) +
+                len(self._new_insights) + (1 if self._pending_delta else 0)
+            )
+            needs_compaction = (
+                compact or
+                not (self.knowledge_dir / self.PATTERNS_FILE).exists() or
+                self._change_log_records + pending_records > self.compact_threshold
+            )
             
-            knowledge_file = self.knowledge_dir / "knowledge_entries.json"
-            with open(knowledge_file, 'w', encoding='utf-8') as f:
-                json.dump(knowledge_data, f, ensure_ascii=False, indent=2)
+            if needs_compaction:
+                self.compact_knowledge_base()
+            elif self._has_pending_changes():
+                self._append_change_log()
             
             logger.info("知识库保存成功")
-            
+        
         except Exception as e:
             logger.error(f"知识库保存失败: {e}")
     
+    def _append_change_log(self):
+        """把待保存的变更追加到变更日志"""
+        records = []
+        if self._pending_delta:
+            records.append({'op': 'aggregates', 'data': self._pending_delta})
+        for pattern_id in sorted(self._dirty_patterns):
+            pattern = self.build_patterns.get(pattern_id)
+            if pattern:
+                records.append({'op': 'pattern', 'data': self._pattern_to_dict(pattern)})
+        for entry_id in sorted(self._dirty_entries):
+            entry = self.knowledge_entries.get(entry_id)
+            if entry:
+                records.append({'op': 'entry', 'data': self._entry_to_dict(entry)})
+        for insight in self._new_insights:
+            records.append({'op': 'insight', 'data': self._insight_to_dict(insight)})
+        for pattern_id in sorted(self._deleted_patterns):
+            records.append({'op': 'delete_pattern', 'data': pattern_id})
+        for entry_id in sorted(self._deleted_entries):
+            records.append({'op': 'delete_entry', 'data': entry_id})
+
+        for record in records:
+            self._log_seq += 1
+            record['seq'] = self._log_seq
+        
+        log_file = self.knowledge_dir / self.CHANGE_LOG_FILE
+        with open(log_file, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+                f.write('\n')
+        
+        self._change_log_records += len(records)
+        self._clear_pending_changes()
+        logger.debug(f"追加了 {len(records)} 条知识库变更记录")
+    
+    def compact_knowledge_base(self):
+        """重写完整快照并清空变更日志
+        
+        聚合文件最后写入并带上最后一条日志记录的序号；删除日志前中断时，
+        重新加载会跳过序号不大于该值的记录，聚合不会被重复累加。
+        """
+        self._write_json(self.PATTERNS_FILE,
+                         [self._pattern_to_dict(p) for p in self.build_patterns.values()])
+        self._write_json(self.INSIGHTS_FILE,
+                         [self._insight_to_dict(i) for i in self.meta_insights])
+        self._write_json(self.ENTRIES_FILE,
+                         [self._entry_to_dict(e) for e in self.knowledge_entries.values()])
+        aggregates_data = self.aggregates.to_dict()
+        aggregates_data[self.SNAPSHOT_SEQ_KEY] = self._log_seq
+        self._write_json(self.AGGREGATES_FILE, aggregates_data)
+        
+        log_file = self.knowledge_dir / self.CHANGE_LOG_FILE
+        if log_file.exists():
+            log_file.unlink()
+        self._change_log_records = 0
+        self._clear_pending_changes()
+        logger.info("知识库快照已压缩")
+    
+    # ===== 更新 =====
+    
+    def _put_pattern(self, pattern: BuildPattern):
+        """写入构筑模式并标记为待保存"""
+        self.build_patterns[pattern.pattern_id] = pattern
+        self._index_pattern(pattern)
+        self._dirty_patterns.add(pattern.pattern_id)
+        self._deleted_patterns.discard(pattern.pattern_id)
+
+    def _put_entry(self, entry: KnowledgeEntry):
+        """写入知识条目并标记为待保存"""
+        self.knowledge_entries[entry.entry_id] = entry
+        self._index_entry(entry)
+        self._dirty_entries.add(entry.entry_id)
+        self._deleted_entries.discard(entry.entry_id)
+    
+    def _drop_pattern(self, pattern_id: str):
+        """删除构筑模式并标记为待保存"""
+        if self.build_patterns.pop(pattern_id, None) is not None:
+            self._unindex_pattern(pattern_id)
+            self._dirty_patterns.discard(pattern_id)
+            self._deleted_patterns.add(pattern_id)
+    
+    def _drop_entry(self, entry_id: str):
+        """删除知识条目并标记为待保存"""
+        if self.knowledge_entries.pop(entry_id, None) is not None:
+            self._unindex_entry(entry_id)
+            self._dirty_entries.discard(entry_id)
+            self._deleted_entries.add(entry_id)
+    
+    # ===== 二级索引 =====
+    
+    def _index_pattern(self, pattern: BuildPattern):
+        """更新构筑模式的二级索引（模式可能已被原地修改，旧键取自记录）"""
+        pattern_id = pattern.pattern_id
+        elements = pattern.core_elements
+        keys = tuple(elements.get(field_name) for field_name in self.PATTERN_INDEX_FIELDS)
+        stamp = (pattern.last_updated, pattern_id)
+        
+        previous = self._pattern_index_keys.get(pattern_id)
+        old_keys, old_stamp = previous if previous else (None, None)
+        if old_keys != keys:
+            for field_name, old_key, key in zip(self.PATTERN_INDEX_FIELDS,
+                                                old_keys or (None,) * len(keys), keys):
+                if old_keys is not None:
+                    _index_discard(self._pattern_index[field_name], old_key, pattern_id)
+                _index_add(self._pattern_index[field_name], key, pattern_id)
+        if old_stamp != stamp:
+            if old_stamp is not None:
+                self._remove_update_stamp(old_stamp)
+            insort(self._patterns_by_update, stamp)
+        self._pattern_index_keys[pattern_id] = (keys, stamp)
+    
+    def _unindex_pattern(self, pattern_id: str):
+        previous = self._pattern_index_keys.pop(pattern_id, None)
+        if previous is None:
+            return
+        keys, stamp = previous
+        for field_name, key in zip(self.PATTERN_INDEX_FIELDS, keys):
+            _index_discard(self._pattern_index[field_name], key, pattern_id)
+        self._remove_update_stamp(stamp)
+    
+    def _remove_update_stamp(self, stamp: Tuple[datetime, str]):
+        position = bisect_right(self._patterns_by_update, stamp) - 1
+        if position >= 0 and self._patterns_by_update[position] == stamp:
+            del self._patterns_by_update[position]
+    
+    def _index_entry(self, entry: KnowledgeEntry):
+        """更新知识条目的二级索引（类型、标签、成功因素名）"""
+        entry_id = entry.entry_id
+        factor = None
+        if entry.knowledge_type == KnowledgeType.SUCCESS_FACTOR:
+            factor = entry.content.get('factor')
+        keys = (entry.knowledge_type, tuple(entry.tags), factor)
+        
+        previous = self._entry_index_keys.get(entry_id)
+        if previous == keys:
+            return
+        if previous is not None:
+            self._unindex_entry(entry_id)
+        
+        _index_add(self._entries_by_type, entry.knowledge_type, entry_id)
+        for tag in entry.tags:
+            _index_add(self._entries_by_tag, tag, entry_id)
+        if factor:
+            self._entries_by_factor[factor] = entry_id
+        self._entry_index_keys[entry_id] = keys
+    
+    def _unindex_entry(self, entry_id: str):
+        previous = self._entry_index_keys.pop(entry_id, None)
+        if previous is None:
+            return
+        knowledge_type, tags, factor = previous
+        _index_discard(self._entries_by_type, knowledge_type, entry_id)
+        for tag in tags:
+            _index_discard(self._entries_by_tag, tag, entry_id)
+        if factor and self._entries_by_factor.get(factor) == entry_id:
+            del self._entries_by_factor[factor]
+
+    @staticmethod
+    def _insight_key(insight: MetaInsight) -> Tuple[str, str]:
+        # 标题包含洞察的主题（如主导职业），同类型同主题的洞察只保留最新一条
+        return insight.insight_type, insight.title
+    
+    def _put_insight(self, insight: MetaInsight) -> bool:
+        """按类型和主题替换洞察，超过max_insights时丢弃最旧的；内容未变化时返回False"""
+        key = self._insight_key(insight)
+        content = (insight.description, insight.confidence, insight.supporting_data, insight.tags)
+        for position, existing in enumerate(self.meta_insights):
+            if self._insight_key(existing) == key:
+                if (existing.description, existing.confidence, existing.supporting_data, existing.tags) == content:
+                    return False
+                del self.meta_insights[position]
+                break
+        
+        self.meta_insights.append(insight)
+        if len(self.meta_insights) > self.max_insights:
+            del self.meta_insights[:-self.max_insights]
+        return True
+    
+    def _add_insight(self, insight: MetaInsight):
+        if self._put_insight(insight):
+            self._new_insights.append(insight)
+    
+    @staticmethod
+    def _pattern_group_key(pattern: BuildPattern) -> str:
+        elements = pattern.core_elements
+        return _join_key(
+            elements.get('character_class', ''),
+            elements.get('ascendancy', ''),
+            elements.get('main_skill', ''),
+            elements.get('build_goal', '')
+        )
+    
     def update_knowledge_from_builds(self, builds: List[PoE2BuildData]):
-        """从构筑数据更新知识库
+        """从构筑数据更新知识库（全量重建运行聚合并压缩保存）
         
         Args:
             builds: 构筑数据列表
         """
         logger.info(f"开始从 {len(builds)} 个构筑更新知识库...")
         
+        self.aggregates = KnowledgeAggregates()
+        self._group_samples = {}
+        self.apply_build_delta(added=builds, save=False)
+        self.save_knowledge_base(compact=True)
+        
+        logger.info("知识库更新完成")
+    
+    def apply_build_delta(self, added: Optional[List[PoE2BuildData]] = None,
+                          removed: Optional[List[PoE2BuildData]] = None,
+                          save: bool = True) -> Dict[str, int]:
+        """按增量更新知识库
+        
+        只对新增/移除的构筑计算聚合增量，并只刷新受影响的模式和协同条目。
+        
+        Args:
+            added: 新增的构筑
+            removed: 移除的构筑（必须是之前加入过的构筑）
+            save: 是否立即保存（追加变更日志）
+        
+        Returns:
+            本次更新的摘要
+        """
+        added = list(added or [])
+        removed = list(removed or [])
+        summary = {'added': len(added), 'removed': len(removed),
+                   'patterns_updated': 0, 'entries_updated': 0}
+        if not added and not removed:
+            return summary
+        
+        delta: Dict[str, Dict[str, float]] = {}
+        for builds, sign in ((added, 1), (removed, -1)):
+            for build in builds:
+                _accumulate(delta, KnowledgeAggregates.contributions(build), sign)
+                self._update_group_samples(build, sign)
+        
+        self.aggregates.merge(delta)
+        _accumulate(self._pending_delta, delta)
+        
+        dirty_patterns = len(self._dirty_patterns)
+        dirty_entries = len(self._dirty_entries)
+        
         # 1. 更新统计信息
-        self._update_statistics(builds)
+        self._update_statistics()
         
-        # 2. 识别和更新构筑模式
-        self._identify_build_patterns(builds)
+        # 2. 更新受影响的构筑模式
+        self._identify_build_patterns(delta.get('group_count', {}).keys())
         
         # 3. 生成Meta洞察
-        self._generate_meta_insights(builds)
+        self._generate_meta_insights()
         
         # 4. 提取成功因素
-        self._extract_success_factors(builds)
+        self._extract_success_factors(delta.get('success_factor_count', {}).keys())
+
+        # 5. 更新受影响的协同信息
+        touched_pairs = [('skill_equipment', key) for key in delta.get('skill_equipment', {})]
+        touched_pairs += [('skill_keystone', key) for key in delta.get('skill_keystone', {})]
+        self._update_synergy_information(touched_pairs)
         
-        # 5. 更新协同信息
-        self._update_synergy_information(builds)
+        summary['patterns_updated'] = len(self._dirty_patterns) - dirty_patterns
+        summary['entries_updated'] = len(self._dirty_entries) - dirty_entries
         
         # 6. 保存知识库
-        self.save_knowledge_base()
+        if save:
+            self.save_knowledge_base()
         
-        logger.info("知识库更新完成")
+        return summary
     
-    def _update_statistics(self, builds: List[PoE2BuildData]):
-        """更新统计信息"""
-        # 职业统计
-        class_counter = Counter()
-        skill_counter = Counter()
-        goal_counter = Counter()
-        
-        cost_by_class = defaultdict(list)
-        success_by_pattern = defaultdict(list)
-        
-        for build in builds:
-            class_counter[build.character_class] += 1
-            skill_counter[build.main_skill_setup.main_skill] += 1
-            goal_counter[build.build_goal.value] += 1
-            
-            cost_by_class[build.character_class].append(build.total_cost)
-            
-            # 成功度量（基于流行度和数据质量）
-            success_score = 0.5
-            if build.popularity_rank > 0:
-                success_score += max(0, 1.0 - build.popularity_rank / 1000)
-            if build.data_quality == DataQuality.HIGH:
-                success_score += 0.3
-            elif build.data_quality == DataQuality.MEDIUM:
-                success_score += 0.1
-            
-            pattern_key = f"{build.character_class}_{build.main_skill_setup.main_skill}"
-            success_by_pattern[pattern_key].append(success_score)
+    def _update_group_samples(self, build: PoE2BuildData, sign: int):
+        """维护每个模式分组的示例构筑哈希"""
+        samples = self._group_samples.setdefault(KnowledgeAggregates.group_key(build), [])
+        build_hash = build.similarity_hash
+        if sign > 0:
+            if len(samples) < self.max_pattern_samples and build_hash not in samples:
+                samples.append(build_hash)
+        elif build_hash in samples:
+            samples.remove(build_hash)
+    
+    def _update_statistics(self):
+        """从运行聚合刷新统计信息"""
+        agg = self.aggregates
         
-        # 更新缓存
         self._class_stats = {
-            'popularity': dict(class_counter),
-            'avg_costs': {cls: sum(costs)/len(costs) if costs else 0 
-                         for cls, costs in cost_by_class.items()},
-            'total_builds': len(builds)
+            'popularity': {cls: int(count) for cls, count in agg.class_count.items()},
+            'avg_costs': {cls: agg.class_cost_sum.get(cls, 0) / count
+                         for cls, count in agg.class_count.items()},
+            'total_builds': int(agg.totals.get('builds', 0))
         }
         
         self._skill_stats = {
-            'popularity': dict(skill_counter),
-            'success_rates': {pattern: sum(scores)/len(scores) if scores else 0.5
-                            for pattern, scores in success_by_pattern.items()}
+            'popularity': {skill: int(count) for skill, count in agg.skill_count.items()},
+            'success_rates': {pattern: agg.pattern_success_sum.get(pattern, 0) / count
+                            for pattern, count in agg.pattern_success_count.items()}
         }
         
         logger.info("统计信息已更新")
     
-    def _identify_build_patterns(self, builds: List[PoE2BuildData]):
-        """识别构筑模式"""
-        pattern_groups = defaultdict(list)
-        
-        # 按核心特征分组构筑
-        for build in builds:
-            core_key = (
-                build.character_class,
-                build.ascendancy,
-                build.main_skill_setup.main_skill,
-                build.build_goal.value
-            )
-            pattern_groups[core_key].append(build)
+    def _identify_build_patterns(self, group_keys):
+        """识别构筑模式（只处理给定的分组）"""
+        agg = self.aggregates
+        total_builds = agg.totals.get('builds', 0)
         
-        # 分析每个组，识别模式
         new_patterns = 0
-        for core_key, group_builds in pattern_groups.items():
-            if len(group_builds) < self.pattern_min_samples:
-                continue
-            
-            class_name, ascendancy, skill, goal = core_key
+        for group_key in group_keys:
+            class_name, ascendancy, skill, goal = _split_key(group_key)
             pattern_id = f"{class_name}_{ascendancy}_{skill}_{goal}".replace(" ", "_").lower()
             
+            group_size = agg.group_count.get(group_key, 0)
+            if group_size < self.pattern_min_samples:
+                # 移除构筑后样本不足的模式不再保留
+                self._drop_pattern(pattern_id)
+                continue
+
             # 分析组内构筑的共同特征
             core_elements = {
                 'character_class': class_name,
@@ -319,18 +828,15 @@ class PoE2KnowledgeBase:
             }
             
             # 计算模式统计
-            costs = [b.total_cost for b in group_builds if b.total_cost > 0]
-            popularity_ranks = [b.popularity_rank for b in group_builds if b.popularity_rank > 0]
-            
-            avg_cost = sum(costs) / len(costs) if costs else 0
-            avg_popularity = sum(popularity_ranks) / len(popularity_ranks) if popularity_ranks else 0
+            cost_count = agg.group_cost_count.get(group_key, 0)
+            avg_cost = agg.group_cost_sum.get(group_key, 0) / cost_count if cost_count else 0
             
             # 成功率计算
-            high_quality_builds = [b for b in group_builds if b.data_quality == DataQuality.HIGH]
-            success_rate = len(high_quality_builds) / len(group_builds)
+            success_rate = agg.group_high_quality.get(group_key, 0) / group_size
             
             # 流行度分数
-            popularity_score = len(group_builds) / len(builds)
+            popularity_score = group_size / total_builds if total_builds else 0.0
+            sample_builds = list(self._group_samples.get(group_key, []))
             
             # 更新或创建模式
             if pattern_id in self.build_patterns:
@@ -338,7 +844,7 @@ class PoE2KnowledgeBase:
                 pattern.last_updated = datetime.now()
                 pattern.success_rate = success_rate
                 pattern.popularity_score = popularity_score
-                pattern.sample_builds = [b.similarity_hash for b in group_builds[:10]]
+                pattern.sample_builds = sample_builds
             else:
                 pattern = BuildPattern(
                     pattern_id=pattern_id,
@@ -348,173 +854,174 @@ class PoE2KnowledgeBase:
                     popularity_score=popularity_score,
                     difficulty_level=self._assess_pattern_difficulty(avg_cost, class_name),
                     investment_tier=self._assess_investment_tier(avg_cost),
-                    sample_builds=[b.similarity_hash for b in group_builds[:10]]
+                    sample_builds=sample_builds
                 )
-                self.build_patterns[pattern_id] = pattern
                 new_patterns += 1
+            self._put_pattern(pattern)
         
+        self._refresh_pattern_popularity()
         logger.info(f"识别了 {new_patterns} 个新构筑模式，总计 {len(self.build_patterns)} 个模式")
     
-    def _generate_meta_insights(self, builds: List[PoE2BuildData]):
-        """生成Meta洞察"""
-        current_time = datetime.now()
+    def _refresh_pattern_popularity(self):
+        """按当前构筑总数刷新模式流行度（可从聚合推导，不写入变更日志）"""
+        total_builds = self.aggregates.totals.get('builds', 0)
+        if not total_builds:
+            return
+        group_count = self.aggregates.group_count
+        for pattern in self.build_patterns.values():
+            group_size = group_count.get(self._pattern_group_key(pattern))
+            if group_size:
+                pattern.popularity_score = group_size / total_builds
+    
+    def _prune_insights(self):
+        """清理过期洞察"""
+        cutoff_date = datetime.now() - timedelta(days=self.insight_retention_days)
+        self.meta_insights = [insight for insight in self.meta_insights
+                            if insight.created_at > cutoff_date]
+    
+    def _generate_meta_insights(self):
+        """从运行聚合生成Meta洞察"""
+        agg = self.aggregates
+        total_builds = agg.totals.get('builds', 0)
+        if not total_builds:
+            return
         
         # 职业分布洞察
-        class_distribution = Counter(b.character_class for b in builds)
+        class_distribution = agg.class_count
         most_popular_class = class_distribution.most_common(1)[0] if class_distribution else ("Unknown", 0)
         
-        if most_popular_class[1] > len(builds) * 0.3:  # 超过30%的构筑使用同一职业
-            insight = MetaInsight(
+        if most_popular_class[1] > total_builds * 0.3:  # 超过30%的构筑使用同一职业
+            self._add_insight(MetaInsight(
                 insight_type="class_dominance",
                 title=f"{most_popular_class[0]} 职业主导当前Meta",
-                description=f"{most_popular_class[0]} 占据了 {most_popular_class[1]/len(builds):.1%} 的构筑，显示出强势的Meta地位。",
+                description=f"{most_popular_class[0]} 占据了 {most_popular_class[1]/total_builds:.1%} 的构筑，显示出强势的Meta地位。",
                 confidence=0.9,
                 supporting_data={'class_distribution': dict(class_distribution)},
                 tags=['meta', 'class_analysis', most_popular_class[0].lower()]
-            )
-            self.meta_insights.append(insight)
+            ))
         
         # 技能流行度洞察
-        skill_distribution = Counter(b.main_skill_setup.main_skill for b in builds)
-        top_skills = skill_distribution.most_common(3)
+        top_skills = agg.skill_count.most_common(3)
         
         if top_skills:
-            insight = MetaInsight(
+            description = f"最受欢迎的技能是 {top_skills[0][0]} ({int(top_skills[0][1])} 个构筑)"
+            if len(top_skills) == 3:
+                description += f"，其次是 {top_skills[1][0]} 和 {top_skills[2][0]}"
+            elif len(top_skills) == 2:
+                description += f"，其次是 {top_skills[1][0]}"
+            self._add_insight(MetaInsight(
                 insight_type="skill_popularity",
                 title="当前Meta热门技能分析",
-                description=f"最受欢迎的技能是 {top_skills[0][0]} ({top_skills[0][1]} 个构筑)，其次是 {top_skills[1][0]} 和 {top_skills[2][0]}。",
+                description=description + "。",
                 confidence=0.8,
-                supporting_data={'skill_distribution': dict(skill_distribution)},
+                supporting_data={'skill_distribution': dict(agg.skill_count)},
                 tags=['meta', 'skill_analysis', 'trending']
-            )
-            self.meta_insights.append(insight)
+            ))
         
         # 预算趋势洞察
-        costs = [b.total_cost for b in builds if b.total_cost > 0]
-        if costs:
-            avg_cost = sum(costs) / len(costs)
+        cost_count = agg.totals.get('positive_cost_count', 0)
+        if cost_count:
+            avg_cost = agg.totals.get('positive_cost_sum', 0) / cost_count
             
             if avg_cost > 15:
-                insight = MetaInsight(
+                self._add_insight(MetaInsight(
                     insight_type="cost_trend",
                     title="高投资构筑趋势",
                     description=f"当前Meta平均构筑成本达到 {avg_cost:.1f} divine，表明高投资构筑成为主流。",
                     confidence=0.7,
-                    supporting_data={'average_cost': avg_cost, 'cost_distribution': costs},
+                    supporting_data={'average_cost': avg_cost, 'sample_count': int(cost_count)},
                     tags=['meta', 'economy', 'high_investment']
-                )
-                self.meta_insights.append(insight)
+                ))
         
         # 清理过期洞察
-        cutoff_date = current_time - timedelta(days=30)
-        self.meta_insights = [insight for insight in self.meta_insights 
-                            if insight.created_at > cutoff_date]
+        self._prune_insights()
         
         logger.info(f"生成了Meta洞察，当前共 {len(self.meta_insights)} 个洞察")
     
-    def _extract_success_factors(self, builds: List[PoE2BuildData]):
-        """提取成功因素"""
-        # 按成功度对构筑分组
-        successful_builds = []
-        for build in builds:
-            success_score = 0
-            if build.popularity_rank > 0 and build.popularity_rank <= 100:
-                success_score += 0.5
-            if build.data_quality == DataQuality.HIGH:
-                success_score += 0.3
-            if build.total_cost < 10:  # 性价比好
-                success_score += 0.2
-            
-            if success_score >= 0.6:
-                successful_builds.append((build, success_score))
-        
-        if not successful_builds:
-            return
-        
-        # 分析成功构筑的共同特征
-        success_patterns = defaultdict(int)
+    def _extract_success_factors(self, touched_factors=()):
+        """从运行聚合提取成功因素
         
-        for build, score in successful_builds:
-            # 职业成功因素
-            success_patterns[f"class_{build.character_class}"] += 1
-            
-            # 技能成功因素
-            success_patterns[f"skill_{build.main_skill_setup.main_skill}"] += 1
-            
-            # 目标成功因素
-            success_patterns[f"goal_{build.build_goal.value}"] += 1
-            
-            # 预算成功因素
-            if build.total_cost < 5:
-                success_patterns["budget_friendly"] += 1
-            elif build.total_cost > 20:
-                success_patterns["high_investment"] += 1
-            else:
-                success_patterns["moderate_investment"] += 1
+        Args:
+            touched_factors: 本次增量涉及的因素，计数归零的因素也需要检查
+        """
+        agg = self.aggregates
+        total_successful = agg.totals.get('successful', 0)
         
         # 创建成功因素知识条目
-        for factor, count in success_patterns.items():
-            if count >= len(successful_builds) * 0.3:  # 至少30%的成功构筑有这个特征
-                confidence = count / len(successful_builds)
-                
-                entry = KnowledgeEntry(
-                    entry_id=f"success_factor_{factor}",
-                    knowledge_type=KnowledgeType.SUCCESS_FACTOR,
-                    title=f"成功因素: {factor}",
-                    content={
-                        'factor': factor,
-                        'occurrence_rate': confidence,
-                        'sample_count': count,
-                        'total_successful': len(successful_builds)
-                    },
-                    confidence=confidence,
-                    tags=['success_factor', factor.split('_')[0] if '_' in factor else factor]
-                )
-                
-                self.knowledge_entries[entry.entry_id] = entry
+        for factor in set(agg.success_factor_count) | set(touched_factors):
+            count = agg.success_factor_count.get(factor, 0)
+            if not total_successful or count < total_successful * 0.3:  # 至少30%的成功构筑有这个特征
+                self._drop_entry(f"success_factor_{factor}")
+                continue
+
+            entry_id = f"success_factor_{factor}"
+            existing = self.knowledge_entries.get(entry_id)
+            if (existing and existing.content.get('sample_count') == count and
+                    existing.content.get('total_successful') == total_successful):
+                continue
+            
+            confidence = count / total_successful
+            self._put_entry(KnowledgeEntry(
+                entry_id=entry_id,
+                knowledge_type=KnowledgeType.SUCCESS_FACTOR,
+                title=f"成功因素: {factor}",
+                content={
+                    'factor': factor,
+                    'occurrence_rate': confidence,
+                    'sample_count': count,
+                    'total_successful': total_successful
+                },
+                confidence=confidence,
+                tags=['success_factor', factor.split('_')[0] if '_' in factor else factor]
+            ))
         
-        logger.info(f"提取了 {len(success_patterns)} 个成功因素")
+        logger.info(f"提取了 {len(agg.success_factor_count)} 个成功因素")
     
-    def _update_synergy_information(self, builds: List[PoE2BuildData]):
-        """更新协同信息"""
-        # 分析技能和装备的协同效应
-        skill_equipment_pairs = defaultdict(Counter)
-        skill_keystone_pairs = defaultdict(Counter)
+    def _update_synergy_information(self, touched_pairs: List[Tuple[str, str]]):
+        """更新受影响的协同信息条目
         
-        for build in builds:
-            skill = build.main_skill_setup.main_skill
+        Args:
+            touched_pairs: (聚合名, 复合键) 列表，聚合名为skill_equipment或skill_keystone
+        """
+        synergy_entries = 0
+        for counter_name, key in touched_pairs:
+            skill, partner = _split_key(key)
+            if counter_name == 'skill_equipment':
+                entry_id = f"synergy_{skill}_{partner}".replace(" ", "_").lower()
+            else:
+                entry_id = f"synergy_{skill}_keystone_{partner}".replace(" ", "_").lower()
             
-            # 技能-装备协同
-            if build.weapon and build.weapon.name:
-                skill_equipment_pairs[skill][build.weapon.name] += 1
+            count = getattr(self.aggregates, counter_name).get(key, 0)
+            if count < self.synergy_min_usage:  # 至少被3个构筑使用
+                self._drop_entry(entry_id)
+                continue
             
-            # 技能-关键天赋协同
-            for keystone in build.passive_keystones:
-                skill_keystone_pairs[skill][keystone] += 1
-        
-        # 创建协同信息条目
-        synergy_entries = 0
-        for skill, equipment_counter in skill_equipment_pairs.items():
-            for equipment, count in equipment_counter.items():
-                if count >= 3:  # 至少被3个构筑使用
-                    entry_id = f"synergy_{skill}_{equipment}".replace(" ", "_").lower()
-                    
-                    entry = KnowledgeEntry(
-                        entry_id=entry_id,
-                        knowledge_type=KnowledgeType.SYNERGY_INFO,
-                        title=f"协同: {skill} + {equipment}",
-                        content={
-                            'skill': skill,
-                            'equipment': equipment,
-                            'usage_count': count,
-                            'synergy_type': 'skill_equipment'
-                        },
-                        confidence=min(0.9, count / 10),  # 使用次数越多置信度越高
-                        tags=['synergy', 'equipment', skill.replace(" ", "_").lower()]
-                    )
-                    
-                    self.knowledge_entries[entry.entry_id] = entry
-                    synergy_entries += 1
+            if counter_name == 'skill_equipment':
+                content = {
+                    'skill': skill,
+                    'equipment': partner,
+                    'usage_count': count,
+                    'synergy_type': 'skill_equipment'
+                }
+                tag = 'equipment'
+            else:
+                content = {
+                    'skill': skill,
+                    'keystone': partner,
+                    'usage_count': count,
+                    'synergy_type': 'skill_keystone'
+                }
+                tag = 'keystone'
+            
+            self._put_entry(KnowledgeEntry(
+                entry_id=entry_id,
+                knowledge_type=KnowledgeType.SYNERGY_INFO,
+                title=f"协同: {skill} + {partner}",
+                content=content,
+                confidence=min(0.9, count / 10),  # 使用次数越多置信度越高
+                tags=['synergy', tag, skill.replace(" ", "_").lower()]
+            ))
+            synergy_entries += 1
         
         logger.info(f"更新了 {synergy_entries} 个协同信息条目")
     
@@ -525,22 +1032,31 @@ class PoE2KnowledgeBase:
     def search_patterns(self, character_class: str = None, 
                        main_skill: str = None,
                        build_goal: str = None,
-                       min_success_rate: float = 0.0) -> List[BuildPattern]:
-        """搜索构筑模式"""
-        matching_patterns = []
+                       min_success_rate: float = 0.0,
+                       ascendancy: str = None) -> List[BuildPattern]:
+        """搜索构筑模式
         
-        for pattern in self.build_patterns.values():
-            # 应用筛选条件
-            if character_class and pattern.core_elements.get('character_class') != character_class:
-                continue
-            if main_skill and pattern.core_elements.get('main_skill') != main_skill:
-                continue
-            if build_goal and pattern.core_elements.get('build_goal') != build_goal:
-                continue
-            if pattern.success_rate < min_success_rate:
-                continue
-            
-            matching_patterns.append(pattern)
+        按二级索引取各筛选条件的候选集合，从最小的集合开始求交集，
+        只对命中的模式检查成功率并排序。
+        """
+        filters = [(field_name, value) for field_name, value in (
+            ('character_class', character_class),
+            ('ascendancy', ascendancy),
+            ('main_skill', main_skill),
+            ('build_goal', build_goal)
+        ) if value]
+        
+        if filters:
+            buckets = sorted((self._pattern_index[field_name].get(value, {})
+                              for field_name, value in filters), key=len)
+            smallest, others = buckets[0], buckets[1:]
+            candidates = [self.build_patterns[pattern_id] for pattern_id in smallest
+                          if all(pattern_id in bucket for bucket in others)]
+        else:
+            candidates = self.build_patterns.values()
+        
+        matching_patterns = [pattern for pattern in candidates
+                             if pattern.success_rate >= min_success_rate]
         
         # 按流行度排序
         return sorted(matching_patterns, key=lambda p: p.popularity_score, reverse=True)
@@ -559,33 +1075,41 @@ class PoE2KnowledgeBase:
     
     def get_knowledge_by_type(self, knowledge_type: KnowledgeType) -> List[KnowledgeEntry]:
         """按类型获取知识条目"""
-        return [entry for entry in self.knowledge_entries.values() 
-                if entry.knowledge_type == knowledge_type]
+        return [self.knowledge_entries[entry_id]
+                for entry_id in self._entries_by_type.get(knowledge_type, ())]
+    
+    def get_knowledge_by_tag(self, tag: str) -> List[KnowledgeEntry]:
+        """按标签获取知识条目"""
+        return [self.knowledge_entries[entry_id]
+                for entry_id in self._entries_by_tag.get(tag, ())]
     
     def get_success_factors_for_build(self, build_class: str, main_skill: str) -> List[KnowledgeEntry]:
-        """获取特定构筑的成功因素"""
-        relevant_factors = []
+        """获取特定构筑的成功因素（职业、技能因素按名称精确查找，外加预算类因素）"""
+        entry_ids: Dict[str, None] = {}
+        for factor in (f"class_{build_class}", f"skill_{main_skill}"):
+            entry_id = self._entries_by_factor.get(factor)
+            if entry_id:
+                entry_ids[entry_id] = None
         
-        for entry in self.knowledge_entries.values():
-            if entry.knowledge_type != KnowledgeType.SUCCESS_FACTOR:
-                continue
-            
-            factor = entry.content.get('factor', '')
-            if (f"class_{build_class}" in factor or 
-                f"skill_{main_skill}" in factor or 
-                'budget' in factor):
-                relevant_factors.append(entry)
+        success_factor_ids = self._entries_by_type.get(KnowledgeType.SUCCESS_FACTOR, {})
+        for entry_id in self._entries_by_tag.get('budget', ()):
+            if entry_id in success_factor_ids:
+                entry_ids[entry_id] = None
         
+        relevant_factors = [self.knowledge_entries[entry_id] for entry_id in entry_ids]
         return sorted(relevant_factors, key=lambda e: e.confidence, reverse=True)
     
     def get_trending_builds(self, days: int = 7) -> List[BuildPattern]:
-        """获取趋势构筑模式"""
+        """获取趋势构筑模式（在按last_updated有序的索引上做范围扫描）"""
         cutoff_date = datetime.now() - timedelta(days=days)
         
         trending_patterns = []
-        for pattern in self.build_patterns.values():
-            if (pattern.last_updated > cutoff_date and 
-                pattern.trend in [MetaTrend.RISING, MetaTrend.EMERGING]):
+        start = bisect_right(self._patterns_by_update, (cutoff_date,))
+        for last_updated, pattern_id in self._patterns_by_update[start:]:
+            if last_updated <= cutoff_date:
+                continue
+            pattern = self.build_patterns[pattern_id]
+            if pattern.trend in (MetaTrend.RISING, MetaTrend.EMERGING):
                 trending_patterns.append(pattern)
         
         return sorted(trending_patterns, key=lambda p: p.popularity_score, reverse=True)
@@ -628,6 +1152,7 @@ class PoE2KnowledgeBase:
             'total_knowledge_entries': len(self.knowledge_entries),
             'class_stats': self._class_stats,
             'skill_stats': self._skill_stats,
+            'change_log_records': self._change_log_records,
             'last_updated': datetime.now().isoformat()
         }
 
@@ -5,11 +5,15 @@ RAG数据模型定义 - PoE2构筑数据结构
 - PoE2BuildData: 核心构筑数据模型
 - RAGDataModel: RAG预处理数据容器  
 - 各种辅助数据类型和验证器
+
+构筑记录类使用__slots__并驻留职业/技能/宝石等重复名称，
+描述文本、相似度哈希和标签在首次读取时才计算。
 """
 
+import sys
 import json
 import hashlib
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, fields
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Union
 from enum import Enum
@@ -30,6 +34,54 @@ class DataQuality(Enum):
     LOW = "low"          # 低质量 - 数据不完整或来源不可靠
     INVALID = "invalid"   # 无效数据
 
+def _intern(value: str) -> str:
+    """驻留字符串，使大量构筑共享同一个职业/技能/宝石名称对象"""
+    return sys.intern(value) if value else value
+
+def _lazy_field(name: str, method_name: str) -> property:
+    """惰性字段: 值为空时在首次读取时调用method_name计算并缓存"""
+    storage = f"_{name}"
+    
+    def getter(self):
+        value = getattr(self, storage)
+        if not value:
+            value = getattr(self, method_name)()
+            setattr(self, storage, value)
+        return value
+    
+    def setter(self, value):
+        setattr(self, storage, value)
+    
+    return property(getter, setter, doc=f"{name} (惰性计算)")
+
+def _slotted(cls=None, *, lazy: Optional[Dict[str, str]] = None):
+    """为dataclass生成使用__slots__的版本 (兼容Python 3.8+)
+    
+    Args:
+        lazy: 惰性字段名 -> 计算方法名，字段存储在"_字段名"槽中
+    """
+    lazy = lazy or {}
+    
+    def wrap(cls):
+        field_names = [f.name for f in fields(cls)]
+        cls_dict = dict(cls.__dict__)
+        cls_dict['__slots__'] = tuple(
+            f"_{name}" if name in lazy else name for name in field_names
+        )
+        for name in field_names:
+            cls_dict.pop(name, None)
+        cls_dict.pop('__dict__', None)
+        cls_dict.pop('__weakref__', None)
+        
+        slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+        slotted_cls.__qualname__ = cls.__qualname__
+        for name, method_name in lazy.items():
+            setattr(slotted_cls, name, _lazy_field(name, method_name))
+        return slotted_cls
+    
+    return wrap if cls is None else wrap(cls)
+
+@_slotted
 @dataclass
 class SuccessMetrics:
     """构筑成功指标"""
@@ -60,6 +112,7 @@ class SuccessMetrics:
             self.cost_effectiveness * weights['cost_effectiveness']
         )
 
+@_slotted
 @dataclass
 class ItemInfo:
     """物品信息"""
@@ -73,10 +126,13 @@ class ItemInfo:
     def __post_init__(self):
         """数据清理"""
         if self.name:
-            self.name = self.name.strip()
+            self.name = _intern(self.name.strip())
         if self.type:
-            self.type = self.type.strip().lower()
+            self.type = _intern(self.type.strip().lower())
+        self.rarity = _intern(self.rarity)
+        self.currency = _intern(self.currency)
 
+@_slotted
 @dataclass 
 class SkillGemSetup:
     """技能宝石配置"""
@@ -90,16 +146,18 @@ class SkillGemSetup:
     def __post_init__(self):
         """数据清理和验证"""
         if self.main_skill:
-            self.main_skill = self.main_skill.strip()
+            self.main_skill = _intern(self.main_skill.strip())
         
         # 清理辅助宝石列表
-        self.support_gems = [gem.strip() for gem in self.support_gems if gem and gem.strip()]
+        self.support_gems = [_intern(gem.strip()) for gem in self.support_gems if gem and gem.strip()]
+        self.socket_colors = _intern(self.socket_colors)
         
         # 限制等级和品质范围
         self.skill_level = max(1, min(30, self.skill_level))
         self.quality = max(0, min(23, self.quality))
         self.links = max(1, min(6, self.links))
 
+@_slotted
 @dataclass
 class DefensiveStats:
     """防御属性"""
@@ -135,6 +193,7 @@ class DefensiveStats:
                 self.cold_resistance >= cap and 
                 self.lightning_resistance >= cap)
 
+@_slotted
 @dataclass
 class OffensiveStats:
     """攻击属性"""
@@ -159,12 +218,19 @@ class OffensiveStats:
         if self.critical_multiplier < 150:
             self.critical_multiplier = 150
 
+@_slotted(lazy={
+    'build_description': '_generate_description',
+    'similarity_hash': '_generate_similarity_hash',
+    'tags': '_extract_tags',
+})
 @dataclass
 class PoE2BuildData:
     """PoE2构筑数据 - 核心数据模型
     
     这是RAG系统的核心数据结构，包含了一个完整PoE2构筑的所有关键信息。
     设计遵循PoE2游戏机制和现实构筑需求。
+    
+    build_description、similarity_hash和tags未显式提供时，在首次读取时生成。
     """
     # 基础信息
     character_name: str = ""                        # 角色名称
@@ -213,7 +279,7 @@ class PoE2BuildData:
     collection_timestamp: datetime = field(default_factory=datetime.now)
     last_updated: Optional[datetime] = None        # 最后更新时间
     
-    # RAG相关字段
+    # RAG相关字段 (惰性生成)
     build_description: str = ""                    # 构筑描述文本
     tags: List[str] = field(default_factory=list) # 标签列表
     similarity_hash: str = ""                      # 相似度哈希
@@ -221,16 +287,16 @@ class PoE2BuildData:
     def __post_init__(self):
         """初始化后处理"""
         self._validate_data()
-        self._generate_description()
-        self._generate_similarity_hash()
-        self._extract_tags()
     
     def _validate_data(self):
         """数据验证和清理"""
         # 清理字符串字段
         self.character_name = self.character_name.strip() if self.character_name else ""
-        self.character_class = self.character_class.strip() if self.character_class else ""
-        self.ascendancy = self.ascendancy.strip() if self.ascendancy else ""
+        self.character_class = _intern(self.character_class.strip()) if self.character_class else ""
+        self.ascendancy = _intern(self.ascendancy.strip()) if self.ascendancy else ""
+        self.currency_type = _intern(self.currency_type)
+        self.budget_tier = _intern(self.budget_tier)
+        self.data_source = _intern(self.data_source)
         
         # 验证等级范围
         self.level = max(1, min(100, self.level))
@@ -248,13 +314,11 @@ class PoE2BuildData:
             self.rings = self.rings[:2]
             
         # 清理关键天赋列表
-        self.passive_keystones = [ks.strip() for ks in self.passive_keystones if ks and ks.strip()]
+        self.passive_keystones = [_intern(ks.strip()) for ks in self.passive_keystones if ks and ks.strip()]
+        self.major_nodes = [_intern(node) for node in self.major_nodes if node]
         
-    def _generate_description(self):
+    def _generate_description(self) -> str:
         """生成构筑描述文本用于RAG向量化"""
-        if self.build_description:  # 如果已有描述就不重新生成
-            return
-            
         parts = []
         
         # 基础信息
@@ -301,9 +365,9 @@ class PoE2BuildData:
         if self.popularity_rank > 0:
             parts.append(f"排名: #{self.popularity_rank}")
         
-        self.build_description = " | ".join(parts)
+        return " | ".join(parts)
     
-    def _generate_similarity_hash(self):
+    def _generate_similarity_hash(self) -> str:
         """生成用于相似度比较的哈希值"""
         # 使用核心特征生成哈希
         key_features = [
@@ -318,9 +382,9 @@ class PoE2BuildData:
         
         # 创建哈希字符串
         hash_string = "|".join([str(f) for f in key_features])
-        self.similarity_hash = hashlib.md5(hash_string.encode('utf-8')).hexdigest()[:16]
+        return hashlib.md5(hash_string.encode('utf-8')).hexdigest()[:16]
     
-    def _extract_tags(self):
+    def _extract_tags(self) -> List[str]:
         """从构筑数据中提取标签"""
         tags = set()
         
@@ -362,7 +426,7 @@ class PoE2BuildData:
             tags.add("low_defense")
         
         # 存储为列表
-        self.tags = sorted(list(tags))
+        return sorted(_intern(tag) for tag in tags)
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -597,13 +661,51 @@ class RAGDataModel:
         return json.dumps(data, ensure_ascii=False, indent=2)
     
     def save_to_file(self, filepath: str):
-        """保存到文件"""
+        """保存到文件
+        
+        路径以.npz结尾时写入列式快照，否则写入JSON。
+        """
+        from .snapshot import is_snapshot_path
+        if is_snapshot_path(filepath):
+            self.save_snapshot(filepath)
+            return
+        
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(self.to_json())
     
+    def save_snapshot(self, filepath: str, chunk_size: Optional[int] = None) -> int:
+        """流式写入列式二进制快照
+        
+        Returns:
+            写入的构筑数量
+        """
+        from .snapshot import write_snapshot, DEFAULT_CHUNK_SIZE
+        return write_snapshot(
+            filepath,
+            self.builds,
+            collection_metadata=self.collection_metadata,
+            processing_stats=self.processing_stats,
+            chunk_size=chunk_size or DEFAULT_CHUNK_SIZE
+        )
+    
+    @classmethod
+    def load_snapshot(cls, filepath: str) -> 'RAGDataModel':
+        """加载列式快照，构筑对象在访问时才构造"""
+        from .snapshot import BuildSnapshot, LazyBuildList
+        snapshot = BuildSnapshot(filepath)
+        return cls(
+            builds=LazyBuildList(snapshot),
+            collection_metadata=dict(snapshot.collection_metadata),
+            processing_stats=dict(snapshot.processing_stats)
+        )
+    
     @classmethod
     def load_from_file(cls, filepath: str) -> 'RAGDataModel':
         """从文件加载"""
+        from .snapshot import is_snapshot_path
+        if is_snapshot_path(filepath):
+            return cls.load_snapshot(filepath)
+        
         with open(filepath, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
@@ -17,7 +17,8 @@ import math
 from .models import PoE2BuildData, BuildGoal, DataQuality
 from .ai_engine import RecommendationStrategy, RecommendationContext, AIRecommendation
 from .knowledge_base import PoE2KnowledgeBase, BuildPattern, MetaInsight
-from .similarity_engine import SearchResult
+from .similarity_engine import SearchResult, PoE2SimilarityEngine
+from .index_builder import PoE2BuildIndexBuilder
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -92,13 +93,20 @@ class PoE2RecommendationEngine:
     实现多种推荐算法，为不同场景提供最适合的推荐策略。
     """
     
-    def __init__(self, knowledge_base: Optional[PoE2KnowledgeBase] = None):
+    def __init__(self, knowledge_base: Optional[PoE2KnowledgeBase] = None,
+                 index_builder: Optional[PoE2BuildIndexBuilder] = None,
+                 similarity_engine: Optional[PoE2SimilarityEngine] = None):
         """初始化推荐引擎
         
         Args:
             knowledge_base: 知识库管理器
+            index_builder: 候选构筑所在的向量索引，用于多样性优化时取回构筑向量
+            similarity_engine: 相似度引擎，未指定 index_builder 时在使用时取其当前索引
+                （引擎的索引在 setup() 之后才可用）
         """
         self.knowledge_base = knowledge_base
+        self.index_builder = index_builder
+        self.similarity_engine = similarity_engine
         self.user_profiles: Dict[str, UserProfile] = {}
         
         # 推荐配置
@@ -109,6 +117,8 @@ class PoE2RecommendationEngine:
         self._similarity_cache = {}
         self._recommendation_cache = {}
         self._user_item_matrix = None
+        # 单次推荐内的知识库查询备忘（同职业/技能的候选共享查询结果）
+        self._knowledge_memo: Dict[tuple, Any] = {}
         
         # 算法权重配置
         self.algorithm_weights = {
@@ -117,6 +127,11 @@ class PoE2RecommendationEngine:
             AlgorithmType.KNOWLEDGE_BASED: 0.25,
             AlgorithmType.MATRIX_FACTORIZATION: 0.2
         }
+        
+        # 多样性优化 (MMR): λ * 推荐分数 - (1 - λ) * 与已选构筑的最大相似度
+        self.diversity_lambda = 0.7
+        # 混合推荐中每种算法提供的候选数量 = max_recommendations * hybrid_pool_factor
+        self.hybrid_pool_factor = 5
     
     def recommend_builds(self, 
                         user_context: RecommendationContext,
@@ -138,19 +153,24 @@ class PoE2RecommendationEngine:
         
         logger.info(f"使用 {algorithm.value} 算法生成推荐")
         
-        if algorithm == AlgorithmType.COLLABORATIVE_FILTERING:
-            return self._collaborative_filtering_recommend(user_context, candidates, max_recommendations)
-        elif algorithm == AlgorithmType.CONTENT_BASED:
-            return self._content_based_recommend(user_context, candidates, max_recommendations)
-        elif algorithm == AlgorithmType.KNOWLEDGE_BASED:
-            return self._knowledge_based_recommend(user_context, candidates, max_recommendations)
-        elif algorithm == AlgorithmType.HYBRID:
-            return self._hybrid_recommend(user_context, candidates, max_recommendations)
-        elif algorithm == AlgorithmType.MATRIX_FACTORIZATION:
-            return self._matrix_factorization_recommend(user_context, candidates, max_recommendations)
-        else:
-            # 默认使用内容推荐
-            return self._content_based_recommend(user_context, candidates, max_recommendations)
+        # 备忘只在本次推荐内有效，知识库可能在两次推荐之间更新
+        self._knowledge_memo = {}
+        try:
+            if algorithm == AlgorithmType.COLLABORATIVE_FILTERING:
+                return self._collaborative_filtering_recommend(user_context, candidates, max_recommendations)
+            elif algorithm == AlgorithmType.CONTENT_BASED:
+                return self._content_based_recommend(user_context, candidates, max_recommendations)
+            elif algorithm == AlgorithmType.KNOWLEDGE_BASED:
+                return self._knowledge_based_recommend(user_context, candidates, max_recommendations)
+            elif algorithm == AlgorithmType.HYBRID:
+                return self._hybrid_recommend(user_context, candidates, max_recommendations)
+            elif algorithm == AlgorithmType.MATRIX_FACTORIZATION:
+                return self._matrix_factorization_recommend(user_context, candidates, max_recommendations)
+            else:
+                # 默认使用内容推荐
+                return self._content_based_recommend(user_context, candidates, max_recommendations)
+        finally:
+            self._knowledge_memo = {}
     
     def _collaborative_filtering_recommend(self, 
                                          user_context: RecommendationContext,
@@ -161,8 +181,9 @@ class PoE2RecommendationEngine:
         
         # 获取用户偏好
         user_preferences = user_context.user_preferences
+        diversity_scores = self._sequential_diversity_scores(candidates)
         
-        for candidate in candidates:
+        for candidate, diversity_score in zip(candidates, diversity_scores):
             metadata = candidate.metadata
             
             # 计算协同过滤分数
@@ -170,7 +191,6 @@ class PoE2RecommendationEngine:
             
             # 计算其他分数组件
             popularity_score = self._calculate_popularity_score(metadata)
-            diversity_score = self._calculate_diversity_score(candidate, recommendations)
             personalization_score = self._calculate_personalization_score(candidate, user_context)
             
             # 组合分数
@@ -290,12 +310,13 @@ class PoE2RecommendationEngine:
                          candidates: List[SearchResult],
                          max_recommendations: int) -> List[Tuple[SearchResult, RecommendationScore]]:
         """混合推荐算法"""
-        # 获取不同算法的推荐结果
-        cf_results = self._collaborative_filtering_recommend(user_context, candidates, max_recommendations * 2)
-        content_results = self._content_based_recommend(user_context, candidates, max_recommendations * 2)
+        # 获取不同算法的推荐结果（候选池越大，多样性优化的选择空间越大）
+        pool_size = max_recommendations * self.hybrid_pool_factor
+        cf_results = self._collaborative_filtering_recommend(user_context, candidates, pool_size)
+        content_results = self._content_based_recommend(user_context, candidates, pool_size)
         
         if self.knowledge_base:
-            knowledge_results = self._knowledge_based_recommend(user_context, candidates, max_recommendations * 2)
+            knowledge_results = self._knowledge_based_recommend(user_context, candidates, pool_size)
         else:
             knowledge_results = []
         
@@ -322,10 +343,13 @@ class PoE2RecommendationEngine:
             candidate_scores[build_hash][1].knowledge_score += score.total_score * self.algorithm_weights.get(AlgorithmType.KNOWLEDGE_BASED, 0.25)
         
         # 计算最终推荐
+        merged = list(candidate_scores.values())
+        diversity_scores = self._sequential_diversity_scores([candidate for candidate, _ in merged])
+        
         final_recommendations = []
-        for candidate, rec_score in candidate_scores.values():
+        for (candidate, rec_score), diversity_score in zip(merged, diversity_scores):
             # 添加多样性分数
-            rec_score.diversity_score = self._calculate_diversity_score(candidate, final_recommendations)
+            rec_score.diversity_score = diversity_score
             rec_score.personalization_score = self._calculate_personalization_score(candidate, user_context)
             rec_score.popularity_score = self._calculate_popularity_score(candidate.metadata)
             
@@ -422,6 +446,13 @@ class PoE2RecommendationEngine:
         
         return min(1.0, score)
     
+    def _query_knowledge(self, method_name: str, *args):
+        """带单次推荐备忘的知识库查询"""
+        key = (method_name,) + args
+        if key not in self._knowledge_memo:
+            self._knowledge_memo[key] = getattr(self.knowledge_base, method_name)(*args)
+        return self._knowledge_memo[key]
+    
     def _calculate_knowledge_score(self, candidate: SearchResult, user_preferences: Dict[str, Any]) -> float:
         """基于知识库计算分数"""
         if not self.knowledge_base:
@@ -431,7 +462,8 @@ class PoE2RecommendationEngine:
         metadata = candidate.metadata
         
         # 检查成功因素
-        success_factors = self.knowledge_base.get_success_factors_for_build(
+        success_factors = self._query_knowledge(
+            'get_success_factors_for_build',
             metadata.get('character_class', ''),
             metadata.get('main_skill', '')
         )
@@ -441,9 +473,10 @@ class PoE2RecommendationEngine:
             score += avg_confidence * 0.3
         
         # 检查构筑模式
-        patterns = self.knowledge_base.search_patterns(
-            character_class=metadata.get('character_class'),
-            main_skill=metadata.get('main_skill')
+        patterns = self._query_knowledge(
+            'search_patterns',
+            metadata.get('character_class'),
+            metadata.get('main_skill')
         )
         
         if patterns:
@@ -458,10 +491,11 @@ class PoE2RecommendationEngine:
             return 0.5
         
         metadata = candidate.metadata
-        matching_patterns = self.knowledge_base.search_patterns(
-            character_class=metadata.get('character_class'),
-            main_skill=metadata.get('main_skill'),
-            build_goal=metadata.get('build_goal')
+        matching_patterns = self._query_knowledge(
+            'search_patterns',
+            metadata.get('character_class'),
+            metadata.get('main_skill'),
+            metadata.get('build_goal')
         )
         
         if matching_patterns:
@@ -519,6 +553,34 @@ class PoE2RecommendationEngine:
         diversity_score = max(0.1, 1.0 - (similar_count * 0.3))
         return diversity_score
     
+    def _sequential_diversity_scores(self, candidates: List[SearchResult]) -> List[float]:
+        """按顺序计算每个候选相对于之前所有候选的多样性分数
+        
+        与依次调用 _calculate_diversity_score 结果相同，但用计数代替两两比较，复杂度为O(n)。
+        """
+        class_counts: Dict[Any, int] = defaultdict(int)
+        skill_counts: Dict[Any, int] = defaultdict(int)
+        pair_counts: Dict[Tuple[Any, Any], int] = defaultdict(int)
+        
+        scores = []
+        for seen, candidate in enumerate(candidates):
+            candidate_class = candidate.metadata.get('character_class', '')
+            candidate_skill = candidate.metadata.get('main_skill', '')
+            
+            if seen == 0:
+                scores.append(1.0)
+            else:
+                # 职业相同或技能相同的已有候选数（容斥）
+                similar_count = (class_counts[candidate_class] + skill_counts[candidate_skill] -
+                                 pair_counts[(candidate_class, candidate_skill)])
+                scores.append(max(0.1, 1.0 - (similar_count * 0.3)))
+            
+            class_counts[candidate_class] += 1
+            skill_counts[candidate_skill] += 1
+            pair_counts[(candidate_class, candidate_skill)] += 1
+        
+        return scores
+    
     def _calculate_personalization_score(self, candidate: SearchResult, context: RecommendationContext) -> float:
         """计算个性化分数"""
         score = 0.5
@@ -565,36 +627,59 @@ class PoE2RecommendationEngine:
     def _apply_diversity_optimization(self, 
                                     recommendations: List[Tuple[SearchResult, RecommendationScore]], 
                                     max_results: int) -> List[Tuple[SearchResult, RecommendationScore]]:
-        """应用多样性优化"""
+        """应用多样性优化 (MMR)
+        
+        每一步选择 λ * 推荐分数 - (1 - λ) * 与已选构筑最大余弦相似度 最高的候选。
+        候选向量和分数保存为数组，并维护每个候选与已选集合的最大相似度，
+        从n个候选中选出k个只需O(k·n)的向量运算。
+        """
         if len(recommendations) <= max_results:
             return recommendations
         
-        optimized = []
-        remaining = recommendations.copy()
+        embeddings = self._candidate_embeddings([candidate for candidate, _ in recommendations])
+        relevance = np.array([rec_score.total_score for _, rec_score in recommendations], dtype=np.float64)
         
-        # 贪心选择：每次选择分数最高且多样性最好的
-        while len(optimized) < max_results and remaining:
-            best_candidate = None
-            best_score = -1
-            best_index = -1
-            
-            for i, (candidate, rec_score) in enumerate(remaining):
-                # 重新计算多样性分数
-                diversity_score = self._calculate_diversity_score(candidate, optimized)
-                
-                # 组合分数 = 原分数 * 多样性权重
-                combined_score = rec_score.total_score * 0.7 + diversity_score * 0.3
-                
-                if combined_score > best_score:
-                    best_score = combined_score
-                    best_candidate = (candidate, rec_score)
-                    best_index = i
+        selected: List[int] = []
+        max_similarity = np.zeros(len(recommendations))
+        available = np.ones(len(recommendations), dtype=bool)
+        
+        while len(selected) < max_results:
+            mmr = self.diversity_lambda * relevance - (1.0 - self.diversity_lambda) * max_similarity
+            mmr[~available] = -np.inf
+            best = int(np.argmax(mmr))
             
-            if best_candidate:
-                optimized.append(best_candidate)
-                remaining.pop(best_index)
+            selected.append(best)
+            available[best] = False
+            np.maximum(max_similarity, embeddings @ embeddings[best], out=max_similarity)
         
-        return optimized
+        return [recommendations[i] for i in selected]
+    
+    def _candidate_embeddings(self, candidates: List[SearchResult]) -> np.ndarray:
+        """候选构筑的标准化向量矩阵
+        
+        优先从FAISS索引取回构筑向量；没有索引或元数据缺少 index_position 时，
+        退化为职业和主技能的独热编码（同职业同技能相似度为1，只有一项相同为0.5）。
+        """
+        vectors = None
+        index_builder = self.index_builder or getattr(self.similarity_engine, 'index_builder', None)
+        positions = [candidate.metadata.get('index_position') for candidate in candidates]
+        if index_builder is not None and all(position is not None for position in positions):
+            vectors = index_builder.reconstruct_vectors(positions)
+        
+        if vectors is None:
+            vocabulary: Dict[Tuple[str, Any], int] = {}
+            rows, columns = [], []
+            for row, candidate in enumerate(candidates):
+                for field_name in ('character_class', 'main_skill'):
+                    key = (field_name, candidate.metadata.get(field_name, ''))
+                    rows.append(row)
+                    columns.append(vocabulary.setdefault(key, len(vocabulary)))
+            vectors = np.zeros((len(candidates), max(len(vocabulary), 1)))
+            vectors[rows, columns] = 1.0
+        
+        vectors = np.asarray(vectors, dtype=np.float64)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
     
     # 用户画像管理
     def create_user_profile(self, user_id: str, preferences: Dict[str, Any]) -> UserProfile:
@@ -673,9 +758,11 @@ class PoE2RecommendationEngine:
         }
 
 # 工厂函数
-def create_recommendation_engine(knowledge_base: Optional[PoE2KnowledgeBase] = None) -> PoE2RecommendationEngine:
+def create_recommendation_engine(knowledge_base: Optional[PoE2KnowledgeBase] = None,
+                                 index_builder: Optional[PoE2BuildIndexBuilder] = None,
+                                 similarity_engine: Optional[PoE2SimilarityEngine] = None) -> PoE2RecommendationEngine:
     """创建推荐引擎的工厂函数"""
-    return PoE2RecommendationEngine(knowledge_base)
+    return PoE2RecommendationEngine(knowledge_base, index_builder, similarity_engine)
 
 # 测试函数
 def test_recommendation_engine():
@@ -11,12 +11,12 @@ from typing import List, Dict, Any, Optional, Tuple, Union, Set
 from dataclasses import dataclass
 from datetime import datetime
 
-try:
-    import faiss
-    FAISS_AVAILABLE = True
-except ImportError:
-    faiss = None
-    FAISS_AVAILABLE = False
+from ..utils.lazy_import import optional_module
+from ..utils.latency import latency_span
+
+# 导入本模块时即解析FAISS，保证 FAISS_AVAILABLE 反映实际能否导入
+faiss = optional_module("faiss", resolve=True)
+FAISS_AVAILABLE = faiss is not None
 
 from .models import PoE2BuildData, BuildGoal, DataQuality
 from .vectorizer import PoE2BuildVectorizer
@@ -208,12 +208,14 @@ class PoE2SimilarityEngine:
         
         if self.index_builder.config.similarity_metric == "cosine":
             # 使用内积搜索 (已标准化向量)
-            scores, indices = self.index_builder.index.search(query_vector, k)
+            with latency_span("rag.faiss_search"):
+                scores, indices = self.index_builder.index.search(query_vector, k)
             # 转换内积为余弦相似度 (已标准化，所以内积=余弦)
             similarities = scores[0]
         else:
             # L2距离搜索
-            distances, indices = self.index_builder.index.search(query_vector, k)
+            with latency_span("rag.faiss_search"):
+                distances, indices = self.index_builder.index.search(query_vector, k)
             # 转换L2距离为相似度分数
             similarities = 1.0 / (1.0 + distances[0])
         
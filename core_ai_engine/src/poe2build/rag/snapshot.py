@@ -0,0 +1,632 @@
+"""
+构筑快照 - RAGDataModel的列式二进制存储格式
+
+将构筑数据按列写入NPZ归档(zip + .npy)，替代整份缩进JSON:
+- 字符串字段统一进入字典表(UTF-8字节块 + 偏移量)，列中只保存整数编码
+- 列表字段(辅助宝石、关键天赋、戒指等)使用 偏移量 + 扁平数组 的变长列
+- 写入按块流式进行，内存占用只与块大小和字符串字典有关
+- 读取时只加载元数据和字符串字典，PoE2BuildData在访问时才按需构造
+"""
+
+import json
+import logging
+import os
+import zipfile
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import MutableSequence, Sequence
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from .models import (
+    PoE2BuildData,
+    SkillGemSetup,
+    ItemInfo,
+    OffensiveStats,
+    DefensiveStats,
+    SuccessMetrics,
+    BuildGoal,
+    DataQuality
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "poe2build-snapshot"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".npz"
+DEFAULT_CHUNK_SIZE = 4096
+
+# 字段布局
+_STRING_FIELDS = [
+    'character_name', 'character_class', 'ascendancy', 'currency_type',
+    'budget_tier', 'data_source', 'build_description', 'similarity_hash'
+]
+_INT_FIELDS = ['level', 'passive_points_used', 'popularity_rank']
+_STRING_LIST_FIELDS = ['passive_keystones', 'major_nodes', 'tags']
+_ITEM_SLOTS = [
+    'weapon', 'offhand', 'helmet', 'body_armour',
+    'gloves', 'boots', 'belt', 'amulet'
+]
+_ITEM_LIST_FIELDS = ['rings', 'jewels']
+_STAT_GROUPS = {
+    'offensive_stats': OffensiveStats,
+    'defensive_stats': DefensiveStats,
+    'success_metrics': SuccessMetrics,
+}
+# group -> [(字段名, 是否为整数)]
+_STAT_FIELDS = {
+    group: [(f.name, f.type is int) for f in fields(stats_cls)]
+    for group, stats_cls in _STAT_GROUPS.items()
+}
+
+
+def is_snapshot_path(filepath: Union[str, Path]) -> bool:
+    """判断路径是否为列式快照文件"""
+    return str(filepath).lower().endswith(SNAPSHOT_SUFFIX)
+
+
+class _StringTable:
+    """字符串字典 - 相同字符串只存储一次"""
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self._values: List[str] = []
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._values)
+            self._codes[value] = code
+            self._values.append(value)
+        return code
+
+    def to_arrays(self):
+        encoded = [value.encode('utf-8') for value in self._values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return blob, offsets
+
+
+class _ChunkBuffer:
+    """单个写入块的列缓冲区"""
+
+    def __init__(self, strings: _StringTable):
+        self.strings = strings
+        self.columns: Dict[str, list] = {}
+        self.dtypes: Dict[str, Any] = {}
+        self.count = 0
+
+    def _append(self, key: str, value, dtype):
+        column = self.columns.get(key)
+        if column is None:
+            column = self.columns[key] = []
+            self.dtypes[key] = dtype
+        column.append(value)
+
+    def add_str(self, key: str, value: Optional[str]):
+        self._append(key, self.strings.code(value), np.int32)
+
+    def add_int(self, key: str, value: int):
+        self._append(key, int(value), np.int64)
+
+    def add_float(self, key: str, value: Optional[float]):
+        self._append(key, np.nan if value is None else float(value), np.float64)
+
+    def add_str_list(self, key: str, values: List[str]):
+        self._append(f"{key}.len", len(values), np.int64)
+        codes_key = f"{key}.codes"
+        if codes_key not in self.columns:
+            self.columns[codes_key] = []
+            self.dtypes[codes_key] = np.int32
+        self.columns[codes_key].extend(self.strings.code(v) for v in values)
+
+    def add_item(self, prefix: str, item: Optional[ItemInfo]):
+        if item is None:
+            self.add_str(f"{prefix}.name", None)
+            self.add_str(f"{prefix}.type", None)
+            self.add_str(f"{prefix}.rarity", None)
+            self.add_str(f"{prefix}.currency", None)
+            self.add_int(f"{prefix}.ilvl", 0)
+            self.add_float(f"{prefix}.price", 0.0)
+            return
+        self.add_str(f"{prefix}.name", item.name)
+        self.add_str(f"{prefix}.type", item.type)
+        self.add_str(f"{prefix}.rarity", item.rarity)
+        self.add_str(f"{prefix}.currency", item.currency)
+        self.add_int(f"{prefix}.ilvl", item.ilvl)
+        self.add_float(f"{prefix}.price", item.price)
+
+    def add_skill(self, prefix: str, setup: SkillGemSetup):
+        self.add_str(f"{prefix}.main_skill", setup.main_skill)
+        self.add_str_list(f"{prefix}.support_gems", setup.support_gems)
+        self.add_int(f"{prefix}.skill_level", setup.skill_level)
+        self.add_int(f"{prefix}.quality", setup.quality)
+        self.add_str(f"{prefix}.socket_colors", setup.socket_colors)
+        self.add_int(f"{prefix}.links", setup.links)
+
+    def add_build(self, build: PoE2BuildData):
+        for name in _STRING_FIELDS:
+            self.add_str(name, getattr(build, name))
+        for name in _INT_FIELDS:
+            self.add_int(name, getattr(build, name))
+        self.add_float('total_cost', build.total_cost)
+        self.add_str('build_goal', build.build_goal.value)
+        self.add_str('data_quality', build.data_quality.value)
+        self.add_float(
+            'collection_timestamp',
+            build.collection_timestamp.timestamp() if build.collection_timestamp else None
+        )
+        self.add_float(
+            'last_updated',
+            build.last_updated.timestamp() if build.last_updated else None
+        )
+
+        self.add_skill('main_skill_setup', build.main_skill_setup)
+        self._append('secondary_skills.len', len(build.secondary_skills), np.int64)
+        for setup in build.secondary_skills:
+            self.add_skill('secondary_skills', setup)
+
+        for slot in _ITEM_SLOTS:
+            self.add_item(slot, getattr(build, slot))
+        for name in _ITEM_LIST_FIELDS:
+            items = getattr(build, name)
+            self._append(f"{name}.len", len(items), np.int64)
+            for item in items:
+                self.add_item(name, item)
+
+        for name in _STRING_LIST_FIELDS:
+            self.add_str_list(name, getattr(build, name))
+
+        for group, stat_fields in _STAT_FIELDS.items():
+            stats = getattr(build, group)
+            for name, is_int in stat_fields:
+                if is_int:
+                    self.add_int(f"{group}.{name}", getattr(stats, name))
+                else:
+                    self.add_float(f"{group}.{name}", getattr(stats, name))
+
+        self.count += 1
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {}
+        for key, values in self.columns.items():
+            if key.endswith('.len'):
+                offsets = np.zeros(len(values) + 1, dtype=np.int64)
+                np.cumsum(values, out=offsets[1:])
+                arrays[key[:-4] + '.offsets'] = offsets
+            else:
+                arrays[key] = np.asarray(values, dtype=self.dtypes[key])
+        return arrays
+
+
+class BuildSnapshotWriter:
+    """构筑快照流式写入器
+
+    构筑按块缓冲并写入NPZ归档，适用于逐条产生的大规模构筑集合::
+
+        with BuildSnapshotWriter("builds.npz") as writer:
+            for build in collector.iter_builds():
+                writer.write(build)
+    """
+
+    def __init__(self, filepath: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size必须为正整数")
+        self.filepath = Path(filepath)
+        self.chunk_size = chunk_size
+        self.collection_metadata: Dict[str, Any] = {}
+        self.processing_stats: Dict[str, Any] = {}
+
+        self._tmp_path = self.filepath.with_name(self.filepath.name + '.tmp')
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        self._zip = zipfile.ZipFile(self._tmp_path, 'w', compression=zipfile.ZIP_STORED, allowZip64=True)
+        self._strings = _StringTable()
+        self._buffer = _ChunkBuffer(self._strings)
+        self._chunk_sizes: List[int] = []
+        self._closed = False
+
+    @property
+    def count(self) -> int:
+        """已写入的构筑数量"""
+        return sum(self._chunk_sizes) + self._buffer.count
+
+    def _write_array(self, name: str, array: np.ndarray):
+        with self._zip.open(f"{name}.npy", 'w', force_zip64=True) as f:
+            np.lib.format.write_array(f, np.ascontiguousarray(array), allow_pickle=False)
+
+    def _flush(self):
+        if self._buffer.count == 0:
+            return
+        chunk_index = len(self._chunk_sizes)
+        for key, array in self._buffer.to_arrays().items():
+            self._write_array(f"c{chunk_index:05d}/{key}", array)
+        self._chunk_sizes.append(self._buffer.count)
+        self._buffer = _ChunkBuffer(self._strings)
+
+    def write(self, build: PoE2BuildData):
+        """写入单个构筑"""
+        if self._closed:
+            raise ValueError("快照写入器已关闭")
+        if not isinstance(build, PoE2BuildData):
+            raise TypeError("只能写入PoE2BuildData类型的数据")
+        self._buffer.add_build(build)
+        if self._buffer.count >= self.chunk_size:
+            self._flush()
+
+    def write_many(self, builds: Iterable[PoE2BuildData]):
+        """批量写入构筑"""
+        for build in builds:
+            self.write(build)
+
+    def close(self):
+        """写入字符串字典和元数据，完成快照"""
+        if self._closed:
+            return
+        try:
+            self._flush()
+            blob, offsets = self._strings.to_arrays()
+            self._write_array('strings.blob', blob)
+            self._write_array('strings.offsets', offsets)
+            meta = {
+                'format': SNAPSHOT_FORMAT,
+                'version': SNAPSHOT_VERSION,
+                'count': sum(self._chunk_sizes),
+                'chunk_sizes': self._chunk_sizes,
+                'created_at': datetime.now().isoformat(),
+                'collection_metadata': self.collection_metadata,
+                'processing_stats': self.processing_stats,
+            }
+            meta_bytes = json.dumps(meta, ensure_ascii=False, default=str).encode('utf-8')
+            self._write_array('meta', np.frombuffer(meta_bytes, dtype=np.uint8))
+            self._zip.close()
+            os.replace(self._tmp_path, self.filepath)
+            logger.info(f"构筑快照已写入: {self.filepath} ({meta['count']} 个构筑)")
+        finally:
+            self._closed = True
+            if self._tmp_path.exists():
+                self._zip.close()
+                self._tmp_path.unlink()
+
+    def abort(self):
+        """放弃写入并删除临时文件"""
+        if self._closed:
+            return
+        self._closed = True
+        self._zip.close()
+        if self._tmp_path.exists():
+            self._tmp_path.unlink()
+
+    def __enter__(self) -> 'BuildSnapshotWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class BuildSnapshot(Sequence):
+    """只读构筑快照
+
+    打开时只读取元数据和字符串字典；列数据按块加载，
+    PoE2BuildData对象在索引访问时才构造。
+    """
+
+    def __init__(self, filepath: Union[str, Path], max_cached_chunks: int = 8):
+        self.filepath = Path(filepath)
+        self._npz = np.load(self.filepath, allow_pickle=False)
+
+        meta = json.loads(self._npz['meta'].tobytes().decode('utf-8'))
+        if meta.get('format') != SNAPSHOT_FORMAT:
+            self._npz.close()
+            raise ValueError(f"不是有效的构筑快照文件: {self.filepath}")
+        if meta.get('version', 0) > SNAPSHOT_VERSION:
+            self._npz.close()
+            raise ValueError(f"不支持的快照版本: {meta.get('version')}")
+
+        self.meta = meta
+        self.collection_metadata: Dict[str, Any] = meta.get('collection_metadata', {})
+        self.processing_stats: Dict[str, Any] = meta.get('processing_stats', {})
+
+        chunk_sizes = meta.get('chunk_sizes', [])
+        self._count = int(meta.get('count', sum(chunk_sizes)))
+        self._chunk_starts = [0]
+        for size in chunk_sizes[:-1]:
+            self._chunk_starts.append(self._chunk_starts[-1] + size)
+        self._num_chunks = len(chunk_sizes)
+
+        self._string_blob = self._npz['strings.blob']
+        self._string_offsets = self._npz['strings.offsets']
+        self._string_cache: Dict[int, str] = {}
+
+        self._chunk_columns: Dict[int, List[str]] = {}
+        for name in self._npz.files:
+            if name.startswith('c') and '/' in name:
+                prefix, column = name.split('/', 1)
+                self._chunk_columns.setdefault(int(prefix[1:]), []).append(column)
+
+        self._max_cached_chunks = max(1, max_cached_chunks)
+        self._chunks: 'OrderedDict[int, Dict[str, list]]' = OrderedDict()
+
+    # ----- 底层读取 -----
+
+    def _string(self, code: int) -> Optional[str]:
+        if code < 0:
+            return None
+        value = self._string_cache.get(code)
+        if value is None:
+            start, end = int(self._string_offsets[code]), int(self._string_offsets[code + 1])
+            value = self._string_blob[start:end].tobytes().decode('utf-8')
+            self._string_cache[code] = value
+        return value
+
+    def _load_chunk(self, chunk_index: int) -> Dict[str, list]:
+        chunk = self._chunks.get(chunk_index)
+        if chunk is not None:
+            self._chunks.move_to_end(chunk_index)
+            return chunk
+        # 块内列转换为Python列表，逐行构造时避免numpy标量开销
+        chunk = {
+            column: self._npz[f"c{chunk_index:05d}/{column}"].tolist()
+            for column in self._chunk_columns.get(chunk_index, [])
+        }
+        self._chunks[chunk_index] = chunk
+        if len(self._chunks) > self._max_cached_chunks:
+            self._chunks.popitem(last=False)
+        return chunk
+
+    def _locate(self, index: int):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("快照索引超出范围")
+        chunk_index = bisect_right(self._chunk_starts, index) - 1
+        return chunk_index, index - self._chunk_starts[chunk_index]
+
+    def _ragged_range(self, cols: Dict[str, list], key: str, row: int):
+        offsets = cols[f"{key}.offsets"]
+        return offsets[row], offsets[row + 1]
+
+    def _string_list(self, cols: Dict[str, list], key: str, row: int) -> List[str]:
+        start, end = self._ragged_range(cols, key, row)
+        codes = cols[f"{key}.codes"]
+        return [self._string(code) for code in codes[start:end]]
+
+    def _item(self, cols: Dict[str, list], prefix: str, row: int) -> Optional[ItemInfo]:
+        name_code = cols[f"{prefix}.name"][row]
+        if name_code < 0:
+            return None
+        return ItemInfo(
+            name=self._string(name_code),
+            type=self._string(cols[f"{prefix}.type"][row]) or "",
+            rarity=self._string(cols[f"{prefix}.rarity"][row]) or "normal",
+            ilvl=cols[f"{prefix}.ilvl"][row],
+            price=cols[f"{prefix}.price"][row],
+            currency=self._string(cols[f"{prefix}.currency"][row]) or "divine"
+        )
+
+    def _skill(self, cols: Dict[str, list], prefix: str, row: int) -> SkillGemSetup:
+        return SkillGemSetup(
+            main_skill=self._string(cols[f"{prefix}.main_skill"][row]) or "",
+            support_gems=self._string_list(cols, f"{prefix}.support_gems", row),
+            skill_level=cols[f"{prefix}.skill_level"][row],
+            quality=cols[f"{prefix}.quality"][row],
+            socket_colors=self._string(cols[f"{prefix}.socket_colors"][row]) or "",
+            links=cols[f"{prefix}.links"][row]
+        )
+
+    @staticmethod
+    def _datetime(value: float) -> Optional[datetime]:
+        if value != value:  # NaN表示缺失
+            return None
+        return datetime.fromtimestamp(value)
+
+    def _materialize(self, index: int) -> PoE2BuildData:
+        chunk_index, row = self._locate(index)
+        cols = self._load_chunk(chunk_index)
+
+        kwargs: Dict[str, Any] = {}
+        for name in _STRING_FIELDS:
+            kwargs[name] = self._string(cols[name][row]) or ""
+        for name in _INT_FIELDS:
+            kwargs[name] = cols[name][row]
+        kwargs['total_cost'] = cols['total_cost'][row]
+        kwargs['build_goal'] = BuildGoal(self._string(cols['build_goal'][row]))
+        kwargs['data_quality'] = DataQuality(self._string(cols['data_quality'][row]))
+        kwargs['collection_timestamp'] = self._datetime(cols['collection_timestamp'][row])
+        kwargs['last_updated'] = self._datetime(cols['last_updated'][row])
+
+        kwargs['main_skill_setup'] = self._skill(cols, 'main_skill_setup', row)
+        start, end = self._ragged_range(cols, 'secondary_skills', row)
+        kwargs['secondary_skills'] = [
+            self._skill(cols, 'secondary_skills', sub_row) for sub_row in range(start, end)
+        ]
+
+        for slot in _ITEM_SLOTS:
+            kwargs[slot] = self._item(cols, slot, row)
+        for name in _ITEM_LIST_FIELDS:
+            start, end = self._ragged_range(cols, name, row)
+            kwargs[name] = [self._item(cols, name, sub_row) for sub_row in range(start, end)]
+
+        for name in _STRING_LIST_FIELDS:
+            kwargs[name] = self._string_list(cols, name, row)
+
+        for group, stat_fields in _STAT_FIELDS.items():
+            kwargs[group] = _STAT_GROUPS[group](**{
+                name: cols[f"{group}.{name}"][row] for name, _ in stat_fields
+            })
+
+        return PoE2BuildData(**kwargs)
+
+    # ----- 公共接口 -----
+
+    def column(self, name: str) -> np.ndarray:
+        """读取标量列(跨块拼接)，无需构造构筑对象
+
+        字符串列返回解码后的object数组，其余返回数值数组。
+        """
+        parts = [
+            self._npz[f"c{chunk_index:05d}/{name}"]
+            for chunk_index in range(self._num_chunks)
+        ]
+        if not parts:
+            return np.array([])
+        values = np.concatenate(parts)
+        if name in _STRING_FIELDS or name in ('build_goal', 'data_quality'):
+            return np.array([self._string(int(code)) for code in values], dtype=object)
+        return values
+
+    def close(self):
+        """关闭底层归档"""
+        self._chunks.clear()
+        self._npz.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._materialize(i) for i in range(*index.indices(self._count))]
+        return self._materialize(index)
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self._materialize(index)
+
+    def __enter__(self) -> 'BuildSnapshot':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class LazyBuildList(MutableSequence):
+    """基于快照的惰性构筑列表
+
+    作为RAGDataModel.builds使用：已访问的构筑会被缓存(修改可保留)，
+    append/extend追加到快照之后；插入或删除中间元素时整体物化为普通列表。
+    """
+
+    def __init__(self, snapshot: BuildSnapshot):
+        self._snapshot: Optional[BuildSnapshot] = snapshot
+        self._cache: Dict[int, PoE2BuildData] = {}
+        self._appended: List[PoE2BuildData] = []
+        self._items: Optional[List[PoE2BuildData]] = None
+
+    @property
+    def snapshot(self) -> Optional[BuildSnapshot]:
+        """底层快照，物化后为None"""
+        return self._snapshot
+
+    @property
+    def materialized_count(self) -> int:
+        """已构造的构筑对象数量"""
+        if self._items is not None:
+            return len(self._items)
+        return len(self._cache) + len(self._appended)
+
+    def _base_len(self) -> int:
+        return len(self._snapshot) if self._snapshot is not None else 0
+
+    def _get(self, index: int) -> PoE2BuildData:
+        base = self._base_len()
+        if index >= base:
+            return self._appended[index - base]
+        build = self._cache.get(index)
+        if build is None:
+            build = self._snapshot[index]
+            self._cache[index] = build
+        return build
+
+    def _materialize_all(self) -> List[PoE2BuildData]:
+        if self._items is None:
+            self._items = [self._get(i) for i in range(len(self))]
+            self._cache.clear()
+            self._appended = []
+            self._snapshot = None
+        return self._items
+
+    def __len__(self) -> int:
+        if self._items is not None:
+            return len(self._items)
+        return self._base_len() + len(self._appended)
+
+    def __getitem__(self, index):
+        if self._items is not None:
+            return self._items[index]
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("list index out of range")
+        return self._get(index)
+
+    def __setitem__(self, index, value):
+        if self._items is not None or isinstance(index, slice):
+            self._materialize_all()[index] = value
+            return
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("list assignment index out of range")
+        base = self._base_len()
+        if index >= base:
+            self._appended[index - base] = value
+        else:
+            self._cache[index] = value
+
+    def __delitem__(self, index):
+        del self._materialize_all()[index]
+
+    def insert(self, index: int, value: PoE2BuildData):
+        if self._items is None and index >= len(self):
+            self._appended.append(value)
+            return
+        self._materialize_all().insert(index, value)
+
+    def append(self, value: PoE2BuildData):
+        if self._items is not None:
+            self._items.append(value)
+        else:
+            self._appended.append(value)
+
+    def __iter__(self):
+        if self._items is not None:
+            return iter(self._items)
+        return (self._get(i) for i in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f"LazyBuildList(len={len(self)}, materialized={self.materialized_count})"
+
+
+def write_snapshot(filepath: Union[str, Path],
+                   builds: Iterable[PoE2BuildData],
+                   collection_metadata: Optional[Dict[str, Any]] = None,
+                   processing_stats: Optional[Dict[str, Any]] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """将构筑写入快照文件
+
+    Returns:
+        写入的构筑数量
+    """
+    with BuildSnapshotWriter(filepath, chunk_size=chunk_size) as writer:
+        writer.collection_metadata = dict(collection_metadata or {})
+        writer.processing_stats = dict(processing_stats or {})
+        writer.write_many(builds)
+        count = writer.count
+    return count
+
+
+def open_snapshot(filepath: Union[str, Path]) -> BuildSnapshot:
+    """打开构筑快照文件"""
+    return BuildSnapshot(filepath)
@@ -14,20 +14,16 @@ from pathlib import Path
 from datetime import datetime
 from dataclasses import dataclass, asdict
 
-# 可选依赖导入
-try:
-    from sentence_transformers import SentenceTransformer
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    SentenceTransformer = None
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
+from ..utils.lazy_import import optional_module
+from ..utils.latency import latency_span
 
-try:
-    import faiss
-    FAISS_AVAILABLE = True
-except ImportError:
-    faiss = None
-    FAISS_AVAILABLE = False
+# 可选依赖：只检查是否安装，首次使用时才真正导入
+sentence_transformers = optional_module("sentence_transformers")
+SENTENCE_TRANSFORMERS_AVAILABLE = sentence_transformers is not None
+
+# FAISS立即解析，保证 FAISS_AVAILABLE 反映实际能否导入
+faiss = optional_module("faiss", resolve=True)
+FAISS_AVAILABLE = faiss is not None
 
 # 依赖检查函数
 def check_dependencies():
@@ -109,7 +105,7 @@ class PoE2BuildVectorizer:
             # 设置缓存目录
             os.environ['SENTENCE_TRANSFORMERS_HOME'] = str(Path(self.config.cache_dir) / "sentence_transformers")
             
-            self.model = SentenceTransformer(
+            self.model = sentence_transformers.SentenceTransformer(
                 self.config.model_name,
                 cache_folder=os.environ['SENTENCE_TRANSFORMERS_HOME']
             )
@@ -416,7 +412,8 @@ class PoE2BuildVectorizer:
         """
         self._load_model()
         
-        vector = self.model.encode([text])[0]
+        with latency_span("rag.encode"):
+            vector = self.model.encode([text])[0]
         
         if self.config.use_normalize and np.linalg.norm(vector) > 0:
             vector = vector / np.linalg.norm(vector)
@@ -27,13 +27,32 @@ from .data_validation import (
 
 from .text_processing import (
     PoE2TextProcessor,
+    FuzzyNameMatcher,
     TextTemplate,
     PoE2Templates,
     PoE2TextUtils,
     clean_poe2_item_name,
     search_poe2_items,
     format_poe2_currency,
-    extract_poe2_numbers
+    extract_poe2_numbers,
+    build_poe2_name_matcher
+)
+
+from .lazy_import import (
+    attach_lazy_attributes,
+    optional_module,
+    module_available,
+    LazyModule
+)
+
+from .async_loop import BackgroundEventLoop
+
+from .latency import (
+    LatencyRecorder,
+    RollingHistogram,
+    get_latency_recorder,
+    latency_span,
+    start_metrics_server
 )
 
 # 便利函数
@@ -176,6 +195,7 @@ __all__ = [
     'PoE2DataValidator',
     'SchemaValidator',
     'PoE2TextProcessor',
+    'FuzzyNameMatcher',
     'TextTemplate',
     'PoE2Templates',
     'PoE2TextUtils',
@@ -206,6 +226,23 @@ __all__ = [
     'search_poe2_items', 
     'format_poe2_currency',
     'extract_poe2_numbers',
+    'build_poe2_name_matcher',
+    
+    # 延迟导入
+    'attach_lazy_attributes',
+    'optional_module',
+    'module_available',
+    'LazyModule',
+    
+    # 后台事件循环
+    'BackgroundEventLoop',
+    
+    # 延迟埋点
+    'LatencyRecorder',
+    'RollingHistogram',
+    'get_latency_recorder',
+    'latency_span',
+    'start_metrics_server',
     
     # 常量
     'MAX_RESISTANCE',
@@ -0,0 +1,130 @@
+"""后台事件循环
+
+在专用线程中托管一个长期存在的asyncio事件循环。其他线程（如GUI主线程）通过
+asyncio.run_coroutine_threadsafe 提交协程，拿到 concurrent.futures.Future 等待结果或取消。
+
+与每次请求新建/关闭事件循环相比，aiohttp会话、连接池和异步缓存都绑定在同一个循环上，
+可以在请求之间复用。
+
+使用示例:
+```python
+background = BackgroundEventLoop(name="poe2-backend-loop")
+future = background.submit(orchestrator.generate_build_recommendations(request))
+future.add_done_callback(on_done)   # 回调在事件循环线程中执行
+...
+background.stop()
+```
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundEventLoop:
+    """在守护线程中运行的持久事件循环"""
+
+    def __init__(self, name: str = "poe2-event-loop"):
+        """
+        初始化后台事件循环（首次提交协程时才启动线程）
+
+        Args:
+            name: 事件循环线程名称
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """托管的事件循环（未启动时自动启动）"""
+        self.start()
+        return self._loop
+
+    @property
+    def is_running(self) -> bool:
+        """事件循环线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def in_loop_thread(self) -> bool:
+        """当前是否处于事件循环线程中"""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def start(self):
+        """启动事件循环线程（已在运行时忽略）"""
+        with self._lock:
+            if self.is_running:
+                return
+
+            self._ready.clear()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+        self._ready.wait()
+        logger.debug(f"后台事件循环 {self.name} 已启动")
+
+    def submit(self, coro: Awaitable[Any]) -> concurrent.futures.Future:
+        """
+        提交协程到后台事件循环
+
+        Args:
+            coro: 要执行的协程
+
+        Returns:
+            线程安全的Future；调用其 cancel() 会取消事件循环中的任务
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """
+        提交协程并阻塞等待结果
+
+        不能在事件循环线程内调用，否则会死锁。
+        """
+        if self.in_loop_thread():
+            raise RuntimeError("不能在事件循环线程中同步等待协程")
+        return self.submit(coro).result(timeout)
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """取消未完成的任务，停止并关闭事件循环"""
+        with self._lock:
+            thread, loop = self._thread, self._loop
+            self._thread = None
+
+        if thread is None or not thread.is_alive():
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel_pending_tasks(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"取消后台任务失败: {e}")
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        logger.debug(f"后台事件循环 {self.name} 已停止")
+
+    def _run(self):
+        """事件循环线程主函数"""
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(self._ready.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    @staticmethod
+    async def _cancel_pending_tasks():
+        """取消事件循环中除自身外的所有任务"""
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.get_running_loop().shutdown_asyncgens()
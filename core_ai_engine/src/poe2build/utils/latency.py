@@ -0,0 +1,236 @@
+"""延迟埋点工具
+
+以 span 的形式记录各处理阶段的耗时，按名称聚合为滚动直方图（最近N次），
+提供 p50/p95/p99 统计，可导出为JSON或Prometheus文本格式。
+
+使用示例:
+```python
+with latency_span("rag.encode"):
+    vectors = model.encode(texts)
+
+recorder = get_latency_recorder()
+recorder.snapshot()["rag.encode"]["p95_ms"]
+print(recorder.to_prometheus())
+
+# 可选: 在后台线程中提供 /metrics 和 /metrics.json
+server = start_metrics_server(9108)
+```
+"""
+
+import json
+import logging
+import math
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 导出的分位数
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RollingHistogram:
+    """保留最近 window 个样本的耗时直方图（毫秒）"""
+
+    def __init__(self, window: int = 1024):
+        if window <= 0:
+            raise ValueError(f"窗口大小必须为正数: {window}")
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._total_count = 0
+        self._total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, duration_ms: float):
+        """记录一次耗时"""
+        with self._lock:
+            self._samples.append(duration_ms)
+            self._total_count += 1
+            self._total_ms += duration_ms
+
+    @property
+    def total_count(self) -> int:
+        """累计记录次数（不受窗口限制）"""
+        return self._total_count
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        """窗口内样本的分位数（最近秩法），无样本时返回None"""
+        with self._lock:
+            samples = sorted(self._samples)
+        return self._percentile_of(samples, quantile)
+
+    @staticmethod
+    def _percentile_of(sorted_samples: List[float], quantile: float) -> Optional[float]:
+        if not sorted_samples:
+            return None
+        rank = max(1, math.ceil(quantile * len(sorted_samples)))
+        return sorted_samples[rank - 1]
+
+    def summary(self) -> Dict[str, Any]:
+        """窗口统计和累计计数"""
+        with self._lock:
+            samples = sorted(self._samples)
+            total_count, total_ms = self._total_count, self._total_ms
+
+        summary = {
+            'count': total_count,
+            'sum_ms': total_ms,
+            'window_count': len(samples),
+            'mean_ms': sum(samples) / len(samples) if samples else None,
+            'max_ms': samples[-1] if samples else None,
+        }
+        for quantile in QUANTILES:
+            summary[f'p{int(quantile * 100)}_ms'] = self._percentile_of(samples, quantile)
+        return summary
+
+
+class LatencySpan:
+    """计时上下文，退出时把耗时记录到所属的记录器（异常退出同样记录）"""
+
+    __slots__ = ('recorder', 'name', 'start', 'duration_ms')
+
+    def __init__(self, recorder: 'LatencyRecorder', name: str):
+        self.recorder = recorder
+        self.name = name
+        self.start = 0.0
+        self.duration_ms: Optional[float] = None
+
+    def __enter__(self) -> 'LatencySpan':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration_ms = (time.perf_counter() - self.start) * 1000
+        self.recorder.record(self.name, self.duration_ms)
+        return False
+
+
+class LatencyRecorder:
+    """按 span 名称聚合的延迟记录器"""
+
+    def __init__(self, window: int = 1024, enabled: bool = True):
+        """
+        Args:
+            window: 每个span保留的样本数
+            enabled: 关闭时 record 不做任何事
+        """
+        self.window = window
+        self.enabled = enabled
+        self._histograms: Dict[str, RollingHistogram] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str) -> LatencySpan:
+        """创建计时span，用于 with 语句（在协程中同样适用，计的是挂起在内的墙钟时间）"""
+        return LatencySpan(self, name)
+
+    def record(self, name: str, duration_ms: float):
+        """直接记录一次耗时"""
+        if not self.enabled:
+            return
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, RollingHistogram(self.window))
+        histogram.record(duration_ms)
+
+    def histogram(self, name: str) -> Optional[RollingHistogram]:
+        """获取指定span的直方图"""
+        return self._histograms.get(name)
+
+    def reset(self):
+        """清空所有记录"""
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """所有span的统计，按名称排序"""
+        with self._lock:
+            histograms = dict(self._histograms)
+        return {name: histograms[name].summary() for name in sorted(histograms)}
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """导出为JSON"""
+        return json.dumps({'timestamp': time.time(), 'spans': self.snapshot()},
+                          indent=indent, ensure_ascii=False)
+
+    def to_prometheus(self, metric_name: str = "poe2build_span_duration_seconds") -> str:
+        """导出为Prometheus文本格式（summary类型，单位秒）"""
+        lines = [
+            f"# HELP {metric_name} Latency of instrumented spans (rolling window quantiles).",
+            f"# TYPE {metric_name} summary",
+        ]
+        for name, summary in self.snapshot().items():
+            label = _escape_label(name)
+            for quantile in QUANTILES:
+                value = summary[f'p{int(quantile * 100)}_ms']
+                if value is not None:
+                    lines.append(f'{metric_name}{{span="{label}",quantile="{quantile}"}} {value / 1000:.6g}')
+            lines.append(f'{metric_name}_sum{{span="{label}"}} {summary["sum_ms"] / 1000:.6g}')
+            lines.append(f'{metric_name}_count{{span="{label}"}} {summary["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    """转义Prometheus标签值"""
+    return re.sub(r'(["\\])', r'\\\1', value).replace("\n", "\\n")
+
+
+# 进程级默认记录器：各组件独立创建，统一记录到这里
+_default_recorder = LatencyRecorder()
+
+
+def get_latency_recorder() -> LatencyRecorder:
+    """获取进程级默认记录器"""
+    return _default_recorder
+
+
+def latency_span(name: str) -> LatencySpan:
+    """在默认记录器上创建计时span"""
+    return _default_recorder.span(name)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1",
+                         recorder: Optional[LatencyRecorder] = None) -> 'ThreadingHTTPServer':
+    """
+    在守护线程中启动指标HTTP服务
+
+    GET /metrics 返回Prometheus文本格式，GET /metrics.json 返回JSON。
+    调用返回值的 shutdown() 停止服务。
+
+    Args:
+        port: 监听端口，0表示随机端口（实际端口见 server.server_address）
+        host: 监听地址
+        recorder: 导出的记录器，默认为进程级记录器
+    """
+    # http.server 只在启用指标服务时导入
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    recorder = recorder or _default_recorder
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = recorder.to_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+            elif self.path == "/metrics.json":
+                body, content_type = recorder.to_json(), "application/json; charset=utf-8"
+            else:
+                self.send_error(404)
+                return
+
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            logger.debug("metrics: " + format, *args)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="poe2-metrics-server", daemon=True)
+    thread.start()
+    logger.info(f"指标服务已启动: http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,111 @@
+"""延迟导入工具
+
+为包提供PEP 562的模块级 __getattr__/__dir__，使导出的属性在首次访问时才导入对应子模块；
+并为可选的重量级依赖(faiss、sentence-transformers等)提供延迟加载的模块代理。
+
+使用示例:
+```python
+# 包的 __init__.py
+__getattr__, __dir__ = attach_lazy_attributes(__name__, {
+    "PoE2BuildData": "models",
+    "PoE2KnowledgeBase": "knowledge_base",
+})
+
+# 可选依赖：首次使用时才导入
+sentence_transformers = optional_module("sentence_transformers")
+
+# 需要可靠的可用性标志时，立即尝试导入（已安装但无法加载时返回None）
+faiss = optional_module("faiss", resolve=True)
+FAISS_AVAILABLE = faiss is not None
+```
+"""
+
+import importlib
+import importlib.util
+import types
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def attach_lazy_attributes(package_name: str,
+                           attribute_modules: Dict[str, str]
+                           ) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """生成包级别的延迟属性加载函数
+
+    Args:
+        package_name: 包名，通常传入 __name__
+        attribute_modules: 属性名 -> 相对子模块名（如 "models" 或 "ninja.scraper"）
+
+    Returns:
+        (__getattr__, __dir__) 函数对，直接赋值给包的同名全局变量
+    """
+    package_globals = importlib.import_module(package_name).__dict__
+
+    def __getattr__(name: str) -> Any:
+        module_name = attribute_modules.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+        module = importlib.import_module(f".{module_name}", package_name)
+        value = getattr(module, name)
+        # 缓存到包的命名空间，之后的访问不再经过 __getattr__
+        package_globals[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(package_globals) | set(attribute_modules))
+
+    return __getattr__, __dir__
+
+
+def module_available(module_name: str) -> bool:
+    """不导入模块，仅检查其是否已安装"""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule(types.ModuleType):
+    """模块代理，首次访问属性时才真正导入模块"""
+
+    def __init__(self, module_name: str):
+        super().__init__(module_name)
+        self.__dict__['_lazy_target'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_target']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_lazy_target'] = module
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__['_lazy_target'] is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def optional_module(module_name: str, resolve: bool = False) -> Optional[LazyModule]:
+    """返回可选依赖的延迟模块代理；依赖未安装时返回None
+
+    默认只通过 find_spec 检查是否安装，真正的导入推迟到第一次使用。
+    find_spec 找到包并不代表能导入（如原生库缺失、ABI不兼容），
+    resolve=True 时立即导入，导入失败同样返回None。
+    """
+    if not module_available(module_name):
+        return None
+    module = LazyModule(module_name)
+    if resolve:
+        try:
+            module._load()
+        except (ImportError, OSError):
+            return None
+    return module
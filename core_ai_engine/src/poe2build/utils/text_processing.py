@@ -1,10 +1,31 @@
 """PoE2专用文本处理工具"""
 
+import bisect
 import re
 import unicodedata
-from typing import List, Dict, Optional, Set
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import List, Dict, Iterable, Optional, Set, Tuple
 from difflib import SequenceMatcher
 
+_NON_WORD_PATTERN = re.compile(r'[^\w\s]')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+@lru_cache(maxsize=8192)
+def _normalize_cached(text: str) -> str:
+    """标准化文本（结果缓存，重复出现的名称只处理一次）"""
+    # 转为小写
+    normalized = text.lower()
+    
+    # 移除Unicode组合字符
+    normalized = unicodedata.normalize('NFKD', normalized)
+    
+    # 移除标点符号和多余空格
+    normalized = _NON_WORD_PATTERN.sub(' ', normalized)
+    normalized = _WHITESPACE_PATTERN.sub(' ', normalized).strip()
+    
+    return normalized
+
 class PoE2TextProcessor:
     """PoE2专用文本处理工具"""
     
@@ -102,17 +123,7 @@ class PoE2TextProcessor:
     @classmethod
     def _normalize_text(cls, text: str) -> str:
         """标准化文本用于比较"""
-        # 转为小写
-        normalized = text.lower()
-        
-        # 移除Unicode组合字符
-        normalized = unicodedata.normalize('NFKD', normalized)
-        
-        # 移除标点符号和多余空格
-        normalized = re.sub(r'[^\w\s]', ' ', normalized)
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
-        
-        return normalized
+        return _normalize_cached(text)
         
     @classmethod
     def fuzzy_search(cls, query: str, candidates: List[str], 
@@ -189,6 +200,209 @@ class PoE2TextProcessor:
         except KeyError as e:
             return f"构筑摘要格式错误: 缺少字段 {e}"
 
+class FuzzyNameMatcher:
+    """
+    预建索引的模糊名称匹配器
+    
+    候选名称在构建时标准化一次并按字符三元组建立倒排索引。查询时按公共三元组数取出
+    少量候选（先用q-gram计数下界排除不可能达到阈值的候选，再取公共三元组最多的前
+    max_candidates 个），按相似度上界从高到低计算编辑距离，结果数达到 limit 且剩余候选
+    的上界不可能超过已有结果时提前结束。最近的查询结果保存在LRU缓存中。
+    
+    相似度为 1 - 编辑距离 / 较长名称的长度（均在标准化之后计算）。
+    
+    使用示例:
+    ```python
+    matcher = FuzzyNameMatcher(catalogue_names)
+    matcher.search("Lightnig Arow")      # [("Lightning Arrow", 0.867), ...]
+    matcher.best_match("Lightnig Arow")  # ("Lightning Arrow", 0.867)
+    ```
+    """
+    
+    GRAM_SIZE = 3
+    
+    def __init__(self, candidates: Iterable[str], cache_size: int = 1024, max_candidates: int = 64):
+        """
+        Args:
+            candidates: 候选名称（重复名称只保留一个）
+            cache_size: 查询结果LRU缓存大小，0表示不缓存
+            max_candidates: 每次查询最多计算编辑距离的候选数
+        """
+        self.candidates: List[str] = list(dict.fromkeys(candidates))
+        self.max_candidates = max_candidates
+        
+        # 标准化后相同的候选共享一个索引条目；标准化后为空的名称（如纯标点）不参与匹配
+        normalized_ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._originals: List[List[int]] = []
+        for index, candidate in enumerate(self.candidates):
+            normalized = _normalize_cached(candidate)
+            if not normalized:
+                continue
+            entry = normalized_ids.get(normalized)
+            if entry is None:
+                entry = normalized_ids[normalized] = len(self._names)
+                self._names.append(normalized)
+                self._originals.append([])
+            self._originals[entry].append(index)
+        
+        # numpy只在构建匹配器时导入，不影响包的导入耗时
+        import numpy as np
+        self._np = np
+        
+        # 三元组倒排索引：三元组 -> (条目数组, 出现次数数组)
+        postings: Dict[str, Tuple[List[int], List[int]]] = defaultdict(lambda: ([], []))
+        for entry, name in enumerate(self._names):
+            for gram, count in self._grams(name).items():
+                entries, counts = postings[gram]
+                entries.append(entry)
+                counts.append(count)
+        self._postings = {
+            gram: (np.array(entries, dtype=np.int32), np.array(counts, dtype=np.int32))
+            for gram, (entries, counts) in postings.items()
+        }
+        self._lengths = np.array([len(name) for name in self._names], dtype=np.int32)
+        
+        self._cached_search = lru_cache(maxsize=cache_size)(self._search) if cache_size else self._search
+    
+    def __len__(self) -> int:
+        return len(self.candidates)
+    
+    def search(self, query: str, threshold: float = 0.6,
+               limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        模糊搜索
+        
+        Args:
+            query: 查询名称
+            threshold: 最低相似度 (0-1)
+            limit: 最多返回的结果数
+        
+        Returns:
+            [(候选名称, 相似度)]，按相似度降序，相同相似度保持候选顺序
+        """
+        normalized = _normalize_cached(query) if query else ""
+        if not normalized or not self._names:
+            return []
+        return list(self._cached_search(normalized, threshold, limit))
+    
+    def best_match(self, query: str, threshold: float = 0.6) -> Optional[Tuple[str, float]]:
+        """最相似的候选，没有达到阈值的候选时返回None"""
+        results = self.search(query, threshold, limit=1)
+        return results[0] if results else None
+    
+    def match_many(self, queries: Iterable[str], threshold: float = 0.6) -> Dict[str, Optional[Tuple[str, float]]]:
+        """批量匹配，返回 {查询: 最佳匹配或None}"""
+        return {query: self.best_match(query, threshold) for query in queries}
+    
+    def cache_info(self):
+        """查询缓存统计（未启用缓存时为None）"""
+        return self._cached_search.cache_info() if hasattr(self._cached_search, 'cache_info') else None
+    
+    def _search(self, query: str, threshold: float, limit: Optional[int]) -> Tuple[Tuple[str, float], ...]:
+        """在索引上执行查询（query已标准化）"""
+        np = self._np
+        query_length = len(query)
+        
+        # 统计各条目与查询共有的三元组数（多重集交集）
+        shared = np.zeros(len(self._names), dtype=np.int32)
+        for gram, query_count in self._grams(query).items():
+            posting = self._postings.get(gram)
+            if posting is not None:
+                entries, counts = posting
+                shared[entries] += np.minimum(counts, query_count)
+        
+        # q-gram计数引理：编辑距离为d时至少有 max(长度) + 2 - 3d 个公共三元组
+        longest = np.maximum(self._lengths, query_length)
+        max_distance = ((1.0 - threshold) * longest + 1e-9).astype(np.int32)
+        required = np.maximum(1, longest + self.GRAM_SIZE - 1 - self.GRAM_SIZE * max_distance)
+        candidates = np.flatnonzero(shared >= required)
+        if len(candidates) > self.max_candidates:
+            order = np.lexsort((candidates, -shared[candidates]))
+            candidates = candidates[order[:self.max_candidates]]
+        
+        # 由公共三元组数和长度差推出的编辑距离下界 -> 相似度上界
+        candidate_longest = longest[candidates]
+        lower_distance = np.maximum(
+            -((shared[candidates] - candidate_longest - self.GRAM_SIZE + 1) // self.GRAM_SIZE),
+            np.abs(self._lengths[candidates] - query_length)
+        )
+        upper_bound = 1.0 - lower_distance / candidate_longest
+        order = np.lexsort((candidates, -upper_bound))
+        
+        # 按上界从高到低计算编辑距离
+        pattern = _BitParallelPattern(query)
+        names = self._names
+        scored = []
+        best = []  # 已找到的最高相似度（最多limit个，升序）
+        for position in order:
+            bound = upper_bound[position]
+            if limit is not None and len(best) >= limit and bound < best[0]:
+                break
+            entry = int(candidates[position])
+            similarity = 1.0 - pattern.distance(names[entry]) / int(candidate_longest[position])
+            if similarity < threshold:
+                continue
+            for index in self._originals[entry]:
+                scored.append((index, similarity))
+            if limit is not None:
+                bisect.insort(best, similarity)
+                if len(best) > limit:
+                    best.pop(0)
+        
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            scored = scored[:limit]
+        return tuple((self.candidates[index], similarity) for index, similarity in scored)
+    
+    @classmethod
+    def _grams(cls, text: str) -> Counter:
+        """两端补位后的字符三元组"""
+        padding = ' ' * (cls.GRAM_SIZE - 1)
+        padded = f"{padding}{text}{padding}"
+        return Counter(padded[i:i + cls.GRAM_SIZE] for i in range(len(padded) - cls.GRAM_SIZE + 1))
+    
+    @staticmethod
+    def edit_distance(a: str, b: str) -> int:
+        """Levenshtein编辑距离"""
+        return _BitParallelPattern(a).distance(b)
+
+class _BitParallelPattern:
+    """Myers位并行编辑距离：模式串预处理一次，每个文本字符只需常数次整数运算"""
+    
+    __slots__ = ('length', 'masks', 'full', 'high')
+    
+    def __init__(self, pattern: str):
+        self.length = len(pattern)
+        self.masks: Dict[str, int] = {}
+        for i, char in enumerate(pattern):
+            self.masks[char] = self.masks.get(char, 0) | (1 << i)
+        self.full = (1 << self.length) - 1
+        self.high = 1 << (self.length - 1) if self.length else 0
+    
+    def distance(self, text: str) -> int:
+        """模式串与text之间的编辑距离"""
+        if not self.length:
+            return len(text)
+        
+        masks, full, high = self.masks, self.full, self.high
+        vp, vn, score = full, 0, self.length
+        for char in text:
+            eq = masks.get(char, 0)
+            xv = eq | vn
+            xh = (((eq & vp) + vp) ^ vp) | eq
+            hp = vn | (~(xh | vp) & full)
+            hn = vp & xh
+            if hp & high:
+                score += 1
+            elif hn & high:
+                score -= 1
+            hp = ((hp << 1) | 1) & full
+            hn = (hn << 1) & full
+            vp = hn | (~(xv | hp) & full)
+            vn = hp & xv
+        return score
+
 class TextTemplate:
     """文本模板处理器"""
     
@@ -322,6 +536,10 @@ def clean_poe2_item_name(item_name: str) -> str:
     """快速清理PoE2物品名称"""
     return PoE2TextProcessor.clean_item_name(item_name)
 
+def build_poe2_name_matcher(names: Iterable[str], cache_size: int = 1024) -> FuzzyNameMatcher:
+    """为物品/技能名称目录构建模糊匹配器"""
+    return FuzzyNameMatcher(names, cache_size)
+
 def search_poe2_items(query: str, item_list: List[str], threshold: float = 0.6) -> List[tuple]:
     """快速搜索PoE2物品"""
     return PoE2TextProcessor.fuzzy_search(query, item_list, threshold)
@@ -5,7 +5,10 @@
 """
 
 import requests
+import importlib
 import json
+import sys
+import threading
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
@@ -13,6 +16,41 @@ from dataclasses import dataclass, asdict
 from bs4 import BeautifulSoup
 import re
 from pathlib import Path
+from urllib.parse import urljoin
+
+def _import_core_module(name: str):
+    """
+    导入核心包 (core_ai_engine/src/poe2build) 的模块
+    
+    核心包已经加载时沿用它的包名（应用以 poe2build 导入，core_ai_engine 下运行时为
+    src.poe2build）；否则再以另一个包名导入会得到第二份副本，进程内共享的限速器等
+    模块级状态也会变成两份。
+    """
+    for package in ("poe2build", "src.poe2build"):
+        if package in sys.modules:
+            return importlib.import_module(f"{package}.{name}")
+    
+    core_src = str(Path(__file__).parent / "core_ai_engine/src")
+    if core_src not in sys.path:
+        sys.path.insert(0, core_src)
+    return importlib.import_module(f"poe2build.{name}")
+
+# 详情页并发爬取调度器（核心包，可断点续爬）
+try:
+    _crawl_scheduler = _import_core_module("data_sources.crawl_scheduler")
+    CrawlCheckpoint = _crawl_scheduler.CrawlCheckpoint
+    CrawlScheduler = _crawl_scheduler.CrawlScheduler
+    get_shared_rate_limiter = _crawl_scheduler.get_shared_rate_limiter
+    CRAWL_SCHEDULER_AVAILABLE = True
+except ImportError:
+    CRAWL_SCHEDULER_AVAILABLE = False
+
+# Meta快照（版本化，刷新时只产生差异）
+try:
+    MetaSnapshotStore = _import_core_module("data_sources.ninja.snapshots").MetaSnapshotStore
+    META_SNAPSHOTS_AVAILABLE = True
+except ImportError:
+    META_SNAPSHOTS_AVAILABLE = False
 
 @dataclass
 class MarketItem:
@@ -80,7 +118,7 @@ class PoE2ScoutCrawler:
             'User-Agent': 'PoE2BuildGenerator/1.0 (Educational Purpose)',
             'Accept': 'application/json'
         })
-        
+    
     def get_item_data(self, league: str = "Rise of the Abyssal") -> List[MarketItem]:
         """获取市场物品数据"""
         try:
@@ -127,11 +165,11 @@ class PoE2ScoutCrawler:
                 
                 print(f"PoE2Scout: 获取到 {len(items)} 个物品数据")
                 return items
-                
+            
             else:
                 print(f"PoE2Scout API失败: {response.status_code}")
                 return []
-                
+        
         except Exception as e:
             print(f"PoE2Scout爬虫异常: {e}")
             return []
@@ -139,7 +177,19 @@ class PoE2ScoutCrawler:
 class PoE2DBCrawler:
     """PoE2DB网站爬虫"""
     
-    def __init__(self, cache_dir: str = "data_storage/poe2db_cache"):
+    # 检查点中的任务类别（与共享同一文件的 PoE2DBScraper 区分）
+    SKILL_DETAIL_KIND = "poe2db_crawler:skill_gem"
+    
+    def __init__(self, cache_dir: str = "data_storage/poe2db_cache", max_workers: int = 4,
+                 rate_limiter=None):
+        """
+        初始化PoE2DB爬虫
+        
+        Args:
+            cache_dir: 缓存和检查点目录
+            max_workers: 详情页并发爬取线程数
+            rate_limiter: 详情页的按主机限速器，默认为进程内共享的限速器（与 PoE2DBScraper 共用）
+        """
         self.base_url = "https://poe2db.tw/us"
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
@@ -147,6 +197,10 @@ class PoE2DBCrawler:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        self.max_workers = max_workers
+        self.checkpoint_path = self.cache_dir / "crawl_checkpoint.sqlite"
+        self.rate_limiter = rate_limiter or (get_shared_rate_limiter() if CRAWL_SCHEDULER_AVAILABLE else None)
+        self._thread_local = threading.local()
     
     def crawl_skill_gems(self) -> List[SkillData]:
         """爬取技能宝石数据"""
@@ -156,6 +210,7 @@ class PoE2DBCrawler:
             if response.status_code == 200:
                 soup = BeautifulSoup(response.content, 'html.parser')
                 skills = []
+                detail_urls = {}
                 
                 # 查找技能表格
                 tables = soup.find_all('table')
@@ -183,9 +238,17 @@ class PoE2DBCrawler:
                                 )
                                 skills.append(skill)
                                 
+                                link = cells[0].find('a')
+                                if link and link.get('href'):
+                                    detail_urls[skill_name] = urljoin(self.base_url + '/', link.get('href'))
+                            
                             except Exception:
                                 continue
                 
+                # 并发爬取详情页补充需求和属性（中断后下次运行从检查点续爬）
+                if detail_urls and CRAWL_SCHEDULER_AVAILABLE:
+                    self._apply_skill_details(skills, detail_urls)
+                
                 # 缓存数据
                 cache_file = self.cache_dir / "skill_gems.json"
                 with open(cache_file, 'w', encoding='utf-8') as f:
@@ -193,15 +256,79 @@ class PoE2DBCrawler:
                 
                 print(f"PoE2DB: 获取到 {len(skills)} 个技能数据")
                 return skills
-                
+            
             else:
                 print(f"PoE2DB访问失败: {response.status_code}")
                 return []
-                
+        
         except Exception as e:
             print(f"PoE2DB爬虫异常: {e}")
             return []
     
+    def _apply_skill_details(self, skills: List[SkillData], detail_urls: Dict[str, str]):
+        """爬取技能详情页并写回需求、属性和标签"""
+        checkpoint = CrawlCheckpoint(self.checkpoint_path)
+        try:
+            scheduler = CrawlScheduler(
+                fetch=self._fetch_detail_page,
+                parse=self._parse_skill_detail,
+                checkpoint=checkpoint,
+                max_workers=self.max_workers,
+                rate_limiter=self.rate_limiter
+            )
+            result = scheduler.run(list(dict.fromkeys(detail_urls.values())), self.SKILL_DETAIL_KIND)
+        finally:
+            checkpoint.close()
+        
+        details = {record['detail_url']: record for record in result.records}
+        for skill in skills:
+            record = details.get(detail_urls.get(skill.name))
+            if record:
+                skill.requirements = record['requirements']
+                skill.stats = record['stats']
+                skill.tags = sorted(set(skill.tags) | set(record['tags']))
+        
+        print(f"PoE2DB: 详情页 {result.completed} 个新完成, {result.resumed} 个从检查点恢复, {result.failed} 个失败")
+    
+    def _fetch_detail_page(self, url: str) -> bytes:
+        """工作线程中获取详情页（每个线程独立会话）"""
+        session = getattr(self._thread_local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.session.headers)
+            self._thread_local.session = session
+        
+        response = session.get(url, timeout=15)
+        response.raise_for_status()
+        return response.content
+    
+    def _parse_skill_detail(self, url: str, content: bytes) -> Dict[str, Any]:
+        """解析技能详情页"""
+        soup = BeautifulSoup(content, 'html.parser')
+        text = soup.get_text(' ', strip=True)
+        
+        requirements = {}
+        level_match = re.search(r'Requires\s+Level\s+(\d+)', text, re.I)
+        if level_match:
+            requirements['level'] = int(level_match.group(1))
+        for attribute, key in (('Str', 'str'), ('Dex', 'dex'), ('Int', 'int')):
+            attribute_match = re.search(rf'(\d+)\s+{attribute}\b', text)
+            if attribute_match:
+                requirements[key] = int(attribute_match.group(1))
+        
+        stats = [
+            element.get_text(strip=True)
+            for element in soup.find_all(class_=re.compile(r'(explicitMod|stat)', re.I))
+            if element.get_text(strip=True)
+        ]
+        
+        return {
+            'detail_url': url,
+            'requirements': requirements,
+            'stats': stats,
+            'tags': self._extract_tags(text)
+        }
+    
     def _determine_gem_type(self, text: str) -> str:
         """判断宝石类型"""
         text = text.lower()
@@ -256,7 +383,7 @@ class PoE2DBCrawler:
 class PoENinjaCrawler:
     """PoE Ninja爬虫"""
     
-    def __init__(self, cache_dir: str = "data_storage/ninja_cache"):
+    def __init__(self, cache_dir: str = "data_storage/ninja_cache", snapshot_versions: int = 10):
         self.base_url = "https://poe.ninja"
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
@@ -264,12 +391,16 @@ class PoENinjaCrawler:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        self.snapshots = MetaSnapshotStore(self.cache_dir / "meta_snapshots.sqlite") if META_SNAPSHOTS_AVAILABLE else None
+        self.snapshot_versions = snapshot_versions
+        self.last_delta = None
     
     def crawl_meta_builds(self) -> List[MetaBuildData]:
         """爬取Meta构筑数据"""
         try:
             # 尝试API访问
             api_success = False
+            api_league = None
             builds = []
             
             # 尝试不同的联赛
@@ -295,6 +426,7 @@ class PoENinjaCrawler:
                                     estimated_dps=build_data.get('dps')
                                 )
                                 builds.append(build)
+                            api_league = league
                             break
                 except:
                     continue
@@ -311,38 +443,38 @@ class PoENinjaCrawler:
                     from unique_builds_database import UniqueBuildDatabase
                     
                     unique_db = UniqueBuildDatabase()
-                    unique_builds = unique_db.builds
+                    unique_builds = [curated.to_dict() for curated in unique_db.builds]  # 可变副本
                     
                     for unique_build in unique_builds:
                         build = MetaBuildData(
-                            name=unique_build.name,
-                            character_class=unique_build.character_class,
-                            ascendancy=unique_build.ascendancy,
-                            main_skill=unique_build.main_skill,
-                            support_gems=unique_build.support_gems,
-                            popularity=unique_build.popularity_score,
+                            name=unique_build['name'],
+                            character_class=unique_build['character_class'],
+                            ascendancy=unique_build['ascendancy'],
+                            main_skill=unique_build['main_skill'],
+                            support_gems=unique_build['support_gems'],
+                            popularity=unique_build['popularity_score'],
                             average_level=85,
-                            key_items=list(unique_build.equipment.keys()),
-                            estimated_dps=unique_build.offense_stats.get('total_dps', 500000),
+                            key_items=list(unique_build['equipment'].keys()),
+                            estimated_dps=unique_build['offense_stats'].get('total_dps', 500000),
                             
                             # 扩展的完整数据
-                            passive_tree=unique_build.passive_tree,
-                            equipment=unique_build.equipment,
-                            flask_setup=unique_build.flask_setup,
-                            aura_setup=unique_build.aura_setup,
-                            defense_stats=unique_build.defense_stats,
-                            offense_stats=unique_build.offense_stats,
-                            movement_stats=unique_build.movement_stats,
-                            cost_analysis=unique_build.cost_analysis,
-                            playstyle=unique_build.playstyle,
-                            difficulty_rating=unique_build.difficulty_rating,
-                            league_suitability=unique_build.league_suitability,
-                            pros_cons=unique_build.pros_cons,
-                            leveling_guide=unique_build.leveling_guide,
-                            endgame_scaling=unique_build.endgame_scaling
+                            passive_tree=unique_build['passive_tree'],
+                            equipment=unique_build['equipment'],
+                            flask_setup=unique_build['flask_setup'],
+                            aura_setup=unique_build['aura_setup'],
+                            defense_stats=unique_build['defense_stats'],
+                            offense_stats=unique_build['offense_stats'],
+                            movement_stats=unique_build['movement_stats'],
+                            cost_analysis=unique_build['cost_analysis'],
+                            playstyle=unique_build['playstyle'],
+                            difficulty_rating=unique_build['difficulty_rating'],
+                            league_suitability=unique_build['league_suitability'],
+                            pros_cons=unique_build['pros_cons'],
+                            leveling_guide=unique_build['leveling_guide'],
+                            endgame_scaling=unique_build['endgame_scaling']
                         )
                         builds.append(build)
-                        
+                
                 except ImportError:
                     print("独特构筑数据库不可用，尝试AI推荐引擎")
                     try:
@@ -381,7 +513,7 @@ class PoENinjaCrawler:
                             builds.append(build)
                         
                         print(f"AI推荐引擎提供了 {len(ai_builds)} 个创新构筑")
-                        
+                    
                     except ImportError:
                         print("AI推荐引擎不可用，使用基础模拟数据")
                     # 基础备用数据
@@ -420,15 +552,24 @@ class PoENinjaCrawler:
                         )
                         builds.append(build)
             
-            # 缓存数据
-            cache_file = self.cache_dir / "meta_builds.json"
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump([asdict(build) for build in builds], f, default=str, indent=2)
-            
             source = "API" if api_success else "Mock Data"
+            
+            # 缓存数据：API数据按联赛提交为新的快照版本，只记录与上一版本的差异
+            # （备用数据不是真实Meta，不进入快照，否则API恢复时会产生虚假差异）
+            if self.snapshots is not None and api_success:
+                self.last_delta = self.snapshots.commit(api_league, [asdict(build) for build in builds])
+                self.snapshots.prune(api_league, keep=self.snapshot_versions)
+                print(f"PoE Ninja: {api_league} Meta快照 v{self.last_delta.version} "
+                      f"(新增 {len(self.last_delta.added)}, 变化 {len(self.last_delta.changed)}, "
+                      f"移除 {len(self.last_delta.removed)})")
+            else:
+                cache_file = self.cache_dir / "meta_builds.json"
+                with open(cache_file, 'w', encoding='utf-8') as f:
+                    json.dump([asdict(build) for build in builds], f, default=str, indent=2)
+            
             print(f"PoE Ninja: 获取到 {len(builds)} 个Meta构筑 (来源: {source})")
             return builds
-                
+        
         except Exception as e:
             print(f"PoE Ninja爬虫异常: {e}")
             return []
@@ -462,7 +603,7 @@ class DynamicDataManager:
         self.scout_crawler = PoE2ScoutCrawler()
         self.poe2db_crawler = PoE2DBCrawler()
         self.ninja_crawler = PoENinjaCrawler()
-        
+    
     def update_all_data(self, league: str = "Rise of the Abyssal"):
         """更新所有动态数据"""
         print("=== 开始更新动态数据 ===")
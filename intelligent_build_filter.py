@@ -5,9 +5,47 @@
 """
 
 from realistic_build_generator import RealisticBuildGenerator, RealisticBuild
-from typing import List, Dict, Any, Tuple
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+import logging
 import math
 
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CompiledFilterRules:
+    """
+    编译后的过滤规则
+    
+    规则字典在加载时按技能展开为查找表：武器冲突和不可能组合直接按技能名取出，
+    禁用辅助宝石用位掩码判定，辅助宝石替换预先算好 (技能, 辅助宝石) -> 替代品。
+    """
+    weapon_issues: Dict[str, List[str]]                    # 技能 -> 武器不兼容问题
+    forbidden_supports: Dict[str, List[Tuple[str, str]]]   # 技能 -> [(辅助宝石, 问题描述)]，按规则顺序
+    forbidden_masks: Dict[str, int]                        # 技能 -> 禁用辅助宝石位掩码
+    support_bits: Dict[str, int]                           # 规则涉及的辅助宝石 -> 位
+    replacements: Dict[Tuple[str, str], str]               # (技能, 辅助宝石) -> 替代品（只记录需要替换的）
+    fallback_replacements: Dict[str, str]                  # 技能 -> 不兼容/未知辅助宝石的通用替代品
+    
+    # 阈值
+    attribute_impossible: float
+    mana_cost_impossible: float
+    dps_too_low: float
+    poor_ascendancy_match: float
+    excessive_mana_cost: float
+    low_synergy: float
+    attribute_strain: float
+    gear_dependency: int
+    
+    def support_mask(self, supports: List[str]) -> int:
+        """构筑辅助宝石中规则涉及部分的位掩码"""
+        mask = 0
+        for support in supports:
+            mask |= self.support_bits.get(support, 0)
+        return mask
+
 class IntelligentBuildFilter:
     """智能构筑过滤器"""
     
@@ -15,6 +53,7 @@ class IntelligentBuildFilter:
         self.generator = RealisticBuildGenerator()
         self.filter_rules = self._load_filter_rules()
         self.optimization_rules = self._load_optimization_rules()
+        self.compiled_rules = self._compile_rules()
     
     def _load_filter_rules(self) -> Dict[str, Any]:
         """加载过滤规则"""
@@ -85,38 +124,170 @@ class IntelligentBuildFilter:
             }
         }
     
+    def _compile_rules(self) -> CompiledFilterRules:
+        """把过滤规则和优化规则编译为查找表（初始化时执行一次）"""
+        critical = self.filter_rules["critical_issues"]
+        major = self.filter_rules["major_warnings"]
+        minor = self.filter_rules["minor_issues"]
+        skills = self.generator.poe2_skills
+        
+        # 1. 武器技能不匹配（简化检查：技能未限定武器或限定的正是冲突武器时判定为问题）
+        weapon_issues: Dict[str, List[str]] = {}
+        for skill, incompatible_weapon in critical["invalid_weapon_skill"]:
+            required_weapon = skills.get(skill, {}).get("weapon", "any")
+            if required_weapon == "any" or required_weapon == incompatible_weapon:
+                weapon_issues.setdefault(skill, []).append(f"{skill}与{incompatible_weapon}武器不兼容")
+        
+        # 2. 不可能的技能-辅助组合，按技能展开并编码为位掩码
+        rule_supports = list(dict.fromkeys(support for _, support in critical["impossible_combinations"]))
+        support_bits = {support: 1 << i for i, support in enumerate(rule_supports)}
+        
+        forbidden_supports: Dict[str, List[Tuple[str, str]]] = {}
+        forbidden_masks: Dict[str, int] = {}
+        for skill, skill_data in skills.items():
+            skill_type = skill_data.get("type", "unknown")
+            skill_tags = set(skill_data.get("tags", []))
+            entries = [
+                (support, f"{skill}({incompatible_type})不能使用{support}")
+                for incompatible_type, support in critical["impossible_combinations"]
+                if incompatible_type in skill_tags or skill_type == incompatible_type
+            ]
+            if entries:
+                forbidden_supports[skill] = entries
+                forbidden_masks[skill] = 0
+                for support, _ in entries:
+                    forbidden_masks[skill] |= support_bits[support]
+        
+        # 3. 辅助宝石替换表
+        fallback_replacements = {}
+        replacements = {}
+        for skill in skills:
+            fallback = self._search_compatible_replacement(skill)
+            if fallback is not None:
+                fallback_replacements[skill] = fallback
+            for support in self.generator.poe2_supports:
+                replacement = self._resolve_replacement(skill, support, fallback)
+                if replacement != support:
+                    replacements[(skill, support)] = replacement
+        
+        return CompiledFilterRules(
+            weapon_issues=weapon_issues,
+            forbidden_supports=forbidden_supports,
+            forbidden_masks=forbidden_masks,
+            support_bits=support_bits,
+            replacements=replacements,
+            fallback_replacements=fallback_replacements,
+            attribute_impossible=critical["attribute_impossible"],
+            mana_cost_impossible=critical["mana_cost_impossible"],
+            dps_too_low=critical["dps_too_low"],
+            poor_ascendancy_match=major["poor_ascendancy_match"],
+            excessive_mana_cost=major["excessive_mana_cost"],
+            low_synergy=major["low_synergy"],
+            attribute_strain=major["attribute_strain"],
+            gear_dependency=minor["gear_dependency"]
+        )
+    
     def filter_and_optimize_builds(self, builds: List[RealisticBuild], 
                                  target_count: int = 5) -> List[RealisticBuild]:
         """过滤和优化构筑列表"""
         
-        print(f"开始过滤 {len(builds)} 个构筑...")
-        
-        # 第一步：严格过滤
-        viable_builds = []
-        for build in builds:
-            filter_result = self._comprehensive_filter(build)
-            if filter_result["viable"]:
-                build.viability_score = filter_result["adjusted_score"]
-                viable_builds.append(build)
+        logger.info(f"开始过滤 {len(builds)} 个构筑...")
         
-        print(f"严格过滤后剩余 {len(viable_builds)} 个可行构筑")
-        
-        # 第二步：优化构筑
-        optimized_builds = []
-        for build in viable_builds:
-            optimized_build = self._optimize_build(build)
-            if optimized_build:
-                optimized_builds.append(optimized_build)
+        # 第一、二步：严格过滤（整批评估）并优化可行构筑
+        optimized_builds = self.optimize_viable_builds(builds)
         
-        print(f"优化后剩余 {len(optimized_builds)} 个构筑")
+        logger.info(f"优化后剩余 {len(optimized_builds)} 个构筑")
         
         # 第三步：最终排序和选择
         final_builds = self._rank_and_select(optimized_builds, target_count)
         
-        print(f"最终选择 {len(final_builds)} 个最佳构筑")
+        logger.info(f"最终选择 {len(final_builds)} 个最佳构筑")
         
         return final_builds
     
+    def optimize_viable_builds(self, builds: List[RealisticBuild]) -> List[RealisticBuild]:
+        """
+        整批严格过滤后优化可行构筑（保持输入顺序）
+        
+        可行性判定和调整后评分与逐个调用 _comprehensive_filter 相同，但只调用一次 evaluate_builds。
+        """
+        viable, adjusted_scores = self.evaluate_builds(builds)
+        logger.info(f"严格过滤后剩余 {int(viable.sum())} 个可行构筑")
+        
+        optimized_builds = []
+        for index in np.flatnonzero(viable):
+            build = builds[index]
+            build.viability_score = float(adjusted_scores[index])
+            optimized_build = self._optimize_build(build)
+            if optimized_build:
+                optimized_builds.append(optimized_build)
+        return optimized_builds
+    
+    def evaluate_builds(self, builds: List[RealisticBuild]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量执行严格过滤
+        
+        与逐个调用 _comprehensive_filter 的结果相同，但不生成问题描述。
+        
+        Returns:
+            (是否可行, 调整后的可行性评分)
+        """
+        rules = self.compiled_rules
+        tables = self.generator.tables
+        n = len(builds)
+        if n == 0:
+            return np.zeros(0, dtype=bool), np.zeros(0)
+        
+        # 逐构筑取出标量列
+        skill_ids = np.array([tables.skill_ids.get(b.main_skill, -1) for b in builds], dtype=np.intp)
+        asc_ids = np.array([tables.ascendancy_ids.get(b.ascendancy, -1) for b in builds], dtype=np.intp)
+        viability = np.array([b.viability_score for b in builds], dtype=float)
+        mana = np.array([b.mana_cost for b in builds], dtype=float)
+        dps = np.array([b.calculated_dps for b in builds], dtype=float)
+        link_count = np.array([len(b.support_gems) + 1 for b in builds])
+        stat_max = np.array([max(b.stat_requirements.values(), default=0) for b in builds], dtype=float)
+        strained = np.array([sum(1 for v in b.stat_requirements.values() if v > rules.attribute_strain)
+                             for b in builds])
+        rule_conflict = np.array([
+            bool(rules.weapon_issues.get(b.main_skill)) or
+            bool(rules.forbidden_masks.get(b.main_skill, 0) & rules.support_mask(b.support_gems))
+            for b in builds
+        ])
+        
+        # 辅助宝石ID矩阵（未知辅助宝石和空位为-1）
+        width = max(1, max(len(b.support_gems) for b in builds))
+        support_ids = np.full((n, width), -1, dtype=np.intp)
+        for row, build in enumerate(builds):
+            ids = tables.support_id_list(build.support_gems)
+            support_ids[row, :len(ids)] = ids
+        
+        # 协同度和升华匹配度（未知技能为0）
+        known = skill_ids >= 0
+        safe_skill = np.where(known, skill_ids, 0)
+        synergy = np.minimum(
+            tables.tag_synergy[safe_skill[:, None], support_ids].prod(axis=1) *
+            tables.ascendancy_synergy[asc_ids, safe_skill],
+            3.0
+        )
+        synergy = np.where(known, synergy, 0.0)
+        asc_match = np.where(known, tables.ascendancy_match[asc_ids, safe_skill], 0.0)
+        
+        # 严重问题
+        critical = (rule_conflict | (stat_max > rules.attribute_impossible) |
+                    (mana > rules.mana_cost_impossible) | (dps < rules.dps_too_low))
+        
+        # 严重警告每个扣2分，一般问题每个扣0.5分（逐次扣减，与逐个评估的浮点结果一致）
+        warnings = ((asc_match < rules.poor_ascendancy_match).astype(int) +
+                    (mana > rules.excessive_mana_cost) + (synergy < rules.low_synergy) + strained)
+        score = viability.copy()
+        for k in range(int(warnings.max())):
+            score = np.where(warnings > k, score - 2.0, score)
+        score = np.where(link_count >= rules.gear_dependency, score - 0.5, score)
+        
+        viable = ~critical & (score >= 5.0)
+        adjusted = np.where(critical, 0.0, np.maximum(score, 0.0))
+        return viable, adjusted
+    
     def _comprehensive_filter(self, build: RealisticBuild) -> Dict[str, Any]:
         """综合过滤评估"""
         score = build.viability_score
@@ -154,40 +325,28 @@ class IntelligentBuildFilter:
     
     def _check_critical_issues(self, build: RealisticBuild) -> List[str]:
         """检查严重问题"""
-        issues = []
-        rules = self.filter_rules["critical_issues"]
+        rules = self.compiled_rules
         
         # 1. 武器技能不匹配
-        skill_data = self.generator.poe2_skills.get(build.main_skill, {})
-        required_weapon = skill_data.get("weapon", "any")
-        
-        for skill, incompatible_weapon in rules["invalid_weapon_skill"]:
-            if build.main_skill == skill:
-                # 这里简化检查，实际应该检查构筑指定的武器类型
-                if required_weapon != "any" and required_weapon != incompatible_weapon:
-                    continue  # 实际是正确的
-                else:
-                    issues.append(f"{skill}与{incompatible_weapon}武器不兼容")
+        issues = list(rules.weapon_issues.get(build.main_skill, ()))
         
         # 2. 不可能的技能-辅助组合
-        skill_type = skill_data.get("type", "unknown")
-        skill_tags = set(skill_data.get("tags", []))
-        
-        for incompatible_type, support in rules["impossible_combinations"]:
-            if (incompatible_type in skill_tags or skill_type == incompatible_type) and support in build.support_gems:
-                issues.append(f"{build.main_skill}({incompatible_type})不能使用{support}")
+        if rules.forbidden_masks.get(build.main_skill, 0) & rules.support_mask(build.support_gems):
+            supports = set(build.support_gems)
+            issues.extend(message for support, message in rules.forbidden_supports[build.main_skill]
+                          if support in supports)
         
         # 3. 属性需求不可能
         for attr, value in build.stat_requirements.items():
-            if value > rules["attribute_impossible"]:
+            if value > rules.attribute_impossible:
                 issues.append(f"{attr}需求过高: {value}")
         
         # 4. 法力消耗不可能
-        if build.mana_cost > rules["mana_cost_impossible"]:
+        if build.mana_cost > rules.mana_cost_impossible:
             issues.append(f"法力消耗过高: {build.mana_cost}")
         
         # 5. DPS过低
-        if build.calculated_dps < rules["dps_too_low"]:
+        if build.calculated_dps < rules.dps_too_low:
             issues.append(f"DPS过低: {build.calculated_dps}")
         
         return issues
@@ -195,25 +354,25 @@ class IntelligentBuildFilter:
     def _check_major_warnings(self, build: RealisticBuild) -> List[str]:
         """检查严重警告"""
         warnings = []
-        rules = self.filter_rules["major_warnings"]
+        rules = self.compiled_rules
         
         # 升华匹配度检查
         match_score = self.generator._check_ascendancy_match(build.main_skill, build.ascendancy)
-        if match_score < rules["poor_ascendancy_match"]:
+        if match_score < rules.poor_ascendancy_match:
             warnings.append(f"升华{build.ascendancy}与技能{build.main_skill}匹配度很低")
         
         # 法力消耗检查
-        if build.mana_cost > rules["excessive_mana_cost"]:
+        if build.mana_cost > rules.excessive_mana_cost:
             warnings.append(f"法力消耗偏高: {build.mana_cost}")
         
         # 协同度检查
         synergy = self.generator._calculate_synergy_score(build.main_skill, build.support_gems, build.ascendancy)
-        if synergy < rules["low_synergy"]:
+        if synergy < rules.low_synergy:
             warnings.append(f"技能协同度较低: {synergy:.2f}")
         
         # 属性需求检查
         for attr, value in build.stat_requirements.items():
-            if value > rules["attribute_strain"]:
+            if value > rules.attribute_strain:
                 warnings.append(f"{attr}需求较高: {value}")
         
         return warnings
@@ -221,10 +380,9 @@ class IntelligentBuildFilter:
     def _check_minor_issues(self, build: RealisticBuild) -> List[str]:
         """检查一般问题"""
         issues = []
-        rules = self.filter_rules["minor_issues"]
         
         # 连接需求
-        if len(build.support_gems) + 1 >= rules["gear_dependency"]:
+        if len(build.support_gems) + 1 >= self.compiled_rules.gear_dependency:
             issues.append(f"需要{len(build.support_gems) + 1}连装备")
         
         return issues
@@ -268,41 +426,54 @@ class IntelligentBuildFilter:
         return optimized_build
     
     def _smart_replace_supports(self, skill: str, supports: List[str]) -> List[str]:
-        """智能替换辅助宝石"""
+        """智能替换辅助宝石（查预先计算的替换表）"""
         if skill not in self.generator.poe2_skills:
             return supports
         
+        rules = self.compiled_rules
+        known_supports = self.generator.poe2_supports
+        
+        optimized_supports = []
+        for support in supports:
+            if support in known_supports:
+                optimized_supports.append(rules.replacements.get((skill, support), support))
+            else:
+                # 未知辅助宝石视为不兼容
+                optimized_supports.append(rules.fallback_replacements.get(skill, support))
+        
+        return optimized_supports
+    
+    def _resolve_replacement(self, skill: str, support: str, fallback: Optional[str]) -> str:
+        """计算单个辅助宝石的替换结果（编译替换表时使用）"""
         skill_data = self.generator.poe2_skills[skill]
         skill_type = skill_data.get("type", "unknown")
-        skill_tags = set(skill_data.get("tags", []))
         damage_type = skill_data.get("damage_type", "physical")
+        smart_replacements = self.optimization_rules["smart_replacements"]
         
-        optimized_supports = []
-        
-        for support in supports:
-            # 检查是否需要替换
-            replacement = None
+        replacement = None
             
-            # 基于技能类型的替换
-            if (skill_type, support) in self.optimization_rules["smart_replacements"]:
-                replacement = self.optimization_rules["smart_replacements"][(skill_type, support)]
+        # 基于技能类型的替换
+        if (skill_type, support) in smart_replacements:
+            replacement = smart_replacements[(skill_type, support)]
             
-            # 基于伤害类型的替换
-            if (damage_type, support) in self.optimization_rules["smart_replacements"]:
-                replacement = self.optimization_rules["smart_replacements"][(damage_type, support)]
+        # 基于伤害类型的替换
+        if (damage_type, support) in smart_replacements:
+            replacement = smart_replacements[(damage_type, support)]
             
-            # 检查兼容性，如果不兼容就寻找替代品
-            if not self.generator._check_support_compatibility(skill, support):
-                replacement = self._find_compatible_replacement(skill, support)
+        # 检查兼容性，如果不兼容就寻找替代品
+        if not self.generator._check_support_compatibility(skill, support):
+            replacement = fallback
             
-            optimized_supports.append(replacement if replacement else support)
-        
-        return optimized_supports
+        return replacement if replacement else support
     
     def _find_compatible_replacement(self, skill: str, incompatible_support: str) -> str:
         """为不兼容的辅助宝石找到替代品"""
+        return self.compiled_rules.fallback_replacements.get(skill, incompatible_support)
+    
+    def _search_compatible_replacement(self, skill: str) -> Optional[str]:
+        """搜索技能的通用替代辅助宝石，找不到时返回None"""
         if skill not in self.generator.poe2_skills:
-            return incompatible_support
+            return None
         
         skill_data = self.generator.poe2_skills[skill]
         skill_tags = set(skill_data.get("tags", []))
@@ -322,41 +493,41 @@ class IntelligentBuildFilter:
             if self.generator._check_support_compatibility(skill, support):
                 return support
         
-        return incompatible_support  # 找不到替代品就保持原样
+        return None  # 找不到替代品
     
     def _rank_and_select(self, builds: List[RealisticBuild], target_count: int) -> List[RealisticBuild]:
         """排序并选择最佳构筑"""
-        
-        # 综合评分函数
-        def composite_score(build: RealisticBuild) -> float:
-            # 多维度评分
-            viability_weight = 0.4      # 可行性权重
-            realism_weight = 0.3        # 现实度权重
-            uniqueness_weight = 0.2     # 独特性权重
-            performance_weight = 0.1    # 性能权重
-            
-            viability_score = build.viability_score / 10.0
-            realism_score = build.realism_score / 10.0
-            uniqueness_score = build.meta_deviation
-            
-            # 性能评分 (DPS和生存能力的平衡)
-            dps_score = min(build.calculated_dps / 500000, 1.0)  # DPS上限50万
-            ehp_score = min(build.calculated_ehp / 10000, 1.0)   # EHP上限1万
-            performance_score = (dps_score + ehp_score) / 2
-            
-            total_score = (
-                viability_score * viability_weight +
-                realism_score * realism_weight +
-                uniqueness_score * uniqueness_weight +
-                performance_score * performance_weight
-            )
-            
-            return total_score
-        
         # 按综合评分排序
-        builds.sort(key=composite_score, reverse=True)
+        builds.sort(key=self.composite_score, reverse=True)
         
         return builds[:target_count]
+    
+    @staticmethod
+    def composite_score(build: RealisticBuild) -> float:
+        """综合评分函数"""
+        # 多维度评分
+        viability_weight = 0.4      # 可行性权重
+        realism_weight = 0.3        # 现实度权重
+        uniqueness_weight = 0.2     # 独特性权重
+        performance_weight = 0.1    # 性能权重
+        
+        viability_score = build.viability_score / 10.0
+        realism_score = build.realism_score / 10.0
+        uniqueness_score = build.meta_deviation
+        
+        # 性能评分 (DPS和生存能力的平衡)
+        dps_score = min(build.calculated_dps / 500000, 1.0)  # DPS上限50万
+        ehp_score = min(build.calculated_ehp / 10000, 1.0)   # EHP上限1万
+        performance_score = (dps_score + ehp_score) / 2
+        
+        total_score = (
+            viability_score * viability_weight +
+            realism_score * realism_weight +
+            uniqueness_score * uniqueness_weight +
+            performance_score * performance_weight
+        )
+        
+        return total_score
 
 def main():
     """测试智能过滤系统"""
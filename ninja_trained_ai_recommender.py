@@ -8,28 +8,157 @@ from realistic_build_generator import RealisticBuildGenerator, RealisticBuild
 from intelligent_build_filter import IntelligentBuildFilter
 from ai_build_recommender import AIBuildRecommender
 from unique_builds_database import UniqueBuildDatabase
-from typing import List, Dict, Any, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Dict, Any, Optional
+import heapq
 import json
+import logging
 import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 工作进程内的组件实例（每个进程只创建一次）
+_worker_components: Dict[str, Any] = {}
+_worker_lock = threading.Lock()
+
+
+def _worker_component(name: str, factory: Callable[[], Any]) -> Any:
+    """获取当前进程中的组件实例，不存在时创建"""
+    with _worker_lock:
+        component = _worker_components.get(name)
+        if component is None:
+            component = _worker_components[name] = factory()
+        return component
+
+
+def _init_generation_worker():
+    """工作进程初始化：fork出的进程继承了父进程的随机状态，需要重新播种"""
+    random.seed()
+
+
+def _generate_realistic_source(config: Dict[str, Any]) -> List[RealisticBuild]:
+    """构筑来源1：基于真实PoE2数据生成"""
+    generator = _worker_component("realistic", RealisticBuildGenerator)
+    return generator.generate_realistic_builds(
+        count=config["realistic_builds_count"],
+        target_popularity=config["target_popularity"],
+        mode=config["generation_mode"],
+        seed=config["generation_seed"]
+    )
+
+
+def _generate_ai_source(config: Dict[str, Any]) -> List[RealisticBuild]:
+    """构筑来源2：AI创新组合，用真实计算引擎重新计算属性"""
+    generator = _worker_component("realistic", RealisticBuildGenerator)
+    ai_generator = _worker_component("ai", AIBuildRecommender)
+    ai_recommendations = ai_generator.generate_unique_combinations(
+        config["ai_builds_count"],
+        mode=config["generation_mode"],
+        seed=config["generation_seed"]
+    )
+    rng = random.Random(config["generation_seed"]) if config["generation_seed"] is not None else random
+    return [_ai_recommendation_to_realistic(generator, ai_rec, rng) for ai_rec in ai_recommendations]
+
+
+def _load_curated_source(config: Dict[str, Any]) -> List[RealisticBuild]:
+    """构筑来源3：精选冷门构筑数据库"""
+    database = _worker_component("curated", UniqueBuildDatabase)
+    return [_curated_to_realistic(curated) for curated in database.get_unpopular_builds(max_popularity=0.15)]
+
+
+def _ai_recommendation_to_realistic(generator: RealisticBuildGenerator, ai_rec, rng=random) -> RealisticBuild:
+    """将AI生成的构筑转换为RealisticBuild格式"""
+    skill = ai_rec.skill_combination.main_skill
+    supports = ai_rec.skill_combination.support_gems
+    
+    return RealisticBuild(
+        name=ai_rec.name,
+        character_class=ai_rec.character_class,
+        ascendancy=ai_rec.ascendancy,
+        main_skill=skill,
+        support_gems=supports,
+        
+        # 使用真实计算引擎重新计算属性
+        calculated_dps=generator.calculate_realistic_dps(skill, supports, ai_rec.ascendancy),
+        calculated_ehp=rng.randint(6000, 10000),
+        mana_cost=generator.calculate_mana_cost(skill, supports),
+        stat_requirements=generator._calculate_stat_requirements(skill, supports),
+        
+        viability_score=generator.assess_build_viability(skill, supports, ai_rec.ascendancy),
+        realism_score=ai_rec.predicted_effectiveness * 10,
+        meta_deviation=ai_rec.innovation_score,
+        
+        skill_synergies=ai_rec.why_unique[:2],
+        potential_problems=ai_rec.potential_issues[:2],
+        scaling_analysis={"primary": "ai_generated"},
+        gear_dependencies=["AI优化装备策略"]
+    )
+
+
+def _curated_to_realistic(curated) -> RealisticBuild:
+    """将精选构筑转换为RealisticBuild格式"""
+    return RealisticBuild(
+        name=curated.name,
+        character_class=curated.character_class,
+        ascendancy=curated.ascendancy,
+        main_skill=curated.main_skill,
+        support_gems=list(curated.support_gems),
+        
+        calculated_dps=curated.offense_stats.get("total_dps", 500000),
+        calculated_ehp=curated.defense_stats.get("effective_health_pool", 7000),
+        mana_cost=50,  # 估算
+        stat_requirements={"str": 100, "dex": 100, "int": 100},  # 估算
+        
+        viability_score=curated.cost_effectiveness,
+        realism_score=9.0,  # 精选构筑现实度很高
+        meta_deviation=1.0 - curated.popularity_score,
+        
+        skill_synergies=list(curated.pros_cons.get("pros", ())[:2]),
+        potential_problems=list(curated.pros_cons.get("cons", ())[:2]),
+        scaling_analysis={"primary": "curated_build"},
+        gear_dependencies=["精选装备方案"]
+    )
+
+
+# 多源生成的各个来源（按合并顺序）
+_GENERATION_SOURCES = (
+    ("realistic", _generate_realistic_source),
+    ("ai", _generate_ai_source),
+    ("curated", _load_curated_source),
+)
+
 
 class NinjaTrainedAIRecommender:
     """基于PoE Ninja数据训练的AI推荐系统"""
     
     def __init__(self):
-        # 核心组件
-        self.realistic_generator = RealisticBuildGenerator()
+        # 核心组件（各生成来源的组件在执行生成的进程中按需创建）
         self.intelligent_filter = IntelligentBuildFilter()
-        self.ai_generator = AIBuildRecommender()
-        self.unique_database = UniqueBuildDatabase()
         
         # 配置参数
         self.generation_config = {
             "realistic_builds_count": 15,      # 基于真实数据生成的构筑数
             "ai_builds_count": 10,             # AI创新生成的构筑数
             "target_popularity": 0.12,         # 目标冷门度 (12%以下)
-            "final_recommendation_count": 5    # 最终推荐数量
+            "final_recommendation_count": 5,   # 最终推荐数量
+            "generation_mode": "exhaustive",   # 候选生成模式 sample/exhaustive
+            "generation_seed": None,           # 随机种子，指定时候选池可复现
+            "parallel_backend": "thread"       # 多源并行方式 thread/serial/process
         }
         
+        # 多源生成的执行器（首次使用时创建，跨请求复用）
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+    
+    def close(self):
+        """关闭多源生成使用的执行器"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+    
     def get_ninja_trained_recommendations(self, 
                                         user_preferences: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """
@@ -51,184 +180,112 @@ class NinjaTrainedAIRecommender:
         if user_preferences is None:
             user_preferences = {}
         
-        print("=== 基于PoE Ninja训练的AI智能推荐系统 ===")
-        print(f"用户偏好: {user_preferences}")
-        print()
+        logger.info(f"Ninja训练AI推荐开始, 用户偏好: {user_preferences}")
         
-        # 第一阶段：多源生成
-        print("阶段1: 多源构筑生成...")
+        # 第一阶段：多源生成（各来源并行）
         all_builds = self._multi_source_generation(user_preferences)
-        print(f"总共生成 {len(all_builds)} 个候选构筑")
-        
-        # 第二阶段：智能筛选和优化
-        print("\n阶段2: 智能筛选与优化...")
-        filtered_builds = self._intelligent_filtering(all_builds, user_preferences)
-        print(f"筛选优化后剩余 {len(filtered_builds)} 个构筑")
+        logger.info(f"多源生成 {len(all_builds)} 个候选构筑")
         
-        # 第三阶段：个性化排序
-        print("\n阶段3: 个性化排序...")
-        final_recommendations = self._personalized_ranking(filtered_builds, user_preferences)
+        # 第二、三阶段：偏好过滤、智能筛选优化和个性化排序合并为一次流式处理
+        final_recommendations = self._filter_and_rank(all_builds, user_preferences)
         
-        # 第四阶段：增强推荐信息
-        enhanced_recommendations = []
-        for build in final_recommendations:
-            enhanced_rec = self._enhance_recommendation(build, user_preferences)
-            enhanced_recommendations.append(enhanced_rec)
+        # 第四阶段：只增强最终推荐
+        enhanced_recommendations = [
+            self._enhance_recommendation(build, user_preferences) for build in final_recommendations
+        ]
         
-        print(f"\nOK Final generated {len(enhanced_recommendations)} personalized recommendations")
+        logger.info(f"生成 {len(enhanced_recommendations)} 个个性化推荐")
         return enhanced_recommendations
     
-    def _multi_source_generation(self, preferences: Dict[str, Any]) -> List[RealisticBuild]:
-        """多源构筑生成"""
-        all_builds = []
-        
-        # 1. 基于真实PoE2数据的构筑生成
-        print("  1.1 基于真实PoE2数据生成构筑...")
-        realistic_builds = self.realistic_generator.generate_realistic_builds(
-            count=self.generation_config["realistic_builds_count"],
-            target_popularity=self.generation_config["target_popularity"]
-        )
-        all_builds.extend(realistic_builds)
-        
-        # 2. AI创新构筑生成
-        print("  1.2 AI创新构筑生成...")
-        ai_builds = self._generate_ai_builds_as_realistic(
-            count=self.generation_config["ai_builds_count"]
-        )
-        all_builds.extend(ai_builds)
-        
-        # 3. 精选冷门构筑数据库
-        print("  1.3 加载精选冷门构筑...")
-        curated_builds = self._load_curated_builds_as_realistic()
-        all_builds.extend(curated_builds)
-        
-        return all_builds
-    
-    def _generate_ai_builds_as_realistic(self, count: int) -> List[RealisticBuild]:
-        """将AI生成的构筑转换为RealisticBuild格式"""
-        ai_recommendations = self.ai_generator.generate_unique_combinations(count)
-        realistic_builds = []
-        
-        for ai_rec in ai_recommendations:
-            # 使用真实计算引擎重新计算属性
-            realistic_dps = self.realistic_generator.calculate_realistic_dps(
-                ai_rec.skill_combination.main_skill,
-                ai_rec.skill_combination.support_gems,
-                ai_rec.ascendancy
-            )
-            
-            realistic_mana = self.realistic_generator.calculate_mana_cost(
-                ai_rec.skill_combination.main_skill,
-                ai_rec.skill_combination.support_gems
-            )
-            
-            realistic_viability = self.realistic_generator.assess_build_viability(
-                ai_rec.skill_combination.main_skill,
-                ai_rec.skill_combination.support_gems,
-                ai_rec.ascendancy
-            )
-            
-            # 转换为RealisticBuild
-            realistic_build = RealisticBuild(
-                name=ai_rec.name,
-                character_class=ai_rec.character_class,
-                ascendancy=ai_rec.ascendancy,
-                main_skill=ai_rec.skill_combination.main_skill,
-                support_gems=ai_rec.skill_combination.support_gems,
-                
-                calculated_dps=realistic_dps,
-                calculated_ehp=random.randint(6000, 10000),
-                mana_cost=realistic_mana,
-                stat_requirements=self.realistic_generator._calculate_stat_requirements(
-                    ai_rec.skill_combination.main_skill,
-                    ai_rec.skill_combination.support_gems
-                ),
-                
-                viability_score=realistic_viability,
-                realism_score=ai_rec.predicted_effectiveness * 10,
-                meta_deviation=ai_rec.innovation_score,
-                
-                skill_synergies=ai_rec.why_unique[:2],
-                potential_problems=ai_rec.potential_issues[:2],
-                scaling_analysis={"primary": "ai_generated"},
-                gear_dependencies=["AI优化装备策略"]
-            )
-            
-            realistic_builds.append(realistic_build)
+    def _get_executor(self) -> Optional[Executor]:
+        """
+        获取多源生成的执行器，serial模式返回None
         
-        return realistic_builds
+        默认使用线程池：单次生成只需几毫秒，进程池的启动和结果序列化开销比生成本身还大，
+        而且GUI在工作线程中调用时会从多线程进程fork。process模式只在来源耗时明显增加时使用。
+        """
+        backend = self.generation_config.get("parallel_backend", "thread")
+        if backend == "serial":
+            return None
+        
+        with self._executor_lock:
+            if self._executor is None:
+                if backend == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=len(_GENERATION_SOURCES), initializer=_init_generation_worker
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=len(_GENERATION_SOURCES), thread_name_prefix="ninja-generation"
+                    )
+            return self._executor
     
-    def _load_curated_builds_as_realistic(self) -> List[RealisticBuild]:
-        """加载精选构筑并转换为RealisticBuild格式"""
-        curated_builds = self.unique_database.get_unpopular_builds(max_popularity=0.15)
-        realistic_builds = []
-        
-        for curated in curated_builds:
-            realistic_build = RealisticBuild(
-                name=curated.name,
-                character_class=curated.character_class,
-                ascendancy=curated.ascendancy,
-                main_skill=curated.main_skill,
-                support_gems=curated.support_gems,
-                
-                calculated_dps=curated.offense_stats.get("total_dps", 500000),
-                calculated_ehp=curated.defense_stats.get("effective_health_pool", 7000),
-                mana_cost=50,  # 估算
-                stat_requirements={"str": 100, "dex": 100, "int": 100},  # 估算
-                
-                viability_score=curated.cost_effectiveness,
-                realism_score=9.0,  # 精选构筑现实度很高
-                meta_deviation=1.0 - curated.popularity_score,
-                
-                skill_synergies=curated.pros_cons.get("pros", [])[:2],
-                potential_problems=curated.pros_cons.get("cons", [])[:2],
-                scaling_analysis={"primary": "curated_build"},
-                gear_dependencies=["精选装备方案"]
-            )
-            
-            realistic_builds.append(realistic_build)
+    def _multi_source_generation(self, preferences: Dict[str, Any]) -> List[RealisticBuild]:
+        """多源构筑生成：各来源并行执行，耗时取决于最慢的来源"""
+        config = dict(self.generation_config)
+        
+        try:
+            executor = self._get_executor()
+            if executor is not None:
+                futures = [executor.submit(source, config) for _, source in _GENERATION_SOURCES]
+                results = [future.result() for future in futures]
+            else:
+                results = [source(config) for _, source in _GENERATION_SOURCES]
+        except (BrokenProcessPool, OSError) as e:
+            # 进程池不可用（如受限环境）时退回串行生成；来源自身的错误直接抛出
+            logger.warning(f"并行生成失败，改为串行: {e}")
+            self.close()
+            results = [source(config) for _, source in _GENERATION_SOURCES]
         
-        return realistic_builds
+        all_builds = []
+        for (name, _), builds in zip(_GENERATION_SOURCES, results):
+            logger.debug(f"来源 {name} 生成 {len(builds)} 个构筑")
+            all_builds.extend(builds)
+        return all_builds
     
-    def _intelligent_filtering(self, builds: List[RealisticBuild], 
-                             preferences: Dict[str, Any]) -> List[RealisticBuild]:
-        """智能过滤"""
-        # 应用用户偏好过滤
-        preference_filtered = self._apply_user_preferences(builds, preferences)
-        
-        # 应用智能过滤系统
-        intelligent_filtered = self.intelligent_filter.filter_and_optimize_builds(
-            preference_filtered, 
-            target_count=self.generation_config["final_recommendation_count"] * 2
-        )
+    def _filter_and_rank(self, builds: List[RealisticBuild],
+                         preferences: Dict[str, Any]) -> List[RealisticBuild]:
+        """
+        过滤与排序
         
-        return intelligent_filtered
+        偏好过滤后的构筑整批经过智能过滤和优化，只在堆中保留综合评分最高的
+        final_recommendation_count * 2 个，最后按个性化评分选出最终推荐。
+        """
+        shortlist_size = self.generation_config["final_recommendation_count"] * 2
+        shortlist = []  # 最小堆 (综合评分, -序号, 构筑)，同分时保留先出现的
+        
+        candidates = [build for build in builds if self._matches_preferences(build, preferences)]
+        for sequence, build in enumerate(self.intelligent_filter.optimize_viable_builds(candidates)):
+            item = (self.intelligent_filter.composite_score(build), -sequence, build)
+            if len(shortlist) < shortlist_size:
+                heapq.heappush(shortlist, item)
+            elif item[:2] > shortlist[0][:2]:
+                heapq.heapreplace(shortlist, item)
+        
+        shortlisted = [build for _, _, build in sorted(shortlist, key=lambda item: item[:2], reverse=True)]
+        return self._personalized_ranking(shortlisted, preferences)
     
-    def _apply_user_preferences(self, builds: List[RealisticBuild], 
-                               preferences: Dict[str, Any]) -> List[RealisticBuild]:
-        """应用用户偏好过滤"""
-        filtered = builds.copy()
-        
+    @staticmethod
+    def _matches_preferences(build: RealisticBuild, preferences: Dict[str, Any]) -> bool:
+        """检查单个构筑是否满足用户偏好"""
         # 预算限制
         budget_limit = preferences.get('budget_limit')
         if budget_limit:
             # 简化：基于DPS估算成本
-            filtered = [b for b in filtered if b.calculated_dps / 100000 * 5 <= budget_limit]
+            if build.calculated_dps / 100000 * 5 > budget_limit:
+                return False
         
         # 职业偏好
         preferred_class = preferences.get('preferred_class')
-        if preferred_class:
-            filtered = [b for b in filtered if b.character_class.lower() == preferred_class.lower()]
+        if preferred_class and build.character_class.lower() != preferred_class.lower():
+            return False
         
         # DPS要求
-        min_dps = preferences.get('min_dps', 0)
-        filtered = [b for b in filtered if b.calculated_dps >= min_dps]
+        if build.calculated_dps < preferences.get('min_dps', 0):
+            return False
         
         # 复杂度限制
-        max_complexity = preferences.get('max_complexity', 5)
-        filtered = [b for b in filtered if len(b.support_gems) <= max_complexity]
-        
-        return filtered
+        return len(build.support_gems) <= preferences.get('max_complexity', 5)
     
     def _personalized_ranking(self, builds: List[RealisticBuild], 
                             preferences: Dict[str, Any]) -> List[RealisticBuild]:
@@ -343,6 +400,7 @@ class NinjaTrainedAIRecommender:
 
 def main():
     """演示基于PoE Ninja训练的AI推荐系统"""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     recommender = NinjaTrainedAIRecommender()
     
     print("=== PoE Ninja训练AI推荐系统演示 ===\n")
@@ -14,29 +14,45 @@ PoB2导入代码生成器 - 高精度构建代码生成与验证
 """
 
 import base64
-import zlib
 import json
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
 import hashlib
 import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Any, Optional, Tuple, Set
 from dataclasses import dataclass, field
 from pathlib import Path
-import re
 
 # 导入项目组件
 import sys
 sys.path.insert(0, str(Path(__file__).parent / "core_ai_engine/src"))
 
-from poe2build.models.build import PoE2Build, BuildStats
+from poe2build.models.build import PoE2Build
 from poe2build.models.characters import PoE2CharacterClass, PoE2Ascendancy
-from poe2build.models.items import PoE2Item, ItemType
+from poe2build.models.items import PoE2Item
 from poe2build.pob2.rag_pob2_adapter import PoB2BuildTemplate
+from poe2build.pob2.import_code_encoder import (
+    PoB2ImportCodeEncoder, ImportCodeStream, DEFAULT_COMPRESSION_LEVEL
+)
 from poe2build.rag.similarity_engine import SearchResult
 
 logger = logging.getLogger(__name__)
 
+# 批量编码：少于这个数量时不启动进程池
+BATCH_POOL_THRESHOLD = 16
+
+# 工作进程中的生成器实例（按压缩级别缓存）
+_worker_generators: Dict[int, 'PoB2ImportCodeGenerator'] = {}
+
+def _generate_in_worker(compression_level: int, build_data: Dict[str, Any]) -> 'PoB2ImportCodeResult':
+    """进程池任务：使用当前进程缓存的生成器生成导入代码"""
+    generator = _worker_generators.get(compression_level)
+    if generator is None:
+        generator = _worker_generators[compression_level] = PoB2ImportCodeGenerator(compression_level)
+    return generator.generate_pob2_import_code(build_data)
+
 @dataclass
 class PoB2SkillSetup:
     """PoB2技能配置"""
@@ -78,9 +94,14 @@ class PoB2ImportCodeGenerator:
     确保100%兼容性和最佳的数据传输效果。
     """
     
-    def __init__(self):
-        """初始化代码生成器"""
+    def __init__(self, compression_level: int = DEFAULT_COMPRESSION_LEVEL):
+        """初始化代码生成器
+        
+        Args:
+            compression_level: 导入代码的zlib压缩级别 (0-9)
+        """
         self.logger = logger
+        self.encoder = PoB2ImportCodeEncoder(compression_level)
         
         # PoE2特有数据映射
         self._init_poe2_mappings()
@@ -88,6 +109,9 @@ class PoB2ImportCodeGenerator:
         # XML模板和验证规则
         self._init_xml_templates()
         
+        # 跨构筑复用的XML片段（光环技能组、配置段）
+        self._fragment_cache: Dict[Any, bytes] = {}
+        
         logger.info("PoB2导入代码生成器初始化完成")
     
     def _init_poe2_mappings(self):
@@ -300,14 +324,11 @@ class PoB2ImportCodeGenerator:
                     is_valid=False
                 )
             
-            # 2. 构建XML结构
-            xml_root = self._build_complete_xml(build_data, template)
-            
-            # 3. 生成格式化的XML字符串
-            xml_string = self._format_xml_string(xml_root)
-            
-            # 4. 压缩并编码
-            import_code = self._compress_and_encode(xml_string)
+            # 2-4. 紧凑XML直接写入压缩流并编码
+            stream = self.encoder.open(keep_xml=True)
+            self._write_complete_xml(stream, build_data, template)
+            import_code = stream.finish()
+            xml_string = stream.xml
             
             # 5. 生成构建哈希
             build_hash = self._generate_build_hash(build_data)
@@ -376,93 +397,110 @@ class PoB2ImportCodeGenerator:
             'warnings': warnings
         }
     
-    def _build_complete_xml(self, 
-                          build_data: Dict[str, Any], 
-                          template: Optional[PoB2BuildTemplate] = None) -> ET.Element:
-        """构建完整的PoB2 XML结构"""
-        
-        # 创建根元素
-        root = ET.Element('PathOfBuilding')
-        for attr, value in self.pob2_xml_template['root_attributes'].items():
-            root.set(attr, value)
+    def generate_batch(self, builds: List[Dict[str, Any]],
+                       max_workers: Optional[int] = None) -> List[PoB2ImportCodeResult]:
+        """批量生成导入代码
         
-        # 添加构建信息
-        self._add_build_section(root, build_data)
+        构筑较多时在进程池中并行编码，结果顺序与输入一致；进程池不可用时退回逐个生成。
         
-        # 添加技能配置
-        self._add_skills_section(root, build_data)
+        Args:
+            builds: 构建数据列表
+            max_workers: 最大工作进程数，默认为CPU核数
+        """
+        if len(builds) < BATCH_POOL_THRESHOLD or max_workers == 1:
+            return [self.generate_pob2_import_code(build_data) for build_data in builds]
         
-        # 添加装备信息
-        self._add_items_section(root, build_data)
+        workers = min(max_workers or os.cpu_count() or 1, len(builds))
+        chunksize = max(1, len(builds) // (workers * 4))
+        level = self.encoder.compression_level
         
-        # 添加被动技能树
-        self._add_tree_section(root, build_data)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(_generate_in_worker, [level] * len(builds), builds,
+                                         chunksize=chunksize))
+        except Exception as e:
+            logger.warning(f"进程池批量编码失败，改为逐个生成: {e}")
+            return [self.generate_pob2_import_code(build_data) for build_data in builds]
+    
+    def _write_complete_xml(self, 
+                            stream: ImportCodeStream,
+                            build_data: Dict[str, Any], 
+                            template: Optional[PoB2BuildTemplate] = None):
+        """写入完整的PoB2 XML结构"""
         
-        # 添加配置信息
-        self._add_config_section(root, build_data)
+        # 根元素
+        stream.start('PathOfBuilding', tuple(self.pob2_xml_template['root_attributes'].items()))
         
-        # 添加备注
-        self._add_notes_section(root, build_data)
+        # 构建信息
+        self._write_build_section(stream, build_data)
         
-        return root
-    
-    def _add_build_section(self, root: ET.Element, build_data: Dict[str, Any]):
-        """添加构建基础信息"""
-        build_elem = ET.SubElement(root, 'Build')
+        # 技能配置
+        self._write_skills_section(stream, build_data)
         
-        # 基础属性
-        build_elem.set('level', str(build_data.get('level', 90)))
-        build_elem.set('targetLevel', str(min(100, build_data.get('level', 90) + 10)))
-        build_elem.set('characterClass', build_data.get('character_class', 'Witch'))
+        # 装备信息
+        self._write_items_section(stream, build_data)
         
-        # 升华职业
-        ascendancy = build_data.get('ascendancy', '')
-        if ascendancy:
-            build_elem.set('ascendancyClass', ascendancy)
+        # 被动技能树
+        self._write_tree_section(stream, build_data)
         
-        # 其他设置
-        build_elem.set('banditChoice', 'None')  # PoE2没有盗贼任务
-        build_elem.set('pantheonMajorGod', 'None')
-        build_elem.set('pantheonMinorGod', 'None')
+        # 配置信息
+        self._write_config_section(stream)
         
-        # 主技能组ID
-        build_elem.set('mainSocketGroup', '1')
+        # 备注
+        self._write_notes_section(stream, build_data)
         
-        # 构建版本标识
-        build_elem.set('viewMode', 'TREE')
-        build_elem.set('playerName', 'RAG-Generated')
+        stream.end('PathOfBuilding')
     
-    def _add_skills_section(self, root: ET.Element, build_data: Dict[str, Any]):
-        """添加技能配置"""
-        skills_elem = ET.SubElement(root, 'Skills')
+    def _write_build_section(self, stream: ImportCodeStream, build_data: Dict[str, Any]):
+        """写入构建基础信息"""
+        attributes = [
+            ('level', str(build_data.get('level', 90))),
+            ('targetLevel', str(min(100, build_data.get('level', 90) + 10))),
+            ('characterClass', build_data.get('character_class', 'Witch'))
+        ]
+        
+        # 升华职业
+        ascendancy = build_data.get('ascendancy', '')
+        if ascendancy:
+            attributes.append(('ascendancyClass', ascendancy))
+        
+        attributes.extend([
+            ('banditChoice', 'None'),  # PoE2没有盗贼任务
+            ('pantheonMajorGod', 'None'),
+            ('pantheonMinorGod', 'None'),
+            ('mainSocketGroup', '1'),  # 主技能组ID
+            ('viewMode', 'TREE'),
+            ('playerName', 'RAG-Generated')
+        ])
+        stream.element('Build', tuple(attributes))
+        
+    def _write_skills_section(self, stream: ImportCodeStream, build_data: Dict[str, Any]):
+        """写入技能配置"""
+        stream.start('Skills')
         
         # 主技能组
         main_skill = build_data.get('main_skill', 'Fireball')
         support_gems = build_data.get('support_gems', [])
         
-        skill_set = ET.SubElement(skills_elem, 'SkillSet')
-        skill_set.set('id', '1')
-        skill_set.set('slot', 'Body Armour')
-        
-        # 主技能
-        main_skill_elem = ET.SubElement(skill_set, 'Skill')
-        main_skill_elem.set('skillId', self._get_skill_id(main_skill))
-        main_skill_elem.set('enabled', 'true')
-        main_skill_elem.set('slot', '1')
+        stream.start('SkillSet', (('id', '1'), ('slot', 'Body Armour')))
+        stream.element('Skill', (('skillId', self._get_skill_id(main_skill)), ('enabled', 'true'), ('slot', '1')))
         
         # 辅助宝石
         for i, support in enumerate(support_gems[:5], 2):  # 最多5个辅助
-            support_elem = ET.SubElement(skill_set, 'Skill')
-            support_elem.set('skillId', self._get_support_id(support))
-            support_elem.set('enabled', 'true')
-            support_elem.set('slot', str(i))
+            stream.element('Skill', (('skillId', self._get_support_id(support)), ('enabled', 'true'), ('slot', str(i))))
+        stream.end('SkillSet')
         
         # 光环/辅助技能组
-        self._add_aura_skills(skills_elem, build_data)
+        stream.write(self._aura_skills_fragment(build_data.get('character_class', 'Witch')))
     
-    def _add_aura_skills(self, skills_elem: ET.Element, build_data: Dict[str, Any]):
-        """添加光环和辅助技能"""
-        character_class = build_data.get('character_class', 'Witch')
+        stream.end('Skills')
+    
+    def _aura_skills_fragment(self, character_class: str) -> bytes:
+        """职业光环技能组的XML片段（按职业缓存）"""
+        key = ('auras', character_class)
+        fragment = self._fragment_cache.get(key)
+        if fragment is not None:
+            return fragment
         
         # 根据职业推荐合适的光环
         class_auras = {
@@ -475,22 +513,22 @@ class PoB2ImportCodeGenerator:
         }
         
         auras = class_auras.get(character_class, [])
+        fragment = self.encoder.open(keep_xml=True)
         if auras:
-            aura_set = ET.SubElement(skills_elem, 'SkillSet')
-            aura_set.set('id', '2')
-            aura_set.set('slot', 'Helmet')
-            
+            fragment.start('SkillSet', (('id', '2'), ('slot', 'Helmet')))
             for i, aura in enumerate(auras[:4], 1):  # 最多4个光环
-                aura_elem = ET.SubElement(aura_set, 'Skill')
-                aura_elem.set('skillId', aura)
-                aura_elem.set('enabled', 'true')
-                aura_elem.set('slot', str(i))
+                fragment.element('Skill', (('skillId', aura), ('enabled', 'true'), ('slot', str(i))))
+            fragment.end('SkillSet')
+            
+        self._fragment_cache[key] = fragment.xml.encode('utf-8')
+        return self._fragment_cache[key]
     
-    def _add_items_section(self, root: ET.Element, build_data: Dict[str, Any]):
-        """添加装备信息"""
-        items_elem = ET.SubElement(root, 'Items')
+    def _write_items_section(self, stream: ImportCodeStream, build_data: Dict[str, Any]):
+        """写入装备信息（默认装备使用缓存片段）"""
+        stream.start('Items')
         
         equipment = build_data.get('equipment', {})
+        character_class = build_data.get('character_class', 'Witch')
         
         # 标准装备槽位
         equipment_slots = [
@@ -507,15 +545,12 @@ class PoB2ImportCodeGenerator:
         ]
         
         for slot_name, slot_id in equipment_slots:
-            item_elem = ET.SubElement(items_elem, 'Item')
-            item_elem.set('id', slot_id)
-            
             if slot_name in equipment:
-                item_text = self._format_item_text(equipment[slot_name])
+                stream.text_element('Item', (('id', slot_id),), self._format_item_text(equipment[slot_name]))
             else:
-                item_text = self._get_default_item_text(slot_name, build_data.get('character_class', 'Witch'))
+                stream.element('Item', (('id', slot_id),), self._get_default_item_text(slot_name, character_class))
             
-            item_elem.text = item_text
+        stream.end('Items')
     
     def _format_item_text(self, item_data: Dict[str, Any]) -> str:
         """格式化装备文本为PoB2格式"""
@@ -587,31 +622,27 @@ class PoB2ImportCodeGenerator:
         
         return defaults.get(slot_name, f"Rarity: Normal\nUnknown Item\n{slot_name}")
     
-    def _add_tree_section(self, root: ET.Element, build_data: Dict[str, Any]):
-        """添加被动技能树"""
-        tree_elem = ET.SubElement(root, 'Tree')
-        tree_elem.set('activeSpec', '1')
-        
-        spec_elem = ET.SubElement(tree_elem, 'Spec')
-        spec_elem.set('treeVersion', '2_35_1')
+    def _write_tree_section(self, stream: ImportCodeStream, build_data: Dict[str, Any]):
+        """写入被动技能树"""
+        stream.start('Tree', (('activeSpec', '1'),))
+        stream.start('Spec', (('treeVersion', '2_35_1'),))
         
         character_class = build_data.get('character_class', 'Witch')
         passive_nodes = self._generate_passive_tree_nodes(build_data, character_class)
         
-        # 添加被动节点
+        # 被动节点
         for node_id in passive_nodes:
-            node_elem = ET.SubElement(spec_elem, 'Node')
-            node_elem.set('id', str(node_id))
-            node_elem.set('allocated', 'true')
+            stream.element('Node', (('id', str(node_id)), ('allocated', 'true')))
         
-        # 添加专精效果 (如果有)
+        # 专精效果 (如果有)
         keystones = build_data.get('passive_keystones', [])
+        class_keystones = self.passive_tree_structure.get(character_class, {}).get('keystones', {})
         for keystone in keystones:
-            if keystone in self.passive_tree_structure.get(character_class, {}).get('keystones', {}):
-                keystone_id = self.passive_tree_structure[character_class]['keystones'][keystone]
-                mastery_elem = ET.SubElement(spec_elem, 'Node')
-                mastery_elem.set('id', str(keystone_id))
-                mastery_elem.set('allocated', 'true')
+            if keystone in class_keystones:
+                stream.element('Node', (('id', str(class_keystones[keystone])), ('allocated', 'true')))
+        
+        stream.end('Spec')
+        stream.end('Tree')
     
     def _generate_passive_tree_nodes(self, build_data: Dict[str, Any], character_class: str) -> List[int]:
         """生成被动技能树节点列表"""
@@ -648,27 +679,31 @@ class PoB2ImportCodeGenerator:
         
         return list(set(nodes))  # 去重
     
-    def _add_config_section(self, root: ET.Element, build_data: Dict[str, Any]):
-        """添加配置信息"""
-        config_elem = ET.SubElement(root, 'Config')
-        
-        # 基础配置
-        configs = [
-            ('enemyLevel', '84'),  # 敌人等级
-            ('multiplierLowLife', '1'),
-            ('multiplierFullLife', '1'),
-            ('conditionStationary', 'false'),
-            ('conditionMoving', 'true'),
-            ('conditionInsane', 'false')
-        ]
-        
-        for key, value in configs:
-            input_elem = ET.SubElement(config_elem, 'Input')
-            input_elem.set('name', key)
-            input_elem.set('string', value)
+    def _write_config_section(self, stream: ImportCodeStream):
+        """写入配置信息（所有构筑相同，只序列化一次）"""
+        fragment = self._fragment_cache.get('config')
+        if fragment is None:
+            # 基础配置
+            configs = [
+                ('enemyLevel', '84'),  # 敌人等级
+                ('multiplierLowLife', '1'),
+                ('multiplierFullLife', '1'),
+                ('conditionStationary', 'false'),
+                ('conditionMoving', 'true'),
+                ('conditionInsane', 'false')
+            ]
+        
+            config = self.encoder.open(keep_xml=True)
+            config.start('Config')
+            for key, value in configs:
+                config.element('Input', (('name', key), ('string', value)))
+            config.end('Config')
+            fragment = self._fragment_cache['config'] = config.xml.encode('utf-8')
+    
+        stream.write(fragment)
     
-    def _add_notes_section(self, root: ET.Element, build_data: Dict[str, Any]):
-        """添加构建备注"""
+    def _write_notes_section(self, stream: ImportCodeStream, build_data: Dict[str, Any]):
+        """写入构建备注"""
         notes_content = []
         
         notes_content.append("=== RAG-PoB2生成构建 ===")
@@ -711,8 +746,7 @@ class PoB2ImportCodeGenerator:
         notes_content.append(f"\n由RAG-PoB2导入代码生成器创建")
         notes_content.append(f"生成时间: {time.time()}")
         
-        notes_elem = ET.SubElement(root, 'Notes')
-        notes_elem.text = "\n".join(notes_content)
+        stream.text_element('Notes', (), "\n".join(notes_content))
     
     def _get_skill_id(self, skill_name: str) -> str:
         """获取技能ID"""
@@ -722,34 +756,6 @@ class PoB2ImportCodeGenerator:
         """获取辅助宝石ID"""
         return self.support_gems_database.get(support_name, {}).get('id', support_name)
     
-    def _format_xml_string(self, root: ET.Element) -> str:
-        """格式化XML字符串"""
-        rough_string = ET.tostring(root, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ")
-    
-    def _compress_and_encode(self, xml_string: str) -> str:
-        """压缩并编码XML为PoB2导入代码"""
-        try:
-            # 移除XML声明和多余空行
-            xml_cleaned = re.sub(r'<\?xml[^>]*\?>\s*', '', xml_string)
-            xml_cleaned = re.sub(r'\n\s*\n', '\n', xml_cleaned).strip()
-            
-            # 编码为UTF-8字节
-            xml_bytes = xml_cleaned.encode('utf-8')
-            
-            # 使用zlib压缩
-            compressed = zlib.compress(xml_bytes, level=9)
-            
-            # Base64编码
-            encoded = base64.b64encode(compressed).decode('ascii')
-            
-            return encoded
-            
-        except Exception as e:
-            logger.error(f"压缩编码失败: {e}")
-            return ""
-    
     def _generate_build_hash(self, build_data: Dict[str, Any]) -> str:
         """生成构建哈希"""
         hash_data = {
@@ -806,7 +812,7 @@ class PoB2ImportCodeGenerator:
             compressed_data = base64.b64decode(import_code.encode('ascii'))
             
             # 解压
-            xml_data = zlib.decompress(compressed_data)
+            xml_data = self.encoder.decode(import_code)
             
             # 解析XML
             root = ET.fromstring(xml_data.decode('utf-8'))
@@ -895,5 +901,4 @@ def test_code_generator():
     return result
 
 if __name__ == "__main__":
-    import time
     result = test_code_generator()
\ No newline at end of file
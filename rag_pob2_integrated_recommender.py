@@ -158,7 +158,9 @@ class RAGPoB2IntegratedRecommender:
             
             # 4. 初始化推荐引擎
             logger.info("🎯 初始化智能推荐引擎...")
-            self.recommendation_engine = PoE2RecommendationEngine(self.knowledge_base)
+            self.recommendation_engine = PoE2RecommendationEngine(
+                self.knowledge_base, similarity_engine=self.similarity_engine
+            )
             
             # 5. 初始化PoB2组件
             logger.info("🔧 初始化PoB2集成组件...")
@@ -4,13 +4,16 @@
 参考真实游戏数据，生成合理的构筑推荐
 """
 
+import itertools
 import json
 import random
 import math
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+from dataclasses import dataclass, asdict, field
 from pathlib import Path
 
+import numpy as np
+
 @dataclass
 class GameMechanic:
     """游戏机制数据"""
@@ -47,6 +50,74 @@ class RealisticBuild:
     scaling_analysis: Dict[str, str]
     gear_dependencies: List[str]
 
+@dataclass
+class CompatibilityTables:
+    """
+    按整数ID索引的技能×辅助宝石兼容表和倍率表（加载时计算一次）
+    
+    辅助宝石维度末尾多一列空位，ID为-1时对应"无辅助宝石"（不兼容、倍率为1）；
+    升华维度同样末尾多一行，ID为-1时对应未知升华（无加成、匹配度为0）。
+    """
+    skill_names: List[str]
+    support_names: List[str]
+    ascendancy_names: List[str]
+    
+    # 技能 × (辅助宝石+1)
+    compatible: np.ndarray        # 是否兼容
+    damage_more: np.ndarray       # 伤害more倍率（不兼容为1）
+    speed_more: np.ndarray        # 攻击/施法速度倍率（不兼容为1）
+    mana_multiplier: np.ndarray   # 法力倍率（不兼容为1）
+    tag_synergy: np.ndarray       # 标签协同倍率（与兼容性无关）
+    
+    # 辅助宝石+1
+    support_int_req: np.ndarray   # 额外智力需求
+    
+    # 技能
+    skill_base_damage: np.ndarray # 平均基础伤害
+    skill_base_mana: np.ndarray   # 基础法力消耗
+    skill_stat_total: np.ndarray  # 基础属性需求总和
+    
+    # (升华+1) × 技能
+    ascendancy_damage: np.ndarray   # 升华伤害倍率
+    ascendancy_synergy: np.ndarray  # 升华协同倍率
+    ascendancy_match: np.ndarray    # 升华匹配度
+    
+    # 现实度评分分量
+    skill_realism: np.ndarray     # 技能基础现实度 (8 × 可行性评级/10)
+    support_realism: np.ndarray   # 每个辅助宝石的现实度增量（空位为0）
+    ascendancy_power: np.ndarray  # 升华功率等级（未知升华为10，即不缩放）
+    
+    skill_ids: Dict[str, int] = field(init=False, repr=False)
+    support_ids: Dict[str, int] = field(init=False, repr=False)
+    ascendancy_ids: Dict[str, int] = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self.skill_ids = {name: i for i, name in enumerate(self.skill_names)}
+        self.support_ids = {name: i for i, name in enumerate(self.support_names)}
+        self.ascendancy_ids = {name: i for i, name in enumerate(self.ascendancy_names)}
+        
+        # 单个组合的计算走Python列表，避免numpy标量索引的开销
+        self.rows = {
+            name: getattr(self, name).tolist()
+            for name in ('compatible', 'damage_more', 'speed_more', 'mana_multiplier', 'tag_synergy',
+                         'support_int_req', 'skill_base_damage', 'skill_base_mana', 'skill_stat_total',
+                         'ascendancy_damage', 'ascendancy_synergy', 'ascendancy_match')
+        }
+    
+    def compatible_support_ids(self, skill_id: int) -> List[int]:
+        """技能兼容的辅助宝石ID（按数据顺序）"""
+        return [j for j, ok in enumerate(self.rows['compatible'][skill_id][:-1]) if ok]
+    
+    def support_id_list(self, supports: Sequence[str]) -> List[int]:
+        """辅助宝石名称转ID，忽略未知名称"""
+        return [self.support_ids[name] for name in supports if name in self.support_ids]
+
+def _best_per_pair(ranked: np.ndarray, skill_ids: np.ndarray, asc_ids: np.ndarray) -> np.ndarray:
+    """在已排序的组合下标中只保留每个 (技能, 升华) 的第一个"""
+    pair_keys = skill_ids[ranked] * (int(asc_ids.max()) + 2) + asc_ids[ranked]
+    _, first = np.unique(pair_keys, return_index=True)
+    return ranked[np.sort(first)]
+
 class RealisticBuildGenerator:
     """基于真实PoE2数据的构筑生成器"""
     
@@ -56,6 +127,7 @@ class RealisticBuildGenerator:
         self.poe2_ascendancies = self._load_poe2_ascendancies()
         self.game_mechanics = self._load_game_mechanics()
         self.viability_rules = self._load_viability_rules()
+        self.tables = self._build_compatibility_tables()
         
     def _load_poe2_skills(self) -> Dict[str, Dict]:
         """加载真实PoE2技能数据"""
@@ -339,154 +411,288 @@ class RealisticBuildGenerator:
             }
         }
     
-    def calculate_realistic_dps(self, skill: str, supports: List[str], ascendancy: str) -> int:
-        """计算真实的DPS"""
-        if skill not in self.poe2_skills:
-            return 0
-            
-        skill_data = self.poe2_skills[skill]
-        base_damage = sum(skill_data["base_damage"]) / 2  # 平均基础伤害
+    def _build_compatibility_tables(self) -> CompatibilityTables:
+        """根据技能、辅助宝石和升华数据预先计算兼容表和各项倍率"""
+        skill_names = list(self.poe2_skills)
+        support_names = list(self.poe2_supports)
+        ascendancy_names = list(self.poe2_ascendancies)
+        n_skills, n_supports, n_asc = len(skill_names), len(support_names), len(ascendancy_names)
         
-        # 计算支援宝石的伤害倍率
-        total_more_multiplier = 1.0
-        total_increased_damage = 0.0
+        # 辅助宝石维度多一列、升华维度多一行作为空位（ID -1）
+        compatible = np.zeros((n_skills, n_supports + 1), dtype=bool)
+        damage_more = np.ones((n_skills, n_supports + 1))
+        speed_more = np.ones((n_skills, n_supports + 1))
+        mana_multiplier = np.ones((n_skills, n_supports + 1))
+        tag_synergy = np.ones((n_skills, n_supports + 1))
+        support_int_req = np.zeros(n_supports + 1)
         
-        for support in supports:
-            if support in self.poe2_supports:
+        for j, support in enumerate(support_names):
+            level_req = self.poe2_supports[support].get("level_req", 1)
+            # 高等级辅助宝石需要更多智力
+            support_int_req[j] = 10 if level_req > 30 else 5 if level_req > 20 else 0
+        
+        for i, skill in enumerate(skill_names):
+            skill_tags = set(self.poe2_skills[skill]["tags"])
+            for j, support in enumerate(support_names):
                 support_data = self.poe2_supports[support]
                 
-                # 检查兼容性
-                if self._check_support_compatibility(skill, support):
-                    # More multiplier (乘法)
-                    damage_bonus = support_data.get("damage_bonus", 0)
-                    if damage_bonus != 0:
-                        total_more_multiplier *= (1 + damage_bonus)
-                    
-                    # 攻击/施法速度 (More multiplier)
-                    if "attack_speed" in support_data:
-                        total_more_multiplier *= support_data["attack_speed"]
-                    if "cast_speed" in support_data:
-                        total_more_multiplier *= support_data["cast_speed"]
-        
-        # 升华职业加成
-        asc_multiplier = 1.0
-        if ascendancy in self.poe2_ascendancies:
+                # 标签匹配加分（协同得分不区分是否兼容）
+                matches = skill_tags.intersection(support_data.get("compatible_tags", []))
+                if matches:
+                    tag_synergy[i, j] = 1 + len(matches) * 0.2
+                
+                if not self._tags_compatible(skill_tags, support_data):
+                    continue
+                compatible[i, j] = True
+                
+                damage_bonus = support_data.get("damage_bonus", 0)
+                if damage_bonus != 0:
+                    damage_more[i, j] = 1 + damage_bonus
+                speed_more[i, j] = support_data.get("attack_speed", 1.0) * support_data.get("cast_speed", 1.0)
+                mana_multiplier[i, j] = support_data.get("mana_multiplier", 1.0)
+        
+        skill_base_damage = np.array([sum(self.poe2_skills[s]["base_damage"]) / 2 for s in skill_names])
+        skill_base_mana = np.array([self.poe2_skills[s]["mana_cost"] for s in skill_names], dtype=float)
+        skill_stat_total = np.array([sum(self.poe2_skills[s]["stat_req"].values()) for s in skill_names],
+                                    dtype=float)
+        
+        ascendancy_damage = np.ones((n_asc + 1, n_skills))
+        ascendancy_synergy = np.ones((n_asc + 1, n_skills))
+        ascendancy_match = np.zeros((n_asc + 1, n_skills))
+        for a, ascendancy in enumerate(ascendancy_names):
             asc_data = self.poe2_ascendancies[ascendancy]
             bonuses = asc_data.get("bonuses", {})
+            preferred_tags = set(asc_data.get("preferred_skills", []))
             
-            # 根据技能类型应用相关加成
-            skill_tags = skill_data["tags"]
-            for tag in skill_tags:
-                if f"{tag}_damage" in bonuses:
-                    asc_multiplier *= (1 + bonuses[f"{tag}_damage"])
+            for i, skill in enumerate(skill_names):
+                skill_tags = self.poe2_skills[skill]["tags"]
+                
+                # 根据技能类型应用相关加成
+                multiplier = 1.0
+                for tag in skill_tags:
+                    if f"{tag}_damage" in bonuses:
+                        multiplier *= (1 + bonuses[f"{tag}_damage"])
+                ascendancy_damage[a, i] = multiplier
+                
+                asc_matches = preferred_tags.intersection(skill_tags)
+                if asc_matches:
+                    ascendancy_synergy[a, i] = 1 + len(asc_matches) * 0.3
+                ascendancy_match[a, i] = len(asc_matches) / max(len(preferred_tags), 1)
         
-        # 计算最终DPS
-        final_dps = base_damage * total_more_multiplier * asc_multiplier * 15  # 假设15次/秒
+        skill_realism = np.array([8.0 * (self.poe2_skills[s].get("viability_rating", 5.0) / 10.0)
+                                  for s in skill_names])
+        support_realism = np.zeros(n_supports + 1)
+        for j, support in enumerate(support_names):
+            support_realism[j] = (self.poe2_supports[support].get("effectiveness", 5.0) / 10.0 - 0.5) * 0.5
+        ascendancy_power = np.full(n_asc + 1, 10.0)
+        for a, ascendancy in enumerate(ascendancy_names):
+            ascendancy_power[a] = self.poe2_ascendancies[ascendancy].get("power_level", 5.0)
         
-        return int(final_dps)
+        return CompatibilityTables(
+            skill_names=skill_names,
+            support_names=support_names,
+            ascendancy_names=ascendancy_names,
+            compatible=compatible,
+            damage_more=damage_more,
+            speed_more=speed_more,
+            mana_multiplier=mana_multiplier,
+            tag_synergy=tag_synergy,
+            support_int_req=support_int_req,
+            skill_base_damage=skill_base_damage,
+            skill_base_mana=skill_base_mana,
+            skill_stat_total=skill_stat_total,
+            ascendancy_damage=ascendancy_damage,
+            ascendancy_synergy=ascendancy_synergy,
+            ascendancy_match=ascendancy_match,
+            skill_realism=skill_realism,
+            support_realism=support_realism,
+            ascendancy_power=ascendancy_power
+        )
+    
+    @staticmethod
+    def _tags_compatible(skill_tags: set, support_data: Dict) -> bool:
+        """按标签判断辅助宝石能否辅助技能"""
+        # 检查必需标签
+        compatible_tags = support_data.get("compatible_tags", [])
+        if compatible_tags and not skill_tags.intersection(compatible_tags):
+            return False
+        
+        # 检查不兼容标签
+        return not skill_tags.intersection(support_data.get("incompatible_tags", []))
+    
+    def calculate_realistic_dps(self, skill: str, supports: List[str], ascendancy: str) -> int:
+        """计算真实的DPS"""
+        skill_id = self.tables.skill_ids.get(skill)
+        if skill_id is None:
+            return 0
+        return self._dps_by_id(skill_id, self.tables.support_id_list(supports),
+                               self.tables.ascendancy_ids.get(ascendancy, -1))
     
     def calculate_mana_cost(self, skill: str, supports: List[str]) -> int:
         """计算法力消耗"""
-        if skill not in self.poe2_skills:
+        skill_id = self.tables.skill_ids.get(skill)
+        if skill_id is None:
             return 999
-            
-        base_cost = self.poe2_skills[skill]["mana_cost"]
-        total_multiplier = 1.0
-        
-        for support in supports:
-            if support in self.poe2_supports:
-                if self._check_support_compatibility(skill, support):
-                    multiplier = self.poe2_supports[support].get("mana_multiplier", 1.0)
-                    total_multiplier *= multiplier
-        
-        return int(base_cost * total_multiplier)
+        return self._mana_by_id(skill_id, self.tables.support_id_list(supports))
     
     def _check_support_compatibility(self, skill: str, support: str) -> bool:
         """检查技能与辅助宝石的兼容性"""
-        if skill not in self.poe2_skills or support not in self.poe2_supports:
-            return False
-            
-        skill_data = self.poe2_skills[skill]
-        support_data = self.poe2_supports[support]
-        
-        # 检查必需标签
-        compatible_tags = support_data.get("compatible_tags", [])
-        skill_tags = skill_data["tags"]
-        
-        if compatible_tags and not any(tag in skill_tags for tag in compatible_tags):
-            return False
-            
-        # 检查不兼容标签
-        incompatible_tags = support_data.get("incompatible_tags", [])
-        if any(tag in skill_tags for tag in incompatible_tags):
+        skill_id = self.tables.skill_ids.get(skill)
+        support_id = self.tables.support_ids.get(support)
+        if skill_id is None or support_id is None:
             return False
-            
-        return True
+        return self.tables.rows['compatible'][skill_id][support_id]
     
     def assess_build_viability(self, skill: str, supports: List[str], ascendancy: str) -> float:
         """评估构筑可行性"""
+        skill_id = self.tables.skill_ids.get(skill)
+        if skill_id is None:
+            # 未知技能: DPS为0、法力999、属性需求极高、无协同
+            return self._viability(0, 999, 0.0, 2997, 0.0)
+        return self._viability_by_id(skill_id, self.tables.support_id_list(supports),
+                                     self.tables.ascendancy_ids.get(ascendancy, -1))
+    
+    def _dps_by_id(self, skill_id: int, support_ids: Sequence[int], asc_id: int) -> int:
+        """按ID计算DPS: 兼容辅助宝石的伤害和速度倍率连乘，再乘升华加成"""
+        rows = self.tables.rows
+        compatible = rows['compatible'][skill_id]
+        damage_more = rows['damage_more'][skill_id]
+        speed_more = rows['speed_more'][skill_id]
+        
+        total_more_multiplier = 1.0
+        for j in support_ids:
+            if compatible[j]:
+                total_more_multiplier *= damage_more[j]
+                total_more_multiplier *= speed_more[j]
+        
+        asc_multiplier = rows['ascendancy_damage'][asc_id][skill_id]
+        
+        # 计算最终DPS（假设15次/秒）
+        return int(rows['skill_base_damage'][skill_id] * total_more_multiplier * asc_multiplier * 15)
+    
+    def _mana_by_id(self, skill_id: int, support_ids: Sequence[int]) -> int:
+        """按ID计算法力消耗"""
+        rows = self.tables.rows
+        compatible = rows['compatible'][skill_id]
+        mana_multiplier = rows['mana_multiplier'][skill_id]
+        
+        total_multiplier = 1.0
+        for j in support_ids:
+            if compatible[j]:
+                total_multiplier *= mana_multiplier[j]
+        
+        return int(rows['skill_base_mana'][skill_id] * total_multiplier)
+    
+    def _synergy_by_id(self, skill_id: int, support_ids: Sequence[int], asc_id: int) -> float:
+        """按ID计算协同得分"""
+        rows = self.tables.rows
+        tag_synergy = rows['tag_synergy'][skill_id]
+        
+        score = 1.0
+        for j in support_ids:
+            score *= tag_synergy[j]
+        score *= rows['ascendancy_synergy'][asc_id][skill_id]
+        
+        return min(score, 3.0)  # 限制最大协同值
+    
+    def _viability_by_id(self, skill_id: int, support_ids: Sequence[int], asc_id: int) -> float:
+        """按ID评估可行性"""
+        rows = self.tables.rows
+        support_int_req = rows['support_int_req']
+        total_stats = rows['skill_stat_total'][skill_id] + sum(support_int_req[j] for j in support_ids)
+        
+        return self._viability(
+            self._dps_by_id(skill_id, support_ids, asc_id),
+            self._mana_by_id(skill_id, support_ids),
+            self._synergy_by_id(skill_id, support_ids, asc_id),
+            total_stats,
+            rows['ascendancy_match'][asc_id][skill_id]
+        )
+    
+    def _viability(self, dps: float, mana_cost: float, synergy_score: float,
+                   total_stats: float, asc_match: float) -> float:
+        """根据各项指标计算可行性评分 (0-10)"""
+        thresholds = self.game_mechanics["viability_thresholds"]
         score = 10.0  # 满分
         
         # 1. DPS检查
-        dps = self.calculate_realistic_dps(skill, supports, ascendancy)
-        min_dps = self.game_mechanics["viability_thresholds"]["min_dps"]
+        min_dps = thresholds["min_dps"]
         if dps < min_dps:
             score -= 3.0 * (1 - dps / min_dps)
         
         # 2. 法力消耗检查
-        mana_cost = self.calculate_mana_cost(skill, supports)
-        max_mana = self.game_mechanics["viability_thresholds"]["max_mana_cost"]
+        max_mana = thresholds["max_mana_cost"]
         if mana_cost > max_mana:
             score -= 2.0 * (mana_cost / max_mana - 1)
         
         # 3. 协同性检查
-        synergy_score = self._calculate_synergy_score(skill, supports, ascendancy)
         if synergy_score < 0.5:
             score -= 2.0 * (0.5 - synergy_score)
         
         # 4. 属性需求检查
-        stat_req = self._calculate_stat_requirements(skill, supports)
-        max_stat = self.game_mechanics["viability_thresholds"]["max_stat_req"]
-        total_stats = sum(stat_req.values())
+        max_stat = thresholds["max_stat_req"]
         if total_stats > max_stat:
             score -= 1.5 * (total_stats / max_stat - 1)
         
         # 5. 升华匹配度检查
-        asc_match = self._check_ascendancy_match(skill, ascendancy)
         if asc_match < 0.3:
             score -= 1.5 * (0.3 - asc_match)
         
         return max(0.0, min(10.0, score))
     
-    def _calculate_synergy_score(self, skill: str, supports: List[str], ascendancy: str) -> float:
-        """计算协同得分"""
-        if skill not in self.poe2_skills:
-            return 0.0
-            
-        score = 1.0
-        skill_tags = set(self.poe2_skills[skill]["tags"])
+    def evaluate_combinations(self, skill_ids: np.ndarray, support_ids: np.ndarray,
+                              asc_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        批量计算组合的DPS、法力消耗和可行性
         
-        # 检查支援宝石协同
-        for support in supports:
-            if support in self.poe2_supports:
-                support_data = self.poe2_supports[support]
-                compatible_tags = set(support_data.get("compatible_tags", []))
-                
-                # 标签匹配加分
-                matches = skill_tags.intersection(compatible_tags)
-                if matches:
-                    score *= (1 + len(matches) * 0.2)
+        Args:
+            skill_ids: 技能ID，形状 (n,)
+            support_ids: 辅助宝石ID，形状 (n, k)，不足k个时用-1填充
+            asc_ids: 升华ID，形状 (n,)，-1表示未知升华
         
-        # 检查升华协同
-        if ascendancy in self.poe2_ascendancies:
-            asc_data = self.poe2_ascendancies[ascendancy]
-            preferred_tags = set(asc_data.get("preferred_skills", []))
-            
-            asc_matches = skill_tags.intersection(preferred_tags)
-            if asc_matches:
-                score *= (1 + len(asc_matches) * 0.3)
+        Returns:
+            (dps, mana_cost, viability)，与 calculate_realistic_dps / calculate_mana_cost /
+            assess_build_viability 的结果一致
+        """
+        t = self.tables
+        thresholds = self.game_mechanics["viability_thresholds"]
+        skill_ids = np.asarray(skill_ids, dtype=np.intp)
+        support_ids = np.asarray(support_ids, dtype=np.intp).reshape(len(skill_ids), -1)
+        asc_ids = np.asarray(asc_ids, dtype=np.intp)
         
-        return min(score, 3.0)  # 限制最大协同值
+        rows = skill_ids[:, None]
+        compatible = t.compatible[rows, support_ids]
+        more = np.where(compatible, t.damage_more[rows, support_ids] * t.speed_more[rows, support_ids], 1.0)
+        mana_mult = np.where(compatible, t.mana_multiplier[rows, support_ids], 1.0)
+        
+        dps = np.floor(t.skill_base_damage[skill_ids] * more.prod(axis=1) *
+                       t.ascendancy_damage[asc_ids, skill_ids] * 15)
+        mana = np.floor(t.skill_base_mana[skill_ids] * mana_mult.prod(axis=1))
+        synergy = np.minimum(
+            t.tag_synergy[rows, support_ids].prod(axis=1) * t.ascendancy_synergy[asc_ids, skill_ids], 3.0
+        )
+        total_stats = t.skill_stat_total[skill_ids] + t.support_int_req[support_ids].sum(axis=1)
+        asc_match = t.ascendancy_match[asc_ids, skill_ids]
+        
+        min_dps = thresholds["min_dps"]
+        max_mana = thresholds["max_mana_cost"]
+        max_stat = thresholds["max_stat_req"]
+        score = np.full(len(skill_ids), 10.0)
+        score -= np.where(dps < min_dps, 3.0 * (1 - dps / min_dps), 0.0)
+        score -= np.where(mana > max_mana, 2.0 * (mana / max_mana - 1), 0.0)
+        score -= np.where(synergy < 0.5, 2.0 * (0.5 - synergy), 0.0)
+        score -= np.where(total_stats > max_stat, 1.5 * (total_stats / max_stat - 1), 0.0)
+        score -= np.where(asc_match < 0.3, 1.5 * (0.3 - asc_match), 0.0)
+        
+        return dps.astype(np.int64), mana.astype(np.int64), np.clip(score, 0.0, 10.0)
+    
+    def _calculate_synergy_score(self, skill: str, supports: List[str], ascendancy: str) -> float:
+        """计算协同得分"""
+        skill_id = self.tables.skill_ids.get(skill)
+        if skill_id is None:
+            return 0.0
+        return self._synergy_by_id(skill_id, self.tables.support_id_list(supports),
+                                   self.tables.ascendancy_ids.get(ascendancy, -1))
     
     def _calculate_stat_requirements(self, skill: str, supports: List[str]) -> Dict[str, int]:
         """计算属性需求"""
@@ -509,22 +715,30 @@ class RealisticBuildGenerator:
     
     def _check_ascendancy_match(self, skill: str, ascendancy: str) -> float:
         """检查升华匹配度"""
-        if skill not in self.poe2_skills or ascendancy not in self.poe2_ascendancies:
+        skill_id = self.tables.skill_ids.get(skill)
+        asc_id = self.tables.ascendancy_ids.get(ascendancy)
+        if skill_id is None or asc_id is None:
             return 0.0
-            
-        skill_tags = set(self.poe2_skills[skill]["tags"])
-        asc_data = self.poe2_ascendancies[ascendancy]
-        preferred_skills = set(asc_data.get("preferred_skills", []))
-        
-        matches = skill_tags.intersection(preferred_skills)
-        return len(matches) / max(len(preferred_skills), 1)
+        return self.tables.rows['ascendancy_match'][asc_id][skill_id]
     
     def generate_realistic_builds(self, count: int = 5, 
-                                target_popularity: float = 0.15) -> List[RealisticBuild]:
-        """生成基于真实机制的构筑"""
-        builds = []
-        attempts = 0
-        max_attempts = count * 10
+                                target_popularity: float = 0.15,
+                                mode: str = "sample",
+                                seed: Optional[int] = None,
+                                top_k_supports: Optional[int] = None) -> List[RealisticBuild]:
+        """
+        生成基于真实机制的构筑
+        
+        Args:
+            count: 生成数量
+            target_popularity: 目标冷门度，只使用流行度不超过该值的技能（升华为两倍）
+            mode: "sample" 随机抽样（最多尝试 count*10 次）；
+                  "exhaustive" 枚举所有 (技能, 升华, 辅助宝石子集) 批量评分，
+                  每个 (技能, 升华) 取最佳辅助组合后返回真正的前 count 个
+            seed: 随机种子，指定时抽样、名称和模拟EHP可复现
+            top_k_supports: exhaustive 模式下每个技能只从智能评分最高的k个兼容辅助宝石中组合
+        """
+        rng = random.Random(seed) if seed is not None else random
         
         # 筛选冷门技能
         unpopular_skills = [
@@ -538,22 +752,41 @@ class RealisticBuildGenerator:
             if data.get("meta_popularity", 0) <= target_popularity * 2  # 升华可以稍微热门一些
         ]
         
+        if mode == "exhaustive":
+            builds = self._generate_exhaustive(count, unpopular_skills, unpopular_ascendancies,
+                                               top_k_supports, rng)
+        elif mode == "sample":
+            builds = self._generate_sampled(count, unpopular_skills, unpopular_ascendancies, rng)
+        else:
+            raise ValueError(f"未知的生成模式: {mode}")
+        
+        # 按可行性和现实度排序
+        builds.sort(key=lambda x: (x.viability_score + x.realism_score) / 2, reverse=True)
+        
+        return builds
+    
+    def _generate_sampled(self, count: int, skills: List[str], ascendancies: List[str],
+                          rng) -> List[RealisticBuild]:
+        """随机抽样生成构筑"""
+        builds = []
+        attempts = 0
+        max_attempts = count * 10
+        
+        if not skills or not ascendancies:
+            return builds
+        
         while len(builds) < count and attempts < max_attempts:
             attempts += 1
             
             # 随机选择技能和升华
-            skill = random.choice(unpopular_skills)
-            ascendancy = random.choice(unpopular_ascendancies)
-            
-            # 确保职业匹配
-            skill_data = self.poe2_skills[skill]
-            asc_data = self.poe2_ascendancies[ascendancy]
+            skill = rng.choice(skills)
+            ascendancy = rng.choice(ascendancies)
             
             # 选择兼容的辅助宝石
-            compatible_supports = []
-            for support, support_data in self.poe2_supports.items():
-                if self._check_support_compatibility(skill, support):
-                    compatible_supports.append(support)
+            compatible_supports = [
+                self.tables.support_names[j]
+                for j in self.tables.compatible_support_ids(self.tables.skill_ids[skill])
+            ]
             
             if len(compatible_supports) < 3:
                 continue
@@ -570,43 +803,112 @@ class RealisticBuildGenerator:
             if viability < 6.0:  # 最低可行性阈值
                 continue
             
-            # 计算其他属性
-            ehp = random.randint(5000, 9000)  # 模拟EHP
-            stat_req = self._calculate_stat_requirements(skill, selected_supports)
+            builds.append(self._create_realistic_build(
+                skill, selected_supports, ascendancy, dps, mana_cost, viability, rng
+            ))
             
-            # 生成构筑名称
-            build_name = self._generate_realistic_name(skill, ascendancy)
-            
-            # 创建构筑对象
-            build = RealisticBuild(
-                name=build_name,
-                character_class=asc_data["base_class"],
-                ascendancy=ascendancy,
-                main_skill=skill,
-                support_gems=selected_supports,
-                
-                calculated_dps=dps,
-                calculated_ehp=ehp,
-                mana_cost=mana_cost,
-                stat_requirements=stat_req,
-                
-                viability_score=viability,
-                realism_score=self._calculate_realism_score(skill, selected_supports, ascendancy),
-                meta_deviation=1.0 - skill_data.get("meta_popularity", 0.5),
-                
-                skill_synergies=self._analyze_synergies(skill, selected_supports, ascendancy),
-                potential_problems=self._identify_problems(skill, selected_supports, ascendancy),
-                scaling_analysis=self._analyze_scaling(skill, selected_supports),
-                gear_dependencies=self._identify_gear_deps(skill, selected_supports)
-            )
+        return builds
             
-            builds.append(build)
+    def _generate_exhaustive(self, count: int, skills: List[str], ascendancies: List[str],
+                             top_k_supports: Optional[int], rng) -> List[RealisticBuild]:
+        """枚举全部组合并批量评分，返回可行性达标的前 count 个构筑"""
+        skill_ids, support_ids, asc_ids = self._enumerate_combinations(skills, ascendancies, top_k_supports)
+        if len(skill_ids) == 0:
+            return []
         
-        # 按可行性和现实度排序
-        builds.sort(key=lambda x: (x.viability_score + x.realism_score) / 2, reverse=True)
+        dps, mana, viability = self.evaluate_combinations(skill_ids, support_ids, asc_ids)
+        rank_score = (viability + self._realism_scores(skill_ids, support_ids, asc_ids)) / 2
+        
+        # 过滤不可行的构筑，每个 (技能, 升华) 保留最佳辅助组合，按排序分取前 count 个（同分保持枚举顺序）
+        viable = np.flatnonzero(viability >= 6.0)
+        ranked = viable[np.argsort(-rank_score[viable], kind="stable")]
+        top = _best_per_pair(ranked, skill_ids, asc_ids)[:count]
         
+        t = self.tables
+        builds = []
+        for index in top:
+            supports = [t.support_names[j] for j in support_ids[index] if j >= 0]
+            builds.append(self._create_realistic_build(
+                t.skill_names[skill_ids[index]], supports, t.ascendancy_names[asc_ids[index]],
+                int(dps[index]), int(mana[index]), float(viability[index]), rng
+            ))
         return builds
     
+    def _enumerate_combinations(self, skills: List[str], ascendancies: List[str],
+                                top_k_supports: Optional[int],
+                                support_count: int = 4) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        枚举 (技能, 升华, 辅助宝石子集) 组合的ID数组
+        
+        兼容辅助宝石少于3个的技能跳过；不足 support_count 个时使用全部兼容辅助宝石。
+        """
+        t = self.tables
+        asc_list = [t.ascendancy_ids[asc] for asc in ascendancies]
+        
+        skill_rows, support_rows = [], []
+        for skill in skills:
+            skill_id = t.skill_ids[skill]
+            compatible = t.compatible_support_ids(skill_id)
+            if len(compatible) < 3:
+                continue
+            
+            if top_k_supports is not None:
+                names = self._select_smart_supports(skill, [t.support_names[j] for j in compatible],
+                                                    top_k_supports)
+                compatible = sorted(t.support_ids[name] for name in names)
+            
+            size = min(support_count, len(compatible))
+            for subset in itertools.combinations(compatible, size):
+                skill_rows.append(skill_id)
+                support_rows.append(subset + (-1,) * (support_count - size))
+        
+        if not skill_rows or not asc_list:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, np.zeros((0, support_count), dtype=np.intp), empty
+        
+        # 技能/辅助组合 × 升华 的笛卡尔积
+        n_asc = len(asc_list)
+        skill_ids = np.repeat(np.array(skill_rows, dtype=np.intp), n_asc)
+        support_ids = np.repeat(np.array(support_rows, dtype=np.intp), n_asc, axis=0)
+        asc_ids = np.tile(np.array(asc_list, dtype=np.intp), len(skill_rows))
+        return skill_ids, support_ids, asc_ids
+    
+    def _realism_scores(self, skill_ids: np.ndarray, support_ids: np.ndarray,
+                        asc_ids: np.ndarray) -> np.ndarray:
+        """批量计算现实度评分（与 _calculate_realism_score 相同的公式）"""
+        t = self.tables
+        score = t.skill_realism[skill_ids] + t.support_realism[support_ids].sum(axis=1)
+        score *= t.ascendancy_power[asc_ids] / 10.0
+        return np.clip(score, 0.0, 10.0)
+    
+    def _create_realistic_build(self, skill: str, supports: List[str], ascendancy: str,
+                                dps: int, mana_cost: int, viability: float, rng) -> RealisticBuild:
+        """根据已计算的属性创建构筑对象"""
+        skill_data = self.poe2_skills[skill]
+        asc_data = self.poe2_ascendancies[ascendancy]
+        
+        return RealisticBuild(
+            name=self._generate_realistic_name(skill, ascendancy, rng),
+            character_class=asc_data["base_class"],
+            ascendancy=ascendancy,
+            main_skill=skill,
+            support_gems=supports,
+                
+            calculated_dps=dps,
+            calculated_ehp=rng.randint(5000, 9000),  # 模拟EHP
+            mana_cost=mana_cost,
+            stat_requirements=self._calculate_stat_requirements(skill, supports),
+                
+            viability_score=viability,
+            realism_score=self._calculate_realism_score(skill, supports, ascendancy),
+            meta_deviation=1.0 - skill_data.get("meta_popularity", 0.5),
+                
+            skill_synergies=self._analyze_synergies(skill, supports, ascendancy),
+            potential_problems=self._identify_problems(skill, supports, ascendancy),
+            scaling_analysis=self._analyze_scaling(skill, supports),
+            gear_dependencies=self._identify_gear_deps(skill, supports)
+        )
+    
     def _select_smart_supports(self, skill: str, available_supports: List[str], count: int) -> List[str]:
         """智能选择辅助宝石"""
         if skill not in self.poe2_skills:
@@ -671,7 +973,7 @@ class RealisticBuildGenerator:
         
         return min(10.0, max(0.0, score))
     
-    def _generate_realistic_name(self, skill: str, ascendancy: str) -> str:
+    def _generate_realistic_name(self, skill: str, ascendancy: str, rng=random) -> str:
         """生成真实的构筑名称"""
         skill_adjectives = {
             "Lightning Arrow": ["Storm", "Thunder", "Shock"],
@@ -686,7 +988,7 @@ class RealisticBuildGenerator:
         }
         
         adjectives = skill_adjectives.get(skill, ["Unique", "Rare", "Hidden"])
-        adjective = random.choice(adjectives)
+        adjective = rng.choice(adjectives)
         
         return f"{adjective} {ascendancy}"
     
@@ -0,0 +1,332 @@
+"""
+RAG检索链路基准测试工具
+直接测量真实的 PoE2BuildVectorizer / PoE2BuildIndexBuilder / PoE2SimilarityEngine：
+- 合成PoE2BuildData语料 (1k/10k/100k)
+- 确定性的哈希编码器代替Sentence-Transformer (无需下载模型)
+- 向量化吞吐、索引训练/构建耗时、各索引结构的p50/p99检索延迟、相对Flat的recall@k、RSS
+- 结果输出为JSON，便于在版本之间对比
+
+命令行用法 (在 tests_and_validation 目录下):
+    python -m tests.performance.rag_benchmark --scales 1000 10000 100000 --output rag_benchmark.json
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import platform
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    psutil = None
+    PSUTIL_AVAILABLE = False
+
+from src.poe2build.rag.models import (
+    PoE2BuildData, SkillGemSetup, ItemInfo, OffensiveStats, DefensiveStats,
+    BuildGoal, DataQuality
+)
+from src.poe2build.rag.vectorizer import PoE2BuildVectorizer, VectorConfig
+from src.poe2build.rag.index_builder import PoE2BuildIndexBuilder, IndexConfig, FAISS_AVAILABLE
+from src.poe2build.rag.similarity_engine import PoE2SimilarityEngine, SearchConfig
+from src.poe2build.utils.poe2_constants import PoE2Constants
+
+BENCHMARK_FORMAT_VERSION = 1
+DEFAULT_SCALES = (1000, 10000, 100000)
+INDEX_KINDS = ("flat", "ivf", "ivfpq")
+
+_SKILLS = {
+    'Witch': ["Fireball", "Flame Wall", "Raise Zombie", "Bone Cage", "Contagion", "Essence Drain"],
+    'Ranger': ["Lightning Arrow", "Ice Shot", "Rain of Arrows", "Poisonburst Arrow", "Tornado Shot"],
+    'Warrior': ["Earthquake", "Leap Slam", "Boneshatter", "Hammer of the Gods", "Sunder"],
+    'Monk': ["Tempest Flurry", "Ice Strike", "Falling Thunder", "Killing Palm", "Glacial Cascade"],
+    'Sorceress': ["Arc", "Spark", "Frost Bomb", "Comet", "Ball Lightning", "Cold Snap"],
+    'Mercenary': ["Explosive Shot", "Galvanic Shards", "Gas Grenade", "Fragmentation Rounds"],
+}
+_SUPPORTS = ["Added Fire Damage", "Spell Echo", "Controlled Destruction", "Elemental Focus",
+             "Faster Projectiles", "Pierce", "Chain", "Fork", "Brutality", "Concentrated Effect",
+             "Increased Area of Effect", "Lightning Penetration", "Cold Penetration", "Arcane Surge"]
+_WEAPONS = ["Chiming Staff", "Dualstring Bow", "Heavy Crossbow", "Forge Maul", "Quarterstaff",
+            "Lightning Wand", "Bone Sceptre", "Tempered Mace"]
+_KEYSTONES = ["Chaos Inoculation", "Eldritch Battery", "Resolute Technique", "Elemental Overload",
+              "Mind Over Matter", "Avatar of Fire", "Pain Attunement", "Iron Reflexes"]
+_ARMOURS = ["Silk Robe", "Leather Vest", "Chain Mail", "Plate Vest", "Hermit Garb"]
+
+
+class HashingTextEncoder:
+    """确定性的特征哈希编码器
+
+    接口与SentenceTransformer.encode一致，把词和相邻词对用blake2b哈希到固定维度，
+    相同文本在任何机器上都得到相同的向量，用于在不下载模型的情况下测量真实检索链路。
+    """
+
+    _TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, dimension: int = 384, seed: int = 0):
+        self.dimension = dimension
+        self._salt = seed.to_bytes(8, 'little', signed=False)
+        self._feature_cache: Dict[str, tuple] = {}
+
+    def _feature(self, token: str) -> tuple:
+        cached = self._feature_cache.get(token)
+        if cached is None:
+            digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8, salt=self._salt).digest()
+            value = int.from_bytes(digest, 'little')
+            cached = (value % self.dimension, 1.0 if (value >> 63) & 1 else -1.0)
+            self._feature_cache[token] = cached
+        return cached
+
+    def encode(self, texts: Sequence[str], **kwargs) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = self._TOKEN_PATTERN.findall(text.lower())
+            features = tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                column, sign = self._feature(feature)
+                vectors[row, column] += sign
+        return vectors
+
+
+def generate_corpus(size: int, seed: int = 42) -> List[PoE2BuildData]:
+    """生成确定性的合成构筑语料"""
+    rng = random.Random(seed)
+    classes = list(PoE2Constants.ASCENDANCY_MAPPING)
+    goals = list(BuildGoal)
+    qualities = [DataQuality.HIGH, DataQuality.MEDIUM, DataQuality.LOW]
+
+    builds = []
+    for i in range(size):
+        character_class = rng.choice(classes)
+        builds.append(PoE2BuildData(
+            character_name=f"Bench{seed}_{i}",
+            character_class=character_class,
+            ascendancy=rng.choice(PoE2Constants.ASCENDANCY_MAPPING[character_class]),
+            level=rng.randint(70, 100),
+            main_skill_setup=SkillGemSetup(
+                main_skill=rng.choice(_SKILLS[character_class]),
+                support_gems=rng.sample(_SUPPORTS, rng.randint(2, 5))
+            ),
+            weapon=ItemInfo(name=rng.choice(_WEAPONS)),
+            body_armour=ItemInfo(name=rng.choice(_ARMOURS)),
+            passive_keystones=rng.sample(_KEYSTONES, rng.randint(0, 2)),
+            offensive_stats=OffensiveStats(dps=rng.uniform(5e4, 5e6)),
+            defensive_stats=DefensiveStats(
+                life=rng.randint(2000, 8000),
+                energy_shield=rng.randint(0, 6000),
+                fire_resistance=rng.choice([60, 75]),
+                cold_resistance=rng.choice([60, 75]),
+                lightning_resistance=rng.choice([60, 75])
+            ),
+            total_cost=round(rng.uniform(0.5, 60.0), 2),
+            popularity_rank=rng.randint(1, 2000),
+            build_goal=rng.choice(goals),
+            data_quality=rng.choice(qualities)
+        ))
+    return builds
+
+
+def create_benchmark_vectorizer(work_dir: Path, dimension: int = 384, seed: int = 0) -> PoE2BuildVectorizer:
+    """创建使用哈希编码器的真实向量化引擎"""
+    vectorizer = PoE2BuildVectorizer(VectorConfig(
+        vector_dimension=dimension,
+        cache_dir=str(work_dir / "models")
+    ))
+    vectorizer.model = HashingTextEncoder(dimension, seed)
+    vectorizer._model_loaded = True
+    return vectorizer
+
+
+def current_rss_mb() -> Optional[float]:
+    """当前进程常驻内存(MB)；没有psutil时退回到峰值RSS"""
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        'p50_ms': float(np.percentile(values, 50)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'mean_ms': float(values.mean()),
+        'max_ms': float(values.max())
+    }
+
+
+def _recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(row_found[row_found >= 0]) & set(row_truth)) for row_found, row_truth in zip(found, truth))
+    return hits / (k * len(truth))
+
+
+def run_scale_benchmark(size: int,
+                        index_kinds: Iterable[str] = INDEX_KINDS,
+                        k: int = 10,
+                        num_queries: int = 200,
+                        engine_queries: int = 50,
+                        dimension: int = 384,
+                        seed: int = 42,
+                        use_opq: bool = False,
+                        work_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """对单个语料规模运行基准测试
+
+    Args:
+        size: 语料构筑数量
+        index_kinds: 要测量的索引结构 (flat, ivf, ivfpq)，Flat始终作为recall基准
+        k: 检索的近邻数量
+        num_queries: 原始索引检索的查询数量
+        engine_queries: 经过PoE2SimilarityEngine完整链路的查询数量
+        dimension: 向量维度
+        seed: 语料随机种子，查询使用 seed+1 生成
+        use_opq: IVF+PQ是否启用OPQ预处理（训练非常慢，默认关闭）
+        work_dir: 模型/索引缓存目录，默认使用临时目录
+    """
+    if work_dir is None:
+        work_dir = Path(tempfile.mkdtemp(prefix="poe2_rag_bench_"))
+    work_dir = Path(work_dir)
+    result: Dict[str, Any] = {'corpus_size': size, 'k': k, 'use_opq': use_opq, 'rss_mb': {}}
+
+    gc.collect()
+    result['rss_mb']['start'] = current_rss_mb()
+
+    start = time.perf_counter()
+    corpus = generate_corpus(size, seed)
+    queries = generate_corpus(num_queries, seed + 1)
+    result['corpus_generation_seconds'] = time.perf_counter() - start
+    result['rss_mb']['after_corpus'] = current_rss_mb()
+
+    # 向量化吞吐
+    vectorizer = create_benchmark_vectorizer(work_dir, dimension)
+    start = time.perf_counter()
+    vectors = vectorizer.vectorize_builds(corpus, show_progress=False)
+    elapsed = time.perf_counter() - start
+    result['vectorize'] = {
+        'seconds': elapsed,
+        'builds_per_second': size / elapsed if elapsed > 0 else None
+    }
+    query_vectors = vectorizer.vectorize_builds(queries, show_progress=False)
+    result['rss_mb']['after_vectorize'] = current_rss_mb()
+
+    if not FAISS_AVAILABLE:
+        result['indexes'] = {}
+        result['skipped'] = "faiss-cpu未安装，跳过索引基准"
+        return result
+
+    kinds = ["flat"] + [kind for kind in index_kinds if kind != "flat"]
+    ground_truth = None
+    result['indexes'] = {}
+
+    for kind in kinds:
+        builder = PoE2BuildIndexBuilder(IndexConfig(
+            index_kind=kind,
+            vector_dimension=dimension,
+            index_path=str(work_dir / "indexes"),
+            use_opq=use_opq,
+            auto_save=False
+        ))
+        builder.set_vectorizer(vectorizer)
+        build_stats = builder.build_index_from_vectors(vectors, corpus)
+
+        # 原始索引检索延迟（单条查询，与在线调用一致）
+        normalized = query_vectors / np.maximum(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-8)
+        found = np.empty((num_queries, k), dtype=np.int64)
+        latencies = []
+        for i in range(num_queries):
+            query = normalized[i:i + 1]
+            start = time.perf_counter()
+            _, indices = builder.index.search(query, k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found[i] = indices[0]
+        if kind == "flat":
+            ground_truth = found.copy()
+
+        # 经过过滤/打分/多样化的完整检索链路
+        engine = PoE2SimilarityEngine(SearchConfig(max_results=k))
+        engine.setup(vectorizer, builder)
+        engine_latencies = []
+        for build in queries[:engine_queries]:
+            start = time.perf_counter()
+            engine.search_similar_builds(build)
+            engine_latencies.append((time.perf_counter() - start) * 1000)
+
+        result['indexes'][kind] = {
+            'index_type': build_stats['index_type'],
+            'train_seconds': build_stats['train_time_seconds'],
+            'add_seconds': build_stats['add_time_seconds'],
+            'build_seconds': build_stats['build_time_seconds'],
+            'estimated_memory_mb': build_stats['memory_usage_mb'],
+            'search': _percentiles(latencies),
+            'engine_search': _percentiles(engine_latencies) if engine_latencies else None,
+            f'recall_at_{k}': _recall_at_k(found, ground_truth),
+            'rss_mb': current_rss_mb()
+        }
+
+        del engine, builder
+        gc.collect()
+
+    return result
+
+
+def run_benchmarks(scales: Iterable[int] = DEFAULT_SCALES, **kwargs) -> Dict[str, Any]:
+    """按多个语料规模运行基准测试，返回可直接写入JSON的结果"""
+    return {
+        'format_version': BENCHMARK_FORMAT_VERSION,
+        'benchmark': 'rag_retrieval',
+        'timestamp': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'faiss_available': FAISS_AVAILABLE,
+        },
+        'results': [run_scale_benchmark(size, **kwargs) for size in scales]
+    }
+
+
+def write_results(results: Dict[str, Any], output_path: Path) -> Path:
+    """把基准结果写入JSON文件"""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    return output_path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="RAG检索链路基准测试")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help="语料规模列表")
+    parser.add_argument('--index-kinds', nargs='+', default=list(INDEX_KINDS), choices=INDEX_KINDS,
+                        help="要测量的索引结构")
+    parser.add_argument('--k', type=int, default=10, help="检索近邻数量")
+    parser.add_argument('--queries', type=int, default=200, help="查询数量")
+    parser.add_argument('--opq', action='store_true', help="IVF+PQ启用OPQ预处理")
+    parser.add_argument('--output', type=Path, default=Path("rag_benchmark.json"),
+                        help="JSON结果输出路径")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scales, index_kinds=args.index_kinds,
+                             k=args.k, num_queries=args.queries, use_opq=args.opq)
+    print(f"基准结果已写入: {write_results(results, args.output)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+包导入耗时基准测试
+使用 python -X importtime 检查延迟导入的包在启动时不会加载重量级依赖，
+并把累计导入耗时控制在预算之内
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parents[3] / "core_ai_engine" / "src"
+
+# 导入耗时预算(毫秒)，留出足够余量以适应较慢的CI机器
+IMPORT_BUDGET_MS = {
+    "poe2build.rag": 250,
+    "poe2build.rag.models": 250,
+    "poe2build.data_sources": 250,
+}
+
+# 这些依赖只应在首次使用对应组件时才被导入
+HEAVY_MODULES = ("aiohttp", "bs4", "requests", "faiss", "sentence_transformers", "torch")
+
+
+def _run_importtime(module: str) -> Dict[str, int]:
+    """在子进程中导入模块，返回 模块名 -> 累计导入耗时(微秒)"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(SRC_DIR)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # 表头行
+        timings[parts[2].strip()] = int(parts[1])
+    return timings
+
+
+@pytest.mark.performance
+class TestPackageImportTime:
+    """包导入耗时测试"""
+
+    @pytest.mark.parametrize("module", sorted(IMPORT_BUDGET_MS))
+    def test_import_does_not_load_heavy_dependencies(self, module):
+        """测试导入包时不会加载重量级可选依赖"""
+        timings = _run_importtime(module)
+
+        loaded = sorted(name for name in HEAVY_MODULES if name in timings)
+        assert not loaded, f"导入 {module} 时加载了 {loaded}"
+
+    @pytest.mark.parametrize("module", sorted(IMPORT_BUDGET_MS))
+    def test_import_time_within_budget(self, module):
+        """测试累计导入耗时不超过预算"""
+        # 第一次运行会写入字节码缓存，取第二次的结果
+        _run_importtime(module)
+        timings = _run_importtime(module)
+
+        cumulative_ms = timings[module] / 1000
+        assert cumulative_ms <= IMPORT_BUDGET_MS[module], \
+            f"导入 {module} 耗时 {cumulative_ms:.1f}ms，超过预算 {IMPORT_BUDGET_MS[module]}ms"
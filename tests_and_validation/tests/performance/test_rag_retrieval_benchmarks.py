@@ -0,0 +1,71 @@
+"""
+RAG检索链路基准测试
+使用真实的向量化、索引和相似性搜索组件，测量吞吐、延迟和召回率。
+
+默认只运行1k规模；设置环境变量 POE2_RAG_BENCH_SCALES=1000,10000,100000
+可运行更大规模，POE2_RAG_BENCH_OUTPUT 指定JSON结果的输出路径。
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from tests.performance.rag_benchmark import (
+    HashingTextEncoder, generate_corpus, create_benchmark_vectorizer,
+    run_benchmarks, write_results, FAISS_AVAILABLE
+)
+
+BENCH_SCALES = [int(value) for value in
+                os.environ.get("POE2_RAG_BENCH_SCALES", "1000").split(",") if value.strip()]
+
+
+@pytest.mark.performance
+@pytest.mark.rag
+class TestRAGRetrievalBenchmarks:
+    """RAG检索链路基准测试"""
+
+    def test_hashing_encoder_is_deterministic(self):
+        """测试哈希编码器对相同文本输出相同向量"""
+        texts = ["Witch Infernalist Fireball", "Ranger Deadeye Lightning Arrow"]
+        first = HashingTextEncoder(64).encode(texts)
+        second = HashingTextEncoder(64).encode(texts)
+
+        assert first.shape == (2, 64)
+        assert np.array_equal(first, second)
+        assert not np.array_equal(first[0], first[1])
+
+    def test_corpus_generation_is_reproducible(self):
+        """测试合成语料可复现"""
+        first = generate_corpus(20, seed=7)
+        second = generate_corpus(20, seed=7)
+        assert [b.similarity_hash for b in first] == [b.similarity_hash for b in second]
+
+    def test_vectorize_throughput(self, temp_dir):
+        """测试真实向量化引擎在哈希编码器下的吞吐"""
+        vectorizer = create_benchmark_vectorizer(temp_dir, dimension=128)
+        vectors = vectorizer.vectorize_builds(generate_corpus(200), show_progress=False)
+
+        assert vectors.shape == (200, 128)
+        norms = np.linalg.norm(vectors, axis=1)
+        assert np.allclose(norms[norms > 0], 1.0, atol=1e-5)
+
+    @pytest.mark.skipif(not FAISS_AVAILABLE, reason="需要faiss-cpu")
+    def test_retrieval_benchmark(self, temp_dir):
+        """测试各索引结构的延迟和相对Flat的recall@k，并输出JSON结果"""
+        results = run_benchmarks(BENCH_SCALES, num_queries=100, engine_queries=20,
+                                 work_dir=temp_dir)
+
+        output = os.environ.get("POE2_RAG_BENCH_OUTPUT") or temp_dir / "rag_benchmark.json"
+        with open(write_results(results, output), encoding='utf-8') as f:
+            saved = json.load(f)
+
+        for scale_result in saved['results']:
+            indexes = scale_result['indexes']
+            assert set(indexes) == {"flat", "ivf", "ivfpq"}
+            assert indexes['flat']['recall_at_10'] == 1.0
+            for kind, stats in indexes.items():
+                assert 0.0 <= stats['recall_at_10'] <= 1.0
+                assert stats['search']['p50_ms'] <= stats['search']['p99_ms']
+            assert scale_result['vectorize']['builds_per_second'] > 0
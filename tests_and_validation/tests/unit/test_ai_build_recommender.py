@@ -0,0 +1,86 @@
+"""
+单元测试 - AI构筑组合生成器
+
+测试仓库根目录 ai_build_recommender 的 generate_unique_combinations：
+- 固定种子可复现
+- exhaustive 模式返回穷举得到的真正前N个
+- 未知模式报错
+"""
+
+import itertools
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from ai_build_recommender import AIBuildRecommender  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def recommender():
+    return AIBuildRecommender()
+
+
+def _brute_force_top(rec, count):
+    """逐个组合调用标量评分，返回每个 (技能, 升华) 最佳辅助组合中排序分最高的 count 个"""
+    skills = [s for s, d in rec.skills_db.items() if d.get("meta_usage", 0) < 0.10]
+    ascendancies = [a for a, d in rec.ascendancy_db.items() if d.get("meta_usage", 0) < 0.15]
+    support_order = list(rec.support_gems_db)
+
+    best = {}
+    for skill in skills:
+        compatible = sorted(set(rec._compatible_supports(skill)), key=support_order.index)
+        if len(compatible) < 4:
+            continue
+        for subset in itertools.combinations(compatible, min(5, len(compatible))):
+            supports = list(subset)
+            synergy = rec.analyze_skill_synergy(skill, supports)
+            for ascendancy in ascendancies:
+                innovation = rec.calculate_innovation_score(skill, supports, ascendancy)
+                if synergy < 1.3 or innovation < 0.6:
+                    continue
+                score = (innovation + synergy) / 2
+                key = (skill, ascendancy)
+                if key not in best or score > best[key][0]:
+                    best[key] = (score, (skill, ascendancy, tuple(sorted(supports))))
+
+    ranked = sorted(best.values(), key=lambda item: item[0], reverse=True)
+    return ranked[:count]
+
+
+def _key(recommendation):
+    combination = recommendation.skill_combination
+    return (combination.main_skill, recommendation.ascendancy, tuple(sorted(combination.support_gems)))
+
+
+@pytest.mark.unit
+class TestGenerateUniqueCombinations:
+    """测试 generate_unique_combinations 的生成模式"""
+
+    @pytest.mark.parametrize("mode", ["sample", "exhaustive"])
+    def test_same_seed_same_output(self, recommender, mode):
+        """测试相同种子生成完全相同的推荐"""
+        first = recommender.generate_unique_combinations(6, mode=mode, seed=11)
+        second = recommender.generate_unique_combinations(6, mode=mode, seed=11)
+
+        assert first
+        assert first == second
+
+    def test_exhaustive_returns_true_top_n(self, recommender):
+        """测试 exhaustive 模式返回穷举得到的真正前N个 (技能, 升华) 组合"""
+        expected = _brute_force_top(recommender, 5)
+        recommendations = recommender.generate_unique_combinations(5, mode="exhaustive", seed=3)
+
+        assert expected
+        assert [_key(r) for r in recommendations] == [key for _, key in expected]
+        assert [(r.innovation_score + r.skill_combination.synergy_score) / 2 for r in recommendations] == \
+            pytest.approx([score for score, _ in expected], abs=1e-9)
+
+    def test_unknown_mode_raises(self, recommender):
+        """测试未知生成模式抛出ValueError"""
+        with pytest.raises(ValueError):
+            recommender.generate_unique_combinations(3, mode="greedy")
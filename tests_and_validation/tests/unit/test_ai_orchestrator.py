@@ -11,10 +11,12 @@ from typing import Dict, Any, List
 
 from src.poe2build.core.ai_orchestrator import (
     PoE2AIOrchestrator, UserRequest, RecommendationResult,
-    SystemComponent, ComponentStatus, ComponentHealth
+    SystemComponent, ComponentStatus, ComponentHealth,
+    PipelineEventType
 )
 from src.poe2build.models.build import PoE2Build, PoE2BuildStats, PoE2BuildGoal
 from src.poe2build.models.characters import PoE2CharacterClass, PoE2Ascendancy
+from src.poe2build.utils.latency import LatencyRecorder
 from tests.fixtures.test_data import TestDataFactory
 
 
@@ -503,4 +505,434 @@ class TestOrchestratorRecommendationFlow:
         for i in range(len(sorted_builds) - 1):
             current_cost = sorted_builds[i].estimated_cost or float('inf')
             next_cost = sorted_builds[i + 1].estimated_cost or float('inf')
-            assert current_cost <= next_cost
\ No newline at end of file
+            assert current_cost <= next_cost
+
+class TestOrchestratorConcurrentInitialization:
+    """协调器并发/延迟初始化测试"""
+    
+    @staticmethod
+    def _slow_init(delay: float, result: int = 1):
+        async def init():
+            await asyncio.sleep(delay)
+            return result
+        return init
+    
+    @pytest.mark.asyncio
+    async def test_components_initialize_concurrently(self):
+        """测试组件并发初始化，总耗时接近最慢的组件"""
+        orchestrator = PoE2AIOrchestrator()
+        for method_name in PoE2AIOrchestrator.COMPONENT_INITIALIZERS.values():
+            setattr(orchestrator, method_name, self._slow_init(0.2))
+        
+        start = time.perf_counter()
+        assert await orchestrator.initialize()
+        elapsed = time.perf_counter() - start
+        
+        assert elapsed < 0.6  # 串行需要1.2秒
+        assert all(orchestrator._is_component_healthy(c) for c in SystemComponent)
+    
+    @pytest.mark.asyncio
+    async def test_component_init_timeout(self):
+        """测试单个组件初始化超时不阻塞其他组件"""
+        orchestrator = PoE2AIOrchestrator({'init_timeouts': {'rag_engine': 0.05}})
+        for method_name in PoE2AIOrchestrator.COMPONENT_INITIALIZERS.values():
+            setattr(orchestrator, method_name, self._slow_init(0.0))
+        orchestrator._init_rag_engine = self._slow_init(5.0)
+        
+        start = time.perf_counter()
+        assert await orchestrator.initialize()
+        
+        assert time.perf_counter() - start < 1.0
+        health = orchestrator._component_health[SystemComponent.RAG_ENGINE]
+        assert health.status == ComponentStatus.UNAVAILABLE
+        assert "超时" in health.error_message
+    
+    @pytest.mark.asyncio
+    async def test_lazy_components_load_on_first_use(self):
+        """测试延迟模式下RAG引擎和PoB2本地客户端在首次使用时加载"""
+        orchestrator = PoE2AIOrchestrator({'lazy_init': True})
+        calls = []
+        for component, method_name in PoE2AIOrchestrator.COMPONENT_INITIALIZERS.items():
+            async def init(component=component):
+                calls.append(component)
+                return 1
+            setattr(orchestrator, method_name, init)
+        
+        assert await orchestrator.initialize()
+        assert SystemComponent.RAG_ENGINE not in calls
+        assert SystemComponent.POB2_LOCAL not in calls
+        
+        report = await orchestrator.health_check()
+        assert report['components']['rag_engine']['status'] == ComponentStatus.NOT_LOADED.value
+        assert report['overall_status'] == 'healthy'
+        
+        # 并发的首次使用只初始化一次
+        results = await asyncio.gather(
+            orchestrator._ensure_component(SystemComponent.RAG_ENGINE),
+            orchestrator._ensure_component(SystemComponent.RAG_ENGINE)
+        )
+        assert results == [True, True]
+        assert calls.count(SystemComponent.RAG_ENGINE) == 1
+
+
+class TestOrchestratorHealthSnapshots:
+    """健康快照与后台监控测试"""
+    
+    @staticmethod
+    async def _ready_orchestrator(config=None) -> PoE2AIOrchestrator:
+        orchestrator = PoE2AIOrchestrator(config)
+        for method_name in PoE2AIOrchestrator.COMPONENT_INITIALIZERS.values():
+            async def init():
+                return 1
+            setattr(orchestrator, method_name, init)
+        assert await orchestrator.initialize()
+        return orchestrator
+    
+    @pytest.mark.asyncio
+    async def test_snapshot_published_after_initialization(self):
+        """测试初始化完成后即有快照，且快照不可修改"""
+        orchestrator = await self._ready_orchestrator()
+        
+        snapshot = orchestrator.get_health_snapshot()
+        assert snapshot is orchestrator.get_health_snapshot()
+        assert snapshot.overall_status == 'healthy'
+        assert snapshot.is_component_healthy(SystemComponent.RAG_ENGINE)
+        
+        with pytest.raises(Exception):
+            snapshot.overall_status = 'unhealthy'
+        with pytest.raises(TypeError):
+            snapshot.components['rag_engine'] = {}
+    
+    @pytest.mark.asyncio
+    async def test_health_check_replaces_snapshot(self):
+        """测试健康检查发布新快照，旧快照保持不变"""
+        orchestrator = await self._ready_orchestrator()
+        old_snapshot = orchestrator.get_health_snapshot()
+        
+        orchestrator._component_health[SystemComponent.POB2_LOCAL] = ComponentHealth(
+            component=SystemComponent.POB2_LOCAL,
+            status=ComponentStatus.ERROR,
+            error_message="连接失败"
+        )
+        report = await orchestrator.health_check()
+        
+        new_snapshot = orchestrator.get_health_snapshot()
+        assert new_snapshot is not old_snapshot
+        assert report == new_snapshot.to_dict()
+        assert report['overall_status'] == 'degraded'
+        assert new_snapshot.component_status('pob2_local') == 'error'
+        assert old_snapshot.is_component_healthy(SystemComponent.POB2_LOCAL)
+    
+    @pytest.mark.asyncio
+    async def test_lazy_load_publishes_snapshot(self):
+        """测试延迟组件加载完成后快照随之更新"""
+        orchestrator = await self._ready_orchestrator({'lazy_init': True})
+        assert orchestrator.get_health_snapshot().component_status('rag_engine') == 'not_loaded'
+        
+        assert await orchestrator._ensure_component(SystemComponent.RAG_ENGINE)
+        await asyncio.sleep(0)  # 等待完成回调
+        
+        assert orchestrator.get_health_snapshot().is_component_healthy('rag_engine')
+    
+    def test_background_monitor_refreshes(self):
+        """测试后台监控按间隔刷新快照并可停止"""
+        from src.poe2build.core.health_monitor import HealthMonitor
+        
+        orchestrator = asyncio.run(self._ready_orchestrator())
+        updates = []
+        monitor = HealthMonitor(orchestrator, interval=0.02, on_update=updates.append)
+        
+        monitor.start()
+        try:
+            deadline = time.time() + 2.0
+            while monitor.refresh_count < 3 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            monitor.stop()
+        
+        assert not monitor.is_running
+        assert monitor.refresh_count >= 3
+        assert updates[-1] is monitor.snapshot
+        
+        with pytest.raises(ValueError):
+            HealthMonitor(orchestrator, interval=0)
+    
+    def test_monitor_runs_on_shared_loop(self):
+        """测试监控可以运行在已有的后台事件循环上"""
+        from src.poe2build.core.health_monitor import HealthMonitor
+        from src.poe2build.utils.async_loop import BackgroundEventLoop
+        
+        background = BackgroundEventLoop()
+        try:
+            orchestrator = background.run(self._ready_orchestrator(), timeout=5)
+            monitor = HealthMonitor(orchestrator, interval=0.02)
+            monitor.start(loop=background.loop)
+            
+            deadline = time.time() + 2.0
+            while monitor.refresh_count < 2 and time.time() < deadline:
+                time.sleep(0.01)
+            assert monitor.is_running
+            
+            monitor.stop()
+            assert monitor.refresh_count >= 2
+            assert not monitor.is_running
+        finally:
+            background.stop()
+
+
+class TestOrchestratorRequestCoalescing:
+    """请求指纹、并发合并与结果缓存测试"""
+    
+    @staticmethod
+    async def _ready_orchestrator(config=None, delay: float = 0.05):
+        orchestrator = PoE2AIOrchestrator(config)
+        for method_name in PoE2AIOrchestrator.COMPONENT_INITIALIZERS.values():
+            async def init():
+                return 1
+            setattr(orchestrator, method_name, init)
+        assert await orchestrator.initialize()
+        
+        calls = []
+        
+        async def pipeline(request, fallback=False):
+            calls.append(request)
+            await asyncio.sleep(delay)
+            return RecommendationResult(
+                builds=[], metadata={'fallback_mode': True} if fallback else {},
+                rag_confidence=0.8, pob2_validated=False,
+                generation_time_ms=delay * 1000, used_components=[]
+            )
+        orchestrator._run_recommendation_pipeline = pipeline
+        return orchestrator, calls
+    
+    def test_fingerprint_normalization(self):
+        """测试语义相同的请求指纹相同"""
+        first = UserRequest(character_class=PoE2CharacterClass.WITCH, build_goal=PoE2BuildGoal.CLEAR_SPEED,
+                            preferred_skills=["Fireball", "Ice Nova"], playstyle="Balanced", max_budget=10)
+        second = UserRequest(character_class=PoE2CharacterClass.WITCH, build_goal=PoE2BuildGoal.CLEAR_SPEED,
+                             preferred_skills=[" ice nova", "fireball", "Fireball"], playstyle="balanced ",
+                             max_budget=10.0)
+        other = UserRequest(character_class=PoE2CharacterClass.RANGER, build_goal=PoE2BuildGoal.CLEAR_SPEED)
+        
+        assert first.fingerprint() == second.fingerprint()
+        assert first.fingerprint() != other.fingerprint()
+        assert UserRequest(preferred_skills=[]).fingerprint() == UserRequest().fingerprint()
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_one_computation(self):
+        """测试并发的相同请求只计算一次"""
+        orchestrator, calls = await self._ready_orchestrator()
+        request = UserRequest(character_class=PoE2CharacterClass.WITCH)
+        
+        results = await asyncio.gather(*(
+            orchestrator.generate_build_recommendations(request) for _ in range(5)
+        ))
+        
+        assert len(calls) == 1
+        assert sum(1 for r in results if r.metadata.get('coalesced')) == 4
+        assert orchestrator.get_system_stats()['coalesced_requests'] == 4
+        assert not orchestrator._inflight_requests
+    
+    @pytest.mark.asyncio
+    async def test_result_cache_ttl_and_data_versions(self):
+        """测试缓存命中、过期以及数据版本变化后重新计算"""
+        orchestrator, calls = await self._ready_orchestrator({'result_cache_ttl': 60})
+        orchestrator._rag_engine = Mock(index_version=1)
+        request = UserRequest(character_class=PoE2CharacterClass.WITCH)
+        
+        await orchestrator.generate_build_recommendations(request)
+        cached = await orchestrator.generate_build_recommendations(request)
+        assert len(calls) == 1
+        assert cached.metadata.get('cache_hit')
+        
+        # 数据版本变化
+        orchestrator._rag_engine.index_version = 2
+        await orchestrator.generate_build_recommendations(request)
+        assert len(calls) == 2
+        
+        # 缓存过期
+        for key, (result, _) in list(orchestrator._result_cache.items()):
+            orchestrator._result_cache[key] = (result, time.time() - 1)
+        await orchestrator.generate_build_recommendations(request)
+        assert len(calls) == 3
+    
+    @pytest.mark.asyncio
+    async def test_returned_builds_do_not_alias_cache(self):
+        """测试修改返回的构筑不影响缓存和其他合并请求的结果"""
+        orchestrator, calls = await self._ready_orchestrator({'result_cache_ttl': 60})
+        pipeline = orchestrator._run_recommendation_pipeline
+        
+        async def pipeline_with_build(request):
+            result = await pipeline(request)
+            result.builds.append(PoE2Build(
+                name="Cached Build", character_class=PoE2CharacterClass.WITCH, level=90,
+                stats=PoE2BuildStats(total_dps=500000, effective_health_pool=6000, fire_resistance=75,
+                                     cold_resistance=75, lightning_resistance=75, chaos_resistance=0)
+            ))
+            return result
+        orchestrator._run_recommendation_pipeline = pipeline_with_build
+        request = UserRequest(character_class=PoE2CharacterClass.WITCH)
+        
+        first, coalesced = await asyncio.gather(
+            orchestrator.generate_build_recommendations(request),
+            orchestrator.generate_build_recommendations(request)
+        )
+        for result in (first, coalesced):
+            result.builds[0].name = "Mutated"
+            result.builds[0].stats.total_dps = 1
+        
+        cached = await orchestrator.generate_build_recommendations(request)
+        assert len(calls) == 1
+        assert cached.metadata.get('cache_hit')
+        assert cached.builds[0].name == "Cached Build"
+        assert cached.builds[0].stats.total_dps == 500000
+    
+    @pytest.mark.asyncio
+    async def test_fallback_results_are_not_cached(self):
+        """测试降级结果不进入缓存"""
+        orchestrator, calls = await self._ready_orchestrator()
+        pipeline = orchestrator._run_recommendation_pipeline
+        orchestrator._run_recommendation_pipeline = lambda request: pipeline(request, fallback=True)
+        request = UserRequest(character_class=PoE2CharacterClass.WITCH)
+        
+        await orchestrator.generate_build_recommendations(request)
+        await orchestrator.generate_build_recommendations(request)
+        
+        assert len(calls) == 2
+        assert not orchestrator._result_cache
+    
+    @pytest.mark.asyncio
+    async def test_cancelling_last_waiter_cancels_computation(self):
+        """测试只有最后一个等待者取消时才取消共享计算"""
+        orchestrator, calls = await self._ready_orchestrator(delay=0.2)
+        request = UserRequest(character_class=PoE2CharacterClass.WITCH)
+        
+        first = asyncio.ensure_future(orchestrator.generate_build_recommendations(request))
+        second = asyncio.ensure_future(orchestrator.generate_build_recommendations(request))
+        await asyncio.sleep(0.01)
+        shared = next(iter(orchestrator._inflight_requests.values()))
+        
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert not shared.cancelled()
+        
+        second.cancel()
+        await asyncio.sleep(0.01)
+        assert shared.cancelled()
+        assert not orchestrator._inflight_requests
+
+
+class TestOrchestratorStreaming:
+    """流式推荐事件测试"""
+    
+    @staticmethod
+    async def _collect(orchestrator, request):
+        return [event async for event in orchestrator.stream_build_recommendations(request)]
+    
+    @pytest.mark.asyncio
+    async def test_event_sequence_matches_batch_result(self):
+        """测试事件顺序：临时结果、逐构筑增量、最终结果，且与批量接口一致"""
+        orchestrator = PoE2AIOrchestrator({'result_cache_ttl': 0})
+        assert await orchestrator.initialize()
+        request = UserRequest(character_class=PoE2CharacterClass.WITCH, validate_with_pob2=True)
+        
+        events = await self._collect(orchestrator, request)
+        
+        assert events[0].event_type == PipelineEventType.PROVISIONAL
+        assert sorted(events[0].build_indices) == [0, 1]
+        assert events[-1].event_type == PipelineEventType.FINAL
+        updates = events[1:-1]
+        assert {(e.stage, e.build_indices[0]) for e in updates} == {
+            (stage, index) for stage in ('market_integration', 'pob2_validation') for index in (0, 1)
+        }
+        assert [e.progress for e in events] == sorted(e.progress for e in events)
+        
+        batch = await orchestrator.generate_build_recommendations(request)
+        # PoB2模拟客户端的属性带随机波动，只比较构筑集合
+        assert {b.name for b in events[-1].result.builds} == {b.name for b in batch.builds}
+    
+    @pytest.mark.asyncio
+    async def test_provisional_results_arrive_before_slow_validation(self):
+        """测试临时结果不等待PoB2计算"""
+        orchestrator = PoE2AIOrchestrator()
+        assert await orchestrator.initialize()
+        calculate = orchestrator._pob2_local.calculate_build_stats
+        
+        async def slow_calculate(build):
+            await asyncio.sleep(0.3)
+            return await calculate(build)
+        orchestrator._pob2_local.calculate_build_stats = slow_calculate
+        
+        start = time.perf_counter()
+        stream = orchestrator.stream_build_recommendations(UserRequest(character_class=PoE2CharacterClass.WITCH))
+        first = await stream.__anext__()
+        
+        assert first.event_type == PipelineEventType.PROVISIONAL
+        assert len(first.builds) == 2
+        assert time.perf_counter() - start < 0.2
+        await stream.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_builds_over_budget_are_removed(self):
+        """测试超出预算的构筑产出移除事件"""
+        orchestrator = PoE2AIOrchestrator()
+        assert await orchestrator.initialize()
+        request = UserRequest(character_class=PoE2CharacterClass.WITCH, max_budget=10.0)
+        
+        events = await self._collect(orchestrator, request)
+        
+        removed = [e for e in events if e.event_type == PipelineEventType.BUILD_REMOVED]
+        assert len(removed) == 1
+        assert removed[0].builds[0].estimated_cost > 10.0
+        assert all(b.estimated_cost <= 10.0 for b in events[-1].result.builds)
+    
+    @pytest.mark.asyncio
+    async def test_cached_request_streams_final_only(self):
+        """测试缓存命中时直接产出最终结果"""
+        orchestrator = PoE2AIOrchestrator()
+        assert await orchestrator.initialize()
+        request = UserRequest(character_class=PoE2CharacterClass.WITCH)
+        
+        await orchestrator.generate_build_recommendations(request)
+        events = await self._collect(orchestrator, request)
+        
+        assert [e.event_type for e in events] == [PipelineEventType.FINAL]
+        assert events[0].result.metadata.get('cache_hit')
+
+
+@pytest.mark.unit
+class TestOrchestratorLatency:
+    """分阶段延迟埋点测试"""
+    
+    @pytest.mark.asyncio
+    async def test_stage_spans_recorded(self):
+        """测试一次请求后记录各阶段耗时"""
+        orchestrator = PoE2AIOrchestrator({'result_cache_ttl': 0})
+        assert await orchestrator.initialize()
+        orchestrator.latency_recorder = LatencyRecorder()
+        
+        await orchestrator.generate_build_recommendations(
+            UserRequest(character_class=PoE2CharacterClass.WITCH, validate_with_pob2=True)
+        )
+        
+        metrics = orchestrator.get_latency_metrics()
+        for stage in ('rag_generation', 'provisional_ranking', 'market_integration',
+                      'pob2_validation', 'final_ranking', 'time_to_first_result', 'total'):
+            assert metrics[f'orchestrator.{stage}']['count'] >= 1
+        assert metrics['orchestrator.market_integration']['count'] == 2
+        assert metrics['orchestrator.total']['p99_ms'] >= metrics['orchestrator.time_to_first_result']['p99_ms']
+        assert 'latency' in orchestrator.get_system_stats()
+    
+    @pytest.mark.asyncio
+    async def test_prometheus_export(self):
+        """测试Prometheus文本导出"""
+        orchestrator = PoE2AIOrchestrator()
+        assert await orchestrator.initialize()
+        orchestrator.latency_recorder = LatencyRecorder()
+        
+        await orchestrator.generate_build_recommendations(UserRequest(character_class=PoE2CharacterClass.WITCH))
+        text = orchestrator.get_latency_metrics(format="prometheus")
+        
+        assert 'poe2build_span_duration_seconds_count{span="orchestrator.total"} 1' in text
+        with pytest.raises(ValueError):
+            orchestrator.get_latency_metrics(format="xml")
@@ -0,0 +1,100 @@
+"""
+单元测试 - BackgroundEventLoop
+
+测试后台持久事件循环：
+- 多次提交共享同一个事件循环
+- 通过Future取消循环中的任务
+- 停止时取消未完成的任务
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.poe2build.utils.async_loop import BackgroundEventLoop
+
+
+@pytest.fixture
+def background_loop():
+    background = BackgroundEventLoop(name="test-loop")
+    yield background
+    background.stop()
+
+
+@pytest.mark.unit
+class TestBackgroundEventLoop:
+    """测试后台事件循环"""
+
+    def test_submissions_share_one_loop(self, background_loop):
+        """测试多次提交的协程运行在同一个循环和线程中"""
+        async def current():
+            return asyncio.get_running_loop(), threading.current_thread().name
+
+        first = background_loop.run(current(), timeout=5)
+        second = background_loop.submit(current()).result(timeout=5)
+
+        assert first == second
+        assert first[0] is background_loop.loop
+        assert first[1] == "test-loop"
+        assert background_loop.is_running
+
+    def test_state_bound_to_loop_survives_requests(self, background_loop):
+        """测试绑定到循环的对象可以跨请求复用"""
+        async def make_queue():
+            return asyncio.Queue()
+
+        async def round_trip(queue, value):
+            await queue.put(value)
+            return await queue.get()
+
+        queue = background_loop.run(make_queue(), timeout=5)
+        assert background_loop.run(round_trip(queue, 1), timeout=5) == 1
+        assert background_loop.run(round_trip(queue, 2), timeout=5) == 2
+
+    def test_cancelling_future_cancels_task(self, background_loop):
+        """测试取消Future会取消事件循环中的任务"""
+        started = threading.Event()
+        cancelled = threading.Event()
+
+        async def long_running():
+            started.set()
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        future = background_loop.submit(long_running())
+        assert started.wait(5)
+        future.cancel()
+
+        assert cancelled.wait(5)
+        assert future.cancelled()
+
+    def test_stop_cancels_pending_tasks(self):
+        """测试停止时取消未完成任务并关闭循环"""
+        background = BackgroundEventLoop()
+        started = threading.Event()
+
+        async def long_running():
+            started.set()
+            await asyncio.sleep(60)
+
+        future = background.submit(long_running())
+        assert started.wait(5)
+        loop = background.loop
+
+        background.stop()
+
+        assert future.cancelled()
+        assert not background.is_running
+        assert loop.is_closed()
+
+    def test_run_inside_loop_thread_is_rejected(self, background_loop):
+        """测试在循环线程内同步等待会报错而不是死锁"""
+        async def nested():
+            background_loop.run(asyncio.sleep(0))
+
+        with pytest.raises(RuntimeError):
+            background_loop.run(nested(), timeout=5)
@@ -0,0 +1,125 @@
+"""
+单元测试 - PoB2构筑导入器
+
+测试增量解析和批量导入：
+- iterparse解析结果与完整解析一致
+- 目录和压缩包展开
+- 进程池批量导入保持输入顺序
+"""
+
+import base64
+import gzip
+import json
+import zipfile
+
+import pytest
+
+from src.poe2build.pob2.build_importer import PoB2BuildImporter
+
+
+def _build_xml(level: int, skill: str = "Fireball") -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<PathOfBuilding version="2_0">'
+        f'<Build className="Witch" ascendClassName="Infernalist" level="{level}"/>'
+        f'<Skills><SkillSet id="1" slot="Body Armour"><Gem skillId="{skill}" level="20" support="0"/>'
+        '<Gem skillId="Added Fire Damage" level="18" quality="10" support="1"/></SkillSet></Skills>'
+        '<Items><Item slot="Helmet" name="Doom Crown" rarity="rare">Rarity: Rare</Item>'
+        '<Item slot="Helmet" name="Second Crown">Rarity: Magic</Item>'
+        '<Item slot="Flask 1" name="Ignored"/></Items>'
+        '<Tree classId="3">100,200,300</Tree>'
+        '<Config><Input name="enemyLevel" value="84"/></Config>'
+        '</PathOfBuilding>'
+    )
+
+
+@pytest.fixture
+def importer():
+    return PoB2BuildImporter()
+
+
+@pytest.mark.unit
+class TestPoB2BuildImporter:
+    """测试PoB2构筑导入器"""
+
+    def test_incremental_parse_matches_full_parse(self, importer, tmp_path):
+        """测试增量解析与对完整文档提取的结果一致"""
+        import xml.etree.ElementTree as ET
+
+        xml_content = _build_xml(85)
+        path = tmp_path / "build.xml"
+        path.write_text(xml_content, encoding="utf-8")
+
+        result = importer.import_build(path)
+        expected = importer._normalize_build_data(
+            importer._extract_xml_build_data(ET.fromstring(xml_content))
+        )
+
+        assert result['success']
+        assert result['data'] == expected
+        assert result['data']['character']['level'] == 85
+        assert result['data']['skills'][0]['main_skill']['name'] == "Fireball"
+        assert result['data']['items']['helmet']['name'] == "Second Crown"
+        assert result['data']['passive_tree']['allocated_nodes'] == [100, 200, 300]
+        assert importer.import_build(xml_content)['data'] == expected
+
+    def test_invalid_xml_reports_error(self, importer):
+        """测试非PathOfBuilding文档和不完整XML返回失败结果"""
+        assert not importer.import_build('<PathOfBuilding><Build>')['success']
+        assert not importer.import_build('<?xml version="1.0"?><Other/>')['success']
+
+    @pytest.mark.parametrize("content", ['<PathOfBuilding><Build>', '<?xml version="1.0"?><Other/>'])
+    def test_invalid_xml_file_is_closed(self, importer, tmp_path, monkeypatch, content):
+        """测试XML文件解析出错（ParseError/ValueError）时文件句柄已关闭"""
+        import xml.etree.ElementTree as ET
+
+        sources = []
+        iterparse = ET.iterparse
+
+        def recording_iterparse(source, *args, **kwargs):
+            sources.append(source)
+            return iterparse(source, *args, **kwargs)
+
+        monkeypatch.setattr(ET, "iterparse", recording_iterparse)
+        path = tmp_path / "broken.xml"
+        path.write_text(content, encoding="utf-8")
+
+        assert not importer.import_build(path)['success']
+        assert len(sources) == 1
+        assert sources[0].closed
+
+    def test_directory_and_archive_sources(self, importer, tmp_path):
+        """测试目录和压缩包被展开并标注来源"""
+        (tmp_path / "a.xml").write_text(_build_xml(10), encoding="utf-8")
+        (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+        with zipfile.ZipFile(tmp_path / "b.zip", "w") as archive:
+            archive.writestr("x.xml", _build_xml(20))
+            archive.writestr("y.xml", _build_xml(30))
+
+        results = list(importer.import_builds([tmp_path], max_workers=1))
+
+        assert [r['data']['character']['level'] for r in results] == [10, 20, 30]
+        assert results[0]['source'] == str(tmp_path / "a.xml")
+        assert results[1]['source'] == f"{tmp_path / 'b.zip'}!x.xml"
+
+    def test_batch_import_with_worker_pool(self, importer, tmp_path):
+        """测试进程池批量导入与逐个导入结果相同且保持顺序"""
+        paths = []
+        for level in range(1, 41):
+            path = tmp_path / f"build_{level:02d}.xml"
+            path.write_text(_build_xml(level), encoding="utf-8")
+            paths.append(path)
+
+        import_code = base64.b64encode(gzip.compress(json.dumps({
+            'build_name': 'Imported ' * 50,
+            'character': {'class': 'Ranger', 'level': 77}
+        }).encode('utf-8'))).decode('ascii')
+
+        sources = paths + [import_code]
+        pooled = list(importer.import_builds(sources, max_workers=2))
+        serial = list(importer.import_builds(sources, max_workers=1))
+
+        assert pooled == serial
+        assert [r['data']['character']['level'] for r in pooled] == list(range(1, 41)) + [77]
+        assert pooled[-1]['source'] is None
+        assert pooled[-1]['format'] == 'import_code'
@@ -0,0 +1,196 @@
+"""
+单元测试 - 构筑组合搜索
+
+测试束搜索构筑引擎：
+- 生成约束（DPS、EHP、预算、禁用物品）
+- 辅助宝石与主技能兼容
+- 时间预算下的anytime结果
+- 与PoE2BuildGenerator的集成
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.poe2build.core.build_generator import PoE2BuildGenerator, GenerationConstraints, BuildComplexity
+from src.poe2build.core.build_search import BuildSearchEngine, BuildSearchSpace
+from src.poe2build.models.build import PoE2Build, PoE2BuildGoal, PoE2BuildStats
+from src.poe2build.models.characters import PoE2CharacterClass, PoE2Ascendancy
+
+
+@pytest.fixture
+def witch_space():
+    return BuildSearchSpace.default(PoE2CharacterClass.WITCH)
+
+
+@pytest.mark.unit
+class TestBuildSearchEngine:
+    """测试构筑搜索引擎"""
+    
+    def test_results_respect_constraints(self, witch_space):
+        """测试所有结果都满足最低DPS和最高预算"""
+        constraints = GenerationConstraints(min_dps=800000, max_budget=20)
+        result = BuildSearchEngine().search(
+            witch_space, PoE2BuildGoal.BOSS_KILLING, constraints, max_results=300
+        )
+        
+        assert result.exhausted
+        assert len(result.candidates) >= 200
+        for candidate in result.candidates:
+            assert candidate.dps >= 800000
+            assert candidate.cost <= 20
+        
+        scores = [candidate.score for candidate in result.candidates]
+        assert scores == sorted(scores, reverse=True)
+    
+    def test_supports_compatible_with_skill(self, witch_space):
+        """测试辅助宝石与主技能标签兼容且不重复"""
+        result = BuildSearchEngine().search(
+            witch_space, PoE2BuildGoal.CLEAR_SPEED, GenerationConstraints(), max_results=100
+        )
+        
+        for candidate in result.candidates:
+            names = [support.name for support in candidate.supports]
+            assert len(names) == len(set(names))
+            assert witch_space.min_supports <= len(names) <= witch_space.max_supports
+            for support in candidate.supports:
+                assert support.tags & candidate.skill.tags
+    
+    def test_forbidden_items_and_complexity(self, witch_space):
+        """测试禁用物品不出现，复杂度限制关键石数量"""
+        forbidden = witch_space.supports[0].name
+        constraints = GenerationConstraints(
+            forbidden_items=[forbidden], complexity_limit=BuildComplexity.BEGINNER
+        )
+        result = BuildSearchEngine().search(
+            witch_space, PoE2BuildGoal.ENDGAME_CONTENT, constraints, max_results=100
+        )
+        
+        assert result.candidates
+        for candidate in result.candidates:
+            assert forbidden not in [support.name for support in candidate.supports]
+            assert len(candidate.keystones) == 0
+    
+    def test_restricted_search(self, witch_space):
+        """测试限定升华和主技能"""
+        skill = witch_space.skills[0].name
+        result = BuildSearchEngine().search(
+            witch_space, PoE2BuildGoal.ENDGAME_CONTENT, GenerationConstraints(),
+            ascendancy=PoE2Ascendancy.INFERNALIST, main_skill=skill
+        )
+        
+        assert result.candidates
+        for candidate in result.candidates:
+            assert candidate.ascendancy.ascendancy == PoE2Ascendancy.INFERNALIST
+            assert candidate.skill.name == skill
+    
+    def test_time_budget_returns_partial_results(self, witch_space):
+        """测试时间预算耗尽时仍返回已找到的结果"""
+        result = BuildSearchEngine(beam_width=4096).search(
+            witch_space, PoE2BuildGoal.ENDGAME_CONTENT, GenerationConstraints(),
+            time_budget=0.01
+        )
+        
+        assert not result.exhausted
+        assert result.candidates
+    
+    def test_impossible_constraints_are_pruned(self, witch_space):
+        """测试不可能满足的约束在第一层被剪枝"""
+        result = BuildSearchEngine().search(
+            witch_space, PoE2BuildGoal.ENDGAME_CONTENT, GenerationConstraints(max_budget=0.1)
+        )
+        
+        assert result.candidates == []
+        assert result.pruned_states == result.expanded_states
+
+
+@pytest.mark.unit
+class TestBuildGeneratorSearch:
+    """测试构筑生成器使用组合搜索"""
+    
+    @pytest.mark.asyncio
+    async def test_generate_builds_from_search(self):
+        """测试生成的构筑有效且满足约束"""
+        generator = PoE2BuildGenerator()
+        constraints = GenerationConstraints(
+            min_dps=500000, max_budget=15, required_resistances={"chaos": 20}
+        )
+        
+        builds = await generator.generate_builds(
+            PoE2CharacterClass.RANGER, PoE2BuildGoal.BOSS_KILLING, constraints, count=5
+        )
+        
+        assert len(builds) == 5
+        combinations = {(build.name, tuple(build.support_gems), tuple(build.passive_keystones)) for build in builds}
+        assert len(combinations) == 5
+        for build in builds:
+            assert build.validate()
+            assert build.stats.total_dps >= 500000
+            assert build.estimated_cost <= 15
+            assert build.stats.chaos_resistance == 20
+            assert build.goal == PoE2BuildGoal.BOSS_KILLING
+    
+    @pytest.mark.asyncio
+    async def test_search_does_not_block_event_loop(self, monkeypatch):
+        """测试组合搜索在线程池中执行，期间事件循环仍能调度其他任务"""
+        generator = PoE2BuildGenerator()
+        search = generator._search_engine.search
+        
+        def slow_search(*args, **kwargs):
+            time.sleep(0.3)
+            return search(*args, **kwargs)
+        monkeypatch.setattr(generator._search_engine, "search", slow_search)
+        
+        ticks = []
+        
+        async def ticker():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+        
+        ticking = asyncio.ensure_future(ticker())
+        builds = await generator.generate_builds(
+            PoE2CharacterClass.WITCH, PoE2BuildGoal.CLEAR_SPEED, GenerationConstraints(), count=2
+        )
+        ticking.cancel()
+        
+        assert len(builds) == 2
+        assert len(ticks) >= 10
+        assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.2
+    
+    def test_search_build_candidates_returns_hundreds(self):
+        """测试单次请求可返回数百个有效组合"""
+        generator = PoE2BuildGenerator()
+        candidates = generator.search_build_candidates(
+            PoE2CharacterClass.SORCERESS, PoE2BuildGoal.CLEAR_SPEED,
+            GenerationConstraints(), max_results=300
+        )
+        
+        assert len(candidates) >= 200
+    
+    @pytest.mark.asyncio
+    async def test_optimize_build_meets_constraints(self):
+        """测试优化后的构筑满足DPS约束并保留主技能"""
+        generator = PoE2BuildGenerator()
+        skill = generator._get_search_space(PoE2CharacterClass.WITCH).skills[0].name
+        build = PoE2Build(
+            name="Weak Build",
+            character_class=PoE2CharacterClass.WITCH,
+            ascendancy=PoE2Ascendancy.INFERNALIST,
+            level=85,
+            stats=PoE2BuildStats(
+                total_dps=1000, effective_health_pool=3000,
+                fire_resistance=75, cold_resistance=75,
+                lightning_resistance=75, chaos_resistance=-30
+            ),
+            goal=PoE2BuildGoal.ENDGAME_CONTENT,
+            main_skill_gem=skill
+        )
+        
+        optimized = await generator.optimize_build(build, GenerationConstraints(min_dps=300000))
+        
+        assert optimized.main_skill_gem == skill
+        assert optimized.ascendancy == PoE2Ascendancy.INFERNALIST
+        assert optimized.level == 85
+        assert optimized.stats.total_dps >= 300000
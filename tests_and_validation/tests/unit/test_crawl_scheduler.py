@@ -0,0 +1,236 @@
+"""
+单元测试 - 爬取调度器
+
+测试有界并发、可续爬的详情页爬取：
+- 并发爬取结果保持URL顺序
+- 失败URL在下次运行时重试，已完成URL不重复爬取
+- 检查点持久化到sqlite文件
+- 不同爬虫共享检查点文件时互不干扰，过期记录重新爬取
+- 按主机限速
+- 根目录爬虫与核心包爬虫共用同一个进程内限速器
+"""
+
+import importlib
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.poe2build.data_sources import crawl_scheduler
+from src.poe2build.data_sources.crawl_scheduler import (
+    CrawlCheckpoint, CrawlScheduler, HostRateLimiter
+)
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+
+def _urls(count: int, host: str = "poe2db.test") -> list:
+    return [f"https://{host}/us/gem_{i}" for i in range(count)]
+
+
+def _parse(url: str, content: str) -> dict:
+    return {"detail_url": url, "name": content}
+
+
+@pytest.fixture
+def fast_limiter():
+    return HostRateLimiter(requests_per_second=10000, burst_capacity=10000)
+
+
+@pytest.mark.unit
+class TestCrawlScheduler:
+    """测试爬取调度器"""
+    
+    def test_parallel_crawl_keeps_order(self, fast_limiter):
+        """测试并发爬取的结果按URL入队顺序返回"""
+        active = []
+        peak = []
+        lock = threading.Lock()
+        
+        def fetch(url):
+            with lock:
+                active.append(url)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.remove(url)
+            return url.rsplit("/", 1)[-1]
+        
+        urls = _urls(30)
+        result = CrawlScheduler(fetch, _parse, max_workers=4, rate_limiter=fast_limiter).run(urls, "skill_gem")
+        
+        assert result.completed == 30 and result.failed == 0
+        assert [record["detail_url"] for record in result.records] == urls
+        assert 1 < max(peak) <= 4
+    
+    def test_resume_retries_only_unfinished(self, fast_limiter):
+        """测试续爬只重试失败的URL，超过尝试次数后不再重试"""
+        checkpoint = CrawlCheckpoint()
+        urls = _urls(10)
+        fetched = []
+        
+        def flaky_fetch(url):
+            fetched.append(url)
+            if url.endswith(("_3", "_7")):
+                raise ConnectionError("reset by peer")
+            return "ok"
+        
+        first = CrawlScheduler(flaky_fetch, _parse, checkpoint, rate_limiter=fast_limiter, max_attempts=2)
+        result = first.run(urls, "skill_gem")
+        assert result.failed == 2 and set(result.errors) == {urls[3], urls[7]}
+        
+        fetched.clear()
+        second = CrawlScheduler(lambda url: fetched.append(url) or "ok", _parse, checkpoint,
+                                rate_limiter=fast_limiter, max_attempts=2)
+        result = second.run(urls, "skill_gem")
+        
+        assert sorted(fetched) == sorted([urls[3], urls[7]])
+        assert result.resumed == 8 and result.completed == 2
+        assert [record["detail_url"] for record in result.records] == urls
+        
+        def failing_fetch(url):
+            fetched.append(url)
+            raise ConnectionError("reset by peer")
+        
+        fetched.clear()
+        always_failing = CrawlScheduler(failing_fetch, _parse, checkpoint, rate_limiter=fast_limiter, max_attempts=1)
+        always_failing.run(_urls(12)[10:], "skill_gem")
+        always_failing.run(_urls(12)[10:], "skill_gem")
+        assert len(fetched) == 2
+        assert checkpoint.progress("skill_gem") == {"pending": 0, "done": 10, "failed": 2}
+    
+    def test_checkpoint_persists_across_instances(self, fast_limiter, tmp_path):
+        """测试中途停止后，新进程打开同一检查点文件可以续爬"""
+        path = tmp_path / "checkpoint.sqlite"
+        urls = _urls(20)
+        
+        scheduler = CrawlScheduler(lambda url: "ok", _parse, CrawlCheckpoint(path),
+                                   max_workers=1, rate_limiter=fast_limiter)
+        original_parse = scheduler.parse
+        
+        def stopping_parse(url, content):
+            if url == urls[4]:
+                scheduler.stop()
+            return original_parse(url, content)
+        
+        scheduler.parse = stopping_parse
+        partial = scheduler.run(urls, "item:unique")
+        scheduler.checkpoint.close()
+        assert 5 <= partial.completed < 20
+        
+        reopened = CrawlCheckpoint(path)
+        assert reopened.progress("item:unique")["done"] == partial.completed
+        result = CrawlScheduler(lambda url: "ok", _parse, reopened, rate_limiter=fast_limiter).run(urls, "item:unique")
+        
+        assert result.resumed == partial.completed
+        assert result.completed == 20 - partial.completed
+        assert len(result.records) == 20
+        assert reopened.progress("skill_gem")["done"] == 0
+    
+    def test_two_crawlers_share_checkpoint_file(self, fast_limiter, tmp_path):
+        """测试两个爬虫共享同一检查点文件和URL时，各自的记录互不覆盖"""
+        path = tmp_path / "checkpoint.sqlite"
+        urls = _urls(5)
+        
+        def detail_parse(url, content):
+            return {"detail_url": url, "requirements": {"level": len(content)}}
+        
+        scraper = CrawlScheduler(lambda url: "ok", _parse, CrawlCheckpoint(path), rate_limiter=fast_limiter)
+        crawler = CrawlScheduler(lambda url: "okay", detail_parse, CrawlCheckpoint(path), rate_limiter=fast_limiter)
+        
+        scraped = scraper.run(urls, "poe2db_scraper:skill_gem")
+        crawled = crawler.run(urls, "poe2db_crawler:skill_gem")
+        assert crawled.resumed == 0 and crawled.completed == 5
+        
+        rescraped = scraper.run(urls, "poe2db_scraper:skill_gem")
+        assert rescraped.resumed == 5 and rescraped.completed == 0
+        assert rescraped.records == scraped.records
+        assert all(record["name"] == "ok" for record in rescraped.records)
+        assert [record["requirements"] for record in crawled.records] == [{"level": 4}] * 5
+    
+    def test_stale_entries_are_recrawled(self, fast_limiter):
+        """测试超过有效期的已完成URL在下次运行时重新爬取"""
+        checkpoint = CrawlCheckpoint()
+        urls = _urls(3)
+        fetched = []
+        
+        def fetch(url):
+            fetched.append(url)
+            return "ok"
+        
+        CrawlScheduler(fetch, _parse, checkpoint, rate_limiter=fast_limiter, max_age=60).run(urls, "skill_gem")
+        CrawlScheduler(fetch, _parse, checkpoint, rate_limiter=fast_limiter, max_age=60).run(urls, "skill_gem")
+        assert len(fetched) == 3
+        
+        time.sleep(0.01)
+        result = CrawlScheduler(fetch, _parse, checkpoint, rate_limiter=fast_limiter,
+                                max_age=0.001).run(urls, "skill_gem")
+        assert len(fetched) == 6
+        assert result.resumed == 0 and result.completed == 3
+    
+    def test_legacy_checkpoint_is_discarded(self, tmp_path):
+        """测试旧版本（只按URL区分）的检查点文件被丢弃重建"""
+        path = tmp_path / "checkpoint.sqlite"
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE crawl_tasks (url TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+                     "attempts INTEGER NOT NULL DEFAULT 0, record TEXT, error TEXT, updated_at REAL NOT NULL)")
+        conn.execute("INSERT INTO crawl_tasks VALUES ('https://poe2db.test/us/gem_0', 'skill_gem', 'done', 1, "
+                     "'{\"url\": \"https://poe2db.test/us/gem_0\"}', NULL, 0)")
+        conn.commit()
+        conn.close()
+        
+        checkpoint = CrawlCheckpoint(path)
+        assert checkpoint.progress("skill_gem")["done"] == 0
+        assert checkpoint.enqueue(_urls(1), "skill_gem") == 1
+        assert checkpoint.enqueue(_urls(1), "other") == 1
+    
+    def test_rate_limit_is_per_host(self):
+        """测试同一主机共享速率限制，不同主机互不影响"""
+        limiter = HostRateLimiter(requests_per_second=50, burst_capacity=1)
+        
+        start = time.monotonic()
+        CrawlScheduler(lambda url: "ok", _parse, max_workers=4, rate_limiter=limiter).run(_urls(6), "a")
+        same_host = time.monotonic() - start
+        
+        start = time.monotonic()
+        for host in ("a.test", "b.test", "c.test"):
+            assert limiter.acquire(f"https://{host}/page")
+        other_hosts = time.monotonic() - start
+        
+        assert same_host >= 0.09
+        assert other_hosts < 0.05
+        
+        slow = HostRateLimiter(requests_per_second=0.1, burst_capacity=1)
+        assert slow.acquire("https://x.test/1", timeout=0)
+        assert not slow.acquire("https://x.test/2", timeout=0.01)
+
+
+@pytest.mark.unit
+class TestSharedRateLimiter:
+    """测试进程内共享的主机限速器"""
+    
+    def test_root_crawler_reuses_loaded_package(self, tmp_path, monkeypatch):
+        """测试根目录爬虫沿用已加载的核心包，与 PoE2DBScraper 共用同一个限速器"""
+        from src.poe2build.data_sources.poe2db_scraper import PoE2DBScraper
+        
+        monkeypatch.syspath_prepend(str(REPO_ROOT))
+        monkeypatch.delitem(sys.modules, "poe2build", raising=False)
+        monkeypatch.delitem(sys.modules, "dynamic_data_crawlers", raising=False)
+        crawlers = importlib.import_module("dynamic_data_crawlers")
+        # 数据源的缓存目录相对于当前目录创建
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "cache").mkdir()
+        
+        assert "poe2build" not in sys.modules
+        assert crawlers.CrawlScheduler is CrawlScheduler
+        
+        shared = crawl_scheduler.get_shared_rate_limiter()
+        crawler = crawlers.PoE2DBCrawler(cache_dir="poe2db_cache")
+        scraper = PoE2DBScraper(use_resilience=False, checkpoint_path=None)
+        assert crawler.rate_limiter is scraper.rate_limiter is shared
+        
+        limiter = HostRateLimiter()
+        assert PoE2DBScraper(use_resilience=False, checkpoint_path=None, rate_limiter=limiter).rate_limiter is limiter
@@ -0,0 +1,214 @@
+"""
+单元测试 - PoB2导入代码编码器
+
+测试流式导入代码编码：
+- 与ElementTree序列化结果一致
+- 片段写入和转义
+- 压缩级别配置
+- RAG适配器和导入代码生成器（单个/批量）的编码结果
+"""
+
+import base64
+import re
+import sys
+import zlib
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.poe2build.pob2.import_code_encoder import (
+    PoB2ImportCodeEncoder, element_fragment, escape_attribute
+)
+from src.poe2build.pob2.rag_pob2_adapter import RAGPoB2Adapter, PoB2BuildTemplate
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+
+def _sample_tree() -> ET.Element:
+    root = ET.Element('PathOfBuilding')
+    build = ET.SubElement(root, 'Build')
+    build.set('level', '90')
+    build.set('characterClass', 'Witch')
+    skills = ET.SubElement(root, 'Skills')
+    for i in range(1, 4):
+        skill = ET.SubElement(skills, 'Skill')
+        skill.set('skillId', f'Skill{i}')
+        skill.set('enabled', 'true')
+    notes = ET.SubElement(root, 'Notes')
+    notes.text = 'a & b <c>\n"引号"'
+    return root
+
+
+@pytest.mark.unit
+class TestPoB2ImportCodeEncoder:
+    """测试导入代码编码器"""
+
+    def test_encode_element_matches_elementtree(self):
+        """测试编码内容与ElementTree紧凑序列化一致"""
+        root = _sample_tree()
+        encoder = PoB2ImportCodeEncoder()
+
+        import_code = encoder.encode_element(root)
+
+        assert encoder.decode(import_code) == ET.tostring(root, encoding='utf-8')
+        assert zlib.decompress(base64.b64decode(import_code)) == ET.tostring(root, encoding='utf-8')
+
+    def test_stream_fragments_match_elementtree(self):
+        """测试逐段写入与ElementTree序列化一致"""
+        root = _sample_tree()
+        stream = PoB2ImportCodeEncoder().open(keep_xml=True)
+
+        stream.start('PathOfBuilding')
+        stream.element('Build', (('level', '90'), ('characterClass', 'Witch')))
+        stream.start('Skills')
+        for i in range(1, 4):
+            stream.element('Skill', (('skillId', f'Skill{i}'), ('enabled', 'true')))
+        stream.end('Skills')
+        stream.text_element('Notes', (), 'a & b <c>\n"引号"')
+        stream.end('PathOfBuilding')
+        import_code = stream.finish()
+
+        expected = ET.tostring(root, encoding='utf-8')
+        assert stream.xml.encode('utf-8') == expected
+        assert stream.xml_size == len(expected)
+        assert PoB2ImportCodeEncoder.decode(import_code) == expected
+        assert stream.finish() == import_code
+        with pytest.raises(ValueError):
+            stream.write(b'<Extra />')
+
+    def test_fragments_are_cached_and_escaped(self):
+        """测试重复片段复用同一对象且属性正确转义"""
+        attributes = (('id', 'Helm'),)
+        first = element_fragment('Item', attributes, 'Rarity: Normal\nLeather Cap')
+
+        assert element_fragment('Item', attributes, 'Rarity: Normal\nLeather Cap') is first
+        assert escape_attribute('a"b\n<c>') == 'a&quot;b&#10;&lt;c&gt;'
+        assert ET.fromstring(element_fragment('Node', (('name', 'x & "y"'),))).get('name') == 'x & "y"'
+
+    def test_compression_level(self):
+        """测试压缩级别影响代码长度且非法级别被拒绝"""
+        root = _sample_tree()
+        for _ in range(50):
+            node = ET.SubElement(root, 'Node')
+            node.set('allocated', 'true')
+
+        stored = PoB2ImportCodeEncoder(compression_level=0).encode_element(root)
+        compressed = PoB2ImportCodeEncoder(compression_level=9).encode_element(root)
+
+        assert len(compressed) < len(stored)
+        assert PoB2ImportCodeEncoder.decode(stored) == PoB2ImportCodeEncoder.decode(compressed)
+        with pytest.raises(ValueError):
+            PoB2ImportCodeEncoder(compression_level=12)
+
+    def test_large_stream_flushes_in_chunks(self):
+        """测试超过缓冲阈值的大文档可以正确还原"""
+        stream = PoB2ImportCodeEncoder().open()
+        stream.start('Tree')
+        for node_id in range(5000):
+            stream.element('Node', (('id', str(node_id)), ('allocated', 'true')))
+        stream.end('Tree')
+
+        root = ET.fromstring(PoB2ImportCodeEncoder.decode(stream.finish()))
+
+        assert len(root) == 5000
+        assert root[-1].get('id') == '4999'
+
+
+def _load_generator_module():
+    """导入仓库根目录的导入代码生成器脚本"""
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    import pob2_import_code_generator
+    return pob2_import_code_generator
+
+
+def _batch_builds(count: int):
+    classes = [('Ranger', 'Deadeye', 'Lightning Arrow'), ('Witch', 'Infernalist', 'Fireball')]
+    builds = []
+    for i in range(count):
+        character_class, ascendancy, main_skill = classes[i % 2]
+        builds.append({
+            'character_class': character_class,
+            'ascendancy': ascendancy,
+            'level': 80 + i % 20,
+            'main_skill': main_skill,
+            'support_gems': ['Multiple Projectiles', 'Added Lightning Damage', 'Pierce'][:i % 4],
+            'total_dps': 500000 + i * 1000,
+            'life': 4000 + i,
+            'energy_shield': 800,
+            'total_cost': 10.0 + i,
+            'notes': f'构筑 {i} & <测试>'
+        })
+    return builds
+
+
+def _decoded_xml(import_code: str) -> bytes:
+    """解码导入代码，去掉备注中每次生成都不同的时间戳"""
+    xml = PoB2ImportCodeEncoder.decode(import_code)
+    return re.sub('生成时间: [0-9.]+'.encode('utf-8'), b'', xml)
+
+
+@pytest.mark.unit
+class TestRAGPoB2AdapterImportCode:
+    """测试RAG适配器通过编码器生成导入代码"""
+
+    def test_import_code_matches_build_xml(self):
+        """测试导入代码解码后与构建XML的ElementTree序列化一致"""
+        adapter = RAGPoB2Adapter(pob2_client=Mock())
+        template = PoB2BuildTemplate(
+            class_name='Witch',
+            ascendancy='Infernalist',
+            level=92,
+            skill_gems={'main': ['Fireball', 'Spell Echo'], 'aura': ['Clarity']},
+            equipment={
+                'Weapon': {'rarity': 'Rare', 'name': 'Dusk "Song"', 'base_type': 'Chiming Staff',
+                           'quality': 20, 'explicit_mods': ['+1 to Level of all Fire Spell Skills']},
+                'Helmet': {'name': 'Leather Cap'}
+            },
+            passive_tree=[101, 202, 303],
+            notes='火球 & <流>\n第二行'
+        )
+
+        import_code = adapter._generate_pob2_import_code(template)
+        expected = ET.tostring(adapter._create_build_xml(template), encoding='utf-8')
+
+        assert import_code
+        assert PoB2ImportCodeEncoder.decode(import_code) == expected
+        assert adapter._generate_pob2_import_code(template) == import_code
+
+
+@pytest.mark.unit
+class TestImportCodeGeneratorBatch:
+    """测试导入代码生成器的批量生成"""
+
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_batch_matches_single(self, max_workers):
+        """测试批量（逐个/进程池）生成的代码解码后与单个生成一致且顺序不变"""
+        module = _load_generator_module()
+        generator = module.PoB2ImportCodeGenerator()
+        builds = _batch_builds(module.BATCH_POOL_THRESHOLD + 4)
+
+        batch = generator.generate_batch(builds, max_workers=max_workers)
+        single = [generator.generate_pob2_import_code(build) for build in builds]
+
+        assert len(batch) == len(builds)
+        for batch_result, single_result in zip(batch, single):
+            assert batch_result.is_valid and single_result.is_valid
+            assert batch_result.build_hash == single_result.build_hash
+            assert _decoded_xml(batch_result.import_code) == _decoded_xml(single_result.import_code)
+            assert PoB2ImportCodeEncoder.decode(batch_result.import_code) == \
+                batch_result.xml_content.encode('utf-8')
+
+    def test_batch_keeps_invalid_builds(self):
+        """测试无效构筑在批量结果中保留原位置"""
+        module = _load_generator_module()
+        generator = module.PoB2ImportCodeGenerator()
+        builds = _batch_builds(3)
+        builds[1] = {'character_class': 'Unknown'}
+
+        results = generator.generate_batch(builds)
+
+        assert [result.is_valid for result in results] == [True, False, True]
+        assert results[1].import_code == ""
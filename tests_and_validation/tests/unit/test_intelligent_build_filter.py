@@ -0,0 +1,94 @@
+"""
+单元测试 - 智能构筑过滤器
+
+测试仓库根目录的 intelligent_build_filter：
+- evaluate_builds 批量过滤与逐个 _comprehensive_filter 的判定和调整评分一致
+- optimize_viable_builds 与逐个过滤再优化的结果一致
+"""
+
+import copy
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from intelligent_build_filter import IntelligentBuildFilter  # noqa: E402
+from realistic_build_generator import RealisticBuild  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def build_filter():
+    return IntelligentBuildFilter()
+
+
+def _random_builds(build_filter, count, seed):
+    """随机构筑：数值覆盖各过滤阈值两侧，并混入未知技能/辅助宝石/升华"""
+    rng = random.Random(seed)
+    generator = build_filter.generator
+    skills = list(generator.poe2_skills) + ["Unknown Skill"]
+    supports = list(generator.poe2_supports) + ["Unknown Support"]
+    ascendancies = list(generator.poe2_ascendancies) + [""]
+
+    builds = []
+    for index in range(count):
+        stat_requirements = {attr: rng.choice([rng.randint(0, 600), 350, 351, 500, 501])
+                             for attr in rng.sample(["str", "dex", "int"], rng.randint(0, 3))}
+        builds.append(RealisticBuild(
+            name=f"Build {index}",
+            character_class="Ranger",
+            ascendancy=rng.choice(ascendancies),
+            main_skill=rng.choice(skills),
+            support_gems=rng.sample(supports, rng.randint(0, 5)),
+            calculated_dps=rng.choice([rng.randint(0, 5000), 499, 500]),
+            calculated_ehp=5000,
+            mana_cost=rng.choice([rng.randint(0, 260), 120, 121, 200, 201]),
+            stat_requirements=stat_requirements,
+            viability_score=rng.choice([rng.uniform(0.0, 10.0), 5.0, 7.0, 7.5, 9.5, 10.0]),
+            realism_score=rng.uniform(0.0, 10.0),
+            meta_deviation=0.5,
+            skill_synergies=[],
+            potential_problems=[],
+            scaling_analysis={},
+            gear_dependencies=[]
+        ))
+    return builds
+
+
+@pytest.mark.unit
+class TestEvaluateBuilds:
+    """测试批量严格过滤"""
+
+    def test_matches_comprehensive_filter(self, build_filter):
+        """测试每个构筑的可行性和调整后评分与 _comprehensive_filter 完全一致"""
+        builds = _random_builds(build_filter, 5000, seed=44)
+
+        viable, adjusted_scores = build_filter.evaluate_builds(builds)
+
+        expected = [build_filter._comprehensive_filter(build) for build in builds]
+        assert viable.tolist() == [result["viable"] for result in expected]
+        assert adjusted_scores.tolist() == [result["adjusted_score"] for result in expected]
+        assert 0 < int(viable.sum()) < len(builds)
+
+    def test_empty_input(self, build_filter):
+        """测试空列表返回空数组"""
+        viable, adjusted_scores = build_filter.evaluate_builds([])
+
+        assert viable.shape == adjusted_scores.shape == (0,)
+
+    def test_optimize_viable_builds_matches_per_build(self, build_filter):
+        """测试整批过滤优化与逐个过滤再优化的结果一致（保持输入顺序）"""
+        builds = _random_builds(build_filter, 1000, seed=45)
+
+        expected = []
+        for build in copy.deepcopy(builds):
+            result = build_filter._comprehensive_filter(build)
+            if result["viable"]:
+                build.viability_score = result["adjusted_score"]
+                expected.append(build_filter._optimize_build(build))
+
+        assert build_filter.optimize_viable_builds(builds) == expected
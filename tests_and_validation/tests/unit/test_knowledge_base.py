@@ -0,0 +1,193 @@
+"""
+单元测试 - PoE2KnowledgeBase
+
+测试知识库的增量更新与持久化：
+- 运行聚合的增量加减
+- 追加式变更日志与压缩（压缩中断后不重复重放）
+"""
+
+import pytest
+
+from src.poe2build.rag.models import (
+    PoE2BuildData, SkillGemSetup, ItemInfo, BuildGoal, DataQuality
+)
+from src.poe2build.rag.knowledge_base import PoE2KnowledgeBase, KnowledgeType
+
+
+def _make_build(index: int, character_class: str = "Witch",
+                skill: str = "Fireball", weapon: str = "Chiming Staff") -> PoE2BuildData:
+    return PoE2BuildData(
+        character_name=f"Char{index}",
+        character_class=character_class,
+        ascendancy="Infernalist",
+        main_skill_setup=SkillGemSetup(main_skill=skill),
+        weapon=ItemInfo(name=weapon),
+        passive_keystones=["Chaos Inoculation"],
+        popularity_rank=10 + index,
+        total_cost=3.0,
+        build_goal=BuildGoal.BALANCED,
+        data_quality=DataQuality.HIGH
+    )
+
+
+def _summary(kb: PoE2KnowledgeBase):
+    patterns = {
+        pid: (round(p.success_rate, 6), round(p.popularity_score, 6))
+        for pid, p in kb.build_patterns.items()
+    }
+    entries = {eid: e.content for eid, e in kb.knowledge_entries.items()}
+    return patterns, entries
+
+
+@pytest.mark.unit
+@pytest.mark.rag
+class TestKnowledgeBaseIncrementalUpdates:
+    """测试知识库增量更新"""
+
+    def test_delta_matches_full_rebuild(self, temp_dir):
+        """测试增量更新结果与全量重建一致"""
+        builds = [_make_build(i) for i in range(6)]
+        builds += [_make_build(i, "Ranger", "Lightning Arrow", "Bow") for i in range(6, 10)]
+
+        full_kb = PoE2KnowledgeBase(str(temp_dir / "full"))
+        full_kb.update_knowledge_from_builds(builds)
+
+        incremental_kb = PoE2KnowledgeBase(str(temp_dir / "incremental"))
+        incremental_kb.update_knowledge_from_builds(builds[:4])
+        incremental_kb.apply_build_delta(added=builds[4:])
+
+        assert _summary(incremental_kb) == _summary(full_kb)
+
+    def test_removing_builds_drops_stale_knowledge(self, temp_dir):
+        """测试移除构筑后样本不足的模式和协同条目被删除"""
+        builds = [_make_build(i) for i in range(6)]
+        kb = PoE2KnowledgeBase(str(temp_dir))
+        kb.update_knowledge_from_builds(builds)
+        assert "witch_infernalist_fireball_balanced" in kb.build_patterns
+        assert "synergy_fireball_chiming_staff" in kb.knowledge_entries
+
+        kb.apply_build_delta(removed=builds[:4])
+
+        assert "witch_infernalist_fireball_balanced" not in kb.build_patterns
+        assert "synergy_fireball_chiming_staff" not in kb.knowledge_entries
+        assert kb.get_statistics_summary()['class_stats']['total_builds'] == 2
+
+    def test_change_log_is_replayed_on_load(self, temp_dir):
+        """测试增量保存写入变更日志，并在重新加载时重放"""
+        kb = PoE2KnowledgeBase(str(temp_dir))
+        kb.update_knowledge_from_builds([_make_build(i) for i in range(5)])
+        assert not (temp_dir / PoE2KnowledgeBase.CHANGE_LOG_FILE).exists()
+
+        kb.apply_build_delta(added=[_make_build(i, "Ranger", "Lightning Arrow", "Bow") for i in range(5)])
+        assert (temp_dir / PoE2KnowledgeBase.CHANGE_LOG_FILE).exists()
+
+        reloaded = PoE2KnowledgeBase(str(temp_dir))
+        assert _summary(reloaded) == _summary(kb)
+        assert reloaded.aggregates.to_dict() == kb.aggregates.to_dict()
+        assert reloaded.get_knowledge_by_type(KnowledgeType.SYNERGY_INFO)
+
+    def test_compaction_truncates_change_log(self, temp_dir):
+        """测试日志超过阈值时压缩为完整快照"""
+        kb = PoE2KnowledgeBase(str(temp_dir))
+        kb.update_knowledge_from_builds([_make_build(i) for i in range(5)])
+        kb.compact_threshold = 1
+
+        kb.apply_build_delta(added=[_make_build(5)])
+
+        assert not (temp_dir / PoE2KnowledgeBase.CHANGE_LOG_FILE).exists()
+        reloaded = PoE2KnowledgeBase(str(temp_dir))
+        assert reloaded.aggregates.to_dict() == kb.aggregates.to_dict()
+
+
+    def test_interrupted_compaction_does_not_double_count(self, temp_dir):
+        """测试写完快照、删除日志前中断时，重新加载不会重复累加聚合"""
+        kb = PoE2KnowledgeBase(str(temp_dir))
+        kb.update_knowledge_from_builds([_make_build(i) for i in range(5)])
+        kb.apply_build_delta(added=[_make_build(i, "Ranger", "Lightning Arrow", "Bow") for i in range(5)])
+        log_file = temp_dir / PoE2KnowledgeBase.CHANGE_LOG_FILE
+        stale_log = log_file.read_bytes()
+
+        kb.compact_knowledge_base()
+        log_file.write_bytes(stale_log)
+
+        reloaded = PoE2KnowledgeBase(str(temp_dir))
+        assert reloaded.aggregates.to_dict() == kb.aggregates.to_dict()
+        assert reloaded.get_statistics_summary()['class_stats']['total_builds'] == 10
+
+        reloaded.apply_build_delta(added=[_make_build(10)])
+        assert PoE2KnowledgeBase(str(temp_dir)).aggregates.to_dict() == reloaded.aggregates.to_dict()
+
+    def test_insights_replaced_by_type_and_subject(self, temp_dir):
+        """测试重复更新时洞察按类型和主题替换，不会无限增长"""
+        kb = PoE2KnowledgeBase(str(temp_dir))
+        kb.update_knowledge_from_builds([_make_build(i) for i in range(5)])
+        insight_count = len(kb.meta_insights)
+        assert insight_count > 0
+
+        for i in range(5, 15):
+            kb.apply_build_delta(added=[_make_build(i)])
+        kb.apply_build_delta(added=[_make_build(i, "Ranger", "Lightning Arrow", "Bow") for i in range(20, 40)])
+
+        keys = [(insight.insight_type, insight.title) for insight in kb.meta_insights]
+        assert len(keys) == len(set(keys))
+        assert len(kb.get_meta_insights("skill_popularity")) == 1
+        assert {insight.title for insight in kb.get_meta_insights("class_dominance")} == {
+            "Witch 职业主导当前Meta", "Ranger 职业主导当前Meta"
+        }
+
+        reloaded = PoE2KnowledgeBase(str(temp_dir))
+        assert len(reloaded.meta_insights) == len(kb.meta_insights)
+
+        kb.max_insights = 2
+        kb.apply_build_delta(added=[_make_build(40)])
+        assert len(kb.meta_insights) == 2
+
+@pytest.mark.unit
+@pytest.mark.rag
+class TestKnowledgeBaseIndexes:
+    """测试知识库二级索引查询"""
+
+    def _populated_kb(self, temp_dir) -> PoE2KnowledgeBase:
+        builds = [_make_build(i) for i in range(6)]
+        builds += [_make_build(i, "Ranger", "Lightning Arrow", "Bow") for i in range(6, 12)]
+        kb = PoE2KnowledgeBase(str(temp_dir))
+        kb.update_knowledge_from_builds(builds)
+        return kb
+
+    def test_search_patterns_uses_indexes(self, temp_dir):
+        """测试按职业/技能/升华搜索模式"""
+        kb = self._populated_kb(temp_dir)
+
+        witch = kb.search_patterns(character_class="Witch")
+        assert [p.pattern_id for p in witch] == ["witch_infernalist_fireball_balanced"]
+        assert kb.search_patterns(character_class="Witch", main_skill="Lightning Arrow") == []
+        assert len(kb.search_patterns(ascendancy="Infernalist")) == 2
+        assert kb.search_patterns(main_skill="Fireball", min_success_rate=1.1) == []
+        assert len(kb.search_patterns()) == 2
+
+    def test_indexes_follow_removals(self, temp_dir):
+        """测试删除模式和条目后索引同步更新"""
+        kb = self._populated_kb(temp_dir)
+        assert kb.get_knowledge_by_tag("fireball")
+
+        kb.apply_build_delta(removed=[_make_build(i) for i in range(4)])
+
+        assert kb.search_patterns(character_class="Witch") == []
+        assert kb.get_knowledge_by_tag("fireball") == []
+        synergy_ids = {e.entry_id for e in kb.get_knowledge_by_type(KnowledgeType.SYNERGY_INFO)}
+        assert "synergy_fireball_chiming_staff" not in synergy_ids
+        assert "synergy_lightning_arrow_bow" in synergy_ids
+
+    def test_success_factors_and_trending(self, temp_dir):
+        """测试成功因素查找和趋势范围扫描"""
+        from src.poe2build.rag.knowledge_base import MetaTrend
+
+        kb = self._populated_kb(temp_dir)
+        factors = {e.content['factor'] for e in kb.get_success_factors_for_build("Ranger", "Lightning Arrow")}
+        assert factors == {"class_Ranger", "skill_Lightning Arrow", "budget_friendly"}
+
+        assert kb.get_trending_builds() == []
+        pattern = kb.get_build_pattern("ranger_infernalist_lightning_arrow_balanced")
+        pattern.trend = MetaTrend.RISING
+        assert kb.get_trending_builds() == [pattern]
+        assert kb.get_trending_builds(days=-1) == []
@@ -0,0 +1,104 @@
+"""
+单元测试 - 延迟埋点
+
+测试滚动直方图和延迟记录器：
+- 分位数计算和滚动窗口
+- span 计时（包括异常退出）
+- JSON / Prometheus 导出
+- 指标HTTP服务
+"""
+
+import json
+import urllib.request
+
+import pytest
+
+from src.poe2build.utils.latency import LatencyRecorder, RollingHistogram, start_metrics_server
+
+
+@pytest.mark.unit
+class TestRollingHistogram:
+    """测试滚动直方图"""
+
+    def test_percentiles(self):
+        """测试最近秩法分位数"""
+        histogram = RollingHistogram(window=100)
+        for value in range(1, 101):
+            histogram.record(float(value))
+
+        assert histogram.percentile(0.5) == 50.0
+        assert histogram.percentile(0.95) == 95.0
+        assert histogram.percentile(0.99) == 99.0
+
+        summary = histogram.summary()
+        assert summary['count'] == 100
+        assert summary['max_ms'] == 100.0
+        assert summary['mean_ms'] == pytest.approx(50.5)
+
+    def test_window_keeps_recent_samples(self):
+        """测试窗口只保留最近样本，累计计数不受影响"""
+        histogram = RollingHistogram(window=3)
+        for value in (100.0, 1.0, 2.0, 3.0):
+            histogram.record(value)
+
+        summary = histogram.summary()
+        assert summary['window_count'] == 3
+        assert summary['count'] == 4
+        assert summary['max_ms'] == 3.0
+        assert summary['sum_ms'] == 106.0
+
+    def test_empty_and_invalid(self):
+        """测试空直方图和非法窗口"""
+        assert RollingHistogram().percentile(0.5) is None
+        with pytest.raises(ValueError):
+            RollingHistogram(window=0)
+
+
+@pytest.mark.unit
+class TestLatencyRecorder:
+    """测试延迟记录器"""
+
+    def test_span_records_on_exception(self):
+        """测试异常退出时仍记录耗时且不吞异常"""
+        recorder = LatencyRecorder()
+        with pytest.raises(KeyError):
+            with recorder.span("stage.fail"):
+                raise KeyError("boom")
+
+        assert recorder.snapshot()["stage.fail"]["count"] == 1
+
+    def test_disabled_recorder(self):
+        """测试关闭后不记录"""
+        recorder = LatencyRecorder(enabled=False)
+        with recorder.span("stage"):
+            pass
+        assert recorder.snapshot() == {}
+
+    def test_exports(self):
+        """测试JSON和Prometheus导出"""
+        recorder = LatencyRecorder()
+        recorder.record("rag.encode", 20.0)
+        recorder.record('odd"name', 5.0)
+
+        data = json.loads(recorder.to_json())
+        assert data['spans']['rag.encode']['p50_ms'] == 20.0
+
+        text = recorder.to_prometheus()
+        assert '# TYPE poe2build_span_duration_seconds summary' in text
+        assert 'poe2build_span_duration_seconds{span="rag.encode",quantile="0.95"} 0.02' in text
+        assert 'span="odd\\"name"' in text
+
+    def test_metrics_server(self):
+        """测试指标HTTP服务"""
+        recorder = LatencyRecorder()
+        recorder.record("http.poe2scout", 12.0)
+        server = start_metrics_server(0, recorder=recorder)
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+                assert b'span="http.poe2scout"' in response.read()
+            with urllib.request.urlopen(f"{base}/metrics.json", timeout=5) as response:
+                assert 'http.poe2scout' in json.loads(response.read())['spans']
+        finally:
+            server.shutdown()
+            server.server_close()
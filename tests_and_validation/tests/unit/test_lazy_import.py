@@ -0,0 +1,59 @@
+"""
+单元测试 - 延迟导入工具
+
+测试可选依赖的延迟模块代理：
+- 未安装的依赖返回None
+- 默认不导入，首次访问属性时才导入
+- resolve=True 时已安装但无法导入的依赖返回None
+"""
+
+import sys
+
+import pytest
+
+from src.poe2build.utils.lazy_import import LazyModule, optional_module
+
+
+@pytest.fixture
+def fake_packages(tmp_path, monkeypatch):
+    """在临时目录中创建一个可导入和一个导入即失败的模块"""
+    (tmp_path / "lazy_ok_module.py").write_text("VALUE = 42\n")
+    (tmp_path / "lazy_broken_module.py").write_text("raise ImportError('native library missing')\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield
+    for name in ("lazy_ok_module", "lazy_broken_module"):
+        sys.modules.pop(name, None)
+
+
+@pytest.mark.unit
+class TestOptionalModule:
+    """测试 optional_module"""
+
+    def test_missing_module(self):
+        """测试未安装的依赖返回None"""
+        assert optional_module("definitely_not_installed_module") is None
+        assert optional_module("definitely_not_installed_module", resolve=True) is None
+
+    def test_deferred_import(self, fake_packages):
+        """测试默认延迟到首次访问属性时才导入"""
+        module = optional_module("lazy_ok_module")
+
+        assert isinstance(module, LazyModule)
+        assert not module.is_loaded
+        assert "lazy_ok_module" not in sys.modules
+
+        assert module.VALUE == 42
+        assert module.is_loaded
+
+    def test_resolve_imports_immediately(self, fake_packages):
+        """测试 resolve=True 时立即导入"""
+        module = optional_module("lazy_ok_module", resolve=True)
+
+        assert module is not None
+        assert module.is_loaded
+        assert module.VALUE == 42
+
+    def test_resolve_broken_module(self, fake_packages):
+        """测试已安装但无法导入的依赖：只查find_spec时误报可用，resolve后返回None"""
+        assert optional_module("lazy_broken_module") is not None
+        assert optional_module("lazy_broken_module", resolve=True) is None
@@ -0,0 +1,246 @@
+"""
+单元测试 - poe.ninja Meta快照
+
+测试版本化快照和增量差异：
+- 提交快照得到新增/变化/移除的构筑
+- 内容未变化的刷新不产生新版本
+- 快照持久化、版本差异和清理
+- NinjaMetaScraper 只向订阅者推送差异
+- FourSourcesRAGTrainer 按差异增量更新知识库
+"""
+
+from dataclasses import replace
+from datetime import datetime
+
+import pytest
+
+from src.poe2build.data_sources.ninja.scraper import NinjaMetaScraper, PopularBuild
+from src.poe2build.data_sources.ninja.snapshots import MetaSnapshotStore
+from src.poe2build.rag import four_sources_integration
+from src.poe2build.rag.four_sources_integration import FourSourcesRAGTrainer
+from src.poe2build.rag.knowledge_base import PoE2KnowledgeBase
+
+
+def _build(name: str, skill: str = "Fireball", popularity: float = 0.1, **overrides) -> PopularBuild:
+    fields = dict(
+        name=name, character_class="Witch", ascendancy="Infernalist", main_skill=skill,
+        support_gems=["Fire Penetration"], popularity_score=popularity, avg_level=90,
+        sample_size=100, dps_estimate=None, ehp_estimate=None, key_items=[],
+        passive_keystone=[], last_updated=datetime.now()
+    )
+    fields.update(overrides)
+    return PopularBuild(**fields)
+
+
+def _records(*builds):
+    return [
+        {"name": b.name, "character_class": b.character_class, "ascendancy": b.ascendancy,
+         "main_skill": b.main_skill, "popularity_score": b.popularity_score,
+         "last_updated": b.last_updated.isoformat()}
+        for b in builds
+    ]
+
+
+@pytest.mark.unit
+class TestMetaSnapshotStore:
+    """测试Meta快照存储"""
+    
+    def test_commit_reports_delta(self):
+        """测试提交快照返回相对上一版本的新增、变化和移除"""
+        store = MetaSnapshotStore()
+        a, b, c = _build("A"), _build("B"), _build("C")
+        
+        first = store.commit("Standard", _records(a, b))
+        assert first.version == 1 and first.previous_version is None
+        assert len(first.added) == 2 and not first.changed and not first.removed
+        
+        second = store.commit("Standard", _records(replace(a, popularity_score=0.5), c))
+        key_a, key_b, key_c = (store.build_key(r) for r in _records(a, b, c))
+        
+        assert second.version == 2 and second.previous_version == 1
+        assert list(second.added) == [key_c]
+        assert second.changed[key_a]["popularity_score"] == 0.5
+        assert second.removed == [key_b]
+    
+    def test_unchanged_refresh_keeps_version(self):
+        """测试只有时间戳变化的刷新不产生新版本"""
+        store = MetaSnapshotStore()
+        store.commit("Standard", _records(_build("A"), _build("B")))
+        
+        later = [_build("B", last_updated=datetime(2030, 1, 1)), _build("A", last_updated=datetime(2030, 1, 1))]
+        delta = store.commit("Standard", _records(*later))
+        
+        assert delta.is_empty
+        assert delta.version == 1
+        assert store.versions("Standard") == [1]
+        assert store.commit("Hardcore", _records(*later)).version == 1
+    
+    def test_persistence_diff_and_prune(self, tmp_path):
+        """测试快照持久化、跨版本差异和旧版本清理"""
+        path = tmp_path / "meta.sqlite"
+        store = MetaSnapshotStore(path)
+        for version in range(1, 5):
+            store.commit("Standard", _records(*[_build(f"B{i}") for i in range(version)]))
+        store.close()
+        
+        reopened = MetaSnapshotStore(path)
+        assert reopened.latest("Standard").version == 4
+        assert reopened.latest("Standard").record_count == 4
+        assert [r["name"] for r in reopened.records("Standard").values()] == ["B0", "B1", "B2", "B3"]
+        
+        delta = reopened.diff("Standard", 2)
+        assert sorted(r["name"] for r in delta.added.values()) == ["B2", "B3"]
+        assert len(reopened.diff("Standard", None).added) == 4
+        
+        assert reopened.prune("Standard", keep=2) == 2
+        assert reopened.versions("Standard") == [3, 4]
+        assert [r["name"] for r in reopened.records("Standard", 3).values()] == ["B0", "B1", "B2"]
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    scraper = NinjaMetaScraper(cache_duration=0)
+    pages = {"Standard": [[_build("A"), _build("B", skill="Spark")]]}
+    
+    def fake_fetch(league):
+        queue = pages.get(league)
+        if not queue:
+            return None
+        return queue.pop(0) if len(queue) > 1 else queue[0]
+    
+    monkeypatch.setattr(scraper, "_fetch_popular_builds", fake_fetch)
+    scraper.pages = pages
+    return scraper
+
+
+@pytest.mark.unit
+class TestNinjaMetaScraperSnapshots:
+    """测试NinjaMetaScraper的增量刷新"""
+    
+    def test_listeners_receive_only_deltas(self, scraper):
+        """测试订阅者只在Meta变化时收到差异"""
+        received = []
+        scraper.subscribe(received.append)
+        
+        scraper.get_popular_builds("Standard")
+        scraper.get_popular_builds("Standard")
+        assert len(received) == 1 and len(received[0].added) == 2
+        
+        scraper.pages["Standard"] = [[_build("A", popularity=0.3), _build("C", skill="Arc")]]
+        scraper.refresh("Standard")
+        
+        assert len(received) == 2
+        assert [r["name"] for r in received[1].changed.values()] == ["A"]
+        assert [r["name"] for r in received[1].added.values()] == ["C"]
+        assert len(received[1].removed) == 1
+        assert scraper.get_meta_delta("Standard", since_version=1).to_dict() == received[1].to_dict()
+        assert scraper.get_popular_builds("Unknown League") == []
+    
+    def test_limit_does_not_change_snapshot(self, scraper):
+        """测试不同limit的调用共享同一个完整快照，不产生虚假的移除和新增"""
+        scraper.pages["Standard"] = [[_build(f"B{i}") for i in range(80)]]
+        received = []
+        scraper.subscribe(received.append)
+        
+        assert len(scraper.get_popular_builds("Standard")) == 80
+        assert scraper.get_meta_summary("Standard")["total_builds_analyzed"] == 50
+        assert len(scraper.get_popular_builds("Standard", limit=10)) == 10
+        
+        assert len(received) == 1 and len(received[0].added) == 80
+        assert scraper.snapshots.versions("Standard") == [1]
+    
+    def test_old_versions_pruned_on_refresh(self, scraper):
+        """测试刷新后只保留最近的快照版本"""
+        scraper.snapshot_versions = 2
+        for i in range(4):
+            scraper.pages["Standard"] = [[_build(f"V{i}")]]
+            scraper.refresh("Standard")
+        
+        assert scraper.snapshots.versions("Standard") == [3, 4]
+    
+    def test_derived_stats_cached_per_version(self, scraper):
+        """测试技能和升华统计在快照版本不变时复用"""
+        skills = scraper.get_skill_usage_stats("Standard")
+        assert scraper.get_skill_usage_stats("Standard") is skills
+        assert scraper.get_ascendancy_trends("Standard") is scraper.get_ascendancy_trends("Standard")
+        
+        scraper.pages["Standard"] = [[_build("A"), _build("C", skill="Arc")]]
+        updated = scraper.get_skill_usage_stats("Standard")
+        
+        assert updated is not skills
+        assert {stat.skill_name for stat in updated} == {"Fireball", "Arc"}
+
+
+def _aggregates(knowledge_base):
+    return {name: pytest.approx(values) for name, values in knowledge_base.aggregates.to_dict().items()}
+
+
+@pytest.mark.unit
+class TestRAGTrainerMetaDelta:
+    """测试RAG训练器按Meta差异增量更新知识库"""
+    
+    @pytest.fixture
+    def make_trainer(self, scraper, monkeypatch, tmp_path):
+        monkeypatch.setattr(four_sources_integration, "get_ninja_scraper", lambda: scraper)
+        trainers = []
+        
+        def make():
+            trainer = FourSourcesRAGTrainer(enable_github_pob2=False)
+            trainer.knowledge_base = PoE2KnowledgeBase(str(tmp_path / f"kb{len(trainers)}"))
+            trainers.append(trainer)
+            return trainer
+        
+        yield make
+        for trainer in trainers:
+            trainer.close()
+    
+    def _reference(self, scraper, tmp_path):
+        """用当前完整快照全量构建的知识库"""
+        knowledge_base = PoE2KnowledgeBase(str(tmp_path / "reference"))
+        records = scraper.snapshots.records("Standard")
+        knowledge_base.update_knowledge_from_builds(
+            [FourSourcesRAGTrainer._popular_build_to_rag(record) for record in records.values()]
+        )
+        return knowledge_base
+    
+    def test_added_changed_removed(self, scraper, make_trainer, tmp_path):
+        """测试新增加入、变化替换、移除减去，结果与全量重建一致"""
+        trainer = make_trainer()
+        
+        scraper.refresh("Standard")
+        aggregates = trainer.knowledge_base.aggregates
+        assert aggregates.totals["builds"] == 2
+        assert aggregates.skill_count == {"Fireball": 1, "Spark": 1}
+        
+        scraper.pages["Standard"] = [[_build("A", support_gems=["Spell Echo"]), _build("C", skill="Arc")]]
+        scraper.refresh("Standard")
+        
+        assert aggregates.totals["builds"] == 2
+        assert aggregates.skill_count == {"Fireball": 1, "Arc": 1}
+        held = trainer._ninja_builds["Standard"]
+        assert sorted(build.character_name for build in held.values()) == ["A", "C"]
+        assert [build.main_skill_setup.support_gems for build in held.values()
+                if build.character_name == "A"] == [["Spell Echo"]]
+        assert _aggregates(trainer.knowledge_base) == self._reference(scraper, tmp_path).aggregates.to_dict()
+    
+    def test_resync_after_missed_versions(self, scraper, make_trainer, tmp_path):
+        """测试订阅前已有快照版本时，按当前快照重新对齐"""
+        scraper.refresh("Standard")
+        trainer = make_trainer()
+        
+        scraper.pages["Standard"] = [[_build("B", skill="Spark", popularity=0.4), _build("D", skill="Arc")]]
+        scraper.refresh("Standard")
+        
+        assert trainer._meta_versions["Standard"] == 2
+        assert sorted(build.character_name for build in trainer._ninja_builds["Standard"].values()) == ["B", "D"]
+        assert _aggregates(trainer.knowledge_base) == self._reference(scraper, tmp_path).aggregates.to_dict()
+    
+    def test_close_unsubscribes(self, scraper, make_trainer):
+        """测试关闭后不再接收差异"""
+        trainer = make_trainer()
+        trainer.close()
+        
+        scraper.refresh("Standard")
+        
+        assert trainer._meta_versions == {}
+        assert not trainer.knowledge_base.aggregates.totals
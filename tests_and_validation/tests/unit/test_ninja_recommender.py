@@ -0,0 +1,133 @@
+"""
+单元测试 - Ninja训练AI推荐器
+
+测试仓库根目录的 ninja_trained_ai_recommender：
+- 流式过滤排序与原 过滤→优化→排序 流程的结果一致
+- 默认多源并行方式
+- 进程池不可用时的串行回退
+"""
+
+import copy
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from ninja_trained_ai_recommender import NinjaTrainedAIRecommender  # noqa: E402
+
+
+@pytest.fixture
+def recommender():
+    recommender = NinjaTrainedAIRecommender()
+    recommender.generation_config.update(
+        realistic_builds_count=60, ai_builds_count=40, generation_seed=42, parallel_backend="serial"
+    )
+    yield recommender
+    recommender.close()
+
+
+@pytest.fixture
+def candidate_pool(recommender):
+    """固定种子的多源候选池"""
+    return recommender._multi_source_generation({})
+
+
+def _reference_filter_and_rank(recommender, builds, preferences):
+    """原流程：偏好过滤 → 逐个严格过滤 → 优化 → 按综合评分截取 → 个性化排序"""
+    intelligent_filter = recommender.intelligent_filter
+    target_count = recommender.generation_config["final_recommendation_count"] * 2
+
+    optimized = []
+    for build in builds:
+        if not recommender._matches_preferences(build, preferences):
+            continue
+        result = intelligent_filter._comprehensive_filter(build)
+        if result["viable"]:
+            build.viability_score = result["adjusted_score"]
+            optimized.append(intelligent_filter._optimize_build(build))
+
+    shortlisted = intelligent_filter._rank_and_select(optimized, target_count)
+    return recommender._personalized_ranking(shortlisted, preferences)
+
+
+def _summary(builds):
+    return [(b.name, b.main_skill, list(b.support_gems), b.viability_score) for b in builds]
+
+
+@pytest.mark.unit
+class TestFilterAndRank:
+    """测试流式过滤与排序"""
+
+    @pytest.mark.parametrize("preferences", [
+        {},
+        {'innovation_level': 'experimental', 'max_complexity': 3},
+        {'innovation_level': 'conservative', 'min_dps': 100000},
+        {'preferred_class': 'Ranger', 'budget_limit': 60},
+    ])
+    def test_matches_reference_chain(self, recommender, candidate_pool, preferences):
+        """测试最终推荐与原流程的前N个完全相同"""
+        expected = _reference_filter_and_rank(recommender, copy.deepcopy(candidate_pool), preferences)
+        actual = recommender._filter_and_rank(copy.deepcopy(candidate_pool), preferences)
+
+        assert _summary(actual) == _summary(expected)
+        assert len(actual) <= recommender.generation_config["final_recommendation_count"]
+
+    def test_pool_is_not_trivial(self, recommender, candidate_pool):
+        """测试候选池中既有被淘汰的也有可行的构筑，比较才有意义"""
+        viable, _ = recommender.intelligent_filter.evaluate_builds(copy.deepcopy(candidate_pool))
+
+        assert 0 < int(viable.sum()) < len(candidate_pool)
+        assert int(viable.sum()) > recommender.generation_config["final_recommendation_count"] * 2
+
+
+@pytest.mark.unit
+class TestParallelGeneration:
+    """测试多源并行生成"""
+
+    def test_default_backend_is_thread(self):
+        """测试默认使用线程池，且执行器跨请求复用"""
+        recommender = NinjaTrainedAIRecommender()
+        try:
+            assert recommender.generation_config["parallel_backend"] == "thread"
+            executor = recommender._get_executor()
+            assert isinstance(executor, ThreadPoolExecutor)
+            assert recommender._get_executor() is executor
+        finally:
+            recommender.close()
+        assert recommender._executor is None
+
+    def test_thread_backend_matches_serial(self, recommender, candidate_pool):
+        """测试固定种子时线程池生成与串行生成结果一致"""
+        recommender.generation_config["parallel_backend"] = "thread"
+
+        assert _summary(recommender._multi_source_generation({})) == _summary(candidate_pool)
+
+    @pytest.mark.parametrize("error", [BrokenProcessPool("worker died"), OSError("fork failed")])
+    def test_falls_back_to_serial(self, recommender, candidate_pool, error):
+        """测试进程池损坏或无法创建时退回串行生成"""
+        executor = Mock()
+        executor.submit.side_effect = error
+        recommender._get_executor = Mock(return_value=executor)
+
+        builds = recommender._multi_source_generation({})
+
+        assert executor.submit.called
+        assert _summary(builds) == _summary(candidate_pool)
+
+    def test_source_errors_are_raised(self, recommender):
+        """测试来源自身的错误不触发串行回退，直接抛出"""
+        future = Mock()
+        future.result.side_effect = ValueError("bad build data")
+        executor = Mock()
+        executor.submit.return_value = future
+        recommender._get_executor = Mock(return_value=executor)
+
+        with pytest.raises(ValueError, match="bad build data"):
+            recommender._multi_source_generation({})
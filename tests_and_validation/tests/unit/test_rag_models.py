@@ -0,0 +1,203 @@
+"""
+单元测试 - RAG构筑记录模型
+
+测试 _slotted 生成的 __slots__ 构筑记录：
+- 槽位布局（无实例 __dict__）
+- 惰性字段在首次读取时生成并缓存
+- asdict / 序列化往返和pickle
+- 与显式提供全部字段（立即构造）的记录相等
+"""
+
+import pickle
+from dataclasses import asdict, fields
+from datetime import datetime
+
+import pytest
+
+from src.poe2build.rag.models import (
+    PoE2BuildData, SkillGemSetup, ItemInfo, OffensiveStats, DefensiveStats,
+    SuccessMetrics, BuildGoal, DataQuality
+)
+
+
+LAZY_FIELDS = ('build_description', 'similarity_hash', 'tags')
+
+
+def _make_build(**overrides) -> PoE2BuildData:
+    data = dict(
+        character_name="TestChar",
+        character_class="Witch",
+        ascendancy="Infernalist",
+        level=92,
+        main_skill_setup=SkillGemSetup(
+            main_skill="Fireball",
+            support_gems=["Added Fire Damage", "Spell Echo"]
+        ),
+        weapon=ItemInfo(name="Chiming Staff", type="Staff", price=2.5),
+        rings=[ItemInfo(name="Ruby Ring")],
+        passive_keystones=["Chaos Inoculation"],
+        offensive_stats=OffensiveStats(dps=1500000.0),
+        defensive_stats=DefensiveStats(life=5000, energy_shield=2000),
+        total_cost=12.5,
+        build_goal=BuildGoal.BOSS_KILLING,
+        data_quality=DataQuality.HIGH,
+        collection_timestamp=datetime(2025, 1, 1, 12, 0, 0)
+    )
+    data.update(overrides)
+    return PoE2BuildData(**data)
+
+
+def _make_eager_build() -> PoE2BuildData:
+    """显式提供全部惰性字段构造的记录"""
+    reference = _make_build()
+    return _make_build(
+        build_description=reference._generate_description(),
+        similarity_hash=reference._generate_similarity_hash(),
+        tags=reference._extract_tags()
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.rag
+class TestSlottedLayout:
+    """测试槽位布局"""
+
+    @pytest.mark.parametrize("cls", [
+        PoE2BuildData, SkillGemSetup, ItemInfo, OffensiveStats, DefensiveStats, SuccessMetrics
+    ])
+    def test_records_have_no_instance_dict(self, cls):
+        """测试记录类只使用__slots__，实例没有__dict__"""
+        instance = cls(name="Ruby Ring") if cls is ItemInfo else cls()
+
+        assert not hasattr(instance, '__dict__')
+        with pytest.raises(AttributeError):
+            instance.unknown_attribute = 1
+
+    def test_lazy_fields_use_private_slots(self):
+        """测试惰性字段存储在"_字段名"槽中，dataclass字段列表保持不变"""
+        slots = PoE2BuildData.__slots__
+
+        for name in LAZY_FIELDS:
+            assert f"_{name}" in slots
+            assert name not in slots
+        assert [f.name for f in fields(PoE2BuildData)][-3:] == ['build_description', 'tags', 'similarity_hash']
+
+    def test_repeated_names_are_interned(self):
+        """测试职业和技能名称在不同记录间共享同一对象"""
+        first = _make_build(character_class="".join(["Wi", "tch"]))
+        second = _make_build(character_class="".join(["Wit", "ch"]))
+
+        assert first.character_class is second.character_class
+        assert first.main_skill_setup.main_skill is second.main_skill_setup.main_skill
+
+
+@pytest.mark.unit
+@pytest.mark.rag
+class TestLazyFields:
+    """测试惰性字段"""
+
+    def test_materialized_on_first_read(self):
+        """测试未提供时首次读取才生成，之后使用缓存值"""
+        build = _make_build()
+
+        assert build._build_description == ""
+        assert build._similarity_hash == ""
+        assert build._tags == []
+
+        description = build.build_description
+        assert "Witch (Infernalist)" in description
+        assert "Fireball" in description
+        assert build._build_description == description
+        assert build.build_description is description
+
+        assert len(build.similarity_hash) == 16
+        assert build.tags == sorted(build.tags)
+        assert "witch" in build.tags and "boss_killing" in build.tags
+
+    def test_cached_value_not_recomputed(self):
+        """测试生成后修改源字段不会改变已缓存的值"""
+        build = _make_build()
+        similarity_hash = build.similarity_hash
+
+        build.character_class = "Ranger"
+
+        assert build.similarity_hash == similarity_hash
+
+    def test_explicit_values_preserved(self):
+        """测试显式提供的值不被覆盖"""
+        build = _make_build(build_description="custom", similarity_hash="abc", tags=["x"])
+
+        assert build.build_description == "custom"
+        assert build.similarity_hash == "abc"
+        assert build.tags == ["x"]
+
+    def test_setter_overrides_value(self):
+        """测试赋值写入存储槽"""
+        build = _make_build()
+        build.tags = ["manual"]
+
+        assert build._tags == ["manual"]
+        assert build.tags == ["manual"]
+
+
+@pytest.mark.unit
+@pytest.mark.rag
+class TestSerialization:
+    """测试序列化"""
+
+    def test_asdict_materializes_lazy_fields(self):
+        """测试asdict按dataclass字段名输出，惰性字段已生成"""
+        build = _make_build()
+        data = asdict(build)
+
+        assert set(data) == {f.name for f in fields(PoE2BuildData)}
+        assert not any(key.startswith('_') for key in data)
+        assert data['build_description'] == build._generate_description()
+        assert data['similarity_hash'] == build._generate_similarity_hash()
+        assert data['tags'] == build._extract_tags()
+        assert data['main_skill_setup']['support_gems'] == ["Added Fire Damage", "Spell Echo"]
+
+    def test_asdict_stable_after_materialization(self):
+        """测试先读取惰性字段再asdict与直接asdict结果一致"""
+        untouched = _make_build()
+        touched = _make_build()
+        _ = touched.tags, touched.similarity_hash, touched.build_description
+
+        assert asdict(untouched) == asdict(touched)
+
+    @pytest.mark.parametrize("materialize", [False, True])
+    def test_pickle_roundtrip(self, materialize):
+        """测试pickle往返：未生成的惰性字段在读取时生成，已生成的值原样保留"""
+        build = _make_build()
+        if materialize:
+            build.build_description = "custom"
+            _ = build.similarity_hash
+
+        restored = pickle.loads(pickle.dumps(build, protocol=pickle.HIGHEST_PROTOCOL))
+
+        assert type(restored) is PoE2BuildData
+        assert restored._similarity_hash == build._similarity_hash
+        assert restored == build
+        assert restored.to_dict() == build.to_dict()
+        if materialize:
+            assert restored.build_description == "custom"
+
+
+@pytest.mark.unit
+@pytest.mark.rag
+class TestEquality:
+    """测试与立即构造的记录相等"""
+
+    def test_lazy_equals_eager(self):
+        """测试惰性构造与显式提供全部字段的记录相等"""
+        lazy = _make_build()
+        eager = _make_eager_build()
+
+        assert lazy == eager
+        assert lazy.to_dict() == eager.to_dict()
+        assert hash(lazy) == hash(eager)
+
+    def test_different_builds_not_equal(self):
+        """测试字段不同的记录不相等"""
+        assert _make_build() != _make_build(level=50)
+        assert _make_build().similarity_hash != _make_build(character_class="Ranger").similarity_hash
@@ -0,0 +1,144 @@
+"""
+单元测试 - RAG推荐算法引擎
+
+测试混合推荐的多样性优化：
+- 顺序多样性分数与逐个计算一致
+- 基于FAISS索引向量的MMR选择
+- 无索引时的元数据退化
+- 相似度引擎的索引在推荐引擎创建之后才建立
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from src.poe2build.rag.ai_engine import RecommendationContext
+from src.poe2build.rag.index_builder import PoE2BuildIndexBuilder, IndexConfig, FAISS_AVAILABLE
+from src.poe2build.rag.recommendation import (
+    PoE2RecommendationEngine, RecommendationScore, AlgorithmType
+)
+from src.poe2build.rag.similarity_engine import SearchResult, PoE2SimilarityEngine
+
+
+def _make_result(index: int, character_class: str, main_skill: str, score: float) -> SearchResult:
+    return SearchResult(
+        build_hash=f"build{index}",
+        similarity_score=score,
+        final_score=score,
+        metadata={
+            'character_class': character_class,
+            'main_skill': main_skill,
+            'total_cost': 5.0,
+            'build_goal': 'clear_speed',
+            'index_position': index
+        }
+    )
+
+
+def _scored(results):
+    return [(result, RecommendationScore(total_score=result.final_score)) for result in results]
+
+
+@pytest.mark.unit
+@pytest.mark.rag
+class TestDiversityOptimization:
+    """测试多样性优化"""
+
+    def test_sequential_diversity_matches_pairwise(self):
+        """测试计数实现与逐个两两比较结果一致"""
+        engine = PoE2RecommendationEngine()
+        classes, skills = ["Witch", "Ranger", "Monk"], ["Arc", "Fireball", "Lightning Arrow", "Ice Strike"]
+        candidates = [_make_result(i, classes[i % 3], skills[(i * 7) % 4], 0.5) for i in range(40)]
+
+        expected = []
+        for i, candidate in enumerate(candidates):
+            expected.append(engine._calculate_diversity_score(candidate, _scored(candidates[:i])))
+
+        assert engine._sequential_diversity_scores(candidates) == pytest.approx(expected)
+
+    def test_mmr_without_index_uses_metadata(self):
+        """测试无索引时按职业/技能去重"""
+        engine = PoE2RecommendationEngine()
+        candidates = [_make_result(i, "Witch", "Arc", 0.9 - i * 0.01) for i in range(5)]
+        candidates.append(_make_result(5, "Ranger", "Lightning Arrow", 0.7))
+
+        selected = engine._apply_diversity_optimization(_scored(candidates), 2)
+
+        assert [result.build_hash for result, _ in selected] == ["build0", "build5"]
+
+    def test_lambda_one_keeps_score_order(self):
+        """测试λ=1时退化为按分数排序"""
+        engine = PoE2RecommendationEngine()
+        engine.diversity_lambda = 1.0
+        candidates = [_make_result(i, "Witch", "Arc", 1.0 - i * 0.1) for i in range(6)]
+
+        selected = engine._apply_diversity_optimization(_scored(candidates), 3)
+
+        assert [result.build_hash for result, _ in selected] == ["build0", "build1", "build2"]
+
+    @pytest.mark.skipif(not FAISS_AVAILABLE, reason="需要faiss")
+    def test_mmr_uses_index_vectors(self, temp_dir):
+        """测试使用FAISS索引中的构筑向量计算相似度"""
+        import faiss
+
+        builder = PoE2BuildIndexBuilder(IndexConfig(
+            index_path=str(temp_dir), auto_save=False, vector_dimension=4, index_kind="flat"
+        ))
+        vectors = np.array([
+            [1.0, 0.0, 0.0, 0.0],
+            [0.99, 0.1, 0.0, 0.0],   # 与0几乎相同
+            [0.0, 1.0, 0.0, 0.0],
+        ], dtype=np.float32)
+        builder.index = faiss.IndexFlatIP(4)
+        builder.index.add(vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+
+        # 元数据完全相同，只有向量能区分
+        candidates = [_make_result(i, "Witch", "Arc", score) for i, score in enumerate([0.9, 0.89, 0.8])]
+        engine = PoE2RecommendationEngine(index_builder=builder)
+
+        selected = engine._apply_diversity_optimization(_scored(candidates), 2)
+
+        assert [result.build_hash for result, _ in selected] == ["build0", "build2"]
+        assert builder.reconstruct_vectors([2]).shape == (1, 4)
+
+    def test_similarity_engine_index_resolved_lazily(self):
+        """测试推荐引擎在多样性优化时才读取相似度引擎的索引"""
+        class RecordingIndex:
+            def __init__(self, vectors):
+                self.vectors = vectors
+                self.requested = []
+
+            def reconstruct_vectors(self, positions):
+                self.requested.append(list(positions))
+                return self.vectors[positions]
+
+        similarity_engine = PoE2SimilarityEngine()
+        engine = PoE2RecommendationEngine(similarity_engine=similarity_engine)
+
+        # 引擎创建之后才setup索引；元数据完全相同，只有向量能区分
+        index = RecordingIndex(np.array([[1.0, 0.0], [0.99, 0.1], [0.0, 1.0]]))
+        similarity_engine.index_builder = index
+        candidates = [_make_result(i, "Witch", "Arc", score) for i, score in enumerate([0.9, 0.89, 0.8])]
+
+        selected = engine._apply_diversity_optimization(_scored(candidates), 2)
+
+        assert index.requested == [[0, 1, 2]]
+        assert [result.build_hash for result, _ in selected] == ["build0", "build2"]
+
+    def test_hybrid_large_pool_is_fast(self):
+        """测试大候选池的混合推荐耗时"""
+        engine = PoE2RecommendationEngine()
+        rng = np.random.default_rng(0)
+        candidates = [
+            _make_result(i, f"Class{i % 8}", f"Skill{i % 97}", float(score))
+            for i, score in enumerate(rng.random(5000))
+        ]
+
+        start = time.perf_counter()
+        results = engine.recommend_builds(RecommendationContext(), candidates, AlgorithmType.HYBRID, 20)
+        elapsed = time.perf_counter() - start
+
+        assert len(results) == 20
+        assert len({result.metadata['main_skill'] for result, _ in results}) > 10
+        assert elapsed < 1.0
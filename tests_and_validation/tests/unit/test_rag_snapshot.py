@@ -0,0 +1,115 @@
+"""
+单元测试 - RAG列式构筑快照
+
+测试RAGDataModel的NPZ快照格式：
+- 写入/读取往返一致性
+- 惰性构造构筑对象
+- 分块流式写入
+"""
+
+import pytest
+from datetime import datetime
+
+from src.poe2build.rag.models import (
+    PoE2BuildData, RAGDataModel, SkillGemSetup, ItemInfo,
+    OffensiveStats, DefensiveStats, BuildGoal, DataQuality
+)
+from src.poe2build.rag.snapshot import (
+    BuildSnapshot, BuildSnapshotWriter, LazyBuildList, write_snapshot
+)
+
+
+def _make_build(index: int) -> PoE2BuildData:
+    return PoE2BuildData(
+        character_name=f"Char{index}",
+        character_class="Witch" if index % 2 else "Ranger",
+        ascendancy="Infernalist" if index % 2 else "Deadeye",
+        level=80 + index % 20,
+        main_skill_setup=SkillGemSetup(
+            main_skill="Fireball" if index % 2 else "Lightning Arrow",
+            support_gems=["Added Fire Damage", "Spell Echo"][:index % 3]
+        ),
+        secondary_skills=[SkillGemSetup(main_skill="Flame Wall", support_gems=["Arcane Surge"])],
+        weapon=ItemInfo(name="Chiming Staff", type="Staff", price=2.5),
+        rings=[ItemInfo(name="Ruby Ring"), ItemInfo(name="Sapphire Ring", rarity="rare")],
+        passive_keystones=["Chaos Inoculation"] if index % 3 == 0 else [],
+        offensive_stats=OffensiveStats(dps=100000.0 * index),
+        defensive_stats=DefensiveStats(life=4000 + index, energy_shield=1000, fire_resistance=75),
+        total_cost=index * 0.5,
+        build_goal=BuildGoal.BOSS_KILLING if index % 2 else BuildGoal.CLEAR_SPEED,
+        data_quality=DataQuality.HIGH,
+        collection_timestamp=datetime(2025, 1, 1, 12, 0, index % 60),
+        last_updated=datetime(2025, 1, 2) if index % 2 else None
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.rag
+class TestBuildSnapshot:
+    """测试列式构筑快照"""
+
+    def test_roundtrip_preserves_builds(self, temp_dir):
+        """测试快照往返后构筑数据一致"""
+        builds = [_make_build(i) for i in range(25)]
+        model = RAGDataModel(builds=builds, collection_metadata={'source': 'test'})
+
+        path = temp_dir / "builds.npz"
+        model.save_to_file(str(path))
+        loaded = RAGDataModel.load_from_file(str(path))
+
+        assert len(loaded) == 25
+        assert loaded.collection_metadata == {'source': 'test'}
+        for original, restored in zip(builds, loaded):
+            assert restored == original
+
+    def test_builds_are_materialized_lazily(self, temp_dir):
+        """测试只有被访问的构筑才会被构造"""
+        path = temp_dir / "lazy.npz"
+        write_snapshot(path, (_make_build(i) for i in range(50)), chunk_size=16)
+
+        loaded = RAGDataModel.load_snapshot(str(path))
+        assert isinstance(loaded.builds, LazyBuildList)
+        assert loaded.builds.materialized_count == 0
+
+        build = loaded[37]
+        assert build.character_name == "Char37"
+        assert loaded.builds.materialized_count == 1
+        # 重复访问返回同一对象，修改得以保留
+        assert loaded[37] is build
+
+    def test_append_and_delete_on_lazy_list(self, temp_dir):
+        """测试惰性列表的追加和删除"""
+        path = temp_dir / "mutable.npz"
+        write_snapshot(path, [_make_build(i) for i in range(5)])
+
+        loaded = RAGDataModel.load_snapshot(str(path))
+        loaded.add_build(_make_build(99))
+        assert len(loaded) == 6
+        assert loaded[-1].character_name == "Char99"
+
+        del loaded.builds[0]
+        assert len(loaded) == 5
+        assert loaded[0].character_name == "Char1"
+
+    def test_streaming_writer_chunks_and_columns(self, temp_dir):
+        """测试分块写入和列读取"""
+        path = temp_dir / "stream.npz"
+        with BuildSnapshotWriter(path, chunk_size=4) as writer:
+            for i in range(10):
+                writer.write(_make_build(i))
+            assert writer.count == 10
+
+        with BuildSnapshot(path) as snapshot:
+            assert len(snapshot) == 10
+            assert snapshot.meta['chunk_sizes'] == [4, 4, 2]
+            assert list(snapshot.column('level')) == [80 + i for i in range(10)]
+            assert snapshot.column('character_class')[1] == "Witch"
+            assert snapshot[9].rings[1].rarity == "rare"
+
+    def test_writer_rejects_non_build(self, temp_dir):
+        """测试写入非构筑数据时报错且不留下文件"""
+        path = temp_dir / "invalid.npz"
+        with pytest.raises(TypeError):
+            with BuildSnapshotWriter(path) as writer:
+                writer.write({'character_class': 'Witch'})
+        assert not path.exists()
@@ -0,0 +1,278 @@
+"""
+单元测试 - 真实构筑生成器
+
+测试仓库根目录的 realistic_build_generator：
+- 兼容表/倍率表与按数据字典逐项计算的标量公式结果一致
+- evaluate_combinations 批量评分与单个组合评分一致
+- 生成模式：固定种子可复现、exhaustive 返回穷举的真正前N个、未知模式报错
+"""
+
+import itertools
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from realistic_build_generator import RealisticBuildGenerator  # noqa: E402
+
+
+# ===== 标量参考公式（直接读取数据字典，不使用预计算表） =====
+
+def _reference_compatible(gen, skill, support):
+    if skill not in gen.poe2_skills or support not in gen.poe2_supports:
+        return False
+    skill_tags = gen.poe2_skills[skill]["tags"]
+    support_data = gen.poe2_supports[support]
+    compatible_tags = support_data.get("compatible_tags", [])
+    if compatible_tags and not any(tag in skill_tags for tag in compatible_tags):
+        return False
+    return not any(tag in skill_tags for tag in support_data.get("incompatible_tags", []))
+
+
+def _reference_dps(gen, skill, supports, ascendancy):
+    if skill not in gen.poe2_skills:
+        return 0
+    skill_data = gen.poe2_skills[skill]
+    base_damage = sum(skill_data["base_damage"]) / 2
+
+    total_more_multiplier = 1.0
+    for support in supports:
+        if support in gen.poe2_supports and _reference_compatible(gen, skill, support):
+            support_data = gen.poe2_supports[support]
+            damage_bonus = support_data.get("damage_bonus", 0)
+            if damage_bonus != 0:
+                total_more_multiplier *= (1 + damage_bonus)
+            if "attack_speed" in support_data:
+                total_more_multiplier *= support_data["attack_speed"]
+            if "cast_speed" in support_data:
+                total_more_multiplier *= support_data["cast_speed"]
+
+    asc_multiplier = 1.0
+    if ascendancy in gen.poe2_ascendancies:
+        bonuses = gen.poe2_ascendancies[ascendancy].get("bonuses", {})
+        for tag in skill_data["tags"]:
+            if f"{tag}_damage" in bonuses:
+                asc_multiplier *= (1 + bonuses[f"{tag}_damage"])
+
+    return int(base_damage * total_more_multiplier * asc_multiplier * 15)
+
+
+def _reference_mana(gen, skill, supports):
+    if skill not in gen.poe2_skills:
+        return 999
+    total_multiplier = 1.0
+    for support in supports:
+        if support in gen.poe2_supports and _reference_compatible(gen, skill, support):
+            total_multiplier *= gen.poe2_supports[support].get("mana_multiplier", 1.0)
+    return int(gen.poe2_skills[skill]["mana_cost"] * total_multiplier)
+
+
+def _reference_synergy(gen, skill, supports, ascendancy):
+    if skill not in gen.poe2_skills:
+        return 0.0
+    score = 1.0
+    skill_tags = set(gen.poe2_skills[skill]["tags"])
+    for support in supports:
+        if support in gen.poe2_supports:
+            matches = skill_tags.intersection(gen.poe2_supports[support].get("compatible_tags", []))
+            if matches:
+                score *= (1 + len(matches) * 0.2)
+    if ascendancy in gen.poe2_ascendancies:
+        asc_matches = skill_tags.intersection(gen.poe2_ascendancies[ascendancy].get("preferred_skills", []))
+        if asc_matches:
+            score *= (1 + len(asc_matches) * 0.3)
+    return min(score, 3.0)
+
+
+def _reference_ascendancy_match(gen, skill, ascendancy):
+    if skill not in gen.poe2_skills or ascendancy not in gen.poe2_ascendancies:
+        return 0.0
+    skill_tags = set(gen.poe2_skills[skill]["tags"])
+    preferred_skills = set(gen.poe2_ascendancies[ascendancy].get("preferred_skills", []))
+    return len(skill_tags.intersection(preferred_skills)) / max(len(preferred_skills), 1)
+
+
+def _reference_viability(gen, skill, supports, ascendancy):
+    thresholds = gen.game_mechanics["viability_thresholds"]
+    score = 10.0
+
+    dps = _reference_dps(gen, skill, supports, ascendancy)
+    if dps < thresholds["min_dps"]:
+        score -= 3.0 * (1 - dps / thresholds["min_dps"])
+
+    mana_cost = _reference_mana(gen, skill, supports)
+    if mana_cost > thresholds["max_mana_cost"]:
+        score -= 2.0 * (mana_cost / thresholds["max_mana_cost"] - 1)
+
+    synergy_score = _reference_synergy(gen, skill, supports, ascendancy)
+    if synergy_score < 0.5:
+        score -= 2.0 * (0.5 - synergy_score)
+
+    total_stats = sum(gen._calculate_stat_requirements(skill, supports).values())
+    if total_stats > thresholds["max_stat_req"]:
+        score -= 1.5 * (total_stats / thresholds["max_stat_req"] - 1)
+
+    asc_match = _reference_ascendancy_match(gen, skill, ascendancy)
+    if asc_match < 0.3:
+        score -= 1.5 * (0.3 - asc_match)
+
+    return max(0.0, min(10.0, score))
+
+
+# ===== fixtures =====
+
+@pytest.fixture(scope="module")
+def generator():
+    return RealisticBuildGenerator()
+
+
+def _random_combinations(gen, count, seed, include_unknown=True):
+    """随机 (技能, 辅助宝石列表, 升华) 组合；可混入未知技能/辅助宝石/升华"""
+    rng = random.Random(seed)
+    skills = list(gen.poe2_skills)
+    supports = list(gen.poe2_supports)
+    ascendancies = list(gen.poe2_ascendancies)
+    if include_unknown:
+        skills.append("Unknown Skill")
+        supports.append("Unknown Support")
+        ascendancies.append("")
+
+    combinations = []
+    for _ in range(count):
+        chosen = rng.sample(supports, rng.randint(0, 5))
+        combinations.append((rng.choice(skills), chosen, rng.choice(ascendancies)))
+    return combinations
+
+
+@pytest.mark.unit
+class TestCompatibilityTables:
+    """测试预计算表与标量公式一致"""
+
+    def test_compatibility_matrix(self, generator):
+        """测试兼容矩阵逐项与标签判断一致，空位列不兼容"""
+        tables = generator.tables
+        for skill in generator.poe2_skills:
+            for support in generator.poe2_supports:
+                assert generator._check_support_compatibility(skill, support) == \
+                    _reference_compatible(generator, skill, support)
+            assert not tables.compatible[tables.skill_ids[skill], -1]
+        assert generator._check_support_compatibility("Unknown Skill", "Multistrike") is False
+
+    def test_scalar_methods_match_reference(self, generator):
+        """测试单个组合的DPS、法力、协同、升华匹配度和可行性与参考公式完全一致"""
+        for skill, supports, ascendancy in _random_combinations(generator, 3000, seed=41):
+            assert generator.calculate_realistic_dps(skill, supports, ascendancy) == \
+                _reference_dps(generator, skill, supports, ascendancy)
+            assert generator.calculate_mana_cost(skill, supports) == _reference_mana(generator, skill, supports)
+            assert generator._calculate_synergy_score(skill, supports, ascendancy) == \
+                pytest.approx(_reference_synergy(generator, skill, supports, ascendancy), rel=1e-12)
+            assert generator._check_ascendancy_match(skill, ascendancy) == \
+                pytest.approx(_reference_ascendancy_match(generator, skill, ascendancy), rel=1e-12)
+            assert generator.assess_build_viability(skill, supports, ascendancy) == \
+                pytest.approx(_reference_viability(generator, skill, supports, ascendancy), abs=1e-9)
+
+    def test_batch_matches_reference(self, generator):
+        """测试 evaluate_combinations 与参考公式一致（未知辅助宝石和升华用-1填充）"""
+        tables = generator.tables
+        combinations = _random_combinations(generator, 3000, seed=42)
+        combinations = [c for c in combinations if c[0] in tables.skill_ids]
+
+        skill_ids = np.array([tables.skill_ids[skill] for skill, _, _ in combinations])
+        support_ids = np.full((len(combinations), 5), -1)
+        for row, (_, supports, _) in enumerate(combinations):
+            ids = tables.support_id_list(supports)
+            support_ids[row, :len(ids)] = ids
+        asc_ids = np.array([tables.ascendancy_ids.get(asc, -1) for _, _, asc in combinations])
+
+        dps, mana, viability = generator.evaluate_combinations(skill_ids, support_ids, asc_ids)
+
+        assert dps.tolist() == [_reference_dps(generator, *c) for c in combinations]
+        assert mana.tolist() == [_reference_mana(generator, s, sup) for s, sup, _ in combinations]
+        np.testing.assert_allclose(
+            viability, [_reference_viability(generator, *c) for c in combinations], rtol=0, atol=1e-9
+        )
+
+    def test_batch_realism_matches_scalar(self, generator):
+        """测试批量现实度评分与 _calculate_realism_score 一致"""
+        tables = generator.tables
+        combinations = _random_combinations(generator, 1000, seed=43, include_unknown=False)
+
+        skill_ids = np.array([tables.skill_ids[skill] for skill, _, _ in combinations])
+        support_ids = np.full((len(combinations), 5), -1)
+        for row, (_, supports, _) in enumerate(combinations):
+            support_ids[row, :len(supports)] = tables.support_id_list(supports)
+        asc_ids = np.array([tables.ascendancy_ids[asc] for _, _, asc in combinations])
+
+        np.testing.assert_allclose(
+            generator._realism_scores(skill_ids, support_ids, asc_ids),
+            [generator._calculate_realism_score(*c) for c in combinations],
+            rtol=0, atol=1e-9
+        )
+
+
+def _build_key(build):
+    return (build.main_skill, build.ascendancy, tuple(sorted(build.support_gems)))
+
+
+def _brute_force_top(gen, count, target_popularity):
+    """逐个组合调用标量方法，返回每个 (技能, 升华) 最佳辅助组合中排序分最高的 count 个"""
+    skills = [s for s, d in gen.poe2_skills.items() if d.get("meta_popularity", 0) <= target_popularity]
+    ascendancies = [a for a, d in gen.poe2_ascendancies.items()
+                    if d.get("meta_popularity", 0) <= target_popularity * 2]
+
+    best = {}
+    for skill in skills:
+        compatible = [s for s in gen.poe2_supports if gen._check_support_compatibility(skill, s)]
+        if len(compatible) < 3:
+            continue
+        for subset in itertools.combinations(compatible, min(4, len(compatible))):
+            supports = list(subset)
+            for ascendancy in ascendancies:
+                viability = gen.assess_build_viability(skill, supports, ascendancy)
+                if viability < 6.0:
+                    continue
+                score = (viability + gen._calculate_realism_score(skill, supports, ascendancy)) / 2
+                key = (skill, ascendancy)
+                if key not in best or score > best[key][0]:
+                    best[key] = (score, (skill, ascendancy, tuple(sorted(supports))))
+
+    ranked = sorted(best.values(), key=lambda item: item[0], reverse=True)
+    return ranked[:count]
+
+
+@pytest.mark.unit
+class TestGenerationModes:
+    """测试 generate_realistic_builds 的生成模式"""
+
+    @pytest.mark.parametrize("mode", ["sample", "exhaustive"])
+    def test_same_seed_same_output(self, generator, mode):
+        """测试相同种子生成完全相同的构筑（包括名称和模拟EHP）"""
+        first = generator.generate_realistic_builds(count=8, target_popularity=0.3, mode=mode, seed=7)
+        second = generator.generate_realistic_builds(count=8, target_popularity=0.3, mode=mode, seed=7)
+
+        assert first
+        assert first == second
+
+    def test_exhaustive_returns_true_top_n(self, generator):
+        """测试 exhaustive 模式返回穷举得到的真正前N个 (技能, 升华) 组合"""
+        count = 10
+        expected = _brute_force_top(generator, count, target_popularity=0.3)
+        builds = generator.generate_realistic_builds(count=count, target_popularity=0.3,
+                                                     mode="exhaustive", seed=1)
+
+        assert len(builds) == len(expected) == count
+        assert [_build_key(b) for b in builds] == [key for _, key in expected]
+        assert [(b.viability_score + b.realism_score) / 2 for b in builds] == \
+            pytest.approx([score for score, _ in expected], abs=1e-9)
+        assert len({(b.main_skill, b.ascendancy) for b in builds}) == count
+
+    def test_unknown_mode_raises(self, generator):
+        """测试未知生成模式抛出ValueError"""
+        with pytest.raises(ValueError):
+            generator.generate_realistic_builds(count=3, mode="greedy")
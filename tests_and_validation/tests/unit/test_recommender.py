@@ -0,0 +1,129 @@
+"""
+单元测试 - PoE2推荐引擎
+
+测试批量评分和多样化推荐：
+- 权重向量与评分矩阵
+- 批量预过滤
+- MMR多样化
+- 大量候选构筑的排序耗时
+"""
+
+import random
+import time
+
+import numpy as np
+import pytest
+
+from src.poe2build.core.recommender import (
+    PoE2Recommender, RecommendationRequest, ScoringWeights,
+    CandidateFeatures, SCORING_CRITERIA
+)
+from src.poe2build.models.build import PoE2Build, PoE2BuildStats, PoE2BuildGoal
+from src.poe2build.models.characters import PoE2CharacterClass
+from tests.fixtures.test_data import TestDataFactory
+
+
+def _make_build(name, character_class=PoE2CharacterClass.WITCH, skill="Arc",
+                dps=1000000, cost=10.0, goal=PoE2BuildGoal.CLEAR_SPEED):
+    return PoE2Build(
+        name=name,
+        character_class=character_class,
+        level=90,
+        stats=PoE2BuildStats(
+            total_dps=dps, effective_health_pool=8000,
+            fire_resistance=76, cold_resistance=76,
+            lightning_resistance=76, chaos_resistance=0
+        ),
+        estimated_cost=cost,
+        goal=goal,
+        main_skill_gem=skill
+    )
+
+
+@pytest.mark.unit
+class TestScoringWeights:
+    """测试评分权重"""
+
+    def test_as_vector_is_normalized(self):
+        """测试权重向量按评分列顺序排列且和为1"""
+        weights = ScoringWeights(dps_weight=2, survivability_weight=1, budget_weight=1,
+                                 popularity_weight=0, ease_weight=0)
+        vector = weights.as_vector()
+
+        assert len(vector) == len(SCORING_CRITERIA)
+        assert vector.sum() == pytest.approx(1.0)
+        assert vector[0] == pytest.approx(0.5)
+
+
+@pytest.mark.unit
+class TestPoE2Recommender:
+    """测试推荐引擎"""
+
+    @pytest.mark.asyncio
+    async def test_batch_scores_match_single_build_scores(self):
+        """测试批量评分与逐个评分结果一致"""
+        random.seed(3)
+        builds = TestDataFactory.create_build_batch(30)
+        recommender = PoE2Recommender()
+        request = RecommendationRequest(require_resistance_cap=False, max_recommendations=30)
+
+        recommendations = await recommender.recommend_builds(request, builds)
+
+        assert recommendations
+        for recommendation in recommendations:
+            single = await recommender._calculate_build_score(recommendation.build, request)
+            assert recommendation.score.total_score == pytest.approx(single.total_score)
+            assert recommendation.score.confidence == pytest.approx(single.confidence)
+
+    def test_prefilter(self):
+        """测试批量预过滤"""
+        builds = [
+            _make_build("cheap witch", cost=5.0),
+            _make_build("expensive witch", cost=50.0),
+            _make_build("ranger", character_class=PoE2CharacterClass.RANGER, cost=5.0),
+        ]
+        request = RecommendationRequest(character_class=PoE2CharacterClass.WITCH, max_budget=20.0)
+
+        filtered = PoE2Recommender()._prefilter_builds(builds, request)
+
+        assert [b.name for b in filtered] == ["cheap witch"]
+
+    @pytest.mark.asyncio
+    async def test_diversification_promotes_different_builds(self):
+        """测试MMR把不同类型的构筑提前，λ=1时退化为按评分排序"""
+        builds = [_make_build(f"arc {i}", dps=1500000 - i * 1000) for i in range(5)]
+        builds.append(_make_build("ranger", character_class=PoE2CharacterClass.RANGER,
+                                  skill="Lightning Arrow", dps=900000, goal=PoE2BuildGoal.BOSS_KILLING))
+        request = RecommendationRequest(max_recommendations=3)
+
+        diversified = await PoE2Recommender().recommend_builds(request, builds)
+        by_score = await PoE2Recommender({'diversity_lambda': 1.0}).recommend_builds(request, builds)
+
+        assert diversified[0].build.name == "arc 0"
+        assert "ranger" in [r.build.name for r in diversified]
+        assert [r.build.name for r in by_score] == ["arc 0", "arc 1", "arc 2"]
+
+    def test_similarity_matrix_is_cosine(self):
+        """测试多样化特征行已标准化，相同构筑相似度为1"""
+        builds = [_make_build("a"), _make_build("b"),
+                  _make_build("c", character_class=PoE2CharacterClass.MONK, skill="Ice Strike")]
+        matrix = CandidateFeatures.from_builds(builds).similarity_matrix()
+
+        assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+        assert matrix[0] @ matrix[1] == pytest.approx(1.0)
+        assert matrix[0] @ matrix[2] < 0.5
+
+    @pytest.mark.asyncio
+    async def test_ranks_thousands_of_candidates_quickly(self):
+        """测试数千个候选构筑的排序耗时"""
+        random.seed(5)
+        builds = TestDataFactory.create_build_batch(3000)
+        recommender = PoE2Recommender()
+        request = RecommendationRequest(require_resistance_cap=False)
+
+        start = time.perf_counter()
+        recommendations = await recommender.recommend_builds(request, builds)
+        elapsed = time.perf_counter() - start
+
+        assert len(recommendations) == request.max_recommendations
+        assert elapsed < 0.5
@@ -0,0 +1,95 @@
+"""
+单元测试 - 文本处理
+
+测试索引模糊名称匹配：
+- 拼写错误的名称匹配到正确候选
+- 结果与逐个计算编辑距离一致
+- 查询结果缓存
+"""
+
+import pytest
+
+from src.poe2build.utils.text_processing import FuzzyNameMatcher, PoE2TextProcessor
+
+
+CATALOGUE = [
+    "Lightning Arrow", "Lightning Bolt", "Ice Shard", "Fireball", "Explosive Shot",
+    "Gas Arrow", "Vine Arrow", "Earthquake", "Hammer of the Gods", "Falling Thunder",
+    "Tempest Bell", "Ice Strike", "Rapid Fire", "Explosive Grenades", "fireball",
+]
+
+
+def _levenshtein(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[-1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+@pytest.fixture
+def matcher():
+    return FuzzyNameMatcher(CATALOGUE)
+
+
+@pytest.mark.unit
+class TestFuzzyNameMatcher:
+    """测试模糊名称匹配器"""
+    
+    def test_best_match_with_typos(self, matcher):
+        """测试拼写错误和大小写、标点差异"""
+        assert matcher.best_match("Lightnig Arow")[0] == "Lightning Arrow"
+        assert matcher.best_match("hammer of the god's")[0] == "Hammer of the Gods"
+        assert matcher.best_match("TEMPEST-BELL") == ("Tempest Bell", 1.0)
+        assert matcher.best_match("Completely Unrelated", threshold=0.8) is None
+    
+    def test_results_match_brute_force(self, matcher):
+        """测试结果与对全部候选计算编辑距离相同"""
+        for query in ["Lightning Arow", "ice", "Explosive", "Fire ball", "Arrow"]:
+            normalized_query = PoE2TextProcessor._normalize_text(query)
+            expected = []
+            for candidate in CATALOGUE:
+                normalized = PoE2TextProcessor._normalize_text(candidate)
+                longest = max(len(normalized), len(normalized_query))
+                similarity = 1.0 - _levenshtein(normalized_query, normalized) / longest
+                if similarity >= 0.5:
+                    expected.append((candidate, similarity))
+            expected.sort(key=lambda item: -item[1])
+            
+            assert matcher.search(query, threshold=0.5) == expected
+    
+    def test_duplicates_after_normalization(self, matcher):
+        """测试标准化后相同的候选都会返回"""
+        results = matcher.search("Fireball", threshold=1.0)
+        
+        assert results == [("Fireball", 1.0), ("fireball", 1.0)]
+        assert matcher.search("Fireball", threshold=1.0, limit=1) == [("Fireball", 1.0)]
+    
+    def test_edit_distance(self):
+        """测试位并行编辑距离"""
+        pairs = [("", "abc"), ("kitten", "sitting"), ("flaw", "lawn"), ("same", "same"), ("a" * 80, "b" * 79)]
+        for a, b in pairs:
+            assert FuzzyNameMatcher.edit_distance(a, b) == _levenshtein(a, b)
+    
+    def test_query_cache(self, matcher):
+        """测试重复查询命中缓存"""
+        matcher.match_many(["Ice Shrd", "Ice Shrd", "Gas Arow"])
+        
+        info = matcher.cache_info()
+        assert info.hits >= 1
+        assert FuzzyNameMatcher(CATALOGUE, cache_size=0).cache_info() is None
+    
+    def test_punctuation_only_names_and_queries(self):
+        """测试标准化后为空的名称不进入索引，空查询直接返回空结果"""
+        import warnings
+        
+        matcher = FuzzyNameMatcher(['Arc', '---'])
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            assert matcher.search('!!!') == []
+            assert matcher.search('', threshold=0.0) == []
+            assert matcher.search('Arc', threshold=0.0) == [('Arc', 1.0)]
+        assert matcher.best_match('???') is None
+        assert FuzzyNameMatcher(['---']).search('Arc', threshold=0.0) == []
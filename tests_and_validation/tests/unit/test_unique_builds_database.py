@@ -0,0 +1,234 @@
+"""
+单元测试 - 冷门构筑数据库
+
+测试仓库根目录的 unique_builds_database：
+- 成本范围、成本档位、难度索引查询
+- get_recommendations / get_unpopular_builds 与原线性扫描的结果和顺序一致
+- 数据库实例共享同一份构筑数据和索引
+- 构筑记录只读
+"""
+
+import copy
+import json
+import pickle
+import random
+import sys
+from dataclasses import FrozenInstanceError
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from unique_builds_database import (  # noqa: E402
+    UniqueBuildData, UniqueBuildDatabase, UniqueBuildStore, cost_bracket
+)
+from ninja_trained_ai_recommender import _curated_to_realistic  # noqa: E402
+
+
+def _make_build(index, rng):
+    """随机构筑：数值取自小集合，保证有同分项"""
+    return UniqueBuildData(
+        name=f"Build {index}",
+        character_class=rng.choice(["Witch", "Ranger", "Monk"]),
+        ascendancy="Test",
+        main_skill="Spark",
+        support_gems=["Spell Echo", "Controlled Destruction"],
+        passive_tree={"keystones": ["Eldritch Battery"], "total_points": 110},
+        equipment={"weapon": {"type": "Staff"}},
+        flask_setup=[{"type": "Life"}],
+        aura_setup=["Clarity"],
+        defense_stats={"effective_health_pool": 8000},
+        offense_stats={"total_dps": 500000},
+        movement_stats={"movement_speed": 30},
+        cost_analysis={"mid_league_cost": rng.choice([1.0, 3.5, 5.0, 8.0, 15.0, 15.5, 30.0])},
+        cost_effectiveness=rng.choice([6.5, 7.0, 8.0, 8.5, 9.0]),
+        popularity_score=rng.choice([0.01, 0.05, 0.1, 0.15, 0.3]),
+        playstyle="Caster",
+        difficulty_rating=rng.randint(1, 5),
+        league_suitability=["Standard"],
+        pros_cons={"pros": ["Cheap", "Safe"], "cons": ["Slow"]},
+        leveling_guide=[{"level": "1-12", "skills": ["Spark"]}],
+        endgame_scaling={"damage": "gems"},
+        gameplay_tips=["Stay mobile"],
+        creator="test",
+        last_updated="2025-01-01",
+        league_tested="Standard"
+    )
+
+
+@pytest.fixture
+def database(tmp_path):
+    """使用随机构筑数据的数据库实例"""
+    rng = random.Random(48)
+    builds = [_make_build(index, rng) for index in range(200)]
+    database = UniqueBuildDatabase(cache_dir=str(tmp_path))
+    database.store = UniqueBuildStore.build(builds)
+    database.builds = builds
+    return database
+
+
+# ===== 原线性扫描实现（参考） =====
+
+def _reference_recommendations(builds, budget=None, difficulty=None):
+    recommendations = builds.copy()
+    if budget:
+        recommendations = [b for b in recommendations if b.cost_analysis["mid_league_cost"] <= budget]
+    if difficulty:
+        recommendations = [b for b in recommendations if b.difficulty_rating <= difficulty]
+    recommendations.sort(key=lambda x: x.cost_effectiveness, reverse=True)
+    return recommendations
+
+
+def _names(builds):
+    return [build.name for build in builds]
+
+
+@pytest.mark.unit
+class TestIndexedQueries:
+    """测试索引查询"""
+
+    @pytest.mark.parametrize("min_cost, max_cost", [
+        (None, None), (None, 5.0), (5.0, None), (3.5, 15.0), (5.1, 14.9), (16.0, 20.0)
+    ])
+    def test_cost_range(self, database, min_cost, max_cost):
+        """测试成本范围查询包含边界，并保持原始顺序"""
+        expected = [
+            b for b in database.builds
+            if (min_cost is None or b.cost_analysis["mid_league_cost"] >= min_cost)
+            and (max_cost is None or b.cost_analysis["mid_league_cost"] <= max_cost)
+        ]
+
+        assert _names(database.get_builds_by_cost_range(min_cost, max_cost)) == _names(expected)
+
+    @pytest.mark.parametrize("bracket", ["budget", "medium", "expensive", "unknown"])
+    def test_cost_bracket(self, database, bracket):
+        """测试成本档位查询"""
+        expected = [b for b in database.builds if cost_bracket(b.cost_analysis["mid_league_cost"]) == bracket]
+
+        assert _names(database.get_builds_by_cost_bracket(bracket)) == _names(expected)
+        assert bool(expected) == (bracket != "unknown")
+
+    def test_cost_bracket_boundaries(self):
+        """测试档位上限归入较低档位"""
+        assert [cost_bracket(cost) for cost in (0, 5.0, 5.01, 15.0, 15.5, 1000)] == \
+            ["budget", "budget", "medium", "medium", "expensive", "expensive"]
+
+    @pytest.mark.parametrize("difficulty", [1, 3, 5, 6])
+    def test_difficulty(self, database, difficulty):
+        """测试难度评级查询"""
+        expected = [b for b in database.builds if b.difficulty_rating == difficulty]
+
+        assert _names(database.get_builds_by_difficulty(difficulty)) == _names(expected)
+
+
+@pytest.mark.unit
+class TestLinearScanEquivalence:
+    """测试与原线性扫描的结果和顺序一致"""
+
+    @pytest.mark.parametrize("budget, difficulty", [
+        (None, None), (10.0, None), (None, 3), (15.0, 2), (0.5, None), (5.0, 5)
+    ])
+    def test_recommendations(self, database, budget, difficulty):
+        """测试推荐结果按性价比降序，同分保持原始顺序"""
+        expected = _reference_recommendations(database.builds, budget, difficulty)
+
+        assert _names(database.get_recommendations(budget=budget, difficulty=difficulty)) == _names(expected)
+
+    @pytest.mark.parametrize("max_popularity", [0.0, 0.05, 0.1, 0.15, 1.0])
+    def test_unpopular_builds(self, database, max_popularity):
+        """测试冷门构筑查询"""
+        expected = [b for b in database.builds if b.popularity_score <= max_popularity]
+
+        assert _names(database.get_unpopular_builds(max_popularity)) == _names(expected)
+
+    def test_class_and_name_lookup(self, database):
+        """测试职业和名称查询大小写不敏感"""
+        assert _names(database.get_builds_by_class("WITCH")) == \
+            _names([b for b in database.builds if b.character_class == "Witch"])
+        assert database.get_build_details("build 7") is database.builds[7]
+        assert database.get_build_details("missing") is None
+
+
+@pytest.mark.unit
+class TestSharedStore:
+    """测试共享构筑数据"""
+
+    def test_instances_share_one_store(self, tmp_path, monkeypatch):
+        """测试多个实例只加载一次，并共享同一份数据和索引"""
+        monkeypatch.setattr(UniqueBuildDatabase, "_shared_store", None)
+        loads = []
+        original = UniqueBuildDatabase._load_unique_builds
+
+        def counting_load():
+            loads.append(1)
+            return original()
+
+        monkeypatch.setattr(UniqueBuildDatabase, "_load_unique_builds", staticmethod(counting_load))
+
+        first = UniqueBuildDatabase(cache_dir=str(tmp_path))
+        second = UniqueBuildDatabase(cache_dir=str(tmp_path))
+
+        assert len(loads) == 1
+        assert first.store is second.store
+        assert first.builds[0] is second.builds[0]
+        assert first.builds is not second.builds
+
+
+@pytest.mark.unit
+class TestImmutableRecords:
+    """测试构筑记录只读"""
+
+    @pytest.fixture
+    def build(self):
+        return UniqueBuildDatabase.get_shared_store().builds[0]
+
+    def test_fields_cannot_be_reassigned(self, build):
+        """测试字段不能重新赋值"""
+        with pytest.raises(FrozenInstanceError):
+            build.support_gems = []
+
+    def test_nested_values_are_read_only(self, build):
+        """测试嵌套的列表和字典不能原地修改"""
+        assert isinstance(build.support_gems, tuple)
+        with pytest.raises(AttributeError):
+            build.pros_cons["pros"].append("modified")
+        with pytest.raises(TypeError):
+            build.cost_analysis["mid_league_cost"] = 0
+        with pytest.raises(TypeError):
+            build.equipment["weapon"]["type"] = "Wand"
+
+    def test_to_dict_is_independent_copy(self, build):
+        """测试to_dict返回可变副本，修改不影响共享记录，并可JSON序列化"""
+        data = build.to_dict()
+        data["support_gems"].append("modified")
+        data["pros_cons"]["pros"].clear()
+
+        assert "modified" not in build.support_gems
+        assert build.pros_cons["pros"]
+        assert json.loads(json.dumps(build.to_dict()))["name"] == build.name
+
+    def test_copy_and_pickle(self, build):
+        """测试深拷贝和pickle往返后相等且仍为只读"""
+        for restored in (copy.deepcopy(build), pickle.loads(pickle.dumps(build))):
+            assert restored == build
+            assert isinstance(restored.pros_cons["pros"], tuple)
+
+    def test_curated_conversion_copies_lists(self, build):
+        """测试转换为RealisticBuild时得到独立的列表"""
+        realistic = _curated_to_realistic(build)
+        realistic.support_gems.append("modified")
+
+        assert realistic.support_gems[:-1] == list(build.support_gems)
+        assert isinstance(realistic.skill_synergies, list)
+        assert "modified" not in build.support_gems
+
+    def test_export_to_json(self, build, tmp_path):
+        """测试导出JSON"""
+        database = UniqueBuildDatabase(cache_dir=str(tmp_path))
+        path = tmp_path / "build.json"
+        database.export_build_to_json(build, str(path))
+
+        assert json.loads(path.read_text(encoding="utf-8")) == build.to_dict()
@@ -5,62 +5,191 @@
 包含完整的技能、装备、天赋树配置
 """
 
-from dataclasses import dataclass, asdict
-from typing import Dict, List, Any, Optional
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Mapping
+from bisect import bisect_left, bisect_right
 import json
+import threading
 from pathlib import Path
 
-@dataclass
+# 成本档位 (mid_league_cost, Divine Orbs)：(名称, 上限)
+COST_BRACKETS = (
+    ("budget", 5.0),
+    ("medium", 15.0),
+    ("expensive", float("inf"))
+)
+
+def cost_bracket(mid_league_cost: float) -> str:
+    """构筑成本所属档位"""
+    for bracket, upper in COST_BRACKETS:
+        if mid_league_cost <= upper:
+            return bracket
+    return COST_BRACKETS[-1][0]
+
+def _freeze(value: Any) -> Any:
+    """递归转换为只读结构：dict -> MappingProxyType，list -> tuple"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _thaw(value: Any) -> Any:
+    """_freeze 的逆操作，得到可变的 dict/list 副本"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+@dataclass(frozen=True)
 class UniqueBuildData:
-    """独特构筑完整数据结构"""
+    """
+    独特构筑完整数据结构（只读）
+    
+    记录在所有数据库实例间共享，构造时把嵌套的 dict/list 转为 MappingProxyType/tuple；
+    需要修改或序列化时使用 to_dict() 得到的可变副本。
+    """
     # 基础信息
     name: str
     character_class: str
     ascendancy: str
     main_skill: str
-    support_gems: List[str]
+    support_gems: Tuple[str, ...]
     
     # 核心数据
-    passive_tree: Dict[str, Any]      # 天赋树分配
-    equipment: Dict[str, Dict]        # 装备配置  
-    flask_setup: List[Dict]          # 药剂配置
-    aura_setup: List[str]            # 光环/buff配置
+    passive_tree: Mapping[str, Any]       # 天赋树分配
+    equipment: Mapping[str, Mapping]      # 装备配置  
+    flask_setup: Tuple[Mapping, ...]     # 药剂配置
+    aura_setup: Tuple[str, ...]          # 光环/buff配置
     
     # 属性统计
-    defense_stats: Dict[str, int]     # 防御属性
-    offense_stats: Dict[str, int]     # 输出属性  
-    movement_stats: Dict[str, int]    # 移动属性
+    defense_stats: Mapping[str, int]     # 防御属性
+    offense_stats: Mapping[str, int]     # 输出属性  
+    movement_stats: Mapping[str, int]    # 移动属性
     
     # 成本与评价
-    cost_analysis: Dict[str, float]   # 成本分析
+    cost_analysis: Mapping[str, float]   # 成本分析
     cost_effectiveness: float         # 性价比评分 (1-10)
     popularity_score: float           # 流行度 (0-1, 越低越冷门)
     
     # 游戏性
     playstyle: str                   # 游戏风格
     difficulty_rating: int           # 难度评级 (1-5)
-    league_suitability: List[str]    # 适合的联赛
+    league_suitability: Tuple[str, ...]  # 适合的联赛
     
     # 详细描述
-    pros_cons: Dict[str, List[str]]   # 优缺点
-    leveling_guide: List[Dict]       # 升级指南
-    endgame_scaling: Dict[str, str]   # 终局扩展性
-    gameplay_tips: List[str]         # 游戏提示
+    pros_cons: Mapping[str, Tuple[str, ...]]  # 优缺点
+    leveling_guide: Tuple[Mapping, ...]  # 升级指南
+    endgame_scaling: Mapping[str, str]   # 终局扩展性
+    gameplay_tips: Tuple[str, ...]       # 游戏提示
     
     # 元数据
     creator: str                     # 构筑作者
     last_updated: str               # 最后更新
     league_tested: str              # 测试联赛
+    
+    def __post_init__(self):
+        for field in fields(self):
+            object.__setattr__(self, field.name, _freeze(getattr(self, field.name)))
+    
+    def __reduce__(self):
+        # MappingProxyType 不能pickle/深拷贝，按可变副本重建（__post_init__ 会重新冻结）
+        return (self.__class__, tuple(_thaw(getattr(self, field.name)) for field in fields(self)))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可变的字典副本（导出/序列化用）"""
+        return {field.name: _thaw(getattr(self, field.name)) for field in fields(self)}
+
+class SortedIndex:
+    """按数值键排序的构筑下标，支持bisect范围查询"""
+    
+    def __init__(self, keys: Iterable[float]):
+        order = sorted(enumerate(keys), key=lambda item: item[1])
+        self.keys: Tuple[float, ...] = tuple(key for _, key in order)
+        self.positions: Tuple[int, ...] = tuple(position for position, _ in order)
+    
+    def range(self, low: Optional[float] = None, high: Optional[float] = None) -> Tuple[int, ...]:
+        """键在 [low, high] 内的构筑下标（按原始顺序）"""
+        start = 0 if low is None else bisect_left(self.keys, low)
+        end = len(self.keys) if high is None else bisect_right(self.keys, high)
+        return tuple(sorted(self.positions[start:end]))
+
+@dataclass(frozen=True)
+class UniqueBuildStore:
+    """
+    构筑数据和索引（进程内只构建一次，所有数据库实例共享）
+    
+    查询结果都是下标，按构筑在数据中的原始顺序排列。
+    """
+    builds: Tuple[UniqueBuildData, ...]
+    by_class: Mapping[str, Tuple[int, ...]]          # 小写职业名
+    by_name: Mapping[str, int]                       # 小写构筑名（同名取第一个）
+    by_cost_bracket: Mapping[str, Tuple[int, ...]]   # 成本档位
+    by_difficulty: Mapping[int, Tuple[int, ...]]     # 难度评级
+    cost_index: SortedIndex                          # cost_analysis['mid_league_cost']
+    effectiveness_index: SortedIndex                 # cost_effectiveness
+    popularity_index: SortedIndex                    # popularity_score
+    effectiveness_rank: Tuple[int, ...]              # 按性价比降序（同分保持原始顺序）
+    
+    @classmethod
+    def build(cls, builds: Iterable[UniqueBuildData]) -> 'UniqueBuildStore':
+        """建立索引"""
+        builds = tuple(builds)
+        by_class: Dict[str, List[int]] = {}
+        by_name: Dict[str, int] = {}
+        by_cost_bracket: Dict[str, List[int]] = {}
+        by_difficulty: Dict[int, List[int]] = {}
+        
+        for position, build in enumerate(builds):
+            by_class.setdefault(build.character_class.lower(), []).append(position)
+            by_name.setdefault(build.name.lower(), position)
+            by_cost_bracket.setdefault(cost_bracket(build.cost_analysis["mid_league_cost"]), []).append(position)
+            by_difficulty.setdefault(build.difficulty_rating, []).append(position)
+        
+        def freeze(index: Dict[Any, List[int]]) -> Mapping[Any, Tuple[int, ...]]:
+            return MappingProxyType({key: tuple(positions) for key, positions in index.items()})
+        
+        return cls(
+            builds=builds,
+            by_class=freeze(by_class),
+            by_name=MappingProxyType(by_name),
+            by_cost_bracket=freeze(by_cost_bracket),
+            by_difficulty=freeze(by_difficulty),
+            cost_index=SortedIndex(build.cost_analysis["mid_league_cost"] for build in builds),
+            effectiveness_index=SortedIndex(build.cost_effectiveness for build in builds),
+            popularity_index=SortedIndex(build.popularity_score for build in builds),
+            effectiveness_rank=tuple(sorted(range(len(builds)), key=lambda i: -builds[i].cost_effectiveness))
+        )
+    
+    def select(self, positions: Iterable[int]) -> List[UniqueBuildData]:
+        """下标 -> 构筑列表"""
+        return [self.builds[position] for position in positions]
 
 class UniqueBuildDatabase:
     """冷门高性价比构筑数据库"""
     
+    _shared_store: Optional[UniqueBuildStore] = None
+    _store_lock = threading.Lock()
+    
     def __init__(self, cache_dir: str = "data_storage/unique_builds"):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.builds = self._load_unique_builds()
+        self.store = self.get_shared_store()
+        self.builds = list(self.store.builds)
+    
+    @classmethod
+    def get_shared_store(cls) -> UniqueBuildStore:
+        """获取共享的构筑数据和索引，首次调用时加载"""
+        if cls._shared_store is None:
+            with cls._store_lock:
+                if cls._shared_store is None:
+                    cls._shared_store = UniqueBuildStore.build(cls._load_unique_builds())
+        return cls._shared_store
     
-    def _load_unique_builds(self) -> List[UniqueBuildData]:
+    @staticmethod
+    def _load_unique_builds() -> List[UniqueBuildData]:
         """加载冷门高性价比构筑数据"""
         
         builds_data = [
@@ -337,28 +466,39 @@ class UniqueBuildDatabase:
         for build_data in builds_data:
             build = UniqueBuildData(**build_data)
             builds.append(build)
-            
+        
         print(f"加载了 {len(builds)} 个独特构筑")
         return builds
     
     def get_builds_by_cost_effectiveness(self, min_score: float = 8.0) -> List[UniqueBuildData]:
         """获取高性价比构筑"""
-        return [build for build in self.builds if build.cost_effectiveness >= min_score]
+        return self.store.select(self.store.effectiveness_index.range(low=min_score))
     
     def get_unpopular_builds(self, max_popularity: float = 0.1) -> List[UniqueBuildData]:
         """获取冷门构筑 (流行度低于10%)"""  
-        return [build for build in self.builds if build.popularity_score <= max_popularity]
+        return self.store.select(self.store.popularity_index.range(high=max_popularity))
     
     def get_builds_by_class(self, character_class: str) -> List[UniqueBuildData]:
         """按职业筛选构筑"""
-        return [build for build in self.builds if build.character_class.lower() == character_class.lower()]
+        return self.store.select(self.store.by_class.get(character_class.lower(), ()))
+    
+    def get_builds_by_cost_range(self, min_cost: Optional[float] = None,
+                                 max_cost: Optional[float] = None) -> List[UniqueBuildData]:
+        """按中期联赛成本 (Divine Orbs) 范围筛选构筑"""
+        return self.store.select(self.store.cost_index.range(min_cost, max_cost))
+    
+    def get_builds_by_cost_bracket(self, bracket: str) -> List[UniqueBuildData]:
+        """按成本档位筛选构筑 (budget/medium/expensive)"""
+        return self.store.select(self.store.by_cost_bracket.get(bracket, ()))
+    
+    def get_builds_by_difficulty(self, difficulty: int) -> List[UniqueBuildData]:
+        """按难度评级筛选构筑"""
+        return self.store.select(self.store.by_difficulty.get(difficulty, ()))
     
     def get_build_details(self, build_name: str) -> Optional[UniqueBuildData]:
         """获取特定构筑的详细信息"""
-        for build in self.builds:
-            if build.name.lower() == build_name.lower():
-                return build
-        return None
+        position = self.store.by_name.get(build_name.lower())
+        return self.store.builds[position] if position is not None else None
     
     def export_build_to_json(self, build: UniqueBuildData, filepath: str = None):
         """导出构筑为JSON格式"""
@@ -366,24 +506,30 @@ class UniqueBuildDatabase:
             filepath = self.cache_dir / f"{build.name.replace(' ', '_')}.json"
         
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(asdict(build), f, indent=2, ensure_ascii=False)
+            json.dump(build.to_dict(), f, indent=2, ensure_ascii=False)
         
         print(f"构筑已导出到: {filepath}")
     
     def get_recommendations(self, budget: float = None, difficulty: int = None) -> List[UniqueBuildData]:
         """根据预算和难度推荐构筑"""
-        recommendations = self.builds.copy()
+        store = self.store
+        allowed = None
         
         if budget:
-            recommendations = [b for b in recommendations if b.cost_analysis["mid_league_cost"] <= budget]
+            allowed = set(store.cost_index.range(high=budget))
         
         if difficulty:
-            recommendations = [b for b in recommendations if b.difficulty_rating <= difficulty]
+            within_difficulty = {
+                position
+                for rating, positions in store.by_difficulty.items() if rating <= difficulty
+                for position in positions
+            }
+            allowed = within_difficulty if allowed is None else allowed & within_difficulty
         
         # 按性价比排序
-        recommendations.sort(key=lambda x: x.cost_effectiveness, reverse=True)
-        
-        return recommendations
+        if allowed is None:
+            return store.select(store.effectiveness_rank)
+        return store.select(position for position in store.effectiveness_rank if position in allowed)
 
 def main():
     """测试独特构筑数据库"""